@@ -0,0 +1,197 @@
+"""Bounded concurrency pool for outbound Gemini calls."""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from app.core.config import settings
+from app.core.exceptions import RateLimitError, TimeoutError
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ConcurrencyLimiter:
+    """
+    Limit in-flight calls with a bounded FIFO wait queue.
+
+    Callers beyond ``max_in_flight`` wait in a queue of at most ``max_queue``
+    entries for up to ``queue_timeout`` seconds. Waiters are plain futures
+    created on the running loop, so the limiter is safe to share across
+    event loops (e.g. between test cases).
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        """
+        Initialize limiter.
+
+        Args:
+            max_in_flight: Maximum concurrent calls
+            max_queue: Maximum callers waiting for a slot
+            queue_timeout: Seconds a caller may wait before giving up
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self.max_in_flight = max_in_flight
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Counters
+        self._acquired_total = 0
+        self._rejected_total = 0
+        self._timeouts_total = 0
+        self._peak_in_flight = 0
+        self._peak_queue_depth = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a slot."""
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """
+        Acquire a slot, waiting in the queue if necessary.
+
+        Raises:
+            RateLimitError: If the wait queue is full
+            TimeoutError: If no slot frees up within ``queue_timeout``
+        """
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._grant(0.0)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._rejected_total += 1
+            logger.warning(
+                "gemini_queue_full",
+                in_flight=self._in_flight,
+                queue_depth=len(self._waiters)
+            )
+            raise RateLimitError("Gemini request queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._peak_queue_depth = max(self._peak_queue_depth, len(self._waiters))
+        start = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Slot may have been handed over as the timeout fired
+            self._pass_on_granted(waiter)
+            self._timeouts_total += 1
+            logger.warning("gemini_queue_timeout", waited=round(time.perf_counter() - start, 3))
+            raise TimeoutError("Timed out waiting for Gemini capacity")
+        except asyncio.CancelledError:
+            # Slot may have been handed over just before cancellation
+            self._pass_on_granted(waiter)
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        # Slot was transferred by release(); account for it here
+        self._record_wait(time.perf_counter() - start)
+
+    def try_acquire(self) -> bool:
+        """
+        Take a slot only if one is free right now.
+
+        Never queues and never jumps ahead of waiting callers.
+
+        Returns:
+            True if a slot was taken and must be released
+        """
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._grant(0.0)
+            return True
+        return False
+
+    def release(self) -> None:
+        """Release a slot and hand it to the next waiter, if any."""
+        self._in_flight -= 1
+        self._wake_next()
+
+    def _pass_on_granted(self, waiter: asyncio.Future) -> None:
+        """Give a slot transferred to an abandoned waiter to the next one."""
+        if waiter.done() and not waiter.cancelled():
+            self._in_flight -= 1
+            self._wake_next()
+
+    def _wake_next(self) -> None:
+        """Transfer a free slot to the oldest live waiter."""
+        while self._waiters and self._in_flight < self.max_in_flight:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+                waiter.set_result(None)
+                return
+
+    def _grant(self, waited: float) -> None:
+        """Take a slot immediately."""
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        self._record_wait(waited)
+
+    def _record_wait(self, waited: float) -> None:
+        """Update wait-time counters for a granted slot."""
+        self._acquired_total += 1
+        self._wait_seconds_total += waited
+        self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the ``async with`` block."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, float]:
+        """Return queue-depth and throughput metrics."""
+        acquired = self._acquired_total
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "peak_in_flight": self._peak_in_flight,
+            "peak_queue_depth": self._peak_queue_depth,
+            "acquired_total": acquired,
+            "rejected_total": self._rejected_total,
+            "timeouts_total": self._timeouts_total,
+            "avg_wait_ms": round(self._wait_seconds_total / acquired * 1000, 3) if acquired else 0.0,
+            "max_wait_ms": round(self._wait_seconds_max * 1000, 3),
+        }
+
+
+_generation_limiter: Optional[ConcurrencyLimiter] = None
+
+
+def get_generation_limiter() -> ConcurrencyLimiter:
+    """Get the process-wide limiter for Gemini generation calls (singleton)."""
+    global _generation_limiter
+
+    if _generation_limiter is None:
+        _generation_limiter = ConcurrencyLimiter(
+            max_in_flight=settings.gemini_max_concurrency,
+            max_queue=settings.gemini_max_queue,
+            queue_timeout=settings.gemini_queue_timeout_seconds,
+        )
+
+    return _generation_limiter
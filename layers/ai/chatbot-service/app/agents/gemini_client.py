@@ -1,18 +1,56 @@
 """Production-ready Gemini API client with Google Search grounding."""
 
+import asyncio
 import os
 import json
-import re
-from typing import Optional
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
 from app.core.logging import get_logger
-from app.core.exceptions import AIServiceError
+from app.core.exceptions import AIServiceError, CircuitOpenError, TimeoutError
 from app.core.config import settings
+from app.core.metrics import GEMINI_SECONDS, STAGE_SECONDS
+from app.core.tracing import CLIENT, begin_span, start_span, use_span
+from app.agents.concurrency import get_generation_limiter
+from app.agents.json_extract import extract_json
+from app.agents.prompt_cache import PromptPrefixCache
+from app.agents.resilience import get_gemini_caller
 
 logger = get_logger(__name__)
 
+# Status codes with which the API rejects a missing or expired cached content handle
+_STALE_CACHE_CODES = (400, 403, 404)
+
+
+# JSON schema for chat responses (built once at import)
+RESPONSE_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "data": types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "coins": types.Schema(
+                    type=types.Type.ARRAY,
+                    items=types.Schema(type=types.Type.STRING)
+                ),
+                "timeframe": types.Schema(
+                    type=types.Type.STRING,
+                    enum=["1d", "1m", "3m", "1y", "all"]
+                ),
+                "explanation": types.Schema(type=types.Type.STRING)
+            },
+            required=["coins", "timeframe", "explanation"]
+        ),
+        "suggested_next_prompts": types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(type=types.Type.STRING)
+        )
+    },
+    required=["data", "suggested_next_prompts"]
+)
+
 
 class GeminiClient:
     """Simplified Gemini client with Google Search grounding."""
@@ -20,13 +58,22 @@ class GeminiClient:
     MODEL_NAME = "gemini-2.5-flash"
     
     def __init__(self, api_key: Optional[str] = None):
-        """Initialize Gemini client."""
+        """
+        Initialize Gemini client.
+        
+        ``prefix_cache`` starts unset; attach a ``PromptPrefixCache`` built on
+        ``self.client`` to send the system prompt by cache handle.
+        """
         try:
             self.api_key = api_key or settings.gemini_api_key
             if not self.api_key:
                 raise ValueError("GEMINI_API_KEY not found")
             
             self.client = genai.Client(api_key=self.api_key)
+            self.limiter = get_generation_limiter()
+            self.caller = get_gemini_caller()
+            self._configs: Dict[Tuple[str, Optional[str]], types.GenerateContentConfig] = {}
+            self.prefix_cache: Optional[PromptPrefixCache] = None
             logger.info("gemini_client_initialized", model=self.MODEL_NAME)
         except Exception as e:
             logger.error("gemini_init_failed", error=str(e))
@@ -36,6 +83,8 @@ class GeminiClient:
         """
         Generate response with enforced JSON output.
         
+        Blocking call; async callers should use ``agenerate``.
+        
         Args:
             prompt: User query
             system_prompt: System instructions for response format
@@ -46,47 +95,11 @@ class GeminiClient:
         try:
             logger.info("generating_response", prompt_length=len(prompt))
             
-            # Define JSON schema for response
-            response_schema = types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "data": types.Schema(
-                        type=types.Type.OBJECT,
-                        properties={
-                            "coins": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(type=types.Type.STRING)
-                            ),
-                            "timeframe": types.Schema(
-                                type=types.Type.STRING,
-                                enum=["1d", "1m", "3m", "1y", "all"]
-                            ),
-                            "explanation": types.Schema(type=types.Type.STRING)
-                        },
-                        required=["coins", "timeframe", "explanation"]
-                    ),
-                    "suggested_next_prompts": types.Schema(
-                        type=types.Type.ARRAY,
-                        items=types.Schema(type=types.Type.STRING)
-                    )
-                },
-                required=["data", "suggested_next_prompts"]
-            )
-            
-            # Configure generation with JSON schema and system instruction
-            config = types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=2048,
-                response_mime_type="application/json",
-                response_schema=response_schema,
-                system_instruction=system_prompt
-            )
-            
             # Generate content with enforced JSON format
             response = self.client.models.generate_content(
                 model=self.MODEL_NAME,
                 contents=prompt,
-                config=config,
+                config=self._build_config(system_prompt),
             )
             
             # Parse JSON response
@@ -99,30 +112,263 @@ class GeminiClient:
             logger.error("generation_failed", error=str(e))
             raise AIServiceError(f"Failed to generate response: {str(e)}")
     
-    def _extract_json(self, text: str) -> dict:
-        """Extract and parse JSON from response text."""
+    async def agenerate(self, prompt: str, system_prompt: str) -> dict:
+        """
+        Generate response with enforced JSON output without blocking the event loop.
+        
+        Uses the SDK's native async client. Calls are admitted through the
+        process-wide generation limiter, so excess callers queue instead of
+        piling onto the upstream, and run under the shared deadline, retry
+        and circuit breaker policy.
+        
+        Args:
+            prompt: User query
+            system_prompt: System instructions for response format
+            
+        Returns:
+            Parsed JSON response dict
+            
+        Raises:
+            RateLimitError: If the generation queue is full
+            TimeoutError: If no generation slot frees up in time or the call budget runs out
+            CircuitOpenError: If Gemini is failing and calls are rejected
+            AIServiceError: If generation or parsing fails
+        """
+        with start_span("gemini.generate", CLIENT, {"gemini.prompt_length": len(prompt)}):
+            async with self.limiter.slot():
+                try:
+                    logger.info("generating_response", prompt_length=len(prompt))
+                    
+                    # Responses with a schema cannot use the search tool, so never grounded
+                    with GEMINI_SECONDS.time("false"):
+                        response = await self.caller.call(lambda: self._generate_content(prompt, system_prompt))
+                    
+                    with STAGE_SECONDS.time("json_extract"):
+                        json_data = json.loads(response.text)
+                    
+                    logger.info("response_generated", has_data=bool(json_data))
+                    return json_data
+                
+                except (TimeoutError, CircuitOpenError):
+                    raise
+                except Exception as e:
+                    logger.error("generation_failed", error=str(e))
+                    raise AIServiceError(f"Failed to generate response: {str(e)}")
+    
+    async def agenerate_stream(self, prompt: str, system_prompt: str) -> AsyncIterator[str]:
+        """
+        Stream raw JSON text chunks as Gemini produces them.
+        
+        The generation slot is held until the stream is exhausted or closed.
+        Opening the stream is retried like ``agenerate``; the whole stream
+        must finish within the call deadline. Callers are responsible for
+        assembling and parsing the final document.
+        
+        Args:
+            prompt: User query
+            system_prompt: System instructions for response format
+            
+        Yields:
+            Text chunks of the JSON response
+            
+        Raises:
+            RateLimitError: If the generation queue is full
+            TimeoutError: If no generation slot frees up in time or the stream overruns its deadline
+            CircuitOpenError: If Gemini is failing and calls are rejected
+            AIServiceError: If the stream fails
+        """
+        # Not made current across yields: the consumer may resume this
+        # generator from another task
+        span = begin_span("gemini.generate_stream", CLIENT, {"gemini.prompt_length": len(prompt)})
         try:
-            # Remove markdown code blocks if present
-            text = text.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            elif text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
+            async with self.limiter.slot():
+                try:
+                    logger.info("streaming_response", prompt_length=len(prompt))
+                    
+                    deadline = self.caller.deadline()
+                    with use_span(span):
+                        stream = await self.caller.call(
+                            lambda: self._generate_content(prompt, system_prompt, stream=True),
+                            deadline=deadline,
+                            hedge=False
+                        )
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - time.monotonic()))
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            raise TimeoutError("Gemini stream exceeded its deadline")
+                        if chunk.text:
+                            yield chunk.text
+                    
+                    logger.info("stream_completed")
+                
+                except (TimeoutError, CircuitOpenError):
+                    raise
+                except Exception as e:
+                    logger.error("stream_failed", error=str(e))
+                    raise AIServiceError(f"Failed to stream response: {str(e)}")
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end()
+    
+    async def agenerate_text(
+        self,
+        prompt: str,
+        system_prompt: str,
+        max_output_tokens: int = 512
+    ) -> str:
+        """
+        Generate free-form text (no JSON schema), e.g. for summaries.
+        
+        Args:
+            prompt: Input text
+            system_prompt: System instructions
+            max_output_tokens: Output length limit
             
-            text = text.strip()
+        Returns:
+            Generated text
             
-            # Try direct JSON parse
-            try:
-                return json.loads(text)
-            except json.JSONDecodeError:
-                # Try to find JSON object in text
-                json_match = re.search(r'\{.*\}', text, re.DOTALL)
-                if json_match:
-                    return json.loads(json_match.group())
-                raise
+        Raises:
+            RateLimitError: If the generation queue is full
+            TimeoutError: If no generation slot frees up in time or the call budget runs out
+            CircuitOpenError: If Gemini is failing and calls are rejected
+            AIServiceError: If generation fails
+        """
+        config = types.GenerateContentConfig(
+            temperature=0.2,
+            max_output_tokens=max_output_tokens,
+            system_instruction=system_prompt
+        )
+        with start_span("gemini.generate_text", CLIENT, {"gemini.prompt_length": len(prompt)}):
+            async with self.limiter.slot():
+                try:
+                    response = await self.caller.call(lambda: self.client.aio.models.generate_content(
+                        model=self.MODEL_NAME,
+                        contents=prompt,
+                        config=config,
+                    ))
+                    return response.text or ""
                 
+                except (TimeoutError, CircuitOpenError):
+                    raise
+                except Exception as e:
+                    logger.error("text_generation_failed", error=str(e))
+                    raise AIServiceError(f"Failed to generate text: {str(e)}")
+    
+    async def _generate_content(self, prompt: str, system_prompt: str, stream: bool = False) -> Any:
+        """
+        Start a JSON generation, sending the system prompt by cache handle if possible.
+        
+        If the API rejects the handle (e.g. it expired early or was deleted),
+        the handle is dropped and the call is retried once with the system
+        prompt inline.
+        
+        Returns:
+            The response, or the chunk iterator when ``stream`` is set
+        """
+        call = (
+            self.client.aio.models.generate_content_stream if stream
+            else self.client.aio.models.generate_content
+        )
+        
+        attributes = {"gemini.model": self.MODEL_NAME, "gemini.stream": stream}
+        with start_span("gemini.request", CLIENT, attributes) as span:
+            handle = await self._prefix_handle(system_prompt)
+            span.set_attribute("gemini.cached_prefix", handle is not None)
+            if handle is not None:
+                try:
+                    response = await call(
+                        model=self.MODEL_NAME,
+                        contents=prompt,
+                        config=self._build_config(system_prompt, handle),
+                    )
+                    if not stream:
+                        self.prefix_cache.record_usage(response.usage_metadata)
+                    return response
+                except errors.ClientError as e:
+                    if e.code not in _STALE_CACHE_CODES:
+                        raise
+                    logger.warning("cached_prefix_rejected", code=e.code, error=str(e))
+                    self.prefix_cache.invalidate(handle)
+            
+            return await call(
+                model=self.MODEL_NAME,
+                contents=prompt,
+                config=self._build_config(system_prompt),
+            )
+    
+    async def _prefix_handle(self, system_prompt: str) -> Optional[str]:
+        """Cached content handle for the system prompt, or None to send it inline."""
+        if self.prefix_cache is None:
+            return None
+        try:
+            return await self.prefix_cache.handle(self.MODEL_NAME, system_prompt)
+        except Exception as e:
+            logger.warning("prompt_prefix_lookup_failed", error=str(e))
+            return None
+    
+    async def register_prefix(self, system_prompt: str) -> None:
+        """Register the system prompt with the prefix cache ahead of the first request."""
+        if await self._prefix_handle(system_prompt) is not None:
+            logger.info("prompt_prefix_ready", model=self.MODEL_NAME)
+    
+    def _build_config(self, system_prompt: str, cached_content: Optional[str] = None) -> types.GenerateContentConfig:
+        """
+        Get generation config with JSON schema and system instruction.
+        
+        With a ``cached_content`` handle the system instruction lives in the
+        cache and must not be repeated in the request. Configs are immutable
+        per (system prompt, handle), so they are built once and reused.
+        """
+        key = (system_prompt, cached_content)
+        config = self._configs.get(key)
+        if config is None:
+            if cached_content is not None:
+                # Drop configs for handles that have since been replaced
+                self._configs = {k: v for k, v in self._configs.items() if k[1] is None}
+            config = types.GenerateContentConfig(
+                temperature=0.7,
+                max_output_tokens=2048,
+                response_mime_type="application/json",
+                response_schema=RESPONSE_SCHEMA,
+                system_instruction=None if cached_content else system_prompt,
+                cached_content=cached_content
+            )
+            self._configs[key] = config
+        return config
+    
+    async def warmup(self) -> None:
+        """
+        Pre-warm the async HTTP connection pool.
+        
+        Issues a cheap metadata request so the TLS handshake happens at
+        startup rather than on the first user request. Failures are logged
+        and ignored.
+        """
+        try:
+            await self.client.aio.models.get(model=self.MODEL_NAME)
+            logger.info("gemini_warmup_complete", model=self.MODEL_NAME)
+        except Exception as e:
+            logger.warning("gemini_warmup_failed", error=str(e))
+    
+    async def close(self) -> None:
+        """Release cached prefixes and close underlying HTTP connections."""
+        if self.prefix_cache is not None:
+            await self.prefix_cache.close()
+        try:
+            await self.client.aio.aclose()
         except Exception as e:
+            logger.warning("gemini_close_failed", error=str(e))
+    
+    def _extract_json(self, text: str) -> dict:
+        """Extract and parse JSON from response text."""
+        try:
+            return extract_json(text)
+        except ValueError as e:
             logger.error("json_extraction_failed", error=str(e), text_preview=text[:200])
             raise AIServiceError(f"Failed to parse JSON response: {str(e)}")
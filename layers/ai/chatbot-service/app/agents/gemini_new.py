@@ -1,14 +1,18 @@
 """Simplified Gemini API client with Google Search grounding."""
 
-import asyncio
-import re
-import json
+import time
+from collections import deque
+from typing import Deque, Dict
 from google import genai
 from google.genai import types
 
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.core.exceptions import AIServiceError
+from app.core.metrics import GEMINI_SECONDS
+from app.core.exceptions import AIServiceError, CircuitOpenError, TimeoutError
+from app.core.tracing import CLIENT, start_span
+from app.agents.json_extract import extract_json
+from app.agents.resilience import get_gemini_caller
 
 logger = get_logger(__name__)
 
@@ -18,10 +22,18 @@ class GeminiClient:
     
     MODEL_NAME = "gemini-2.5-flash"
     
+    # Latency samples kept per grounding mode for stats
+    LATENCY_WINDOW = 512
+    
     def __init__(self):
         """Initialize Gemini client."""
         try:
             self.client = genai.Client(api_key=settings.gemini_api_key)
+            self.caller = get_gemini_caller()
+            self._latencies: Dict[bool, Deque[float]] = {
+                True: deque(maxlen=self.LATENCY_WINDOW),
+                False: deque(maxlen=self.LATENCY_WINDOW),
+            }
             logger.info("gemini_initialized")
         except Exception as e:
             logger.error("gemini_init_failed", error=str(e))
@@ -49,13 +61,18 @@ class GeminiClient:
                 max_output_tokens=2048,
             )
             
-            # Generate response
-            response = await asyncio.to_thread(
-                self.client.models.generate_content,
-                model=self.MODEL_NAME,
-                contents=prompt,
-                config=config,
-            )
+            # Generate response; the async client lets timed-out attempts be cancelled
+            start = time.perf_counter()
+            attributes = {"gemini.model": self.MODEL_NAME, "gemini.use_search": use_search}
+            with start_span("gemini.generate", CLIENT, attributes):
+                response = await self.caller.call(lambda: self.client.aio.models.generate_content(
+                    model=self.MODEL_NAME,
+                    contents=prompt,
+                    config=config,
+                ))
+            elapsed = time.perf_counter() - start
+            self._latencies[use_search].append(elapsed)
+            GEMINI_SECONDS.observe(elapsed, "true" if use_search else "false")
             
             if not response.text:
                 raise AIServiceError("Empty response from Gemini")
@@ -67,13 +84,31 @@ class GeminiClient:
             # Parse JSON from response
             result = self._extract_json(response.text)
             
-            logger.info("generation_success")
+            logger.info("generation_success", use_search=use_search, elapsed=round(elapsed, 2))
             return result
                 
+        except (TimeoutError, CircuitOpenError):
+            raise
         except Exception as e:
             logger.error("generation_failed", error=str(e), exc_info=True)
             raise AIServiceError(f"Generation failed: {str(e)}")
     
+    def latency_stats(self) -> dict:
+        """Return generation latency with and without search grounding."""
+        stats = {}
+        for use_search, label in ((True, "grounded"), (False, "ungrounded")):
+            samples = sorted(self._latencies[use_search])
+            if not samples:
+                stats[label] = {"count": 0}
+                continue
+            stats[label] = {
+                "count": len(samples),
+                "avg_ms": round(sum(samples) / len(samples) * 1000, 1),
+                "p50_ms": round(samples[len(samples) // 2] * 1000, 1),
+                "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1),
+            }
+        return stats
+    
     def _log_grounding_metadata(self, metadata) -> None:
         """Log grounding metadata from Google Search."""
         try:
@@ -92,30 +127,8 @@ class GeminiClient:
         Returns:
             Parsed JSON dict
         """
-        # Clean control characters
-        cleaned = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F]', '', text)
-        
-        # Try to extract JSON from markdown code blocks
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', cleaned, re.DOTALL)
-        if json_match:
-            cleaned = json_match.group(1)
-        else:
-            # Find first complete JSON object
-            start_idx = cleaned.find('{')
-            if start_idx != -1:
-                # Find matching closing brace
-                brace_count = 0
-                for i in range(start_idx, len(cleaned)):
-                    if cleaned[i] == '{':
-                        brace_count += 1
-                    elif cleaned[i] == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            cleaned = cleaned[start_idx:i+1]
-                            break
-        
         try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError as e:
-            logger.error("json_parse_failed", error=str(e), text=cleaned[:500])
+            return extract_json(text)
+        except ValueError as e:
+            logger.error("json_parse_failed", error=str(e), text=text[:500])
             raise AIServiceError(f"Invalid JSON response: {str(e)}")
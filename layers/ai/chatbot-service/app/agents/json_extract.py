@@ -0,0 +1,176 @@
+"""Single-pass extraction of the first JSON object from LLM output."""
+
+import json
+import re
+from typing import Any, Dict, Optional
+
+# Structural characters outside strings and special characters inside them;
+# everything between matches is skipped by the regex engine, not Python
+_STRUCTURAL = re.compile(r'[{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F]')
+_FENCE = "```json"
+
+# Accepts raw control characters inside strings, which models sometimes emit
+_DECODER = json.JSONDecoder(strict=False)
+
+
+class JSONObjectExtractor:
+    """
+    Incrementally find and parse the first complete top-level JSON object.
+
+    Text may arrive in arbitrary chunks (e.g. from a streaming response).
+    Braces are only counted outside JSON strings, and escape sequences are
+    honoured, so ``{"a": "}"}`` is extracted correctly. Prose or markdown
+    fences around the object are ignored. If a balanced candidate fails to
+    parse, scanning resumes after its closing brace, so a malformed document
+    is never replaced by an object nested inside it.
+    """
+
+    def __init__(self):
+        """Initialize extractor."""
+        self._buffer = ""
+        self._pos = 0  # Next index to scan
+        self._start: Optional[int] = None  # Index of the candidate's opening brace
+        self._depth = 0
+        self._in_string = False
+        self.result: Optional[Dict[str, Any]] = None
+
+    @property
+    def done(self) -> bool:
+        """Whether a complete object has been extracted."""
+        return self.result is not None
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """
+        Add a chunk of text.
+
+        Args:
+            chunk: Next piece of the model output
+
+        Returns:
+            The parsed object once it is complete, None until then
+        """
+        if self.result is not None:
+            return self.result
+
+        self._buffer += chunk
+        return self._scan()
+
+    def _scan(self) -> Optional[Dict[str, Any]]:
+        """Advance through the buffer until an object completes or input runs out."""
+        buf = self._buffer
+        pos = self._pos
+
+        while True:
+            if self._start is None:
+                start = buf.find("{", pos)
+                if start == -1:
+                    # Nothing before the next brace is needed
+                    self._buffer = ""
+                    self._pos = 0
+                    return None
+                self._start = start
+                self._depth = 1
+                pos = start + 1
+
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(buf):
+                        # Escape split across chunks; rescan it next time
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                continue
+
+            match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+
+            ch = match.group()
+            pos = match.end()
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    result = self._parse(buf[self._start:pos])
+                    if result is not None:
+                        self.result = result
+                        self._pos = pos
+                        return result
+                    # Not valid JSON; look for the next candidate after this one
+                    self._start = None
+
+        self._pos = pos
+        return None
+
+    @staticmethod
+    def _parse(candidate: str) -> Optional[Dict[str, Any]]:
+        """Parse a balanced candidate, tolerating raw control characters."""
+        try:
+            value = _DECODER.decode(candidate)
+        except json.JSONDecodeError:
+            try:
+                value = _DECODER.decode(_CONTROL_CHARS.sub("", candidate))
+            except json.JSONDecodeError:
+                return None
+        return value if isinstance(value, dict) else None
+
+
+def _decode_first_object(text: str, pos: int = 0) -> Optional[Dict[str, Any]]:
+    """
+    Decode the first object starting at a ``{`` at or after ``pos``.
+
+    ``raw_decode`` parses exactly one value in C and stops at its end, so
+    strings, escapes and trailing text are handled without a Python-level
+    scan. If decoding fails, the scanner takes over from the same brace: it
+    retries the balanced candidate without stray control characters, then
+    moves past it rather than into its nested objects.
+    """
+    start = text.find("{", pos)
+    if start == -1:
+        return None
+    try:
+        value, _ = _DECODER.raw_decode(text, start)
+    except json.JSONDecodeError:
+        return JSONObjectExtractor().feed(text[start:])
+    return value if isinstance(value, dict) else None
+
+
+def extract_json(text: str) -> Dict[str, Any]:
+    """
+    Extract the first complete JSON object from model output.
+
+    A ```` ```json ```` fence, if present, is preferred over any braces in
+    prose before it.
+
+    Args:
+        text: Raw response text
+
+    Returns:
+        Parsed JSON object
+
+    Raises:
+        ValueError: If the text contains no complete JSON object
+    """
+    fence = text.find(_FENCE)
+    if fence != -1:
+        result = _decode_first_object(text, fence + len(_FENCE))
+        if result is not None:
+            return result
+
+    result = _decode_first_object(text)
+    if result is None:
+        raise ValueError("No complete JSON object found in response")
+    return result
@@ -0,0 +1,349 @@
+"""Provider-side caching of the static prompt prefix (the system prompt)."""
+
+import asyncio
+import hashlib
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+from google.genai import types
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# A handle closer than this to expiry is not handed out, so a request that
+# starts with it cannot outlive it
+_EXPIRY_SLACK_SECONDS = 30.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class PrefixCacheProvider(ABC):
+    """Backend that stores a prompt prefix and refers to it by handle."""
+
+    name = "abstract"
+
+    @abstractmethod
+    async def create(self, model: str, prefix: str, ttl_seconds: int) -> Tuple[str, float]:
+        """
+        Register a prefix.
+
+        Args:
+            model: Model the prefix will be used with
+            prefix: System instruction text
+            ttl_seconds: Requested lifetime
+
+        Returns:
+            (handle, expiry as a unix timestamp)
+        """
+
+    @abstractmethod
+    async def refresh(self, handle: str, ttl_seconds: int) -> float:
+        """Extend a handle's lifetime and return its new expiry timestamp."""
+
+    @abstractmethod
+    async def delete(self, handle: str) -> None:
+        """Release a handle."""
+
+
+class GeminiCacheProvider(PrefixCacheProvider):
+    """Gemini explicit context caching (``client.aio.caches``)."""
+
+    name = "gemini"
+
+    def __init__(self, client: Any):
+        """
+        Initialize provider.
+
+        Args:
+            client: ``google.genai.Client`` shared with the generation calls
+        """
+        self.client = client
+
+    async def create(self, model: str, prefix: str, ttl_seconds: int) -> Tuple[str, float]:
+        cached = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=prefix,
+                ttl=f"{int(ttl_seconds)}s",
+                display_name="chatbot-system-prompt"
+            )
+        )
+        return cached.name, self._expiry(cached, ttl_seconds)
+
+    async def refresh(self, handle: str, ttl_seconds: int) -> float:
+        cached = await self.client.aio.caches.update(
+            name=handle,
+            config=types.UpdateCachedContentConfig(ttl=f"{int(ttl_seconds)}s")
+        )
+        return self._expiry(cached, ttl_seconds)
+
+    async def delete(self, handle: str) -> None:
+        await self.client.aio.caches.delete(name=handle)
+
+    @staticmethod
+    def _expiry(cached: Any, ttl_seconds: int) -> float:
+        """Expiry reported by the API, or the requested TTL if it is missing."""
+        if cached.expire_time is not None:
+            return cached.expire_time.timestamp()
+        return time.time() + ttl_seconds
+
+
+class LocalStubProvider(PrefixCacheProvider):
+    """
+    In-process stand-in for a provider cache.
+
+    Keeps prefixes in a dict so cache behaviour and token savings can be
+    measured offline (tests, benchmarks). Handles are never valid upstream.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Initialize provider.
+
+        Args:
+            latency: Simulated seconds per provider call
+        """
+        self.latency = latency
+        self.prefixes: Dict[str, Tuple[str, float]] = {}
+        self.calls = {"create": 0, "refresh": 0, "delete": 0}
+
+    async def create(self, model: str, prefix: str, ttl_seconds: int) -> Tuple[str, float]:
+        await self._call("create")
+        handle = f"cachedContents/stub-{uuid.uuid4().hex[:12]}"
+        expires_at = time.time() + ttl_seconds
+        self.prefixes[handle] = (prefix, expires_at)
+        return handle, expires_at
+
+    async def refresh(self, handle: str, ttl_seconds: int) -> float:
+        await self._call("refresh")
+        prefix, _ = self.resolve(handle)
+        expires_at = time.time() + ttl_seconds
+        self.prefixes[handle] = (prefix, expires_at)
+        return expires_at
+
+    async def delete(self, handle: str) -> None:
+        await self._call("delete")
+        self.prefixes.pop(handle, None)
+
+    def resolve(self, handle: str) -> Tuple[str, float]:
+        """
+        Look up a live handle, as the model server would.
+
+        Raises:
+            KeyError: If the handle is unknown or expired
+        """
+        entry = self.prefixes.get(handle)
+        if entry is None or entry[1] <= time.time():
+            raise KeyError(handle)
+        return entry
+
+    async def _call(self, op: str) -> None:
+        self.calls[op] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+@dataclass
+class _PrefixEntry:
+    handle: str
+    expires_at: float
+    tokens: int
+
+
+class PromptPrefixCache:
+    """
+    Register a static prompt prefix once and refer to it by handle afterwards.
+
+    Handles are created lazily (or at warmup) with a single provider call per
+    prefix, even under concurrent first use. Handles nearing expiry are
+    extended in the background while callers keep using them; expired ones
+    are recreated. Whenever no usable handle is available - prefix below the
+    provider's minimum size, provider errors, backoff after a failure - ``handle``
+    returns None and callers send the prefix inline as before.
+    """
+
+    def __init__(
+        self,
+        provider: PrefixCacheProvider,
+        ttl_seconds: int = 3600,
+        refresh_margin_seconds: int = 300,
+        min_prefix_tokens: int = 1024,
+        retry_after_seconds: float = 60.0
+    ):
+        """
+        Initialize prefix cache.
+
+        Args:
+            provider: Backend holding the cached prefixes
+            ttl_seconds: Lifetime requested for each handle
+            refresh_margin_seconds: Extend handles this long before they expire
+            min_prefix_tokens: Smallest prefix worth caching (provider minimum)
+            retry_after_seconds: Wait after a failed create before trying again
+        """
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = min(refresh_margin_seconds, ttl_seconds / 2)
+        self.min_prefix_tokens = min_prefix_tokens
+        self.retry_after = retry_after_seconds
+        self._entries: Dict[str, _PrefixEntry] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._failed_until: Dict[str, float] = {}
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.inline = 0
+        self.creates = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.invalidations = 0
+        self.tokens_saved = 0
+        self.cached_tokens_reported = 0
+
+    async def handle(self, model: str, prefix: str) -> Optional[str]:
+        """
+        Get a live handle for a prefix, registering it if needed.
+
+        Args:
+            model: Model the prefix will be used with
+            prefix: System instruction text
+
+        Returns:
+            Provider handle, or None to send the prefix inline
+        """
+        tokens = estimate_tokens(prefix)
+        if tokens < self.min_prefix_tokens:
+            self.inline += 1
+            return None
+
+        key = self._key(model, prefix)
+        entry = self._usable(key)
+        if entry is None:
+            entry = await self._create(key, model, prefix, tokens)
+        if entry is None:
+            self.inline += 1
+            return None
+
+        self.hits += 1
+        self.tokens_saved += entry.tokens
+        return entry.handle
+
+    def invalidate(self, handle: str) -> None:
+        """
+        Forget a handle the provider rejected, so the next call recreates it.
+
+        Args:
+            handle: Handle returned by ``handle``
+        """
+        for key, entry in list(self._entries.items()):
+            if entry.handle == handle:
+                del self._entries[key]
+                self.invalidations += 1
+                logger.warning("prompt_prefix_invalidated", handle=handle)
+
+    def record_usage(self, usage_metadata: Any) -> None:
+        """Accumulate cached token counts reported on a response."""
+        count = getattr(usage_metadata, "cached_content_token_count", None)
+        if count:
+            self.cached_tokens_reported += count
+
+    def _usable(self, key: str) -> Optional[_PrefixEntry]:
+        """Return the entry if it can be used now, scheduling a refresh if due."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry.expires_at - time.time()
+        if remaining <= _EXPIRY_SLACK_SECONDS:
+            return None
+        if remaining <= self.refresh_margin and key not in self._refreshing:
+            self._refreshing.add(key)
+            task = asyncio.ensure_future(self._refresh(key, entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return entry
+
+    async def _create(self, key: str, model: str, prefix: str, tokens: int) -> Optional[_PrefixEntry]:
+        """Register a prefix once, however many callers are waiting for it."""
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._usable(key)
+            if entry is not None:
+                return entry
+            if self._failed_until.get(key, 0.0) > time.time():
+                return None
+
+            stale = self._entries.pop(key, None)
+            try:
+                handle, expires_at = await self.provider.create(model, prefix, self.ttl_seconds)
+            except Exception as e:
+                self.failures += 1
+                self._failed_until[key] = time.time() + self.retry_after
+                logger.warning("prompt_prefix_create_failed", provider=self.provider.name, error=str(e))
+                return None
+
+            entry = _PrefixEntry(handle=handle, expires_at=expires_at, tokens=tokens)
+            self._entries[key] = entry
+            self._failed_until.pop(key, None)
+            self.creates += 1
+            logger.info("prompt_prefix_registered", provider=self.provider.name, handle=handle, tokens=tokens)
+
+        if stale is not None:
+            await self._delete(stale.handle)
+        return entry
+
+    async def _refresh(self, key: str, entry: _PrefixEntry) -> None:
+        """Extend a handle's TTL; on failure it is recreated once it expires."""
+        try:
+            entry.expires_at = await self.provider.refresh(entry.handle, self.ttl_seconds)
+            self.refreshes += 1
+            logger.debug("prompt_prefix_refreshed", handle=entry.handle)
+        except Exception as e:
+            self.failures += 1
+            logger.warning("prompt_prefix_refresh_failed", handle=entry.handle, error=str(e))
+        finally:
+            self._refreshing.discard(key)
+
+    async def _delete(self, handle: str) -> None:
+        """Best-effort release of a handle."""
+        try:
+            await self.provider.delete(handle)
+        except Exception as e:
+            logger.debug("prompt_prefix_delete_failed", handle=handle, error=str(e))
+
+    @staticmethod
+    def _key(model: str, prefix: str) -> str:
+        return hashlib.sha256(f"{model}\0{prefix}".encode()).hexdigest()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return prefix cache counters."""
+        total = self.hits + self.inline
+        return {
+            "provider": self.provider.name,
+            "handles": len(self._entries),
+            "hits": self.hits,
+            "inline": self.inline,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "creates": self.creates,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "invalidations": self.invalidations,
+            "est_tokens_saved": self.tokens_saved,
+            "cached_tokens_reported": self.cached_tokens_reported,
+        }
+
+    async def close(self) -> None:
+        """Cancel pending refreshes and release every handle this worker created."""
+        for task in list(self._tasks):
+            task.cancel()
+        entries = list(self._entries.values())
+        self._entries.clear()
+        for entry in entries:
+            await self._delete(entry.handle)
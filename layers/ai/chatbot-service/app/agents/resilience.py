@@ -0,0 +1,426 @@
+"""Deadlines, retries, hedging and circuit breaking for outbound Gemini calls."""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+import httpx
+from google.genai import errors as genai_errors
+
+from app.agents.concurrency import ConcurrencyLimiter, get_generation_limiter
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenError, TimeoutError
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Monotonic time by which the current HTTP request must be answered
+_request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(timeout: float) -> Iterator[float]:
+    """
+    Bound every Gemini call made in this context by an overall request budget.
+
+    Args:
+        timeout: Seconds the whole request may take
+
+    Yields:
+        The deadline as a ``time.monotonic()`` value
+    """
+    deadline = time.monotonic() + timeout
+    token = _request_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _request_deadline.reset(token)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether a failure indicates a transient upstream problem worth retrying."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code == 429 or exc.code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the upstream is degraded.
+
+    Opens after ``failure_threshold`` consecutive transient failures and
+    rejects calls for ``recovery_timeout`` seconds. Then up to
+    ``half_open_max_calls`` probes are let through: a success closes the
+    circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        """
+        Initialize breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds to stay open before probing
+            half_open_max_calls: Concurrent probes allowed while half-open
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+        # Counters
+        self._opened_total = 0
+        self._rejected_total = 0
+
+    @property
+    def state(self) -> str:
+        """Current state; an open circuit turns half-open once its timeout passes."""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+            logger.info("circuit_half_open")
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit will accept a probe."""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def before_call(self) -> None:
+        """
+        Admit a call or reject it.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or its probes are taken
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return
+
+        self._rejected_total += 1
+        raise CircuitOpenError("Gemini is unavailable, failing fast", retry_after=max(1.0, self.retry_after()))
+
+    def record_success(self) -> None:
+        """Record a call that reached a healthy upstream."""
+        if self._state == self.HALF_OPEN:
+            logger.info("circuit_closed")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probes = 0
+
+    def record_failure(self) -> None:
+        """Record a transient upstream failure."""
+        self._failures += 1
+        if self._state == self.HALF_OPEN or (self._state == self.CLOSED and self._failures >= self.failure_threshold):
+            self._open()
+
+    def release(self) -> None:
+        """Return a probe slot for a call that ended without an outcome (cancelled)."""
+        if self._state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._opened_total += 1
+        logger.warning("circuit_opened", consecutive_failures=self._failures, recovery_timeout=self.recovery_timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return breaker state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened_total": self._opened_total,
+            "rejected_total": self._rejected_total,
+            "retry_after_sec": round(self.retry_after(), 1),
+        }
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies."""
+
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        """
+        Initialize tracker.
+
+        Args:
+            window: Number of recent samples kept
+            min_samples: Samples needed before percentiles are reported
+        """
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample."""
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile ``q``, or None until enough samples exist."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class ResilientCaller:
+    """
+    Run upstream calls within a deadline, with retries, hedging and a breaker.
+
+    Each call gets a budget (``budget_seconds``, further capped by the
+    enclosing ``request_deadline``). Attempts are bounded by
+    ``attempt_timeout`` and by what is left of the budget. Transient failures
+    are retried with full-jitter exponential backoff, but only if the backoff
+    still fits in the budget. With hedging enabled, a second attempt is
+    started if the first has not answered by the observed p95 latency, and
+    the first success wins. A hedge is an extra upstream request, so when a
+    ``limiter`` is given it must take its own slot there; if none is free
+    the hedge is skipped rather than queued.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        budget_seconds: float = 90.0,
+        attempt_timeout: float = 30.0,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 4.0,
+        hedge_enabled: bool = False,
+        hedge_min_delay: float = 1.0,
+        hedge_percentile: float = 0.95,
+        limiter: Optional[ConcurrencyLimiter] = None
+    ):
+        """
+        Initialize caller.
+
+        Args:
+            breaker: Circuit breaker shared by calls to the same upstream
+            budget_seconds: Default total time for one call including retries
+            attempt_timeout: Maximum time for a single attempt
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff cap before the first retry
+            max_delay: Backoff cap for later retries
+            hedge_enabled: Start a second attempt after the hedge delay
+            hedge_min_delay: Lower bound on the hedge delay
+            hedge_percentile: Latency quantile used as the hedge delay
+            limiter: Pool a hedged attempt must take a slot from
+        """
+        self.breaker = breaker
+        self.budget_seconds = budget_seconds
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_percentile = hedge_percentile
+        self.limiter = limiter
+        self.latency = LatencyTracker()
+
+        # Counters
+        self._calls_total = 0
+        self._retries_total = 0
+        self._timeouts_total = 0
+        self._hedges_total = 0
+        self._hedges_skipped_total = 0
+        self._hedge_wins_total = 0
+
+    def deadline(self, budget: Optional[float] = None) -> float:
+        """
+        Monotonic deadline for a call started now.
+
+        Args:
+            budget: Seconds allowed (defaults to ``budget_seconds``)
+        """
+        deadline = time.monotonic() + (budget if budget is not None else self.budget_seconds)
+        request_deadline = _request_deadline.get()
+        if request_deadline is not None:
+            deadline = min(deadline, request_deadline)
+        return deadline
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        deadline: Optional[float] = None,
+        hedge: bool = True
+    ) -> T:
+        """
+        Run ``fn`` with retries until it succeeds or the budget runs out.
+
+        Args:
+            fn: Zero-argument coroutine factory; called once per attempt
+            deadline: Monotonic deadline (defaults to ``self.deadline()``)
+            hedge: Allow hedged attempts (only for idempotent calls)
+
+        Returns:
+            Result of the first successful attempt
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            TimeoutError: If the budget ran out
+            Exception: The last non-retryable or final error from ``fn``
+        """
+        if deadline is None:
+            deadline = self.deadline()
+        self._calls_total += 1
+        attempt = 0
+
+        while True:
+            attempt += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._timeouts_total += 1
+                raise TimeoutError("Gemini call budget exhausted")
+
+            self.breaker.before_call()
+            try:
+                result = await self._attempt(fn, min(remaining, self.attempt_timeout), hedge)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The upstream answered; the request itself was bad
+                    self.breaker.record_success()
+
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                if not retryable or attempt >= self.max_attempts or time.monotonic() + delay >= deadline:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self._timeouts_total += 1
+                        raise TimeoutError("Gemini call timed out") from e
+                    raise
+
+                self._retries_total += 1
+                logger.warning("gemini_retry", attempt=attempt, delay=round(delay, 3), error=str(e) or type(e).__name__)
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], timeout: float, hedge: bool) -> T:
+        """One attempt, hedged if enabled and there is room before the timeout."""
+        start = time.monotonic()
+        hedge_delay = self._hedge_delay() if hedge else None
+        if hedge_delay is None or hedge_delay >= timeout:
+            result = await asyncio.wait_for(fn(), timeout)
+        else:
+            result = await self._hedged(fn, timeout, hedge_delay)
+        self.latency.record(time.monotonic() - start)
+        return result
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]], timeout: float, hedge_delay: float) -> T:
+        """Race the primary attempt against a backup started after ``hedge_delay``."""
+        deadline = time.monotonic() + timeout
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                backup = self._start_hedge(fn)
+                if backup is not None:
+                    pending.add(backup)
+                    logger.info("gemini_hedge_started", delay=round(hedge_delay, 3))
+
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._hedge_wins_total += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _start_hedge(self, fn: Callable[[], Awaitable[T]]) -> Optional["asyncio.Future[T]"]:
+        """Start a backup attempt holding its own limiter slot, or None if no slot is free."""
+        if self.limiter is not None and not self.limiter.try_acquire():
+            self._hedges_skipped_total += 1
+            logger.info("gemini_hedge_skipped", in_flight=self.limiter.in_flight)
+            return None
+        self._hedges_total += 1
+        backup = asyncio.ensure_future(fn())
+        if self.limiter is not None:
+            backup.add_done_callback(lambda _: self.limiter.release())
+        return backup
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Delay before hedging, or None if hedging is off or not yet calibrated."""
+        if not self.hedge_enabled:
+            return None
+        observed = self.latency.percentile(self.hedge_percentile)
+        if observed is None:
+            return None
+        return max(self.hedge_min_delay, observed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return breaker state and retry/hedge counters."""
+        p95 = self.latency.percentile(0.95)
+        return {
+            "circuit": self.breaker.stats(),
+            "calls_total": self._calls_total,
+            "retries_total": self._retries_total,
+            "timeouts_total": self._timeouts_total,
+            "hedges_total": self._hedges_total,
+            "hedges_skipped_total": self._hedges_skipped_total,
+            "hedge_wins_total": self._hedge_wins_total,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+_gemini_caller: Optional[ResilientCaller] = None
+
+
+def get_gemini_caller() -> ResilientCaller:
+    """Get the process-wide resilient caller for Gemini (singleton)."""
+    global _gemini_caller
+
+    if _gemini_caller is None:
+        _gemini_caller = ResilientCaller(
+            CircuitBreaker(
+                failure_threshold=settings.circuit_failure_threshold,
+                recovery_timeout=settings.circuit_recovery_seconds,
+            ),
+            budget_seconds=settings.agent_timeout_seconds,
+            attempt_timeout=settings.gemini_attempt_timeout_seconds,
+            max_attempts=settings.gemini_max_attempts,
+            base_delay=settings.gemini_retry_base_delay_seconds,
+            max_delay=settings.gemini_retry_max_delay_seconds,
+            hedge_enabled=settings.gemini_hedge_enabled,
+            hedge_min_delay=settings.gemini_hedge_min_delay_seconds,
+            limiter=get_generation_limiter(),
+        )
+
+    return _gemini_caller
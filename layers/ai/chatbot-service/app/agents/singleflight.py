@@ -0,0 +1,188 @@
+"""Single-flight coalescing of identical in-flight calls."""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.storage.redis_store import RedisSessionStore
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the call in its own task; callers that
+    arrive while it is running await the same task. Cancelling one caller
+    never cancels the shared call for the others.
+    """
+
+    def __init__(self):
+        """Initialize coalescer."""
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``fn`` once for all concurrent callers with the same key.
+
+        Args:
+            key: Coalescing key
+            fn: Zero-argument coroutine factory producing the result
+
+        Returns:
+            Result of the shared call
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug("singleflight_coalesced", key=key[:16])
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._calls[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Execute the shared call."""
+        return await fn()
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        """Forget a completed call."""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark exception as retrieved even if every caller went away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters."""
+        total = self.leaders + self.coalesced
+        return {
+            "mode": "local",
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesce_ratio": round(self.coalesced / total, 4) if total else 0.0,
+        }
+
+
+class RedisSingleFlight(SingleFlight):
+    """
+    Single-flight that also coalesces across workers using a Redis lock.
+
+    Within a worker calls are coalesced as in ``SingleFlight``. The local
+    leader then takes a short Redis lock for the key; if another worker
+    already holds it, the leader waits for that worker to publish the
+    result instead of calling upstream itself. Results must be
+    JSON-serializable. Any Redis failure falls back to a local call.
+    """
+
+    LOCK_PREFIX = "chat:inflight:lock:"
+    RESULT_PREFIX = "chat:inflight:result:"
+
+    _RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+    def __init__(
+        self,
+        store: RedisSessionStore,
+        lock_ttl: float = 30.0,
+        wait_timeout: float = 30.0,
+        poll_interval: float = 0.05,
+        result_ttl: int = 5
+    ):
+        """
+        Initialize cross-worker coalescer.
+
+        Args:
+            store: Session store whose Redis connection is shared
+            lock_ttl: Seconds before an abandoned lock expires
+            wait_timeout: Seconds a follower waits for the remote result
+            poll_interval: Seconds between result polls
+            result_ttl: Seconds a published result remains readable
+        """
+        super().__init__()
+        self.store = store
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.remote_leaders = 0
+        self.remote_coalesced = 0
+        self.remote_fallbacks = 0
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        lock_key = self.LOCK_PREFIX + key
+        result_key = self.RESULT_PREFIX + key
+        token = uuid.uuid4().hex
+
+        try:
+            client = await self.store.get_client()
+            acquired = await client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            logger.warning("singleflight_lock_error", error=str(e))
+            self.remote_fallbacks += 1
+            return await fn()
+
+        if acquired:
+            self.remote_leaders += 1
+            try:
+                result = await fn()
+                try:
+                    await client.set(result_key, json.dumps(result), ex=self.result_ttl)
+                except Exception as e:
+                    logger.warning("singleflight_publish_error", error=str(e))
+                return result
+            finally:
+                try:
+                    await client.eval(self._RELEASE_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.warning("singleflight_release_error", error=str(e))
+
+        result = await self._wait_for_result(client, lock_key, result_key)
+        if result is not None:
+            self.remote_coalesced += 1
+            return result
+
+        # Remote leader failed or timed out; do the work ourselves
+        self.remote_fallbacks += 1
+        return await fn()
+
+    async def _wait_for_result(self, client, lock_key: str, result_key: str) -> Optional[Any]:
+        """Poll for the result published by the remote leader."""
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while time.monotonic() < deadline:
+                data = await client.get(result_key)
+                if data is not None:
+                    return json.loads(data)
+                if not await client.exists(lock_key):
+                    # Lock released; check once more for a just-published result
+                    data = await client.get(result_key)
+                    return json.loads(data) if data is not None else None
+                await asyncio.sleep(self.poll_interval)
+        except Exception as e:
+            logger.warning("singleflight_wait_error", error=str(e))
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "mode": "redis",
+            "remote_leaders": self.remote_leaders,
+            "remote_coalesced": self.remote_coalesced,
+            "remote_fallbacks": self.remote_fallbacks,
+        })
+        return stats
@@ -1,9 +1,21 @@
 """Dependency injection for API routes."""
 
 from typing import AsyncGenerator
+from fastapi import Depends, Request
 from app.storage.session_store import SessionStore
 from app.storage.redis_store import RedisSessionStore
 from app.storage.memory_store import MemorySessionStore
+from app.storage.shm_store import SharedMemorySessionStore
+from app.storage.tiered_store import TieredSessionStore
+from app.storage.response_cache import ResponseCache, MemoryResponseCache, RedisResponseCache
+from app.storage.rate_limit import RateLimiter, MemoryRateLimiter, RedisRateLimiter
+from app.agents.gemini_client import GeminiClient
+from app.agents.prompt_cache import PromptPrefixCache, GeminiCacheProvider
+from app.agents.singleflight import SingleFlight, RedisSingleFlight
+from app.services.chat_service import ChatService, load_system_prompt
+from app.services.compaction import HistoryCompactor, gemini_summarizer
+from app.services.intent import ChartIntentParser
+from app.services.admission import AdmissionController, parse_priorities
 from app.core.config import settings
 from app.core.logging import get_logger
 
@@ -12,6 +24,50 @@ logger = get_logger(__name__)
 _session_store: SessionStore | None = None
 
 
+def create_redis_store() -> RedisSessionStore:
+    """Create a Redis session store with the configured connection pool."""
+    return RedisSessionStore(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        pool_timeout=settings.redis_pool_timeout_seconds,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_socket_connect_timeout_seconds,
+        socket_keepalive=settings.redis_socket_keepalive,
+        health_check_interval=settings.redis_health_check_interval
+    )
+
+
+def create_memory_store() -> MemorySessionStore:
+    """Create an in-memory session store bounded by the configured limits."""
+    return MemorySessionStore(
+        max_sessions=settings.memory_store_max_sessions,
+        max_bytes=settings.memory_store_max_bytes
+    )
+
+
+def create_shared_memory_store() -> SharedMemorySessionStore:
+    """Create a session store shared by the workers on this host."""
+    return SharedMemorySessionStore(
+        settings.shm_store_path,
+        max_bytes=settings.shm_store_max_bytes,
+        slot_bytes=settings.shm_store_slot_bytes
+    )
+
+
+def create_local_store() -> SessionStore:
+    """Create the session store used without Redis: shared memory if enabled and available, else per worker."""
+    if settings.shm_store_enabled:
+        try:
+            store = create_shared_memory_store()
+            logger.info("using_shared_memory_store", path=settings.shm_store_path)
+            return store
+        except (OSError, ValueError) as e:
+            logger.warning("shared_memory_store_unavailable", path=settings.shm_store_path, error=str(e))
+    
+    logger.info("using_memory_store")
+    return create_memory_store()
+
+
 async def get_session_store() -> SessionStore:
     """Get session store instance (singleton)."""
     global _session_store
@@ -20,16 +76,251 @@ async def get_session_store() -> SessionStore:
         if settings.use_redis:
             try:
                 logger.info("initializing_redis_store")
-                _session_store = RedisSessionStore(settings.redis_url)
-                # Test connection
-                await _session_store.ping()
+                _session_store = create_redis_store()
+                # Test connection (ping reports failure rather than raising)
+                if not await _session_store.ping():
+                    raise ConnectionError(f"Redis unavailable at {settings.redis_url}")
                 logger.info("redis_store_initialized")
             except Exception as e:
                 logger.warning("redis_init_failed", error=str(e))
-                logger.info("falling_back_to_memory_store")
-                _session_store = MemorySessionStore()
+                logger.info("falling_back_to_local_store")
+                _session_store = create_local_store()
         else:
-            logger.info("using_memory_store")
-            _session_store = MemorySessionStore()
+            _session_store = create_local_store()
     
     return _session_store
+
+
+def create_tiered_store(session_store: SessionStore) -> SessionStore:
+    """Put a per-worker near cache in front of a shared session store if enabled."""
+    if settings.near_cache_enabled and isinstance(session_store, RedisSessionStore):
+        logger.info("using_near_cache", max_entries=settings.near_cache_max_entries)
+        return TieredSessionStore(
+            session_store,
+            max_entries=settings.near_cache_max_entries,
+            ttl=settings.near_cache_ttl_seconds
+        )
+    return session_store
+
+
+def create_response_cache(session_store: SessionStore) -> ResponseCache | None:
+    """Create the configured response cache, or None if disabled."""
+    if not settings.response_cache_enabled:
+        return None
+    
+    ttl = settings.response_cache_ttl_seconds
+    max_entries = settings.response_cache_max_entries
+    
+    if settings.response_cache_backend == "redis":
+        if isinstance(session_store, RedisSessionStore):
+            logger.info("using_redis_response_cache")
+            return RedisResponseCache(session_store, ttl=ttl, max_entries=max_entries)
+        logger.warning("redis_response_cache_unavailable", reason="session store is not redis")
+    
+    logger.info("using_memory_response_cache")
+    return MemoryResponseCache(ttl=ttl, max_entries=max_entries)
+
+
+def create_singleflight(session_store: SessionStore) -> SingleFlight | None:
+    """Create the configured request coalescer, or None if disabled."""
+    if not settings.coalesce_enabled:
+        return None
+    
+    if settings.coalesce_mode == "redis":
+        if isinstance(session_store, RedisSessionStore):
+            logger.info("using_redis_singleflight")
+            return RedisSingleFlight(
+                session_store,
+                lock_ttl=settings.coalesce_lock_ttl_seconds,
+                wait_timeout=settings.coalesce_wait_timeout_seconds
+            )
+        logger.warning("redis_singleflight_unavailable", reason="session store is not redis")
+    
+    return SingleFlight()
+
+
+def create_rate_limiter(session_store: SessionStore) -> RateLimiter:
+    """Create the configured per-client rate limiter."""
+    rate = settings.rate_limit_per_minute
+    burst = settings.rate_limit_burst
+    
+    if settings.rate_limit_backend == "redis":
+        if isinstance(session_store, RedisSessionStore):
+            logger.info("using_redis_rate_limiter")
+            return RedisRateLimiter(session_store, rate, burst)
+        logger.warning("redis_rate_limiter_unavailable", reason="session store is not redis")
+    
+    return MemoryRateLimiter(rate, burst)
+
+
+def create_admission_controller(session_store: SessionStore) -> AdmissionController | None:
+    """Create the admission controller, or None if disabled."""
+    if not settings.admission_enabled:
+        return None
+    
+    # Beyond Gemini concurrency plus its queue, requests could only wait and fail
+    max_in_flight = settings.admission_max_in_flight or (settings.gemini_max_concurrency + settings.gemini_max_queue)
+    if settings.rate_limit_per_minute > 0 and settings.chat_batch_max_items > settings.rate_limit_burst:
+        logger.warning(
+            "batch_larger_than_burst",
+            chat_batch_max_items=settings.chat_batch_max_items,
+            rate_limit_burst=settings.rate_limit_burst,
+            detail="batches above the burst are rejected with 400"
+        )
+    return AdmissionController(
+        create_rate_limiter(session_store) if settings.rate_limit_per_minute > 0 else None,
+        max_in_flight=max_in_flight,
+        priorities=parse_priorities(settings.admission_priorities),
+        default_priority=settings.admission_default_priority,
+        shed_retry_after=settings.admission_shed_retry_after_seconds
+    )
+
+
+def create_intent_parser() -> ChartIntentParser | None:
+    """Create the local chart-request fast path, or None if disabled."""
+    if not settings.fast_path_enabled:
+        return None
+    return ChartIntentParser(max_length=settings.fast_path_max_length)
+
+
+def create_prefix_cache(gemini_client: GeminiClient) -> PromptPrefixCache | None:
+    """Create the system prompt prefix cache on the client's SDK, or None if disabled."""
+    if not settings.prompt_cache_enabled:
+        return None
+    
+    return PromptPrefixCache(
+        GeminiCacheProvider(gemini_client.client),
+        ttl_seconds=settings.prompt_cache_ttl_seconds,
+        refresh_margin_seconds=settings.prompt_cache_refresh_margin_seconds,
+        min_prefix_tokens=settings.prompt_cache_min_tokens
+    )
+
+
+def create_compactor(session_store: SessionStore, gemini_client: GeminiClient) -> HistoryCompactor | None:
+    """Create the history compactor, or None if disabled."""
+    if not settings.history_compaction_enabled:
+        return None
+    
+    summarizer = gemini_summarizer(gemini_client) if settings.history_summary_mode == "llm" else None
+    return HistoryCompactor(
+        session_store,
+        summarizer=summarizer,
+        token_budget=settings.history_token_budget,
+        keep_recent_turns=settings.history_keep_recent_turns,
+        max_turns=settings.session_max_turns,
+        summary_max_chars=settings.history_summary_max_chars
+    )
+
+
+class ServiceContainer:
+    """
+    Per-worker container for long-lived services.
+
+    Built once by the application lifespan so the Gemini client (and its
+    HTTP connection pool), the system prompt and the chat service are
+    shared by every request instead of being rebuilt each time.
+    """
+
+    def __init__(
+        self,
+        session_store: SessionStore,
+        gemini_client: GeminiClient,
+        system_prompt: str,
+        response_cache: ResponseCache | None = None,
+        singleflight: SingleFlight | None = None,
+        compactor: HistoryCompactor | None = None,
+        intent_parser: ChartIntentParser | None = None,
+        admission: AdmissionController | None = None
+    ):
+        """Initialize container from already-constructed services."""
+        self.session_store = session_store
+        self.gemini_client = gemini_client
+        self.system_prompt = system_prompt
+        self.response_cache = response_cache
+        self.singleflight = singleflight
+        self.compactor = compactor
+        self.intent_parser = intent_parser
+        self.admission = admission
+        self.chat_service = ChatService(
+            session_store,
+            gemini_client=gemini_client,
+            system_prompt=system_prompt,
+            response_cache=response_cache,
+            singleflight=singleflight,
+            compactor=compactor,
+            intent_parser=intent_parser
+        )
+
+    @classmethod
+    async def create(cls) -> "ServiceContainer":
+        """Build all services for this worker."""
+        shared_store = await get_session_store()
+        session_store = create_tiered_store(shared_store)
+        gemini_client = GeminiClient()
+        gemini_client.prefix_cache = create_prefix_cache(gemini_client)
+        container = cls(
+            session_store=session_store,
+            gemini_client=gemini_client,
+            system_prompt=load_system_prompt(),
+            response_cache=create_response_cache(shared_store),
+            singleflight=create_singleflight(shared_store),
+            compactor=create_compactor(session_store, gemini_client),
+            intent_parser=create_intent_parser(),
+            admission=create_admission_controller(shared_store)
+        )
+        logger.info("service_container_created")
+        return container
+
+    async def warmup(self) -> None:
+        """Pre-warm outbound connections."""
+        await self.session_store.ping()
+        await self.gemini_client.warmup()
+        await self.gemini_client.register_prefix(self.system_prompt)
+
+    async def close(self) -> None:
+        """Release connections held by the services."""
+        await self.gemini_client.close()
+        if self.response_cache is not None:
+            await self.response_cache.close()
+        await self.session_store.close()
+    
+    def stats(self) -> dict:
+        """Collect runtime stats from the services."""
+        stats = {}
+        if hasattr(self.session_store, "stats"):
+            stats["session_store"] = self.session_store.stats()
+        if self.response_cache is not None:
+            stats["response_cache"] = self.response_cache.stats()
+        if self.singleflight is not None:
+            stats["coalescing"] = self.singleflight.stats()
+        if self.compactor is not None:
+            stats["compaction"] = self.compactor.stats()
+        if self.admission is not None:
+            stats["admission"] = self.admission.stats()
+        if self.intent_parser is not None:
+            stats["fast_path"] = self.intent_parser.stats()
+        prefix_cache = getattr(self.gemini_client, "prefix_cache", None)
+        if prefix_cache is not None:
+            stats["prompt_cache"] = prefix_cache.stats()
+        return stats
+
+
+async def get_services(request: Request) -> ServiceContainer:
+    """
+    Get the worker's service container.
+
+    The container is normally created by the lifespan handler; it is built
+    lazily here when the app runs without lifespan events (e.g. in tests).
+    """
+    services = getattr(request.app.state, "services", None)
+    if services is None:
+        services = await ServiceContainer.create()
+        request.app.state.services = services
+    return services
+
+
+async def get_chat_service(
+    services: ServiceContainer = Depends(get_services)
+) -> ChatService:
+    """Get the shared chat service."""
+    return services.chat_service
@@ -0,0 +1,297 @@
+"""ASGI middleware for the chatbot service."""
+
+import ipaddress
+import json
+import math
+import time
+from typing import Iterable, List, Optional, Tuple, Union
+
+from starlette.responses import JSONResponse
+
+from app.agents.resilience import request_deadline
+from app.core.metrics import IN_FLIGHT
+from app.core.tracing import SERVER, get_tracer, parse_traceparent, start_span
+
+_Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class RequestDeadlineMiddleware:
+    """
+    Give every HTTP request an overall time budget.
+    
+    Sets the request deadline that the Gemini resilience layer uses to cap
+    per-call budgets, so retries never outlive the request. Implemented as
+    pure ASGI so the deadline also covers streamed response bodies.
+    """
+    
+    def __init__(self, app, timeout: float):
+        """
+        Initialize middleware.
+        
+        Args:
+            app: Wrapped ASGI application
+            timeout: Seconds each request may take
+        """
+        self.app = app
+        self.timeout = timeout
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with request_deadline(self.timeout):
+            await self.app(scope, receive, send)
+
+
+class InFlightMiddleware:
+    """
+    Track HTTP requests in flight for the ``chatbot_requests_in_flight`` gauge.
+    
+    A request counts until its response, including streamed bodies, has been
+    sent. Scrapes of the metrics endpoint are not counted.
+    """
+    
+    def __init__(self, app, exclude: Tuple[str, ...] = ("/metrics",)):
+        """
+        Initialize middleware.
+        
+        Args:
+            app: Wrapped ASGI application
+            exclude: Paths that are not counted
+        """
+        self.app = app
+        self.exclude = exclude
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            IN_FLIGHT.dec()
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware recording a server span per HTTP request.
+    
+    Continues the caller's trace from its ``traceparent`` header, so spans
+    from every service handling one request share a trace id. The span
+    covers streamed bodies until the last chunk is sent.
+    """
+    
+    def __init__(self, app, exclude: Tuple[str, ...] = ("/health", "/ready", "/metrics")):
+        """
+        Initialize middleware.
+        
+        Args:
+            app: Wrapped ASGI application
+            exclude: Paths that are not traced
+        """
+        self.app = app
+        self.exclude = frozenset(exclude)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or get_tracer() is None or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+        
+        method = scope["method"]
+        attributes = {"http.method": method, "http.target": scope["path"]}
+        with start_span(f"{method} {scope['path']}", SERVER, attributes, parent=parent) as span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "error"
+                await send(message)
+            
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # Name by route template once routing has matched
+                route = scope.get("route")
+                if getattr(route, "path", None):
+                    span.name = f"{method} {route.path}"
+
+
+class AdmissionMiddleware:
+    """
+    Admit or reject chat requests before any work is done.
+    
+    Uses the worker's ``AdmissionController`` (``app.state.services.admission``);
+    requests pass straight through while it is not configured. Rejections are
+    answered at once with 429 or 503 and ``Retry-After``, or with 400 for a
+    batch too large to ever be admitted. Admitted requests count as in
+    flight until their response, including streamed bodies, has been sent. A batch costs one rate limit token and one in-flight unit per
+    item, since each item is a separate Gemini call.
+    
+    Clients are identified by the peer address. Requests from a trusted
+    proxy are identified by ``X-Client-Id``, then the nearest untrusted
+    ``X-Forwarded-For`` hop; from anyone else these headers are ignored, as
+    a client could set them to get a fresh bucket per request.
+    """
+    
+    def __init__(
+        self,
+        app,
+        path_prefix: str = "/chat",
+        trusted_proxies: Iterable[str] = (),
+        batch_path: str = "/chat/batch",
+        max_batch_items: int = 20
+    ):
+        """
+        Initialize middleware.
+        
+        Args:
+            app: Wrapped ASGI application
+            path_prefix: Only POST requests under this path are controlled
+            trusted_proxies: Addresses or CIDR ranges of gateways whose client headers are believed
+            batch_path: Path whose requests are charged per item
+            max_batch_items: Largest batch the endpoint accepts; larger ones are charged this much
+        
+        Raises:
+            ValueError: If a trusted proxy is not an IP address or network
+        """
+        self.app = app
+        self.path_prefix = path_prefix
+        self.trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in trusted_proxies]
+        self.batch_path = batch_path
+        self.max_batch_items = max(1, max_batch_items)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        
+        services = getattr(scope["app"].state, "services", None)
+        controller = getattr(services, "admission", None)
+        if controller is None:
+            await self.app(scope, receive, send)
+            return
+        
+        receive, ui_source, items = await _peek_body(receive, count_items=scope["path"] == self.batch_path)
+        # Oversized batches are rejected by the endpoint before any Gemini call
+        cost = min(items, self.max_batch_items)
+        decision = await controller.admit(_client_id(scope, self.trusted_proxies), ui_source, cost)
+        if not decision.admitted:
+            response = _rejection(decision.status_code, decision.retry_after)
+            await response(scope, receive, send)
+            return
+        
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(cost)
+
+
+def _client_id(scope, trusted_proxies: List[_Network]) -> str:
+    """
+    Identify the client for per-client rate limiting.
+    
+    Client headers are only believed from a trusted proxy. Proxies append to
+    ``X-Forwarded-For``, so hops a client could forge are on the left; the
+    nearest hop that is not itself a trusted proxy is used.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else "anonymous"
+    if not _is_trusted(peer, trusted_proxies):
+        return peer
+    
+    forwarded = []
+    for name, value in scope["headers"]:
+        if name == b"x-client-id":
+            return value.decode("latin-1")[:128]
+        if name == b"x-forwarded-for":
+            forwarded.extend(hop.strip().decode("latin-1") for hop in value.split(b","))
+    hops = [hop for hop in forwarded if hop]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else peer
+
+
+def _is_trusted(address: str, trusted_proxies: List[_Network]) -> bool:
+    """Whether ``address`` is one of the trusted proxies."""
+    if not trusted_proxies:
+        return False
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+async def _peek_body(receive, count_items: bool = False) -> Tuple[object, Optional[str], int]:
+    """
+    Read the request body to find ``metadata.ui_source`` and the batch size.
+    
+    Args:
+        receive: ASGI receive callable
+        count_items: Count the entries of a batch's ``requests`` list
+    
+    Returns:
+        A receive callable that replays the body, the ui_source if present,
+        and the number of batch items (1 if not counted or not a list)
+    """
+    messages = []
+    body = b""
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            break
+    
+    ui_source = None
+    items = 1
+    # Most single requests carry no metadata; skip parsing them
+    if count_items or b'"ui_source"' in body:
+        try:
+            payload = json.loads(body)
+            metadata = payload.get("metadata")
+            if isinstance(metadata, dict) and isinstance(metadata.get("ui_source"), str):
+                ui_source = metadata["ui_source"].strip()
+            if count_items and isinstance(payload.get("requests"), list):
+                items = max(1, len(payload["requests"]))
+        except (ValueError, AttributeError):
+            pass
+    
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+    
+    return replay, ui_source, items
+
+
+def _rejection(status_code: int, retry_after: float) -> JSONResponse:
+    """Error response matching the app's exception handlers."""
+    headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+    if status_code == 400:
+        # Retrying cannot help, so no Retry-After
+        error, message = "validation_error", "Batch is larger than the rate limit allows; split it into smaller batches"
+        headers = {}
+    elif status_code == 429:
+        error, message = "rate_limit_error", "Too many requests, please retry later"
+    else:
+        error, message = "overloaded", "Service is at capacity, please retry shortly"
+    return JSONResponse(
+        status_code=status_code,
+        headers=headers,
+        content={
+            "error": error,
+            "message": message,
+            "timestamp": int(time.time())
+        }
+    )
@@ -1,25 +1,42 @@
 """API routes for chatbot service."""
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import AsyncIterator
 import time
 import uuid
 
-from app.models.requests import ChatRequest
-from app.models.responses import ChatResponse
-from app.storage.session_store import SessionStore
-from app.api.dependencies import get_session_store
+from app.models.requests import ChatRequest, BatchChatRequest
+from app.models.responses import ChatResponse, BatchChatResponse, BatchItemResult, ErrorDetail
+from app.api.dependencies import get_chat_service
+from app.api.responses import FastJSONResponse
 from app.services.chat_service import ChatService
+from app.services.streaming import format_sse
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import REQUEST_SECONDS, record_error
+from app.core.exceptions import ChatbotException, ValidationError
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
+# Client-facing messages for failed batch items, matching the /chat error handlers
+_BATCH_ERROR_MESSAGES = {
+    "ai_service_error": "AI service temporarily unavailable",
+    "circuit_open": "AI service temporarily unavailable, please retry shortly",
+    "rate_limit_error": "Too many concurrent requests, please retry shortly",
+    "timeout_error": "AI service is busy, please retry shortly",
+    "session_error": "Session management error",
+}
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    session_store: SessionStore = Depends(get_session_store)
+    background_tasks: BackgroundTasks,
+    chat_service: ChatService = Depends(get_chat_service)
 ) -> ChatResponse:
     """Process chat message and return AI response."""
     request_id = str(uuid.uuid4())
@@ -33,13 +50,11 @@ async def chat(
     )
     
     try:
-        # Initialize chat service
-        chat_service = ChatService(session_store)
-        
         # Process request
         response = await chat_service.process_message(request)
         
         elapsed = time.time() - start_time
+        REQUEST_SECONDS.observe(elapsed, "chat")
         logger.info(
             "chat_success",
             request_id=request_id,
@@ -47,10 +62,17 @@ async def chat(
             elapsed=round(elapsed, 2)
         )
         
+        # Compact long histories after the response has been sent
+        background_tasks.add_task(chat_service.compact_session, response.meta.session_id)
+        
+        if settings.fast_json_enabled:
+            # Already validated by the chat service; skip response_model re-validation
+            return FastJSONResponse(response, background=background_tasks)
         return response
         
     except Exception as e:
         elapsed = time.time() - start_time
+        record_error(e)
         logger.error(
             "chat_failed",
             request_id=request_id,
@@ -59,3 +81,183 @@ async def chat(
             exc_info=True
         )
         raise
+
+
+@router.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(
+    batch: BatchChatRequest,
+    background_tasks: BackgroundTasks,
+    chat_service: ChatService = Depends(get_chat_service)
+) -> BatchChatResponse:
+    """
+    Process several chat messages concurrently.
+    
+    At most ``CHAT_BATCH_MAX_CONCURRENCY`` requests (or the batch's lower
+    ``max_concurrency``) run at once. Results are returned in request
+    order; a failed request gets an error in its result instead of
+    failing the batch.
+    """
+    request_id = str(uuid.uuid4())
+    start_time = time.time()
+    
+    if len(batch.requests) > settings.chat_batch_max_items:
+        raise ValidationError(f"Batch may hold at most {settings.chat_batch_max_items} requests", field="requests")
+    
+    concurrency = min(batch.max_concurrency or settings.chat_batch_max_concurrency, settings.chat_batch_max_concurrency)
+    logger.info(
+        "chat_batch_request",
+        request_id=request_id,
+        items=len(batch.requests),
+        concurrency=concurrency
+    )
+    
+    outcomes = await chat_service.process_batch(batch.requests, concurrency)
+    
+    results = []
+    session_ids = set()
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            record_error(outcome)
+            logger.warning(
+                "chat_batch_item_failed",
+                request_id=request_id,
+                index=index,
+                error=str(outcome)
+            )
+            results.append(BatchItemResult(index=index, error=_batch_error(outcome)))
+        else:
+            results.append(BatchItemResult(index=index, response=outcome))
+            session_ids.add(outcome.meta.session_id)
+    
+    # Compact long histories after the response has been sent
+    for session_id in session_ids:
+        background_tasks.add_task(chat_service.compact_session, session_id)
+    
+    failed = sum(1 for result in results if result.error is not None)
+    response = BatchChatResponse(results=results, succeeded=len(results) - failed, failed=failed)
+    
+    elapsed = time.time() - start_time
+    REQUEST_SECONDS.observe(elapsed, "chat_batch")
+    logger.info(
+        "chat_batch_success",
+        request_id=request_id,
+        succeeded=response.succeeded,
+        failed=failed,
+        elapsed=round(elapsed, 2)
+    )
+    
+    if settings.fast_json_enabled:
+        # Items were validated by the chat service; skip response_model re-validation
+        return FastJSONResponse(response, background=background_tasks)
+    return response
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    chat_service: ChatService = Depends(get_chat_service)
+) -> StreamingResponse:
+    """
+    Process chat message and stream the AI response as Server-Sent Events.
+    
+    Emits ``delta`` events carrying explanation text as it is generated,
+    followed by a single ``done`` event with the validated ChatResponse.
+    Failures after the stream has started are reported as an ``error`` event.
+    """
+    request_id = str(uuid.uuid4())
+    start_time = time.time()
+    
+    logger.info(
+        "chat_stream_request",
+        request_id=request_id,
+        has_session=bool(request.session_id),
+        message_length=len(request.user_message)
+    )
+    
+    events = chat_service.stream_message(request)
+    
+    # Wait for the first event so capacity and upstream errors that happen
+    # before any output still map to proper HTTP status codes
+    try:
+        first_event = await events.__anext__()
+    except StopAsyncIteration:
+        first_event = None
+    except Exception as e:
+        record_error(e)
+        logger.error(
+            "chat_stream_failed",
+            request_id=request_id,
+            error=str(e),
+            elapsed=round(time.time() - start_time, 2)
+        )
+        raise
+    
+    completed = {}
+    if first_event is not None and first_event[0] == "done":
+        completed["session_id"] = first_event[1].meta.session_id
+    
+    async def event_source() -> AsyncIterator[str]:
+        try:
+            if first_event is not None:
+                yield _encode_event(*first_event)
+                async for event in events:
+                    if event[0] == "done":
+                        completed["session_id"] = event[1].meta.session_id
+                    yield _encode_event(*event)
+            
+            elapsed = time.time() - start_time
+            REQUEST_SECONDS.observe(elapsed, "chat_stream")
+            logger.info(
+                "chat_stream_success",
+                request_id=request_id,
+                elapsed=round(elapsed, 2)
+            )
+        except Exception as e:
+            record_error(e)
+            error_type = e.error_type if isinstance(e, ChatbotException) else "internal_error"
+            logger.error(
+                "chat_stream_failed",
+                request_id=request_id,
+                error=str(e),
+                elapsed=round(time.time() - start_time, 2)
+            )
+            yield format_sse("error", {
+                "error": error_type,
+                "message": "Failed to complete response",
+                "timestamp": int(time.time())
+            })
+        finally:
+            await events.aclose()
+    
+    source = event_source()
+    
+    async def after_stream() -> None:
+        # If the client left before the body was iterated, event_source's
+        # finally never ran; close the chat stream and its Gemini slot here
+        await source.aclose()
+        await events.aclose()
+        if "session_id" in completed:
+            await chat_service.compact_session(completed["session_id"])
+    
+    return StreamingResponse(
+        source,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(after_stream)
+    )
+
+
+def _batch_error(error: Exception) -> ErrorDetail:
+    """Error detail for a failed batch item, without internal details."""
+    if isinstance(error, ValidationError):
+        return ErrorDetail(type=error.error_type, message=str(error), field=error.field)
+    if isinstance(error, ChatbotException) and error.error_type in _BATCH_ERROR_MESSAGES:
+        return ErrorDetail(type=error.error_type, message=_BATCH_ERROR_MESSAGES[error.error_type])
+    return ErrorDetail(type="internal_error", message="An unexpected error occurred")
+
+
+def _encode_event(event: str, payload) -> str:
+    """Encode a chat service event as an SSE frame."""
+    if event == "delta":
+        return format_sse("delta", {"text": payload})
+    return format_sse(event, payload.model_dump_json())
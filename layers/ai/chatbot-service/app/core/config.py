@@ -1,6 +1,6 @@
 """Application configuration management."""
 
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -22,7 +22,23 @@ class Settings(BaseSettings):
     # Session Storage
     redis_url: str = "redis://localhost:6379/0"
     session_ttl_seconds: int = 3600
+    session_max_turns: int = 20
     use_redis: bool = True
+    redis_max_connections: int = 64
+    redis_pool_timeout_seconds: float = 5.0
+    redis_socket_timeout_seconds: float = 5.0
+    redis_socket_connect_timeout_seconds: float = 2.0
+    redis_socket_keepalive: bool = True
+    redis_health_check_interval: int = 30
+    near_cache_enabled: bool = True
+    near_cache_max_entries: int = 1024
+    near_cache_ttl_seconds: float = 30.0
+    memory_store_max_sessions: int = 10000
+    memory_store_max_bytes: int = 64 * 1024 * 1024
+    shm_store_enabled: bool = True  # without Redis, share sessions between workers through shared memory
+    shm_store_path: str = "/dev/shm/chatbot-sessions"
+    shm_store_max_bytes: int = 32 * 1024 * 1024
+    shm_store_slot_bytes: int = 16 * 1024  # largest encoded session; older turns are dropped to fit
     
     # Security Settings
     max_tool_calls: int = 3
@@ -30,9 +46,88 @@ class Settings(BaseSettings):
     request_timeout_seconds: int = 120
     rate_limit_per_minute: int = 100
     
+    # Admission Control
+    admission_enabled: bool = True
+    rate_limit_burst: int = 20
+    rate_limit_backend: str = "memory"  # memory or redis
+    admission_max_in_flight: int = 0  # 0 = Gemini concurrency + queue
+    admission_priorities: str = ""  # ui_source:class pairs, classes high, normal or low
+    admission_default_priority: str = "normal"
+    admission_shed_retry_after_seconds: float = 2.0
+    admission_trusted_proxies: str = ""  # peer IPs or CIDRs whose X-Client-Id / X-Forwarded-For are believed
+    
+    # Gemini Concurrency
+    gemini_max_concurrency: int = 64
+    gemini_max_queue: int = 512
+    gemini_queue_timeout_seconds: float = 15.0
+    
+    # Batch Chat
+    chat_batch_max_items: int = 20
+    chat_batch_max_concurrency: int = 4  # per batch; Gemini calls still share the worker's limit
+    
+    # Search Grounding (new chat path)
+    grounding_mode: str = "auto"  # auto, always or never
+    
+    # Local Fast Path
+    fast_path_enabled: bool = True
+    fast_path_max_length: int = 120
+    
+    # Metrics
+    metrics_enabled: bool = True
+    
+    # Tracing
+    tracing_enabled: bool = False
+    tracing_service_name: str = "chatbot-service"
+    tracing_export_path: str = "traces/spans.jsonl"
+    tracing_sample_rate: float = 1.0
+    
+    # Responses
+    fast_json_enabled: bool = True
+    
+    # Prompt Prefix Cache
+    prompt_cache_enabled: bool = True
+    prompt_cache_ttl_seconds: int = 3600
+    prompt_cache_refresh_margin_seconds: int = 300
+    prompt_cache_min_tokens: int = 1024
+    
+    # Gemini Resilience
+    gemini_attempt_timeout_seconds: float = 30.0
+    gemini_max_attempts: int = 3
+    gemini_retry_base_delay_seconds: float = 0.25
+    gemini_retry_max_delay_seconds: float = 4.0
+    gemini_hedge_enabled: bool = False
+    gemini_hedge_min_delay_seconds: float = 1.0
+    circuit_failure_threshold: int = 5
+    circuit_recovery_seconds: float = 30.0
+    
+    # Response Cache
+    response_cache_enabled: bool = True
+    response_cache_backend: str = "memory"  # memory or redis
+    response_cache_ttl_seconds: int = 300
+    response_cache_max_entries: int = 2048
+    
+    # Request Coalescing
+    coalesce_enabled: bool = True
+    coalesce_mode: str = "local"  # local or redis
+    coalesce_lock_ttl_seconds: float = 30.0
+    coalesce_wait_timeout_seconds: float = 30.0
+    
+    # History Compaction
+    history_compaction_enabled: bool = True
+    history_token_budget: int = 1500
+    history_keep_recent_turns: int = 4
+    history_summary_max_chars: int = 1500
+    # extractive or llm; the /chat prompt does not read the summary yet, so
+    # llm would spend a Gemini slot on every long session for nothing
+    history_summary_mode: str = "extractive"
+    
     # Logging
     log_level: str = "INFO"
     log_format: str = "json"
+    log_async: bool = True  # render and write logs on a background thread
+    log_queue_size: int = 10000  # records beyond this are dropped
+    log_max_value_chars: int = 2000
+    log_sample_rates: str = ""  # event=rate pairs, e.g. processing_message=0.1,message_processed=0.1
     
     # CORS
     cors_origins: str = "http://localhost:3000,http://localhost:5173"
@@ -45,6 +140,21 @@ class Settings(BaseSettings):
         """Parse CORS origins into a list."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
     
+    @property
+    def admission_trusted_proxies_list(self) -> List[str]:
+        """Parse trusted proxy addresses into a list."""
+        return [proxy.strip() for proxy in self.admission_trusted_proxies.split(",") if proxy.strip()]
+    
+    @property
+    def log_sample_rates_map(self) -> Dict[str, float]:
+        """Parse log sample rates into event name -> fraction kept."""
+        rates = {}
+        for pair in self.log_sample_rates.split(","):
+            event, _, rate = pair.partition("=")
+            if event.strip() and rate.strip():
+                rates[event.strip()] = float(rate)
+        return rates
+    
     @property
     def is_production(self) -> bool:
         """Check if running in production."""
@@ -52,3 +52,12 @@ class AIServiceError(ChatbotException):
     
     def __init__(self, message: str):
         super().__init__(message, error_type="ai_service_error")
+
+
+class CircuitOpenError(AIServiceError):
+    """Upstream AI service is failing; calls are rejected until it recovers."""
+    
+    def __init__(self, message: str = "AI service circuit is open", retry_after: float = 0.0):
+        super().__init__(message)
+        self.error_type = "circuit_open"
+        self.retry_after = retry_after
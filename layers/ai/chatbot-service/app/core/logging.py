@@ -1,57 +1,285 @@
-"""Structured logging setup."""
+"""
+Structured logging setup.
 
-import sys
+A log call does only the cheap work on the calling thread: level filtering,
+sampling, and adding the level, logger name, time and trace ids. The event
+dict is then handed to a bounded queue, and a background thread renders it
+and writes it to stdout, so requests never wait on serialization or a slow
+pipe. Records from stdlib loggers (uvicorn, httpx) take the same route.
+"""
+
+import atexit
+import json
 import logging
-from typing import Any, Dict
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, TextIO, Union
 import structlog
 from app.core.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+from app.core.tracing import add_trace_context
+
+_STOP = object()
+
+_writer: Optional["_LogWriter"] = None
+_handler: Optional[logging.Handler] = None
+
+
+class _LogWriter:
+    """
+    Render log events and write them to a stream.
+    
+    With ``background`` set, events are queued and written by a daemon
+    thread in batches with one flush each; events arriving while the queue
+    is full are dropped and counted rather than blocking the caller.
+    """
+    
+    def __init__(
+        self,
+        stream: TextIO,
+        processors: List[Callable],
+        background: bool,
+        queue_size: int
+    ):
+        """
+        Initialize writer.
+        
+        Args:
+            stream: Destination for rendered lines
+            processors: Run on each event dict; the last one renders it to a string
+            background: Write on a background thread instead of the caller's
+            queue_size: Events held before new ones are dropped
+        """
+        self.stream = stream
+        self.processors = processors
+        self.queue_size = queue_size
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+    
+    def submit(self, item: Union[Dict[str, Any], logging.LogRecord]) -> None:
+        """Write an event dict or stdlib record, or queue it for the writer thread."""
+        if self._queue is None:
+            self._write([item])
+            return
+        if self._queue.qsize() >= self.queue_size:
+            LOG_RECORDS_DROPPED.inc()
+            return
+        self._queue.put(item)
+    
+    def close(self) -> None:
+        """Write queued events and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            self._write([item for item in batch if item is not _STOP])
+            if stop:
+                return
+    
+    def _write(self, batch: List[Union[Dict[str, Any], logging.LogRecord]]) -> None:
+        lines = []
+        for item in batch:
+            event_dict = _record_to_event(item) if isinstance(item, logging.LogRecord) else item
+            try:
+                for processor in self.processors:
+                    event_dict = processor(None, event_dict.get("level", "info"), event_dict)
+                lines.append(event_dict)
+            except Exception:
+                # A value that cannot be rendered must not stop the writer
+                lines.append(json.dumps({"event": "log_render_failed", "logger": __name__}))
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except (OSError, ValueError):
+            pass
+
+
+class _WriterLogger:
+    """structlog logger passing finished event dicts to the writer."""
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def _submit(self, event_dict: Dict[str, Any]) -> None:
+        if _writer is not None:
+            _writer.submit(event_dict)
+    
+    debug = info = warning = warn = error = critical = fatal = msg = _submit
+
+
+class _WriterHandler(logging.Handler):
+    """stdlib handler passing records, still unformatted, to the writer."""
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        if _writer is not None:
+            _writer.submit(record)
+
+
+def _logger_factory(name: str = "", *args: Any) -> _WriterLogger:
+    return _WriterLogger(name)
+
+
+def _record_to_event(record: logging.LogRecord) -> Dict[str, Any]:
+    """Event dict for a stdlib record; its message is formatted here, off the caller."""
+    event_dict = {
+        "event": record.getMessage(),
+        "level": record.levelname.lower(),
+        "logger": record.name,
+        "timestamp": record.created,
+    }
+    if record.exc_info:
+        event_dict["exception"] = logging.Formatter().formatException(record.exc_info)
+    return event_dict
+
+
+def add_time(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """structlog processor recording the event time; formatted by the writer."""
+    event_dict["timestamp"] = time.time()
+    return event_dict
+
+
+def format_time(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """structlog processor formatting the recorded event time as ISO 8601 UTC."""
+    timestamp = event_dict.get("timestamp")
+    if isinstance(timestamp, float):
+        event_dict["timestamp"] = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return event_dict
+
+
+def sample_events(rates: Dict[str, float]) -> Callable:
+    """
+    structlog processor keeping only a fraction of the named events.
+    
+    Only debug and info events are sampled; kept events carry their
+    ``sample_rate`` so counts can be scaled back up.
+    
+    Args:
+        rates: Event name -> fraction of events to keep
+    """
+    def processor(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        rate = rates.get(event_dict.get("event"))
+        if rate is not None and method_name in ("debug", "info"):
+            if random.random() >= rate:
+                raise structlog.DropEvent
+            event_dict["sample_rate"] = rate
+        return event_dict
+    return processor
+
+
+def cap_values(max_chars: int) -> Callable:
+    """
+    structlog processor truncating event values longer than ``max_chars``.
+    
+    Strings are cut as they are; containers are cut after JSON encoding.
+    Formatted exceptions are left whole.
+    """
+    def processor(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        for key, value in event_dict.items():
+            if key == "exception":
+                continue
+            if isinstance(value, str):
+                text = value
+            elif isinstance(value, (dict, list, tuple, set)):
+                text = json.dumps(value, default=str, ensure_ascii=False)
+            else:
+                continue
+            if len(text) > max_chars:
+                event_dict[key] = f"{text[:max_chars]}...[{len(text) - max_chars} more chars]"
+        return event_dict
+    return processor
+
+
+def _to_writer(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Any:
+    # Pass the dict itself rather than unpacking it into keyword arguments
+    return (event_dict,), {}
 
 
 def setup_logging() -> None:
     """Configure structured logging for the application."""
+    global _writer, _handler
+    
+    shutdown_logging()
     
     # Determine log level
     log_level = getattr(logging, settings.log_level.upper(), logging.INFO)
     
-    # Configure standard logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=log_level,
-    )
-    
-    # Shared processors for all configurations
-    shared_processors = [
-        structlog.stdlib.add_log_level,
+    # Run on the calling thread, before the event leaves it
+    caller_processors = [
+        sample_events(settings.log_sample_rates_map),
+        structlog.processors.add_log_level,
         structlog.stdlib.add_logger_name,
-        structlog.processors.TimeStamper(fmt="iso"),
+        add_time,
         structlog.processors.StackInfoRenderer(),
+        # Needs the caller's exception context
+        structlog.processors.format_exc_info,
     ]
     
+    if settings.tracing_enabled:
+        caller_processors.append(add_trace_context)
+    
     if settings.log_format == "json":
         # JSON formatting for production
-        structlog.configure(
-            processors=shared_processors + [
-                structlog.processors.format_exc_info,
-                structlog.processors.UnicodeDecoder(),
-                structlog.processors.JSONRenderer(),
-            ],
-            wrapper_class=structlog.stdlib.BoundLogger,
-            context_class=dict,
-            logger_factory=structlog.stdlib.LoggerFactory(),
-            cache_logger_on_first_use=True,
-        )
+        renderer = structlog.processors.JSONRenderer()
     else:
         # Human-readable formatting for development
-        structlog.configure(
-            processors=shared_processors + [
-                structlog.dev.ConsoleRenderer(),
-            ],
-            wrapper_class=structlog.stdlib.BoundLogger,
-            context_class=dict,
-            logger_factory=structlog.stdlib.LoggerFactory(),
-            cache_logger_on_first_use=True,
-        )
+        renderer = structlog.dev.ConsoleRenderer()
+    
+    # Run by the writer; also applied to stdlib records
+    _writer = _LogWriter(
+        sys.stdout,
+        [format_time, cap_values(settings.log_max_value_chars), renderer],
+        background=settings.log_async,
+        queue_size=settings.log_queue_size,
+    )
+    
+    _handler = _WriterHandler()
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(log_level)
+    
+    structlog.configure(
+        processors=caller_processors + [_to_writer],
+        # Calls below the level return without building an event
+        wrapper_class=structlog.make_filtering_bound_logger(log_level),
+        context_class=dict,
+        logger_factory=_logger_factory,
+        cache_logger_on_first_use=True,
+    )
+
+
+def shutdown_logging() -> None:
+    """Write out queued events and detach the handler installed by ``setup_logging``."""
+    global _writer, _handler
+    
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+
+
+atexit.register(shutdown_logging)
 
 
 def get_logger(name: str) -> Any:
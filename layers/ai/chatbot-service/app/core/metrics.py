@@ -0,0 +1,287 @@
+"""Prometheus metrics for the chat pipeline."""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; covers local fast path answers up to slow grounded generations
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return f"{int(value)}.0"
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """
+    Base class for a metric family with fixed label names.
+    
+    Values are updated in place with no locking; all updates happen on the
+    worker's event loop thread. Each uvicorn worker keeps its own values,
+    so every worker must be scraped (or the values summed) separately.
+    """
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        """
+        Initialize metric.
+        
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Names of the labels, in the order values are passed
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+    
+    def _labels(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+    
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Sample lines for this metric."""
+    
+    def render(self) -> List[str]:
+        """HELP, TYPE and sample lines for this metric."""
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set."""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add ``amount`` to the count for ``labels``."""
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+    
+    def value(self, *labels: str) -> float:
+        """Current count for ``labels``."""
+        return self._values.get(labels, 0.0)
+    
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(k)} {_format_value(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, optionally read from a callback at scrape time."""
+    
+    kind = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+    
+    def set(self, value: float, *labels: str) -> None:
+        """Set the value for ``labels``."""
+        self._values[labels] = value
+    
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add ``amount`` to the value for ``labels``."""
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+    
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        """Subtract ``amount`` from the value for ``labels``."""
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+    
+    def value(self, *labels: str) -> float:
+        """Current value for ``labels``."""
+        return self._values.get(labels, 0.0)
+    
+    def set_callback(self, callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]]) -> None:
+        """
+        Read values from ``callback`` at scrape time instead of storing them.
+        
+        Args:
+            callback: Returns label values -> value; None to remove
+        """
+        self._callback = callback
+    
+    def samples(self) -> List[str]:
+        values = self._values
+        if self._callback is not None:
+            values = self._callback()
+        return [f"{self.name}{self._labels(k)} {_format_value(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in fixed buckets.
+    
+    An observation increments a single bucket; the cumulative counts the
+    exposition format needs are computed when rendering.
+    """
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        """
+        Initialize histogram.
+        
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Names of the labels
+            buckets: Upper bounds, ascending; ``+Inf`` is added
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+    
+    def observe(self, value: float, *labels: str) -> None:
+        """Record ``value`` for ``labels``."""
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+    
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the elapsed time of its block."""
+        return _Timer(self, labels)
+    
+    def count(self, *labels: str) -> int:
+        """Number of observations for ``labels``."""
+        state = self._values.get(labels)
+        return sum(state[:-1]) if state else 0
+    
+    def samples(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (math.inf,)
+        for labels, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    """Observe the duration of a ``with`` block, including blocks that raise."""
+    
+    __slots__ = ("histogram", "labels", "start")
+    
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+    
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    """Set of metrics rendered together in the Prometheus text format."""
+    
+    def __init__(self):
+        """Initialize empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric.
+        
+        Raises:
+            ValueError: If a metric with the same name is registered
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """Render all metrics."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "chatbot_stage_duration_seconds",
+    "Time spent in each chat pipeline stage.",
+    ["stage"],
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "chatbot_request_duration_seconds",
+    "End-to-end chat request latency.",
+    ["endpoint"],
+))
+GEMINI_SECONDS = REGISTRY.register(Histogram(
+    "chatbot_gemini_call_duration_seconds",
+    "Gemini generation call latency, by whether it was grounded with Google Search.",
+    ["grounded"],
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "chatbot_cache_lookups_total",
+    "Chat answers served locally or from cache, and misses that went to Gemini.",
+    ["cache", "result"],
+))
+ERRORS = REGISTRY.register(Counter(
+    "chatbot_errors_total",
+    "Errors raised or absorbed in the chat pipeline, by exception type.",
+    ["type"],
+))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "chatbot_requests_in_flight",
+    "HTTP requests currently being processed by this worker.",
+))
+LOG_RECORDS_DROPPED = REGISTRY.register(Counter(
+    "chatbot_log_records_dropped_total",
+    "Log records dropped because the log queue was full.",
+))
+SESSION_POOL = REGISTRY.register(Gauge(
+    "chatbot_session_pool_connections",
+    "Session store connection pool usage.",
+    ["state"],
+))
+
+
+def record_error(error: BaseException) -> None:
+    """Count an error by its exception type."""
+    ERRORS.inc(type(error).__name__)
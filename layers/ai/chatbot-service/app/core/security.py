@@ -1,22 +1,62 @@
 """Security utilities for input validation and sanitization."""
 
 import re
+from functools import lru_cache
 from typing import Optional
 import bleach
 
+# Characters that make bleach parse markup or escape output. Form feed is
+# included because bleach keeps or replaces it depending on tokenization.
+# Checked with ``in``, which is several times faster than a regex class.
+_MARKUP_CHARS = ("<", "&", ">", "\x0c")
 
+# What bleach does to plain text: drops NUL and replaces other control
+# characters (except tab, newline and carriage return) with "?"
+_BLEACH_CONTROL = {0: None}
+_BLEACH_CONTROL.update({code: "?" for code in range(1, 32) if chr(code) not in "\t\n\r"})
+
+# Control characters rejected by sanitize_input (NUL is checked separately)
+_INVALID_CONTROL = re.compile(r"[\x01-\x08\x0b\x0c\x0e-\x1f]")
+
+# Chat role keys used in prompt injection attempts
+_ROLE_MARKERS = re.compile(r'"(?:role|system|user|assistant)":', re.IGNORECASE | re.ASCII)
+_ROLE_OBJECT = re.compile(r'\{[^}]*"role"[^}]*\}', re.IGNORECASE)
+
+_URL = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE
+)
+
+_SESSION_ID = re.compile(r'^[a-zA-Z0-9_-]+$')
+
+# Distinct inputs memoized by escape_html and sanitize_for_prompt
+_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
 def escape_html(text: str) -> str:
     """
     Remove HTML tags and escape special characters.
     
+    Text without ``<``, ``&`` or ``>`` cannot contain markup, so it skips
+    the HTML parse; only bleach's control character handling is applied.
+    Results are memoized, so repeated messages are cleaned once.
+    
     Args:
         text: Input text that may contain HTML
         
     Returns:
         Cleaned text with HTML removed and normalized whitespace
     """
-    # Strip all HTML tags
-    cleaned = bleach.clean(text, tags=[], strip=True)
+    if not any(char in text for char in _MARKUP_CHARS):
+        cleaned = text.translate(_BLEACH_CONTROL)
+    else:
+        # Strip all HTML tags
+        cleaned = bleach.clean(text, tags=[], strip=True)
     # Normalize whitespace
     return " ".join(cleaned.split())
 
@@ -69,9 +109,9 @@ def sanitize_input(text: str) -> str:
         raise ValueError("Input contains null bytes")
     
     # Check for control characters (except newline, carriage return, tab)
-    for char in cleaned:
-        if ord(char) < 32 and char not in '\n\r\t':
-            raise ValueError(f"Input contains invalid control character: {repr(char)}")
+    match = _INVALID_CONTROL.search(cleaned)
+    if match is not None:
+        raise ValueError(f"Input contains invalid control character: {repr(match.group())}")
     
     return cleaned
 
@@ -96,21 +136,13 @@ def validate_url(url: str) -> Optional[str]:
         return None
     
     # Basic URL pattern validation
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE
-    )
-    
-    if url_pattern.match(url):
+    if _URL.match(url):
         return url
     
     return None
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def sanitize_for_prompt(text: str) -> str:
     """
     Sanitize text before including in AI prompt.
@@ -127,9 +159,9 @@ def sanitize_for_prompt(text: str) -> str:
     
     # Remove any embedded JSON or structured data attempts
     # This prevents injection like: {"role": "system", "content": "..."}
-    if any(marker in cleaned.lower() for marker in ['"role":', '"system":', '"user":', '"assistant":']):
+    if _ROLE_MARKERS.search(cleaned):
         # Strip out potential JSON structures
-        cleaned = re.sub(r'\{[^}]*"role"[^}]*\}', '', cleaned, flags=re.IGNORECASE)
+        cleaned = _ROLE_OBJECT.sub('', cleaned)
     
     return cleaned.strip()
 
@@ -153,7 +185,7 @@ def validate_session_id(session_id: Optional[str]) -> Optional[str]:
         return None
     
     # Must be alphanumeric with hyphens/underscores only
-    if not re.match(r'^[a-zA-Z0-9_-]+$', normalized):
+    if not _SESSION_ID.match(normalized):
         return None
     
     if len(normalized) > 100:
@@ -3,16 +3,21 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import time
 
 from app.core.config import settings
-from app.core.logging import get_logger
-from app.core.exceptions import ValidationError, AIServiceError, SessionError
+from app.core.logging import get_logger, setup_logging
+from app.core.metrics import REGISTRY, SESSION_POOL, CONTENT_TYPE
+from app.core.tracing import configure_tracing, shutdown_tracing
+from app.core.exceptions import ValidationError, AIServiceError, SessionError, RateLimitError, TimeoutError, CircuitOpenError
+from app.agents.concurrency import get_generation_limiter
+from app.agents.resilience import get_gemini_caller
+from app.api.middleware import AdmissionMiddleware, InFlightMiddleware, RequestDeadlineMiddleware, TracingMiddleware
 from app.api.routes import router as api_router
-from app.storage.session_store import SessionStore
-from app.api.dependencies import get_session_store
+from app.api.dependencies import get_session_store, ServiceContainer
 
+setup_logging()
 logger = get_logger(__name__)
 
 
@@ -20,10 +25,16 @@ logger = get_logger(__name__)
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     logger.info("application_startup", environment=settings.environment)
+    if settings.tracing_enabled:
+        configure_tracing(settings.tracing_service_name, settings.tracing_export_path, settings.tracing_sample_rate)
+    services = await ServiceContainer.create()
+    await services.warmup()
+    app.state.services = services
     yield
     # Cleanup
-    store = await get_session_store()
-    await store.close()
+    await services.close()
+    app.state.services = None
+    shutdown_tracing()
     logger.info("application_shutdown")
 
 
@@ -34,6 +45,14 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Admission control for chat endpoints (inside CORS so rejections carry CORS headers)
+app.add_middleware(
+    AdmissionMiddleware,
+    path_prefix="/chat",
+    trusted_proxies=settings.admission_trusted_proxies_list,
+    max_batch_items=settings.chat_batch_max_items
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -43,6 +62,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Overall request budget, enforced on Gemini calls
+app.add_middleware(RequestDeadlineMiddleware, timeout=settings.request_timeout_seconds)
+
+# Server span per request, continuing the caller's trace
+app.add_middleware(TracingMiddleware)
+
+# Outermost, so requests rejected by admission control are counted too
+app.add_middleware(InFlightMiddleware)
+
 
 # Global exception handlers
 @app.exception_handler(ValidationError)
@@ -73,6 +101,51 @@ async def ai_service_error_handler(request: Request, exc: AIServiceError):
     )
 
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_error_handler(request: Request, exc: CircuitOpenError):
+    """Handle requests rejected while the Gemini circuit is open."""
+    logger.warning("circuit_open_error", path=request.url.path, retry_after=exc.retry_after)
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(max(1, int(exc.retry_after + 0.999)))},
+        content={
+            "error": "circuit_open",
+            "message": "AI service temporarily unavailable, please retry shortly",
+            "timestamp": int(time.time())
+        }
+    )
+
+
+@app.exception_handler(RateLimitError)
+async def rate_limit_error_handler(request: Request, exc: RateLimitError):
+    """Handle requests rejected because the AI queue is full."""
+    logger.warning("rate_limit_error", error=str(exc), path=request.url.path)
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": "1"},
+        content={
+            "error": "rate_limit_error",
+            "message": "Too many concurrent requests, please retry shortly",
+            "timestamp": int(time.time())
+        }
+    )
+
+
+@app.exception_handler(TimeoutError)
+async def timeout_error_handler(request: Request, exc: TimeoutError):
+    """Handle requests that timed out waiting for AI capacity."""
+    logger.warning("timeout_error", error=str(exc), path=request.url.path)
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "2"},
+        content={
+            "error": "timeout_error",
+            "message": "AI service is busy, please retry shortly",
+            "timestamp": int(time.time())
+        }
+    )
+
+
 @app.exception_handler(SessionError)
 async def session_error_handler(request: Request, exc: SessionError):
     """Handle session errors."""
@@ -109,10 +182,42 @@ async def health_check():
         "status": "healthy",
         "timestamp": int(time.time()),
         "version": "1.0.0",
-        "environment": settings.environment
+        "environment": settings.environment,
+        "gemini": get_generation_limiter().stats(),
+        "gemini_resilience": get_gemini_caller().stats(),
+        **_service_stats()
     }
 
 
+def _service_stats() -> dict:
+    """Stats from the worker's service container, if it has been built."""
+    services = getattr(app.state, "services", None)
+    return services.stats() if services is not None else {}
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics for this worker."""
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def _session_pool_usage() -> dict:
+    """Session store connection pool usage, read when metrics are scraped."""
+    stats = _service_stats().get("session_store") or {}
+    pool = stats.get("pool") or (stats.get("shared") or {}).get("pool")
+    if not pool:
+        return {}
+    return {
+        ("in_use",): pool["in_use"],
+        ("idle",): pool["idle"],
+        ("max",): pool["max_connections"],
+    }
+
+
+SESSION_POOL.set_callback(_session_pool_usage)
+
+
 @app.get("/ready")
 async def readiness_check():
     """Readiness check endpoint."""
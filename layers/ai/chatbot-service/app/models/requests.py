@@ -1,6 +1,6 @@
 """Request models for the chatbot API."""
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 
 
@@ -84,3 +84,14 @@ class ChatRequest(BaseModel):
                 return None
             return normalized
         return v
+
+
+class BatchChatRequest(BaseModel):
+    """Request model for the batch chat endpoint."""
+    
+    model_config = ConfigDict(extra="forbid")
+    
+    requests: List[ChatRequest] = Field(..., min_length=1)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+    # Batch-level ui_source, used for admission priority
+    metadata: Optional[Metadata] = None
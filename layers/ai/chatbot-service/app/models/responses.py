@@ -77,6 +77,7 @@ class ResponseMetadata(BaseModel):
     session_id: str = Field(..., min_length=1, max_length=100)
     ttl_remaining_sec: int = Field(..., ge=0)
     generated_at: int = Field(..., ge=0)
+    cache_hit: bool = False
 
 
 class ChatResponse(BaseModel):
@@ -121,3 +122,23 @@ class ErrorResponse(BaseModel):
     model_config = ConfigDict(extra="forbid")
     
     error: ErrorDetail
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one request in a batch."""
+    
+    model_config = ConfigDict(extra="forbid")
+    
+    index: int = Field(..., ge=0)
+    response: Optional[ChatResponse] = None
+    error: Optional[ErrorDetail] = None
+
+
+class BatchChatResponse(BaseModel):
+    """Batch API response, with one result per request in request order."""
+    
+    model_config = ConfigDict(extra="forbid")
+    
+    results: List[BatchItemResult]
+    succeeded: int = Field(..., ge=0)
+    failed: int = Field(..., ge=0)
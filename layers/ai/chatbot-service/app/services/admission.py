@@ -0,0 +1,160 @@
+"""Admission control: per-client rate limits and priority-aware load shedding."""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.storage.rate_limit import RateLimiter
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Share of the in-flight cap each priority class may fill; lower classes
+# are shed first as load rises
+PRIORITY_LIMITS = {
+    "high": 1.0,
+    "normal": 0.85,
+    "low": 0.5,
+}
+
+
+def parse_priorities(spec: str) -> Dict[str, str]:
+    """
+    Parse ``ui_source:class`` pairs, e.g. ``"web:high,batch:low"``.
+    
+    Raises:
+        ValueError: If a class is not one of ``PRIORITY_LIMITS``
+    """
+    priorities = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        source, _, priority = item.partition(":")
+        priority = priority.strip().lower()
+        if priority not in PRIORITY_LIMITS:
+            raise ValueError(f"Unknown priority class for {source.strip()!r}: {priority!r}")
+        priorities[source.strip()] = priority
+    return priorities
+
+
+@dataclass
+class AdmissionDecision:
+    """Outcome of an admission check."""
+    
+    admitted: bool
+    status_code: int = 200
+    retry_after: float = 0.0
+    reason: str = "admitted"
+
+
+class AdmissionController:
+    """
+    Decide immediately whether a request may start.
+    
+    A request is rejected with 503 when the worker's in-flight count has
+    reached the share of the cap its priority class may use, and otherwise
+    with 429 when its client has no rate limit tokens left. Shed requests
+    cost no tokens. A request fanning out to several upstream calls (a
+    batch) is admitted with a ``cost`` and takes that many tokens and
+    in-flight units, all or none. A cost that could never be granted (above
+    the rate limit burst or the in-flight cap) is rejected with 400 instead,
+    as retrying would not help. Requests are never queued
+    here; queuing for Gemini slots happens in the generation limiter.
+    """
+    
+    def __init__(
+        self,
+        rate_limiter: Optional[RateLimiter],
+        max_in_flight: int,
+        priorities: Optional[Dict[str, str]] = None,
+        default_priority: str = "normal",
+        shed_retry_after: float = 2.0
+    ):
+        """
+        Initialize controller.
+        
+        Args:
+            rate_limiter: Per-client token buckets (no per-client limit if None)
+            max_in_flight: Requests this worker may process at once
+            priorities: ``Metadata.ui_source`` -> priority class
+            default_priority: Class for unknown or missing ui_source
+            shed_retry_after: Retry-After seconds sent with 503 responses
+        """
+        self.rate_limiter = rate_limiter
+        self.max_in_flight = max(1, max_in_flight)
+        self.priorities = priorities or {}
+        self.default_priority = default_priority
+        self.shed_retry_after = shed_retry_after
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.too_large = 0
+        self.shed: Dict[str, int] = {name: 0 for name in PRIORITY_LIMITS}
+    
+    def priority(self, ui_source: Optional[str]) -> str:
+        """Priority class for a request's ``ui_source``."""
+        if ui_source is None:
+            return self.default_priority
+        return self.priorities.get(ui_source, self.default_priority)
+    
+    async def admit(self, client_id: str, ui_source: Optional[str] = None, cost: int = 1) -> AdmissionDecision:
+        """
+        Admit or reject a request; admitted requests must call ``release`` with the same cost.
+        
+        Args:
+            client_id: Client identity for rate limiting
+            ui_source: ``Metadata.ui_source`` of the request, if any
+            cost: Upstream calls the request may make
+        
+        Returns:
+            Admission decision
+        """
+        priority = self.priority(ui_source)
+        burst = self.rate_limiter.burst if self.rate_limiter is not None else cost
+        if cost > burst or cost - 1 >= self.max_in_flight * PRIORITY_LIMITS[priority]:
+            self.too_large += 1
+            logger.warning("request_too_large", cost=cost, burst=burst, priority=priority)
+            return AdmissionDecision(False, 400, 0.0, "too_large")
+        
+        # Shed before spending a rate limit token on a request that won't run.
+        # No await between the check and the increment, so the cap holds.
+        if self.in_flight + cost - 1 >= self.max_in_flight * PRIORITY_LIMITS[priority]:
+            self.shed[priority] += 1
+            logger.warning("request_shed", priority=priority, in_flight=self.in_flight)
+            return AdmissionDecision(False, 503, self.shed_retry_after, "overloaded")
+        
+        self.in_flight += cost
+        if self.rate_limiter is not None:
+            try:
+                allowed, retry_after = await self.rate_limiter.acquire(client_id, cost)
+            except BaseException:
+                self.in_flight -= cost
+                raise
+            if not allowed:
+                self.in_flight -= cost
+                self.rate_limited += 1
+                logger.info("request_rate_limited", client_id=client_id, cost=cost, retry_after=round(retry_after, 2))
+                return AdmissionDecision(False, 429, retry_after, "rate_limited")
+        
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.admitted += 1
+        return AdmissionDecision(True)
+    
+    def release(self, cost: int = 1) -> None:
+        """Mark an admitted request as finished."""
+        self.in_flight -= cost
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return admission counters."""
+        stats = {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "too_large": self.too_large,
+            "shed": dict(self.shed),
+        }
+        if self.rate_limiter is not None:
+            stats["rate_limiter"] = self.rate_limiter.stats()
+        return stats
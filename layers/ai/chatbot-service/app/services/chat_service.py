@@ -1,48 +1,85 @@
 """Production-ready chat service."""
 
-from typing import Optional
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
+import json
+import os
 import time
+import uuid
 
 from app.agents.gemini_client import GeminiClient
+from app.agents.singleflight import SingleFlight
 from app.models.requests import ChatRequest
 from app.models.responses import ChatResponse, ChatData, ResponseMetadata
 from app.models.enums import Timeframe
+from app.models.internal import ConversationTurn
+from app.services.compaction import HistoryCompactor
+from app.services.intent import ChartIntentParser
+from app.services.streaming import ExplanationStreamer
 from app.storage.session_store import SessionStore
+from app.storage.response_cache import ResponseCache, make_cache_key
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.core.exceptions import AIServiceError, ValidationError
+from app.core.metrics import STAGE_SECONDS, CACHE_LOOKUPS, record_error
+from app.core.tracing import CLIENT, start_span
+from app.core.exceptions import AIServiceError, ValidationError, RateLimitError, TimeoutError, CircuitOpenError
 
 logger = get_logger(__name__)
 
 
+def load_system_prompt() -> str:
+    """Load system prompt from file."""
+    try:
+        prompt_path = os.path.join(os.path.dirname(__file__), "..", "models", "SYSTEM_PROMPT.md")
+        with open(prompt_path, "r") as f:
+            return f.read()
+    except Exception as e:
+        logger.warning("failed_to_load_system_prompt", error=str(e))
+        return "You are a cryptocurrency market analysis assistant. Provide accurate and helpful information."
+
+
 class ChatService:
     """Main chat service handling user requests."""
     
-    def __init__(self, session_store: SessionStore):
-        """Initialize chat service."""
+    def __init__(
+        self,
+        session_store: SessionStore,
+        gemini_client: Optional[GeminiClient] = None,
+        system_prompt: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        singleflight: Optional[SingleFlight] = None,
+        compactor: Optional[HistoryCompactor] = None,
+        intent_parser: Optional[ChartIntentParser] = None
+    ):
+        """
+        Initialize chat service.
+        
+        Args:
+            session_store: Session storage backend
+            gemini_client: Shared Gemini client (created if not provided)
+            system_prompt: Preloaded system prompt (read from disk if not provided)
+            response_cache: Cache for repeated questions (disabled if not provided)
+            singleflight: Coalescer for identical in-flight prompts (disabled if not provided)
+            compactor: History compactor for long sessions (disabled if not provided)
+            intent_parser: Local fast path for simple chart requests (disabled if not provided)
+        """
         self.session_store = session_store
-        self.gemini_client = GeminiClient()
-        self.system_prompt = self._load_system_prompt()
+        self.gemini_client = gemini_client or GeminiClient()
+        self.system_prompt = system_prompt if system_prompt is not None else load_system_prompt()
+        self.response_cache = response_cache
+        self.singleflight = singleflight
+        self.compactor = compactor
+        self.intent_parser = intent_parser
         logger.info("chat_service_initialized")
     
-    def _load_system_prompt(self) -> str:
-        """Load system prompt from file."""
-        try:
-            import os
-            prompt_path = os.path.join(os.path.dirname(__file__), "..", "models", "SYSTEM_PROMPT.md")
-            with open(prompt_path, "r") as f:
-                return f.read()
-        except Exception as e:
-            logger.warning("failed_to_load_system_prompt", error=str(e))
-            return "You are a cryptocurrency market analysis assistant. Provide accurate and helpful information."
-    
     async def process_message(self, request: ChatRequest) -> ChatResponse:
         """
         Process user message and generate response.
         
         Args:
             request: Chat request with user message
-            
+        
         Returns:
             Complete chat response with data and metadata
         """
@@ -50,47 +87,271 @@ class ChatService:
             start_time = time.time()
             
             # Get or create session ID
-            import uuid
             session_id = request.session_id or str(uuid.uuid4())
             
             logger.info("processing_message", session_id=session_id, message_length=len(request.user_message))
             
-            # Generate response using Gemini with enforced JSON output
-            response_data = self.gemini_client.generate(
-                prompt=request.user_message,
-                system_prompt=self.system_prompt
-            )
+            local_data = self._answer_locally(request)
+            if local_data is not None:
+                response = await self._build_response(session_id, request, local_data)
+                logger.info("message_processed", session_id=session_id, fast_path=True, elapsed=round(time.time() - start_time, 4))
+                return response
             
-            # Parse and validate response
-            chat_data = self._parse_response(response_data)
+            cache_key = self._cache_key(request)
+            response_data = await self._get_cached(cache_key)
+            cache_hit = response_data is not None
+            
+            if not cache_hit:
+                with STAGE_SECONDS.time("gemini"):
+                    response_data = await self._generate(request)
+            
+            response = await self._build_response(session_id, request, response_data, cache_hit)
+            
+            if not cache_hit:
+                await self._store_cached(cache_key, response_data)
+            
+            elapsed = time.time() - start_time
+            logger.info("message_processed", session_id=session_id, cache_hit=cache_hit, elapsed=round(elapsed, 2))
+            
+            return response
+        
+        except (RateLimitError, TimeoutError, CircuitOpenError):
+            # Capacity errors are surfaced as-is so callers can back off
+            raise
+        except Exception as e:
+            logger.error("message_processing_failed", error=str(e))
+            raise AIServiceError(f"Failed to process message: {str(e)}")
+    
+    async def process_batch(
+        self,
+        requests: List[ChatRequest],
+        max_concurrency: int
+    ) -> List[Union[ChatResponse, Exception]]:
+        """
+        Process several chat requests concurrently.
+        
+        Each request goes through ``process_message``, so requests in a batch
+        share the response cache and identical in-flight prompts are
+        coalesced. Requests for the same session run one after another in
+        batch order, keeping its history in order.
+        
+        Args:
+            requests: Chat requests in batch order
+            max_concurrency: Requests processed at once
+        
+        Returns:
+            The response, or the exception raised, for each request in batch order
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        results: List[Union[ChatResponse, Exception, None]] = [None] * len(requests)
+        
+        # Requests without a session each start their own
+        chains: Dict[Any, List[int]] = {}
+        for index, request in enumerate(requests):
+            chains.setdefault(request.session_id or index, []).append(index)
+        
+        async def run_chain(indexes: List[int]) -> None:
+            for index in indexes:
+                async with semaphore:
+                    try:
+                        results[index] = await self.process_message(requests[index])
+                    except Exception as e:
+                        results[index] = e
+        
+        await asyncio.gather(*(run_chain(indexes) for indexes in chains.values()))
+        return results
+    
+    async def stream_message(self, request: ChatRequest) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Process user message, streaming the explanation as it is generated.
+        
+        Yields ``("delta", text)`` for each new piece of explanation text and
+        finally ``("done", ChatResponse)`` with the validated response. The
+        session is only updated once the full response has been received.
+        
+        Args:
+            request: Chat request with user message
+        
+        Yields:
+            (event, payload) tuples
+        """
+        try:
+            start_time = time.time()
+            session_id = request.session_id or str(uuid.uuid4())
+            
+            logger.info("streaming_message", session_id=session_id, message_length=len(request.user_message))
+            
+            local_data = self._answer_locally(request)
+            if local_data is not None:
+                yield "delta", local_data["data"]["explanation"]
+                response = await self._build_response(session_id, request, local_data)
+                logger.info("message_streamed", session_id=session_id, fast_path=True, elapsed=round(time.time() - start_time, 4))
+                yield "done", response
+                return
+            
+            cache_key = self._cache_key(request)
+            response_data = await self._get_cached(cache_key)
+            cache_hit = response_data is not None
+            first_delta_at = None
+            
+            if cache_hit:
+                explanation = str(response_data.get("data", {}).get("explanation", ""))
+                if explanation:
+                    first_delta_at = time.time()
+                    yield "delta", explanation
+            else:
+                streamer = ExplanationStreamer()
+                chunks = []
+                
+                stream = self.gemini_client.agenerate_stream(
+                    prompt=request.user_message,
+                    system_prompt=self.system_prompt
+                )
+                # Includes time the client takes to read the deltas. Closing
+                # this generator early must also release the Gemini slot
+                with STAGE_SECONDS.time("gemini_stream"):
+                    async with aclosing(stream):
+                        async for chunk in stream:
+                            chunks.append(chunk)
+                            delta = streamer.feed(chunk)
+                            if delta:
+                                if first_delta_at is None:
+                                    first_delta_at = time.time()
+                                yield "delta", delta
+                
+                try:
+                    with STAGE_SECONDS.time("json_extract"):
+                        response_data = json.loads("".join(chunks))
+                except json.JSONDecodeError as e:
+                    raise AIServiceError(f"Invalid JSON in streamed response: {str(e)}")
+            
+            response = await self._build_response(session_id, request, response_data, cache_hit)
             
-            # Update session history
-            await self._update_session(session_id, request.user_message, chat_data)
+            if not cache_hit:
+                await self._store_cached(cache_key, response_data)
             
-            # Get session TTL
-            ttl = await self.session_store.get_ttl(session_id)
-            if ttl is None:
-                ttl = 3600  # Default to 1 hour
+            logger.info(
+                "message_streamed",
+                session_id=session_id,
+                cache_hit=cache_hit,
+                time_to_first_delta=round(first_delta_at - start_time, 2) if first_delta_at else None,
+                elapsed=round(time.time() - start_time, 2)
+            )
             
-            # Build response
-            response = ChatResponse(
+            yield "done", response
+        
+        except (RateLimitError, TimeoutError, CircuitOpenError):
+            raise
+        except Exception as e:
+            logger.error("message_streaming_failed", error=str(e))
+            raise AIServiceError(f"Failed to process message: {str(e)}")
+    
+    async def compact_session(self, session_id: str) -> None:
+        """
+        Fold older turns of a long session into its rolling summary.
+        
+        Intended to run as a background task after the response is sent;
+        failures are logged and never surface to the client.
+        
+        Args:
+            session_id: Session identifier
+        """
+        if self.compactor is None:
+            return
+        try:
+            await self.compactor.compact(session_id)
+        except Exception as e:
+            logger.warning("history_compaction_failed", session_id=session_id, error=str(e))
+    
+    async def _build_response(
+        self,
+        session_id: str,
+        request: ChatRequest,
+        response_data: dict,
+        cache_hit: bool = False
+    ) -> ChatResponse:
+        """Validate generated data, persist the turn and build the API response."""
+        # Parse and validate response
+        with STAGE_SECONDS.time("validation"):
+            chat_data = self._parse_response(response_data)
+        
+        # Update session history and get remaining TTL
+        with STAGE_SECONDS.time("session_set"), start_span("session.append_turns", CLIENT, {"session.id": session_id}):
+            ttl = await self._update_session(session_id, request.user_message, chat_data)
+        if ttl is None:
+            ttl = settings.session_ttl_seconds
+        
+        with STAGE_SECONDS.time("response_build"):
+            return ChatResponse(
                 data=chat_data,
                 suggested_next_prompts=response_data.get("suggested_next_prompts", ["Tell me more", "What else?", "Continue"]),
                 meta=ResponseMetadata(
                     session_id=session_id,
                     ttl_remaining_sec=ttl,
-                    generated_at=int(time.time())
+                    generated_at=int(time.time()),
+                    cache_hit=cache_hit
                 )
             )
-            
-            elapsed = time.time() - start_time
-            logger.info("message_processed", session_id=session_id, elapsed=round(elapsed, 2))
-            
-            return response
-            
+    
+    async def _generate(self, request: ChatRequest) -> dict:
+        """Generate response data, coalescing identical in-flight prompts."""
+        def generate():
+            # Generate response using Gemini with enforced JSON output
+            return self.gemini_client.agenerate(
+                prompt=request.user_message,
+                system_prompt=self.system_prompt
+            )
+        
+        if self.singleflight is None:
+            return await generate()
+        
+        symbol = request.crypto_context.symbol if request.crypto_context else None
+        return await self.singleflight.do(make_cache_key(request.user_message, symbol), generate)
+    
+    def _answer_locally(self, request: ChatRequest) -> Optional[dict]:
+        """Response data for simple chart requests, or None if the LLM is needed."""
+        if self.intent_parser is None:
+            return None
+        symbol = request.crypto_context.symbol if request.crypto_context else None
+        with STAGE_SECONDS.time("fast_path"):
+            intent = self.intent_parser.parse(request.user_message, symbol)
+            if intent is None:
+                CACHE_LOOKUPS.inc("fast_path", "miss")
+                return None
+            CACHE_LOOKUPS.inc("fast_path", "hit")
+            return self.intent_parser.respond(intent)
+    
+    def _cache_key(self, request: ChatRequest) -> Optional[str]:
+        """Build response cache key for a request, if caching is enabled."""
+        if self.response_cache is None:
+            return None
+        symbol = request.crypto_context.symbol if request.crypto_context else None
+        return make_cache_key(request.user_message, symbol)
+    
+    async def _get_cached(self, cache_key: Optional[str]) -> Optional[dict]:
+        """Look up a cached response; cache failures count as misses."""
+        if cache_key is None:
+            return None
+        try:
+            with STAGE_SECONDS.time("cache_lookup"), start_span("response_cache.get", CLIENT):
+                cached = await self.response_cache.get(cache_key)
         except Exception as e:
-            logger.error("message_processing_failed", error=str(e))
-            raise AIServiceError(f"Failed to process message: {str(e)}")
+            record_error(e)
+            logger.warning("response_cache_lookup_failed", error=str(e))
+            return None
+        CACHE_LOOKUPS.inc("response", "miss" if cached is None else "hit")
+        return cached
+    
+    async def _store_cached(self, cache_key: Optional[str], response_data: dict) -> None:
+        """Store a validated response; failures never fail the request."""
+        if cache_key is None:
+            return
+        try:
+            with STAGE_SECONDS.time("cache_store"), start_span("response_cache.set", CLIENT):
+                await self.response_cache.set(cache_key, response_data)
+        except Exception as e:
+            record_error(e)
+            logger.warning("response_cache_store_failed", error=str(e))
     
     def _parse_response(self, response_data: dict) -> ChatData:
         """
@@ -98,7 +359,7 @@ class ChatService:
         
         Args:
             response_data: Raw response from Gemini
-            
+        
         Returns:
             Validated ChatData object
         """
@@ -135,42 +396,38 @@ class ChatService:
             )
             
             return chat_data
-            
+        
         except Exception as e:
             logger.error("response_parsing_failed", error=str(e))
             raise ValidationError(f"Failed to parse response: {str(e)}")
     
-    async def _update_session(self, session_id: str, user_message: str, chat_data: ChatData):
-        """Update session with conversation turn."""
+    async def _update_session(self, session_id: str, user_message: str, chat_data: ChatData) -> Optional[int]:
+        """
+        Append the user and assistant turns to the session history.
+        
+        Returns:
+            Remaining session TTL, or None if the update failed
+        """
         try:
-            # Get existing session or create new one
-            session = await self.session_store.get(session_id)
-            if not session:
-                from app.models.internal import SessionData
-                session = SessionData(
-                    session_id=session_id,
-                    conversation_history=[],
-                    created_at=int(time.time()),
-                    last_activity=int(time.time())
-                )
-            
-            # Add conversation turn
-            from app.models.internal import ConversationTurn
+            now = int(time.time())
+            turns = [
+                ConversationTurn(role="user", content=user_message, timestamp=now),
+                ConversationTurn(role="assistant", content=chat_data.explanation, timestamp=now),
+            ]
             
-            turn = ConversationTurn(
-                role="user",
-                content=user_message,
-                timestamp=int(time.time())
+            # Single round trip: append, trim, refresh TTL
+            result = await self.session_store.append_turns(
+                session_id,
+                turns,
+                max_turns=settings.session_max_turns,
+                ttl=settings.session_ttl_seconds
             )
             
-            session.conversation_history.append(turn)
-            session.last_activity = int(time.time())
-            
-            # Save updated session with TTL (1 hour)
-            await self.session_store.set(session_id, session, ttl=3600)
-            
-            logger.debug("session_updated", session_id=session_id, history_length=len(session.conversation_history))
-            
+            logger.debug("session_updated", session_id=session_id, history_length=result.history_length)
+            return result.ttl_remaining
+        
         except Exception as e:
+            record_error(e)
             logger.warning("session_update_failed", error=str(e))
             # Don't fail the request if session update fails
+            return None
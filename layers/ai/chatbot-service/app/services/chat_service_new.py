@@ -9,9 +9,13 @@ from app.models.responses import ChatResponse, ChatData, ChartConfig, Source, Re
 from app.models.internal import SessionData, ConversationTurn
 from app.models.enums import ChartType, SourceType
 from app.storage.session_store import SessionStore
+from app.services.compaction import SUMMARY_KEY
+from app.services.grounding import GroundingClassifier
 from app.agents.gemini_new import GeminiClient
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import STAGE_SECONDS, record_error
+from app.core.tracing import CLIENT, start_span
 from app.core.exceptions import AIServiceError
 from pydantic import ValidationError
 
@@ -37,25 +41,41 @@ class ChatService:
   ]
 }
 '''
-    
-    def __init__(self, session_store: SessionStore):
-        """Initialize chat service."""
+
+    def __init__(self, session_store: SessionStore, grounding: Optional[GroundingClassifier] = None):
+        """
+        Initialize chat service.
+        
+        Args:
+            session_store: Session storage backend
+            grounding: Per-request search grounding policy (built from settings if not provided)
+        """
         self.session_store = session_store
         self.gemini_client = GeminiClient()
+        self.grounding = grounding or GroundingClassifier(settings.grounding_mode)
     
     async def process_message(self, request: ChatRequest) -> ChatResponse:
         """Process user message and generate response."""
         # Get or create session
-        session_id, session_data = await self._get_or_create_session(request.session_id)
+        with STAGE_SECONDS.time("session_get"), start_span("session.get", CLIENT):
+            session_id, session_data = await self._get_or_create_session(request.session_id)
+        
+        # Ground with Google Search only when the question needs fresh data
+        use_search, reason = self.grounding.decide(request)
+        logger.info("grounding_selected", session_id=session_id, use_search=use_search, reason=reason)
         
         # Build prompt
-        prompt = self._build_prompt(request, session_data)
+        with STAGE_SECONDS.time("prompt_build"):
+            prompt = self._build_prompt(request, session_data, use_search)
         
         # Generate response
         try:
-            raw_response = await self.gemini_client.generate(prompt, use_search=True)
-            chat_data = self._parse_response(raw_response)
+            with STAGE_SECONDS.time("gemini"):
+                raw_response = await self.gemini_client.generate(prompt, use_search=use_search)
+            with STAGE_SECONDS.time("validation"):
+                chat_data = self._parse_response(raw_response)
         except Exception as e:
+            record_error(e)
             logger.error("generation_error", error=str(e), exc_info=True)
             # Fallback response
             chat_data = ChatData(
@@ -65,25 +85,19 @@ class ChatService:
                 suggested_prompts=["Try again", "Ask something else", "Get help"]
             )
         
-        # Update session
-        session_data.conversation_history.append(
-            ConversationTurn(role="user", content=request.user_message, timestamp=int(time.time()))
-        )
-        session_data.conversation_history.append(
-            ConversationTurn(role="assistant", content=chat_data.explanation, timestamp=int(time.time()))
-        )
-        
-        # Keep only last 10 turns
-        if len(session_data.conversation_history) > 10:
-            session_data.conversation_history = session_data.conversation_history[-10:]
-        
-        session_data.last_activity = int(time.time())
-        
-        # Save session
-        await self.session_store.set(session_id, session_data, settings.session_ttl_seconds)
-        
-        # Get remaining TTL
-        ttl_remaining = await self.session_store.get_ttl(session_id) or settings.session_ttl_seconds
+        # Append turns (keep only last 10) and get remaining TTL in one round trip
+        now = int(time.time())
+        with STAGE_SECONDS.time("session_set"), start_span("session.append_turns", CLIENT, {"session.id": session_id}):
+            result = await self.session_store.append_turns(
+                session_id,
+                [
+                    ConversationTurn(role="user", content=request.user_message, timestamp=now),
+                    ConversationTurn(role="assistant", content=chat_data.explanation, timestamp=now),
+                ],
+                max_turns=10,
+                ttl=settings.session_ttl_seconds
+            )
+        ttl_remaining = result.ttl_remaining or settings.session_ttl_seconds
         
         # Build response
         return ChatResponse(
@@ -95,12 +109,22 @@ class ChatService:
             )
         )
     
-    def _build_prompt(self, request: ChatRequest, session_data: SessionData) -> str:
+    def stats(self) -> dict:
+        """Return grounding decisions and latency with and without grounding."""
+        return {
+            "grounding": self.grounding.stats(),
+            "latency": self.gemini_client.latency_stats(),
+        }
+    
+    def _build_prompt(self, request: ChatRequest, session_data: SessionData, use_search: bool = True) -> str:
         """Build prompt for Gemini."""
         parts = []
         
         # System instructions
-        parts.append("You are an expert cryptocurrency analyst with access to Google Search.")
+        if use_search:
+            parts.append("You are an expert cryptocurrency analyst with access to Google Search.")
+        else:
+            parts.append("You are an expert cryptocurrency analyst.")
         parts.append("Answer the user's question clearly and helpfully.")
         parts.append("")
         
@@ -114,6 +138,13 @@ class ChatService:
                 parts.append(f"24h Change: {ctx.change_24h:.2f}%")
             parts.append("")
         
+        # Add rolling summary of turns folded away by compaction
+        summary = session_data.metadata.get(SUMMARY_KEY)
+        if summary:
+            parts.append("Conversation Summary:")
+            parts.append(summary)
+            parts.append("")
+        
         # Add conversation history
         if session_data.conversation_history:
             parts.append("Recent Conversation:")
@@ -181,7 +212,7 @@ class ChatService:
                 sources=sources,
                 suggested_prompts=suggested
             )
-            
+        
         except (ValueError, ValidationError) as e:
             logger.error("response_parse_error", error=str(e), raw=raw_response)
             raise AIServiceError(f"Failed to parse response: {str(e)}")
@@ -192,7 +223,7 @@ class ChatService:
     ) -> tuple[str, SessionData]:
         """Get existing session or create new one."""
         if session_id:
-            session_data = await self.session_store.get(session_id)
+            session_data = await self.session_store.get(session_id, max_turns=4)
             if session_data:
                 logger.info("session_found", session_id=session_id)
                 return session_id, session_data
@@ -0,0 +1,200 @@
+"""Token-budgeted compaction of conversation history into a rolling summary."""
+
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+from app.models.internal import ConversationTurn, SessionData
+from app.storage.session_store import SessionStore
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Keys in SessionData.metadata
+SUMMARY_KEY = "summary"
+SUMMARIZED_TURNS_KEY = "summarized_turns"
+
+SUMMARY_INSTRUCTION = (
+    "You maintain a running summary of a conversation between a user and a "
+    "cryptocurrency market assistant. Merge the previous summary with the new "
+    "turns into one concise summary written in the third person. Keep coins, "
+    "timeframes, figures and open questions the user cares about; drop "
+    "pleasantries. Reply with the summary text only."
+)
+
+Summarizer = Callable[[str, int], Awaitable[str]]
+
+
+def gemini_summarizer(gemini_client: Any) -> Summarizer:
+    """Build a summarizer backed by ``GeminiClient.agenerate_text``."""
+    async def summarize(prompt: str, max_chars: int) -> str:
+        # Roughly four characters per token, with headroom
+        return await gemini_client.agenerate_text(
+            prompt,
+            SUMMARY_INSTRUCTION,
+            max_output_tokens=max_chars // 3
+        )
+    return summarize
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def history_tokens(session_data: SessionData) -> int:
+    """Estimate tokens used by a session's summary and turns."""
+    total = estimate_tokens(session_data.metadata.get(SUMMARY_KEY, ""))
+    for turn in session_data.conversation_history:
+        total += estimate_tokens(turn.content)
+    return total
+
+
+def format_turns(turns: List[ConversationTurn], max_chars: Optional[int] = None) -> str:
+    """Render turns as ``Role: content`` lines."""
+    lines = []
+    for turn in turns:
+        role = "User" if turn.role == "user" else "Assistant"
+        content = turn.content if max_chars is None else turn.content[:max_chars]
+        lines.append(f"{role}: {content}")
+    return "\n".join(lines)
+
+
+def extractive_summary(previous: str, turns: List[ConversationTurn], max_chars: int) -> str:
+    """
+    Fold turns into a summary without a model call.
+    
+    Appends a clipped line per turn and drops the oldest lines once the
+    summary exceeds ``max_chars``.
+    """
+    lines = previous.splitlines() if previous else []
+    lines.extend(format_turns(turns, max_chars=160).splitlines())
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)[-max_chars:]
+
+
+class HistoryCompactor:
+    """
+    Fold older turns of long sessions into ``SessionData.metadata["summary"]``.
+    
+    A session is compacted once its estimated history exceeds the token
+    budget, or before the turn cap would silently drop old turns. The most
+    recent turns are always kept verbatim. Meant to run after the response
+    has been sent, so it never adds user-facing latency.
+    """
+    
+    def __init__(
+        self,
+        session_store: SessionStore,
+        summarizer: Optional[Summarizer] = None,
+        token_budget: int = 1500,
+        keep_recent_turns: int = 4,
+        max_turns: int = 20,
+        summary_max_chars: int = 1500
+    ):
+        """
+        Initialize compactor.
+        
+        Args:
+            session_store: Session storage backend
+            summarizer: Model call taking (prompt, max_chars) and returning summary
+                text; the extractive fallback is used if None or if it fails
+            token_budget: Estimated tokens of history allowed before compacting
+            keep_recent_turns: Turns always kept verbatim
+            max_turns: Turn cap applied on append; compaction runs before it bites
+            summary_max_chars: Maximum length of the rolling summary
+        """
+        self.session_store = session_store
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.max_turns = max_turns
+        self.summary_max_chars = summary_max_chars
+        self._running: Set[str] = set()
+        self.compactions = 0
+        self.summarizer_failures = 0
+    
+    def needs_compaction(self, session_data: SessionData) -> bool:
+        """Whether a session is over budget or about to lose turns to the cap."""
+        history = session_data.conversation_history
+        if len(history) <= self.keep_recent_turns:
+            return False
+        if self.max_turns and len(history) + 2 > self.max_turns:
+            return True
+        return history_tokens(session_data) > self.token_budget
+    
+    async def compact(self, session_id: str) -> bool:
+        """
+        Compact a session if needed.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            True if the session was compacted
+        """
+        if session_id in self._running:
+            return False
+        
+        self._running.add(session_id)
+        try:
+            return await self._compact(session_id)
+        finally:
+            self._running.discard(session_id)
+    
+    async def _compact(self, session_id: str) -> bool:
+        session_data = await self.session_store.get(session_id)
+        if session_data is None or not self.needs_compaction(session_data):
+            return False
+        
+        older = session_data.conversation_history[:-self.keep_recent_turns]
+        previous = session_data.metadata.get(SUMMARY_KEY, "")
+        recent = session_data.conversation_history[len(older):]
+        tokens_before = history_tokens(session_data)
+        metadata = dict(session_data.metadata)
+        
+        summary = await self._summarize(previous, older)
+        metadata[SUMMARY_KEY] = summary
+        metadata[SUMMARIZED_TURNS_KEY] = metadata.get(SUMMARIZED_TURNS_KEY, 0) + len(older)
+        
+        # The summary may take a while; the store applies it only if the
+        # history still starts with the folded turns, keeping any appended since
+        if not await self.session_store.compact_history(session_id, older, metadata):
+            logger.info("history_compaction_skipped", session_id=session_id, reason="history changed")
+            return False
+        
+        self.compactions += 1
+        logger.info(
+            "history_compacted",
+            session_id=session_id,
+            folded_turns=len(older),
+            summary_chars=len(summary),
+            tokens_before=tokens_before,
+            tokens_after=estimate_tokens(summary) + sum(estimate_tokens(turn.content) for turn in recent)
+        )
+        return True
+    
+    async def _summarize(self, previous: str, turns: List[ConversationTurn]) -> str:
+        """Produce the new rolling summary, falling back to extractive folding."""
+        if self.summarizer is not None:
+            prompt = (
+                f"Previous summary:\n{previous or '(none)'}\n\n"
+                f"New turns:\n{format_turns(turns)}\n\n"
+                f"Write the updated summary in at most {self.summary_max_chars} characters."
+            )
+            try:
+                summary = (await self.summarizer(prompt, self.summary_max_chars)).strip()
+                if summary:
+                    return summary[:self.summary_max_chars]
+            except Exception as e:
+                self.summarizer_failures += 1
+                logger.warning("history_summarizer_failed", error=str(e))
+        
+        return extractive_summary(previous, turns, self.summary_max_chars)
+    
+    def stats(self) -> dict:
+        """Return compaction counters."""
+        return {
+            "compactions": self.compactions,
+            "summarizer_failures": self.summarizer_failures,
+            "token_budget": self.token_budget,
+        }
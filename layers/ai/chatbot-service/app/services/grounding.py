@@ -0,0 +1,137 @@
+"""Per-request decision on whether to ground a generation with Google Search."""
+
+import re
+from typing import Dict, Tuple
+
+from app.models.requests import ChatRequest
+from app.services.intent import AMBIGUOUS_TICKERS, COIN_ALIASES, COINS
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+GROUNDING_MODES = ("auto", "always", "never")
+
+# Wording that asks about current events or live market state
+_FRESH = re.compile(
+    r"\b(?:today|tonight|yesterday|now|right now|currently|current|latest|recent(?:ly)?|"
+    r"this (?:week|month|morning|year)|last (?:week|night|hour|24 ?h(?:ours)?)|24 ?h|"
+    r"news|headlines?|announce(?:d|ment)?|upgrade|listing|listed|delist(?:ed)?|hack(?:ed)?|"
+    r"etf|sec|regulat\w*|lawsuit|approv\w*|halving|"
+    r"rally|rallying|pump(?:ing|ed)?|dump(?:ing|ed)?|crash(?:ing|ed)?|surg\w*|plung\w*|"
+    r"soar\w*|spik\w*|drop(?:ping|ped)?|moving|moved|happen(?:ed|ing)?|"
+    r"forecast|predict\w*|outlook|sentiment|ath|all[- ]time high|20\d\d)\b",
+    re.IGNORECASE,
+)
+
+# Fresh cues that only ask for the current state, not for events
+_LIVE_CUES = {"now", "right now", "currently", "current", "today"}
+
+# Wording about the live price or volume, which a crypto_context already answers
+_PRICE = re.compile(
+    r"\b(?:price|prices|trading at|worth|cost|market cap|volume|change|up|down)\b",
+    re.IGNORECASE,
+)
+
+# Wording about the state of the market rather than a concept
+_MARKET = re.compile(
+    r"\b(?:doing|performing|performance|charts?|gainers?|losers?|movers?|trending|dominance)\b",
+    re.IGNORECASE,
+)
+
+_WORD = re.compile(r"[A-Za-z]+")
+
+# Wording of conceptual questions that the model answers from its own knowledge
+_CONCEPTUAL = re.compile(
+    r"^\s*(?:what(?:'s| is| are| does)|how (?:does|do|is|are|can)|explain|define|"
+    r"why (?:is|are|do|does) (?:a |an |the )?(?:blockchain|crypto|proof|staking|mining|defi|"
+    r"gas|wallet|token|stablecoin|smart contract)|difference between|eli5|tell me about)\b",
+    re.IGNORECASE,
+)
+
+
+def _mentions_coin(message: str) -> bool:
+    """Whether a message names a coin, by name or ticker."""
+    for raw in _WORD.findall(message):
+        if raw.lower() in COIN_ALIASES:
+            return True
+        upper = raw.upper()
+        if upper in COINS and (upper not in AMBIGUOUS_TICKERS or raw == upper):
+            return True
+    return False
+
+
+class GroundingClassifier:
+    """
+    Decide per request whether Google Search grounding is worth its latency.
+    
+    In ``auto`` mode a request is grounded when it asks about current events
+    or market moves ("why is ETH dropping today"), or about live market
+    data: prices, a named coin, charts or top movers. Price questions are
+    answered without search when the request's ``crypto_context`` already
+    carries the live numbers. Only questions with none of these cues that
+    are phrased conceptually ("what is staking") skip search. Requests with
+    no cue are grounded, so ambiguous questions keep the previous behaviour. ``always`` and ``never``
+    override the classifier.
+    """
+    
+    def __init__(self, mode: str = "auto"):
+        """
+        Initialize classifier.
+        
+        Args:
+            mode: ``auto``, ``always`` or ``never``
+        """
+        if mode not in GROUNDING_MODES:
+            raise ValueError(f"Unknown grounding mode: {mode}")
+        self.mode = mode
+        self._decisions: Dict[str, int] = {}
+    
+    def decide(self, request: ChatRequest) -> Tuple[bool, str]:
+        """
+        Decide whether to ground a request.
+        
+        Args:
+            request: Chat request
+        
+        Returns:
+            (use_search, reason)
+        """
+        use_search, reason = self._classify(request)
+        self._decisions[reason] = self._decisions.get(reason, 0) + 1
+        logger.debug("grounding_decided", use_search=use_search, reason=reason)
+        return use_search, reason
+    
+    def _classify(self, request: ChatRequest) -> Tuple[bool, str]:
+        if self.mode == "always":
+            return True, "forced"
+        if self.mode == "never":
+            return False, "disabled"
+        
+        message = request.user_message
+        cues = {cue.lower() for cue in _FRESH.findall(message)}
+        has_context = request.crypto_context is not None and request.crypto_context.price is not None
+        
+        if cues:
+            # "What is the price right now" is answered by the context numbers
+            if has_context and cues <= _LIVE_CUES and _PRICE.search(message):
+                return False, "context"
+            return True, "fresh"
+        asks_price = _PRICE.search(message) is not None
+        if has_context and asks_price:
+            return False, "context"
+        # Checked before the conceptual phrasing: "what is the price of bitcoin"
+        if asks_price or _MARKET.search(message) or _mentions_coin(message):
+            return True, "live"
+        if _CONCEPTUAL.search(message):
+            return False, "conceptual"
+        return True, "default"
+    
+    def stats(self) -> Dict[str, object]:
+        """Return decision counts by reason."""
+        total = sum(self._decisions.values())
+        grounded = sum(n for r, n in self._decisions.items() if r in ("fresh", "live", "default", "forced"))
+        return {
+            "mode": self.mode,
+            "decisions": dict(self._decisions),
+            "grounded_ratio": round(grounded / total, 4) if total else 0.0,
+        }
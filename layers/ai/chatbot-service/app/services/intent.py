@@ -0,0 +1,299 @@
+"""Deterministic fast path for simple chart requests."""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Ticker -> display name for coins the fast path recognises
+COINS: Dict[str, str] = {
+    "BTC": "Bitcoin",
+    "ETH": "Ethereum",
+    "SOL": "Solana",
+    "BNB": "BNB",
+    "XRP": "XRP",
+    "ADA": "Cardano",
+    "DOGE": "Dogecoin",
+    "DOT": "Polkadot",
+    "AVAX": "Avalanche",
+    "MATIC": "Polygon",
+    "LINK": "Chainlink",
+    "LTC": "Litecoin",
+    "TRX": "TRON",
+    "SHIB": "Shiba Inu",
+    "ATOM": "Cosmos",
+    "XLM": "Stellar",
+    "UNI": "Uniswap",
+    "NEAR": "NEAR Protocol",
+    "TON": "Toncoin",
+    "BCH": "Bitcoin Cash",
+}
+
+# Lowercase names and aliases -> ticker
+COIN_ALIASES: Dict[str, str] = {
+    "bitcoin": "BTC", "btc": "BTC",
+    "ethereum": "ETH", "ether": "ETH", "eth": "ETH",
+    "solana": "SOL", "sol": "SOL",
+    "bnb": "BNB",
+    "xrp": "XRP", "ripple": "XRP",
+    "cardano": "ADA", "ada": "ADA",
+    "dogecoin": "DOGE", "doge": "DOGE",
+    "polkadot": "DOT",
+    "avalanche": "AVAX", "avax": "AVAX",
+    "polygon": "MATIC", "matic": "MATIC",
+    "chainlink": "LINK",
+    "litecoin": "LTC", "ltc": "LTC",
+    "tron": "TRX", "trx": "TRX",
+    "shib": "SHIB",
+    "cosmos": "ATOM",
+    "stellar": "XLM", "xlm": "XLM",
+    "uniswap": "UNI",
+    "toncoin": "TON",
+    "bch": "BCH",
+}
+
+# Tickers that are also English words only count when written in capitals
+AMBIGUOUS_TICKERS = {"DOT", "LINK", "ATOM", "UNI", "NEAR", "TON"}
+
+# Single words naming a timeframe
+TIMEFRAME_WORDS: Dict[str, str] = {
+    "today": "1d", "daily": "1d", "intraday": "1d", "day": "1d",
+    "month": "1m", "monthly": "1m",
+    "quarter": "3m", "quarterly": "3m",
+    "year": "1y", "yearly": "1y", "annual": "1y", "annually": "1y",
+    "ytd": "1y",
+    "max": "all", "ever": "all", "history": "all", "historical": "all", "inception": "all",
+}
+
+# (amount, unit) pairs naming a supported timeframe exactly
+TIMEFRAME_SPANS: Dict[Tuple[int, str], str] = {
+    (1, "d"): "1d", (24, "h"): "1d",
+    (1, "m"): "1m", (30, "d"): "1m", (4, "w"): "1m",
+    (3, "m"): "3m", (90, "d"): "3m", (12, "w"): "3m", (13, "w"): "3m",
+    (1, "y"): "1y", (12, "m"): "1y", (365, "d"): "1y", (52, "w"): "1y",
+}
+
+UNITS = {
+    "h": "h", "hr": "h", "hrs": "h", "hour": "h", "hours": "h",
+    "d": "d", "day": "d", "days": "d",
+    "w": "w", "wk": "w", "wks": "w", "week": "w", "weeks": "w",
+    "m": "m", "mo": "m", "mos": "m", "month": "m", "months": "m",
+    "y": "y", "yr": "y", "yrs": "y", "year": "y", "years": "y",
+}
+
+NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "three": 3, "twelve": 12, "thirty": 30, "ninety": 90}
+
+CHART_VERBS = {"show", "chart", "charts", "plot", "graph", "display", "view", "see", "open", "pull"}
+COMPARE_WORDS = {"compare", "comparison", "vs", "versus", "against"}
+
+# Words that may appear in a chart request without changing its meaning;
+# any other word sends the message to the LLM
+FILLER = {
+    "me", "the", "a", "an", "of", "for", "over", "last", "past", "this", "in", "on", "to",
+    "and", "with", "up", "price", "prices", "pricing", "chart", "charts", "graph", "please",
+    "pls", "can", "could", "you", "i", "want", "let", "lets", "us", "give", "get", "all",
+    "performance", "since", "its", "their", "candles",
+}
+
+_TOKEN = re.compile(r"[A-Za-z]+|\d+[A-Za-z]*")
+_AMOUNT_UNIT = re.compile(r"^(\d+)([a-z]+)$")
+
+_TIMEFRAME_PHRASES = {
+    "1d": "over the last 24 hours",
+    "1m": "over the last month",
+    "3m": "over the last 3 months",
+    "1y": "over the last year",
+    "all": "across its full history",
+}
+
+
+@dataclass
+class ChartIntent:
+    """A chart request recognised without the LLM."""
+    
+    coins: List[str]
+    timeframe: str
+    comparison: bool
+
+
+def _join(items: List[str]) -> str:
+    """Join as ``a``, ``a and b`` or ``a, b and c``."""
+    if len(items) == 1:
+        return items[0]
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+class ChartIntentParser:
+    """
+    Recognise simple chart requests such as "show me ETH for 1 year".
+    
+    Messages are accepted only if every word is a known coin, a timeframe,
+    a chart or comparison verb, or filler. Anything else - a question word,
+    "news", "predict", an unknown coin, an unsupported timeframe like
+    "6 months" - falls through to the LLM, so a match never needs judgement.
+    """
+    
+    def __init__(self, max_length: int = 120, default_timeframe: str = "1m"):
+        """
+        Initialize parser.
+        
+        Args:
+            max_length: Longer messages skip parsing entirely
+            default_timeframe: Timeframe used when the message names none
+        """
+        self.max_length = max_length
+        self.default_timeframe = default_timeframe
+        self.attempts = 0
+        self.matches = 0
+    
+    def parse(self, message: str, context_symbol: Optional[str] = None) -> Optional[ChartIntent]:
+        """
+        Parse a message into a chart intent.
+        
+        Args:
+            message: User message
+            context_symbol: Symbol from the request's crypto context, used
+                when the message names a timeframe but no coin
+        
+        Returns:
+            The intent, or None if the message needs the LLM
+        """
+        self.attempts += 1
+        intent = self._parse(message, context_symbol)
+        if intent is not None:
+            self.matches += 1
+            logger.debug("fast_path_matched", coins=intent.coins, timeframe=intent.timeframe)
+        return intent
+    
+    def _parse(self, message: str, context_symbol: Optional[str]) -> Optional[ChartIntent]:
+        if len(message) > self.max_length:
+            return None
+        
+        coins: List[str] = []
+        timeframes = set()
+        has_verb = False
+        comparison = False
+        # Number waiting for its unit, and whether it was written in digits
+        pending: Optional[Tuple[int, bool]] = None
+        previous = ""
+        
+        for raw in _TOKEN.findall(message):
+            word = raw.lower()
+            
+            if pending is not None:
+                (amount, digits), pending = pending, None
+                unit = UNITS.get(word)
+                if unit is not None:
+                    timeframe = TIMEFRAME_SPANS.get((amount, unit))
+                    if timeframe is None:
+                        return None
+                    timeframes.add(timeframe)
+                    previous = word
+                    continue
+                if digits:
+                    # A bare number ("show BTC 50") is not a chart request
+                    return None
+            
+            symbol = self._coin(raw, word)
+            if symbol is not None:
+                if symbol not in coins:
+                    coins.append(symbol)
+            elif word[0].isdigit():
+                match = _AMOUNT_UNIT.match(word)
+                if match is None:
+                    pending = (int(word), True)
+                else:
+                    unit = UNITS.get(match.group(2))
+                    timeframe = TIMEFRAME_SPANS.get((int(match.group(1)), unit)) if unit else None
+                    if timeframe is None:
+                        return None
+                    timeframes.add(timeframe)
+            elif word in NUMBER_WORDS:
+                pending = (NUMBER_WORDS[word], False)
+            elif word in TIMEFRAME_WORDS:
+                timeframes.add(TIMEFRAME_WORDS[word])
+            elif word == "time" and previous == "all":
+                timeframes.add("all")
+            elif word in COMPARE_WORDS:
+                comparison = True
+            elif word in CHART_VERBS:
+                has_verb = True
+            elif word not in FILLER:
+                return None
+            previous = word
+        
+        if pending is not None and pending[1]:
+            return None
+        if len(timeframes) > 1:
+            return None
+        
+        if not coins and context_symbol in COINS and timeframes:
+            coins.append(context_symbol)
+        if not coins or len(coins) > 5:
+            return None
+        if comparison and len(coins) < 2:
+            return None
+        if not (has_verb or comparison or timeframes):
+            return None
+        
+        timeframe = timeframes.pop() if timeframes else self.default_timeframe
+        return ChartIntent(coins=coins, timeframe=timeframe, comparison=comparison or len(coins) > 1)
+    
+    @staticmethod
+    def _coin(raw: str, word: str) -> Optional[str]:
+        """Ticker for a token, honouring capitalisation of ambiguous tickers."""
+        symbol = COIN_ALIASES.get(word)
+        if symbol is not None:
+            return symbol
+        upper = raw.upper()
+        if upper in COINS and (upper not in AMBIGUOUS_TICKERS or raw == upper):
+            return upper
+        return None
+    
+    def respond(self, intent: ChartIntent) -> Dict[str, Any]:
+        """
+        Build response data in the same shape the model returns.
+        
+        Args:
+            intent: Parsed chart intent
+        
+        Returns:
+            Dict with ``data`` and ``suggested_next_prompts``
+        """
+        names = [f"{COINS[c]} ({c})" if COINS[c] != c else c for c in intent.coins]
+        phrase = _TIMEFRAME_PHRASES[intent.timeframe]
+        if intent.comparison:
+            if intent.timeframe == "all":
+                phrase = "across their full history"
+            explanation = f"Here is a price comparison of {_join(names)} {phrase}."
+        else:
+            explanation = f"Here is the price chart for {names[0]} {phrase}."
+        
+        first = intent.coins[0]
+        other = "ETH" if first == "BTC" else "BTC"
+        longer = "1 year" if intent.timeframe == "all" else "all time"
+        suggestions = [
+            f"Why is {first} moving?",
+            f"Show {first} {longer}",
+            "Which performed best?" if intent.comparison else f"Compare {first} and {other}",
+        ]
+        
+        return {
+            "data": {
+                "coins": list(intent.coins),
+                "timeframe": intent.timeframe,
+                "explanation": explanation,
+            },
+            "suggested_next_prompts": suggestions,
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return fast path counters."""
+        return {
+            "attempts": self.attempts,
+            "matches": self.matches,
+            "hit_rate": round(self.matches / self.attempts, 4) if self.attempts else 0.0,
+        }
@@ -0,0 +1,123 @@
+"""Helpers for streaming chat responses as Server-Sent Events."""
+
+import json
+import re
+from typing import Any, Optional
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+_EXPLANATION_KEY = re.compile(r'"explanation"\s*:\s*"')
+
+
+class ExplanationStreamer:
+    """
+    Incrementally decode the ``explanation`` string from partial JSON.
+
+    Gemini streams the response document as arbitrary text chunks. Each call
+    to ``feed`` returns whatever new explanation text can be decoded so far,
+    leaving incomplete escape sequences buffered until the next chunk.
+    """
+
+    def __init__(self):
+        """Initialize streamer."""
+        self._buffer = ""
+        self._pos: Optional[int] = None  # Start of undecoded explanation text
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """
+        Add a chunk of raw response text.
+
+        Args:
+            chunk: Next piece of the streamed JSON document
+
+        Returns:
+            Newly decoded explanation text (may be empty)
+        """
+        self._buffer += chunk
+        if self.done:
+            return ""
+
+        if self._pos is None:
+            match = _EXPLANATION_KEY.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        return self._decode()
+
+    def _decode(self) -> str:
+        """Decode as much of the explanation string as is available."""
+        buf = self._buffer
+        i = self._pos
+        out = []
+
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+
+            # Escape sequence; wait for more input if it is incomplete
+            if i + 1 >= len(buf):
+                break
+            code = buf[i + 1]
+            if code == "u":
+                if i + 6 > len(buf):
+                    break
+                try:
+                    codepoint = int(buf[i + 2:i + 6], 16)
+                except ValueError:
+                    out.append(buf[i:i + 6])
+                    i += 6
+                    continue
+                if 0xD800 <= codepoint <= 0xDBFF:
+                    # High surrogate; combine with the following low surrogate
+                    if i + 12 > len(buf):
+                        break
+                    if buf[i + 6:i + 8] == "\\u":
+                        try:
+                            low = int(buf[i + 8:i + 12], 16)
+                        except ValueError:
+                            low = 0
+                        if 0xDC00 <= low <= 0xDFFF:
+                            out.append(chr(0x10000 + ((codepoint - 0xD800) << 10) + (low - 0xDC00)))
+                            i += 12
+                            continue
+                out.append(chr(codepoint))
+                i += 6
+            else:
+                out.append(_ESCAPES.get(code, code))
+                i += 2
+
+        self._pos = i
+        return "".join(out)
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format a single Server-Sent Event.
+
+    Args:
+        event: Event name
+        data: JSON string, or an object to serialize as JSON
+
+    Returns:
+        Encoded SSE frame
+    """
+    payload = data if isinstance(data, str) else json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -3,9 +3,21 @@
 from app.storage.session_store import SessionStore
 from app.storage.redis_store import RedisSessionStore
 from app.storage.memory_store import MemorySessionStore
+from app.storage.shm_store import SharedMemorySessionStore
+from app.storage.tiered_store import TieredSessionStore
+from app.storage.response_cache import (
+    ResponseCache,
+    MemoryResponseCache,
+    RedisResponseCache,
+)
 
 __all__ = [
     "SessionStore",
     "RedisSessionStore",
     "MemorySessionStore",
+    "SharedMemorySessionStore",
+    "TieredSessionStore",
+    "ResponseCache",
+    "MemoryResponseCache",
+    "RedisResponseCache",
 ]
@@ -0,0 +1,79 @@
+"""Compact, versioned binary encoding for stored session data."""
+
+import json
+import zlib
+from typing import Any, Sequence
+
+import msgpack
+
+from app.models.internal import ConversationTurn
+
+# Leading format byte of every encoded value
+FORMAT_MSGPACK = 0x01
+FORMAT_MSGPACK_ZLIB = 0x02
+
+# Payloads larger than this are compressed when it actually saves space
+COMPRESS_THRESHOLD = 512
+
+
+def encode(value: Any) -> bytes:
+    """
+    Encode a value as tagged msgpack, compressing large payloads.
+
+    Args:
+        value: msgpack-serializable value
+
+    Returns:
+        Encoded bytes with a leading format byte
+    """
+    packed = msgpack.packb(value, use_bin_type=True)
+    if len(packed) > COMPRESS_THRESHOLD:
+        compressed = zlib.compress(packed, 1)
+        if len(compressed) < len(packed):
+            return bytes((FORMAT_MSGPACK_ZLIB,)) + compressed
+    return bytes((FORMAT_MSGPACK,)) + packed
+
+
+def decode(data: bytes) -> Any:
+    """
+    Decode a value written by ``encode``.
+
+    Untagged values starting with ``{`` or ``[`` are treated as legacy JSON.
+
+    Args:
+        data: Encoded bytes
+
+    Returns:
+        Decoded value
+
+    Raises:
+        ValueError: If the format byte is unknown
+    """
+    if not data:
+        raise ValueError("Cannot decode empty value")
+
+    fmt = data[0]
+    if fmt == FORMAT_MSGPACK:
+        return msgpack.unpackb(data[1:], raw=False)
+    if fmt == FORMAT_MSGPACK_ZLIB:
+        return msgpack.unpackb(zlib.decompress(data[1:]), raw=False)
+    if fmt in (ord("{"), ord("[")):
+        return json.loads(data)
+
+    raise ValueError(f"Unknown session encoding: {fmt:#04x}")
+
+
+def encode_turn(turn: ConversationTurn) -> bytes:
+    """Encode a conversation turn as a compact ``[role, content, timestamp]`` array."""
+    return encode([turn.role, turn.content, turn.timestamp])
+
+
+def decode_turn(data: bytes) -> ConversationTurn:
+    """Decode a conversation turn written by ``encode_turn``."""
+    role, content, timestamp = decode(data)
+    return ConversationTurn.model_construct(role=role, content=content, timestamp=timestamp)
+
+
+def decode_turns(items: Sequence[bytes]) -> list:
+    """Decode a list of encoded turns."""
+    return [decode_turn(item) for item in items]
@@ -1,36 +1,78 @@
 """In-memory session storage implementation for development/testing."""
 
 import asyncio
+import heapq
 import time
-from typing import Optional, Dict
-from app.storage.session_store import SessionStore
-from app.models.internal import SessionData
+from collections import OrderedDict
+from typing import Any, Optional, Dict, List, Tuple
+from app.storage.session_store import SessionStore, AppendResult
+from app.models.internal import SessionData, ConversationTurn
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Rough per-object overheads used for the resident size estimate
+_SESSION_OVERHEAD = 512
+_TURN_OVERHEAD = 160
+
+
+def _estimate_size(session_data: SessionData) -> int:
+    """Estimate the resident size of a session in bytes."""
+    size = _SESSION_OVERHEAD + len(session_data.session_id)
+    for turn in session_data.conversation_history:
+        size += _TURN_OVERHEAD + len(turn.content)
+    if session_data.metadata:
+        size += len(repr(session_data.metadata))
+    return size
+
 
 class MemorySessionStore(SessionStore):
-    """In-memory implementation of session storage with TTL."""
+    """
+    In-memory implementation of session storage with TTL.
+    
+    Sessions are kept in LRU order and bounded by count and estimated size;
+    the least recently used sessions are evicted first. Expiry uses a
+    min-heap of deadlines, so purging costs O(expired log n) instead of a
+    scan of every session.
+    """
+    
+    # Rebuild the heap once stale entries outnumber live sessions by this factor
+    _HEAP_COMPACT_FACTOR = 2
     
-    def __init__(self):
-        """Initialize in-memory session store."""
-        self._data: Dict[str, tuple[SessionData, float]] = {}  # session_id -> (data, expiry_timestamp)
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        cleanup_interval: float = 60.0
+    ):
+        """
+        Initialize in-memory session store.
+        
+        Args:
+            max_sessions: Maximum number of resident sessions (0 for unbounded)
+            max_bytes: Maximum estimated resident size in bytes (0 for unbounded)
+            cleanup_interval: Seconds between background expiry passes
+        """
+        # session_id -> (data, expiry_timestamp, size), least recently used first
+        self._data: "OrderedDict[str, Tuple[SessionData, float, int]]" = OrderedDict()
+        # (expiry_timestamp, session_id); entries are stale once the session's expiry changes
+        self._expiry_heap: List[Tuple[float, str]] = []
         self._cleanup_task: Optional[asyncio.Task] = None
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.cleanup_interval = cleanup_interval
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
     
     async def _cleanup_expired(self):
         """Background task to clean up expired sessions."""
         while True:
             try:
-                await asyncio.sleep(60)  # Check every minute
-                now = time.time()
-                expired_keys = [
-                    key for key, (_, expiry) in self._data.items()
-                    if expiry < now
-                ]
-                for key in expired_keys:
-                    del self._data[key]
-                    logger.debug("memory_cleanup", session_id=key)
+                await asyncio.sleep(self.cleanup_interval)
+                self._purge_expired(time.time())
             except Exception as e:
                 logger.error("memory_cleanup_error", error=str(e))
     
@@ -39,20 +81,89 @@ class MemorySessionStore(SessionStore):
         if self._cleanup_task is None or self._cleanup_task.done():
             self._cleanup_task = asyncio.create_task(self._cleanup_expired())
     
-    async def get(self, session_id: str) -> Optional[SessionData]:
-        """Retrieve session data from memory."""
-        self._start_cleanup_task()
+    def _purge_expired(self, now: float) -> int:
+        """Remove sessions whose deadline has passed; returns the number removed."""
+        heap = self._expiry_heap
+        purged = 0
+        while heap and heap[0][0] <= now:
+            expiry, session_id = heapq.heappop(heap)
+            entry = self._data.get(session_id)
+            if entry is not None and entry[1] == expiry:
+                self._remove(session_id)
+                self.expirations += 1
+                purged += 1
+                logger.debug("memory_cleanup", session_id=session_id)
+        return purged
+    
+    def _store(self, session_id: str, session_data: SessionData, expiry: float) -> None:
+        """Insert or replace a session as most recently used, then enforce limits."""
+        old = self._data.pop(session_id, None)
+        if old is not None:
+            self.resident_bytes -= old[2]
+        
+        size = _estimate_size(session_data)
+        self._data[session_id] = (session_data, expiry, size)
+        self.resident_bytes += size
         
-        if session_id not in self._data:
+        if old is None or old[1] != expiry:
+            heapq.heappush(self._expiry_heap, (expiry, session_id))
+            if len(self._expiry_heap) > self._HEAP_COMPACT_FACTOR * len(self._data) + 64:
+                self._compact_heap()
+        
+        self._purge_expired(time.time())
+        self._evict()
+    
+    def _remove(self, session_id: str) -> None:
+        """Drop a session and its size accounting (its heap entry goes stale)."""
+        _, _, size = self._data.pop(session_id)
+        self.resident_bytes -= size
+    
+    def _evict(self) -> None:
+        """Evict least recently used sessions until within limits (never the newest)."""
+        while len(self._data) > 1 and (
+            (self.max_sessions and len(self._data) > self.max_sessions)
+            or (self.max_bytes and self.resident_bytes > self.max_bytes)
+        ):
+            session_id = next(iter(self._data))
+            self._remove(session_id)
+            self.evictions += 1
+            logger.debug("memory_evict", session_id=session_id)
+    
+    def _compact_heap(self) -> None:
+        """Rebuild the expiry heap from live sessions only."""
+        self._expiry_heap = [(expiry, key) for key, (_, expiry, _) in self._data.items()]
+        heapq.heapify(self._expiry_heap)
+    
+    def _lookup(self, session_id: str, now: float) -> Optional[Tuple[SessionData, float, int]]:
+        """Return a live entry, dropping it if expired."""
+        entry = self._data.get(session_id)
+        if entry is None:
             return None
         
-        session_data, expiry = self._data[session_id]
+        if entry[1] < now:
+            self._remove(session_id)
+            self.expirations += 1
+            return None
         
-        # Check if expired
-        if expiry < time.time():
-            del self._data[session_id]
+        return entry
+    
+    async def get(self, session_id: str, max_turns: Optional[int] = None) -> Optional[SessionData]:
+        """Retrieve session data from memory."""
+        self._start_cleanup_task()
+        
+        entry = self._lookup(session_id, time.time())
+        if entry is None:
+            self.misses += 1
             return None
         
+        self.hits += 1
+        self._data.move_to_end(session_id)
+        session_data = entry[0]
+        
+        if max_turns:
+            return session_data.model_copy(
+                update={"conversation_history": session_data.conversation_history[-max_turns:]}
+            )
         return session_data
     
     async def set(self, session_id: str, session_data: SessionData, ttl: int) -> None:
@@ -60,39 +171,100 @@ class MemorySessionStore(SessionStore):
         self._start_cleanup_task()
         
         expiry = time.time() + ttl
-        self._data[session_id] = (session_data, expiry)
+        self._store(session_id, session_data, expiry)
         logger.debug("memory_set", session_id=session_id, ttl=ttl)
     
+    async def append_turns(
+        self,
+        session_id: str,
+        turns: List[ConversationTurn],
+        max_turns: int,
+        ttl: int
+    ) -> AppendResult:
+        """Append turns in place (atomic: no awaits while mutating)."""
+        self._start_cleanup_task()
+        
+        now = time.time()
+        entry = self._lookup(session_id, now)
+        if entry is None:
+            session_data = SessionData(
+                session_id=session_id,
+                created_at=int(now),
+                last_activity=int(now)
+            )
+        else:
+            session_data = entry[0]
+        
+        history = session_data.conversation_history
+        history.extend(turns)
+        if max_turns > 0 and len(history) > max_turns:
+            del history[:-max_turns]
+        session_data.last_activity = int(now)
+        
+        self._store(session_id, session_data, now + ttl)
+        return AppendResult(len(history), ttl)
+    
+    async def compact_history(
+        self,
+        session_id: str,
+        folded: List[ConversationTurn],
+        metadata: Dict[str, Any]
+    ) -> bool:
+        """Compact in place (atomic: no awaits while mutating)."""
+        entry = self._lookup(session_id, time.time())
+        if entry is None:
+            return False
+        
+        session_data, expiry, _ = entry
+        history = session_data.conversation_history
+        if history[:len(folded)] != folded:
+            return False
+        
+        del history[:len(folded)]
+        session_data.metadata = metadata
+        self._store(session_id, session_data, expiry)
+        return True
+    
     async def delete(self, session_id: str) -> bool:
         """Delete session from memory."""
         if session_id in self._data:
-            del self._data[session_id]
+            self._remove(session_id)
             return True
         return False
     
     async def update_ttl(self, session_id: str, ttl: int) -> bool:
         """Update session TTL in memory."""
-        if session_id not in self._data:
+        entry = self._lookup(session_id, time.time())
+        if entry is None:
             return False
         
-        session_data, _ = self._data[session_id]
-        expiry = time.time() + ttl
-        self._data[session_id] = (session_data, expiry)
+        self._store(session_id, entry[0], time.time() + ttl)
         return True
     
     async def get_ttl(self, session_id: str) -> Optional[int]:
         """Get remaining TTL from memory."""
-        if session_id not in self._data:
+        now = time.time()
+        entry = self._lookup(session_id, now)
+        if entry is None:
             return None
         
-        _, expiry = self._data[session_id]
-        remaining = int(expiry - time.time())
-        
-        if remaining < 0:
-            del self._data[session_id]
-            return None
-        
-        return remaining
+        return int(entry[1] - now)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return occupancy and hit/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "sessions": len(self._data),
+            "resident_bytes": self.resident_bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
     
     async def ping(self) -> bool:
         """Memory store is always available."""
@@ -0,0 +1,182 @@
+"""Per-client token bucket rate limiting."""
+
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from app.storage.redis_store import RedisSessionStore
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RateLimiter(ABC):
+    """
+    Abstract token bucket limiter.
+
+    Each client gets a bucket of ``burst`` tokens refilled at
+    ``rate_per_minute``; a request takes one token, or one per upstream call
+    it will make. A cost above ``burst`` is never granted.
+    """
+
+    backend = "abstract"
+
+    def __init__(self, rate_per_minute: int, burst: int):
+        """
+        Initialize limiter.
+
+        Args:
+            rate_per_minute: Sustained requests per minute per client
+            burst: Bucket size (requests a client may make at once)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.allowed = 0
+        self.limited = 0
+
+    async def acquire(self, client_id: str, cost: int = 1) -> Tuple[bool, float]:
+        """
+        Take tokens from a client's bucket, all or none.
+
+        Args:
+            client_id: Client identity
+            cost: Tokens to take
+
+        Returns:
+            (allowed, seconds until ``cost`` tokens are available if not allowed)
+        """
+        allowed, retry_after = await self._acquire(client_id, cost)
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return allowed, retry_after
+
+    @abstractmethod
+    async def _acquire(self, client_id: str, cost: int) -> Tuple[bool, float]:
+        """Backend token take."""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return limiter counters."""
+        return {
+            "backend": self.backend,
+            "rate_per_minute": round(self.rate * 60),
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Per-worker token buckets, bounded to the most recently seen clients."""
+
+    backend = "memory"
+
+    def __init__(self, rate_per_minute: int, burst: int, max_clients: int = 10000):
+        """
+        Initialize in-memory limiter.
+
+        Args:
+            rate_per_minute: Sustained requests per minute per client
+            burst: Bucket size
+            max_clients: Buckets kept before the least recently used is dropped
+        """
+        super().__init__(rate_per_minute, burst)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def _acquire(self, client_id: str, cost: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > self.max_clients:
+                # A dropped bucket was idle longest; it would be nearly full anyway
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            return True, 0.0
+        bucket[0] = tokens
+        return False, (cost - tokens) / self.rate if self.rate else 60.0
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Token buckets shared by all workers.
+
+    Reuses the connection of the Redis session store. The refill and take
+    run atomically in a script using the Redis server clock, so workers with
+    skewed clocks agree. Fails open if Redis is unreachable.
+    """
+
+    backend = "redis"
+
+    KEY_PREFIX = "ratelimit:"
+
+    # KEYS: bucket; ARGV: rate per second, burst, cost
+    # Returns {allowed, milliseconds until cost tokens are available}
+    _TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) / 1000 * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = math.ceil((cost - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, wait}
+"""
+
+    def __init__(self, store: RedisSessionStore, rate_per_minute: int, burst: int):
+        """
+        Initialize Redis limiter.
+
+        Args:
+            store: Session store whose Redis connection is shared
+            rate_per_minute: Sustained requests per minute per client
+            burst: Bucket size
+        """
+        super().__init__(rate_per_minute, burst)
+        self.store = store
+        self.errors = 0
+
+    async def _acquire(self, client_id: str, cost: int) -> Tuple[bool, float]:
+        try:
+            client = await self.store.get_client()
+            allowed, wait_ms = await client.eval(
+                self._TAKE_SCRIPT,
+                1,
+                self.KEY_PREFIX + client_id,
+                self.rate,
+                self.burst,
+                cost,
+            )
+            return bool(allowed), int(wait_ms) / 1000
+        except Exception as e:
+            self.errors += 1
+            logger.warning("rate_limit_check_failed", error=str(e))
+            return True, 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["errors"] = self.errors
+        return stats
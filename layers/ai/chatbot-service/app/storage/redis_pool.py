@@ -0,0 +1,67 @@
+"""Instrumented Redis connection pool."""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+from redis.asyncio import BlockingConnectionPool
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    Blocking connection pool that records saturation and wait times.
+
+    When every connection is checked out, callers wait up to ``timeout``
+    seconds for one to be released instead of failing immediately. The
+    time spent waiting is the pool's contribution to request latency.
+    """
+
+    # Acquisitions slower than this count as having waited for a connection
+    WAIT_THRESHOLD_MS = 1.0
+
+    def __init__(self, *args, **kwargs):
+        """Initialize pool; accepts the same arguments as ``BlockingConnectionPool``."""
+        super().__init__(*args, **kwargs)
+        self.acquired = 0
+        self.waited = 0
+        self.timeouts = 0
+        self.peak_in_use = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    async def get_connection(self, *args, **kwargs):
+        """Check out a connection, recording how long it took."""
+        start = time.monotonic()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except RedisConnectionError as e:
+            # Pool exhaustion surfaces as ConnectionError caused by a timeout
+            if isinstance(e.__cause__, asyncio.TimeoutError):
+                self.timeouts += 1
+            raise
+
+        wait_ms = (time.monotonic() - start) * 1000
+        self.acquired += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        if wait_ms > self.WAIT_THRESHOLD_MS:
+            self.waited += 1
+        self.peak_in_use = max(self.peak_in_use, len(self._in_use_connections))
+        return connection
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool occupancy and wait-time counters."""
+        in_use = len(self._in_use_connections)
+        return {
+            "max_connections": self.max_connections,
+            "in_use": in_use,
+            "idle": len(self._available_connections),
+            "peak_in_use": self.peak_in_use,
+            "saturation": round(in_use / self.max_connections, 4),
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait_ms / self.acquired, 3) if self.acquired else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 3),
+        }
@@ -1,112 +1,408 @@
 """Redis-based session storage implementation."""
 
+import asyncio
 import json
-from typing import Optional
+import time
+from typing import Any, Dict, Iterable, Optional, List
 import redis.asyncio as aioredis
-from app.storage.session_store import SessionStore
-from app.models.internal import SessionData
+from redis.exceptions import ResponseError
+from app.storage.session_store import SessionStore, AppendResult
+from app.storage.redis_pool import InstrumentedConnectionPool
+from app.storage import codec
+from app.models.internal import SessionData, ConversationTurn
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 
 class RedisSessionStore(SessionStore):
-    """Redis implementation of session storage."""
-    
-    def __init__(self, redis_url: str):
+    """
+    Redis implementation of session storage.
+
+    Layout (format version 2):
+        session:{id}        HASH  v, created_at, last_activity, meta (encoded)
+        session:{id}:turns  LIST  one encoded turn per entry, oldest first
+
+    Sessions written by older versions are a single JSON string under
+    ``session:{id}``; they are still readable and are migrated to the new
+    layout on their next append.
+    """
+
+    LAYOUT_VERSION = b"2"
+
+    # KEYS: header, turns; ARGV: now, max_turns, ttl, encoded turns...
+    # Returns -1 if the header is a legacy JSON string
+    _APPEND_SCRIPT = """
+if redis.call('TYPE', KEYS[1])['ok'] == 'string' then
+    return -1
+end
+redis.call('HSETNX', KEYS[1], 'v', '2')
+redis.call('HSETNX', KEYS[1], 'created_at', ARGV[1])
+redis.call('HSET', KEYS[1], 'last_activity', ARGV[1])
+local length = redis.call('RPUSH', KEYS[2], unpack(ARGV, 4))
+local max_turns = tonumber(ARGV[2])
+if max_turns > 0 and length > max_turns then
+    redis.call('LTRIM', KEYS[2], -max_turns, -1)
+    length = max_turns
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return length
+"""
+
+    # KEYS: header, turns; ARGV: encoded metadata, encoded folded turns...
+    # Returns 0 unless the list still starts with the folded turns
+    _COMPACT_SCRIPT = """
+if redis.call('TYPE', KEYS[1])['ok'] ~= 'hash' then
+    return 0
+end
+local count = #ARGV - 1
+local head = redis.call('LRANGE', KEYS[2], 0, count - 1)
+if #head ~= count then
+    return 0
+end
+for i = 1, count do
+    if head[i] ~= ARGV[i + 1] then
+        return 0
+    end
+end
+redis.call('LTRIM', KEYS[2], count, -1)
+redis.call('HSET', KEYS[1], 'meta', ARGV[1])
+return 1
+"""
+
+    def __init__(
+        self,
+        redis_url: str,
+        max_connections: int = 64,
+        pool_timeout: float = 5.0,
+        socket_timeout: float = 5.0,
+        socket_connect_timeout: float = 2.0,
+        socket_keepalive: bool = True,
+        health_check_interval: int = 30
+    ):
         """
         Initialize Redis session store.
-        
+
         Args:
             redis_url: Redis connection URL
+            max_connections: Connection pool size
+            pool_timeout: Seconds to wait for a free connection before failing
+            socket_timeout: Seconds to wait for a command reply
+            socket_connect_timeout: Seconds to wait when opening a connection
+            socket_keepalive: Enable TCP keepalive on pooled connections
+            health_check_interval: Seconds of idleness before a connection is
+                PINGed on checkout (0 disables)
         """
         self.redis_url = redis_url
         self.redis: Optional[aioredis.Redis] = None
-    
+        self.pool: Optional[InstrumentedConnectionPool] = None
+        self._pool_options = {
+            "max_connections": max_connections,
+            "timeout": pool_timeout,
+            "socket_timeout": socket_timeout,
+            "socket_connect_timeout": socket_connect_timeout,
+            "socket_keepalive": socket_keepalive,
+            "health_check_interval": health_check_interval,
+        }
+        self._init_lock = asyncio.Lock()
+
     async def _get_client(self) -> aioredis.Redis:
-        """Get or create Redis client."""
+        """Get or create Redis client (at most once, even under concurrent first use)."""
         if self.redis is None:
-            self.redis = await aioredis.from_url(
-                self.redis_url,
-                encoding="utf-8",
-                decode_responses=True
-            )
+            async with self._init_lock:
+                if self.redis is None:
+                    # Binary-safe: session values are msgpack, not text
+                    self.pool = InstrumentedConnectionPool.from_url(
+                        self.redis_url,
+                        decode_responses=False,
+                        **self._pool_options
+                    )
+                    self.redis = aioredis.Redis.from_pool(self.pool)
+                    logger.info(
+                        "redis_pool_created",
+                        max_connections=self._pool_options["max_connections"]
+                    )
         return self.redis
-    
+
+    async def get_client(self) -> aioredis.Redis:
+        """Get the Redis client so other components can share the connection."""
+        return await self._get_client()
+
     def _make_key(self, session_id: str) -> str:
         """Create Redis key for session."""
         return f"session:{session_id}"
-    
-    async def get(self, session_id: str) -> Optional[SessionData]:
-        """Retrieve session data from Redis."""
+
+    def _make_turns_key(self, session_id: str) -> str:
+        """Create Redis key for the session's turn list."""
+        return f"session:{session_id}:turns"
+
+    def _queue_get(self, pipe: Any, session_id: str, max_turns: Optional[int]) -> None:
+        """Queue the commands that read one session."""
+        pipe.hgetall(self._make_key(session_id))
+        pipe.lrange(self._make_turns_key(session_id), -max_turns if max_turns else 0, -1)
+
+    async def _parse_session(
+        self,
+        client: aioredis.Redis,
+        session_id: str,
+        header: Any,
+        turns: Any,
+        max_turns: Optional[int]
+    ) -> Optional[SessionData]:
+        """Build a session from pipelined HGETALL/LRANGE replies."""
+        if isinstance(header, ResponseError):
+            # WRONGTYPE: legacy JSON session
+            return await self._get_legacy(client, session_id, max_turns)
+        if isinstance(turns, Exception):
+            raise turns
+
+        if not header:
+            return None
+
+        meta = header.get(b"meta")
+        return SessionData.model_construct(
+            session_id=session_id,
+            conversation_history=codec.decode_turns(turns),
+            created_at=int(header.get(b"created_at", 0)),
+            last_activity=int(header.get(b"last_activity", 0)),
+            metadata=codec.decode(meta) if meta else {},
+        )
+
+    async def get(self, session_id: str, max_turns: Optional[int] = None) -> Optional[SessionData]:
+        """Retrieve session data from Redis, optionally only the last ``max_turns`` turns."""
         try:
             client = await self._get_client()
-            data = await client.get(self._make_key(session_id))
-            
-            if data is None:
-                return None
-            
-            session_dict = json.loads(data)
-            return SessionData(**session_dict)
-            
+
+            async with client.pipeline(transaction=False) as pipe:
+                self._queue_get(pipe, session_id, max_turns)
+                header, turns = await pipe.execute(raise_on_error=False)
+
+            return await self._parse_session(client, session_id, header, turns, max_turns)
+
         except Exception as e:
             logger.error("redis_get_error", session_id=session_id, error=str(e))
             return None
-    
+
+    async def get_many(
+        self,
+        session_ids: Iterable[str],
+        max_turns: Optional[int] = None
+    ) -> Dict[str, Optional[SessionData]]:
+        """Retrieve several sessions in one pipelined round trip."""
+        session_ids = list(dict.fromkeys(session_ids))
+        try:
+            client = await self._get_client()
+
+            async with client.pipeline(transaction=False) as pipe:
+                for session_id in session_ids:
+                    self._queue_get(pipe, session_id, max_turns)
+                replies = await pipe.execute(raise_on_error=False)
+
+            results = {}
+            for i, session_id in enumerate(session_ids):
+                header, turns = replies[2 * i], replies[2 * i + 1]
+                results[session_id] = await self._parse_session(
+                    client, session_id, header, turns, max_turns
+                )
+            return results
+
+        except Exception as e:
+            logger.error("redis_get_many_error", count=len(session_ids), error=str(e))
+            return {session_id: None for session_id in session_ids}
+
+    async def _get_legacy(
+        self,
+        client: aioredis.Redis,
+        session_id: str,
+        max_turns: Optional[int] = None
+    ) -> Optional[SessionData]:
+        """Read a session stored as a single JSON document."""
+        data = await client.get(self._make_key(session_id))
+        if data is None:
+            return None
+
+        session = SessionData(**json.loads(data))
+        if max_turns:
+            session.conversation_history = session.conversation_history[-max_turns:]
+        return session
+
+    def _queue_set(self, pipe: Any, session_id: str, session_data: SessionData, ttl: int) -> None:
+        """Queue the commands that replace one session."""
+        key = self._make_key(session_id)
+        turns_key = self._make_turns_key(session_id)
+
+        pipe.delete(key, turns_key)
+        pipe.hset(key, mapping={
+            "v": self.LAYOUT_VERSION,
+            "created_at": session_data.created_at,
+            "last_activity": session_data.last_activity,
+            "meta": codec.encode(session_data.metadata),
+        })
+        if session_data.conversation_history:
+            pipe.rpush(turns_key, *(codec.encode_turn(t) for t in session_data.conversation_history))
+            pipe.expire(turns_key, ttl)
+        pipe.expire(key, ttl)
+
     async def set(self, session_id: str, session_data: SessionData, ttl: int) -> None:
-        """Store session data in Redis with TTL."""
+        """Store session data in Redis with TTL, replacing any previous value."""
         try:
             client = await self._get_client()
-            data = session_data.model_dump_json()
-            await client.setex(
-                self._make_key(session_id),
-                ttl,
-                data
-            )
+
+            async with client.pipeline(transaction=True) as pipe:
+                self._queue_set(pipe, session_id, session_data, ttl)
+                await pipe.execute()
+
             logger.debug("redis_set", session_id=session_id, ttl=ttl)
-            
+
         except Exception as e:
             logger.error("redis_set_error", session_id=session_id, error=str(e))
             raise
-    
+
+    async def set_many(self, sessions: Dict[str, SessionData], ttl: int) -> None:
+        """Store several sessions in one round trip (each replaced atomically)."""
+        try:
+            client = await self._get_client()
+
+            async with client.pipeline(transaction=True) as pipe:
+                for session_id, session_data in sessions.items():
+                    self._queue_set(pipe, session_id, session_data, ttl)
+                await pipe.execute()
+
+            logger.debug("redis_set_many", count=len(sessions), ttl=ttl)
+
+        except Exception as e:
+            logger.error("redis_set_many_error", count=len(sessions), error=str(e))
+            raise
+
+    async def append_turns(
+        self,
+        session_id: str,
+        turns: List[ConversationTurn],
+        max_turns: int,
+        ttl: int
+    ) -> AppendResult:
+        """Append turns atomically with a server-side script (O(1), one round trip)."""
+        try:
+            client = await self._get_client()
+            args = [
+                int(time.time()),
+                max_turns,
+                ttl,
+                *(codec.encode_turn(turn) for turn in turns)
+            ]
+            keys = (self._make_key(session_id), self._make_turns_key(session_id))
+
+            length = await client.eval(self._APPEND_SCRIPT, 2, *keys, *args)
+            if length == -1:
+                await self._migrate_legacy(client, session_id, ttl)
+                length = await client.eval(self._APPEND_SCRIPT, 2, *keys, *args)
+
+            logger.debug("redis_append", session_id=session_id, history_length=length)
+            return AppendResult(int(length), ttl)
+
+        except Exception as e:
+            logger.error("redis_append_error", session_id=session_id, error=str(e))
+            raise
+
+    async def compact_history(
+        self,
+        session_id: str,
+        folded: List[ConversationTurn],
+        metadata: Dict[str, Any]
+    ) -> bool:
+        """Compact with a server-side script comparing the folded turns as stored."""
+        try:
+            client = await self._get_client()
+            compacted = await client.eval(
+                self._COMPACT_SCRIPT,
+                2,
+                self._make_key(session_id),
+                self._make_turns_key(session_id),
+                codec.encode(metadata),
+                *(codec.encode_turn(turn) for turn in folded)
+            )
+            return bool(compacted)
+
+        except Exception as e:
+            logger.error("redis_compact_error", session_id=session_id, error=str(e))
+            raise
+
+    async def _migrate_legacy(self, client: aioredis.Redis, session_id: str, ttl: int) -> None:
+        """Rewrite a legacy JSON session in the list-based layout."""
+        session = await self._get_legacy(client, session_id)
+        if session is not None:
+            await self.set(session_id, session, ttl)
+            logger.info("redis_session_migrated", session_id=session_id)
+
     async def delete(self, session_id: str) -> bool:
         """Delete session from Redis."""
         try:
             client = await self._get_client()
-            result = await client.delete(self._make_key(session_id))
+            result = await client.delete(
+                self._make_key(session_id),
+                self._make_turns_key(session_id)
+            )
             return result > 0
-            
+
         except Exception as e:
             logger.error("redis_delete_error", session_id=session_id, error=str(e))
             return False
-    
+
+    async def delete_many(self, session_ids: Iterable[str]) -> int:
+        """Delete several sessions with a single command."""
+        session_ids = list(session_ids)
+        if not session_ids:
+            return 0
+        try:
+            client = await self._get_client()
+            keys = []
+            for session_id in session_ids:
+                keys.append(self._make_key(session_id))
+                keys.append(self._make_turns_key(session_id))
+            return await client.delete(*keys)
+
+        except Exception as e:
+            logger.error("redis_delete_many_error", count=len(session_ids), error=str(e))
+            return 0
+
     async def update_ttl(self, session_id: str, ttl: int) -> bool:
         """Update session TTL in Redis."""
         try:
             client = await self._get_client()
-            result = await client.expire(self._make_key(session_id), ttl)
-            return result
-            
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.expire(self._make_key(session_id), ttl)
+                pipe.expire(self._make_turns_key(session_id), ttl)
+                result, _ = await pipe.execute()
+            return bool(result)
+
         except Exception as e:
             logger.error("redis_update_ttl_error", session_id=session_id, error=str(e))
             return False
-    
+
     async def get_ttl(self, session_id: str) -> Optional[int]:
         """Get remaining TTL from Redis."""
         try:
             client = await self._get_client()
             ttl = await client.ttl(self._make_key(session_id))
-            
+
             # Redis returns -2 if key doesn't exist, -1 if no expiry
             if ttl < 0:
                 return None
-            
+
             return ttl
-            
+
         except Exception as e:
             logger.error("redis_get_ttl_error", session_id=session_id, error=str(e))
             return None
-    
+
+    def stats(self) -> Dict[str, Any]:
+        """Return connection pool metrics."""
+        return {
+            "backend": "redis",
+            "pool": self.pool.stats() if self.pool is not None else None,
+        }
+
     async def ping(self) -> bool:
         """Check Redis connection."""
         try:
@@ -116,9 +412,10 @@ class RedisSessionStore(SessionStore):
         except Exception as e:
             logger.error("redis_ping_error", error=str(e))
             return False
-    
+
     async def close(self) -> None:
         """Close Redis connection."""
         if self.redis:
-            await self.redis.close()
+            await self.redis.aclose()
             self.redis = None
+            self.pool = None
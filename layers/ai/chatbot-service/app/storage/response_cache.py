@@ -0,0 +1,216 @@
+"""Cache of generated chat responses keyed on normalized questions."""
+
+import hashlib
+import json
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.storage.redis_store import RedisSessionStore
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n\r?!.,;:"
+
+
+def normalize_message(message: str) -> str:
+    """
+    Normalize a user message for cache lookups.
+
+    Lowercases, collapses whitespace and strips surrounding punctuation so
+    that trivially different phrasings share an entry.
+    """
+    return _WHITESPACE.sub(" ", message.lower()).strip(_EDGE_PUNCTUATION)
+
+
+def make_cache_key(message: str, symbol: Optional[str] = None) -> str:
+    """
+    Build a cache key from the user message and optional context symbol.
+
+    Args:
+        message: Raw user message
+        symbol: ``crypto_context.symbol`` if provided
+
+    Returns:
+        Stable cache key
+    """
+    raw = f"{(symbol or '').upper()}\x1f{normalize_message(message)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Abstract base class for response caches."""
+
+    def __init__(self, ttl: int, max_entries: int):
+        """
+        Initialize cache.
+
+        Args:
+            ttl: Entry lifetime in seconds
+            max_entries: Maximum number of cached responses
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from ``make_cache_key``
+
+        Returns:
+            Cached response data if present, None otherwise
+        """
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Cache key from ``make_cache_key``
+            value: Generated response data
+        """
+        await self._set(key, value)
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Backend lookup."""
+        pass
+
+    @abstractmethod
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        """Backend store."""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+    async def close(self) -> None:
+        """Release backend resources."""
+        pass
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU cache with per-entry expiry."""
+
+    backend = "memory"
+
+    def __init__(self, ttl: int, max_entries: int):
+        """Initialize in-memory cache."""
+        super().__init__(ttl, max_entries)
+        self._data: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.evictions = 0
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        value, expiry = entry
+        if expiry < time.time():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        self._data[key] = (value, time.time() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["entries"] = len(self._data)
+        stats["evictions"] = self.evictions
+        return stats
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    Redis-backed cache shared by all workers.
+
+    Reuses the connection of the Redis session store. Entry count is bounded
+    with an insertion-ordered index that is trimmed on every write.
+    """
+
+    backend = "redis"
+
+    KEY_PREFIX = "chat:response:"
+    INDEX_KEY = "chat:response:index"
+
+    # KEYS: entry, index; ARGV: value, ttl, now, max_entries
+    _SET_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', tonumber(ARGV[3]) - tonumber(ARGV[2]))
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[4])
+if excess > 0 then
+    local stale = redis.call('ZRANGE', KEYS[2], 0, excess - 1)
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, excess - 1)
+    redis.call('DEL', unpack(stale))
+end
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return excess
+"""
+
+    def __init__(self, store: RedisSessionStore, ttl: int, max_entries: int):
+        """
+        Initialize Redis cache.
+
+        Args:
+            store: Session store whose Redis connection is shared
+            ttl: Entry lifetime in seconds
+            max_entries: Maximum number of cached responses
+        """
+        super().__init__(ttl, max_entries)
+        self.store = store
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            client = await self.store.get_client()
+            data = await client.get(self.KEY_PREFIX + key)
+            return json.loads(data) if data is not None else None
+        except Exception as e:
+            logger.warning("response_cache_get_error", error=str(e))
+            return None
+
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            client = await self.store.get_client()
+            await client.eval(
+                self._SET_SCRIPT,
+                2,
+                self.KEY_PREFIX + key,
+                self.INDEX_KEY,
+                json.dumps(value),
+                self.ttl,
+                int(time.time()),
+                self.max_entries,
+            )
+        except Exception as e:
+            logger.warning("response_cache_set_error", error=str(e))
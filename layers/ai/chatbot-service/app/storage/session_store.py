@@ -1,20 +1,29 @@
 """Abstract session storage interface."""
 
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
-from app.models.internal import SessionData
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from app.models.internal import SessionData, ConversationTurn
+
+
+class AppendResult(NamedTuple):
+    """Outcome of appending turns to a session."""
+    
+    history_length: int
+    ttl_remaining: Optional[int]
 
 
 class SessionStore(ABC):
     """Abstract base class for session storage."""
     
     @abstractmethod
-    async def get(self, session_id: str) -> Optional[SessionData]:
+    async def get(self, session_id: str, max_turns: Optional[int] = None) -> Optional[SessionData]:
         """
         Retrieve session data by ID.
         
         Args:
             session_id: Session identifier
+            max_turns: If set, only the last ``max_turns`` turns are loaded
             
         Returns:
             SessionData if found, None otherwise
@@ -73,6 +82,126 @@ class SessionStore(ABC):
         """
         pass
     
+    async def append_turns(
+        self,
+        session_id: str,
+        turns: List[ConversationTurn],
+        max_turns: int,
+        ttl: int
+    ) -> AppendResult:
+        """
+        Append conversation turns, creating the session if needed.
+        
+        Keeps only the last ``max_turns`` turns, refreshes ``last_activity``
+        and resets the TTL. Backends should override this with a single
+        atomic round trip; this default falls back to get/set/get_ttl.
+        
+        Args:
+            session_id: Session identifier
+            turns: Turns to append, oldest first
+            max_turns: Maximum turns to retain (0 for unbounded)
+            ttl: Time to live in seconds
+            
+        Returns:
+            Updated history length and remaining TTL
+        """
+        now = int(time.time())
+        session = await self.get(session_id)
+        if session is None:
+            session = SessionData(session_id=session_id, created_at=now, last_activity=now)
+        
+        history = session.conversation_history + list(turns)
+        if max_turns > 0:
+            history = history[-max_turns:]
+        session.conversation_history = history
+        session.last_activity = now
+        
+        await self.set(session_id, session, ttl)
+        return AppendResult(len(history), await self.get_ttl(session_id))
+    
+    async def compact_history(
+        self,
+        session_id: str,
+        folded: List[ConversationTurn],
+        metadata: Dict[str, Any]
+    ) -> bool:
+        """
+        Drop the oldest turns and replace the metadata, if they are still the oldest.
+        
+        Used to fold old turns into a summary. The session is only changed
+        if its history still starts with ``folded``, so turns appended since
+        the caller read it are kept. The TTL is left as it is. Backends
+        should override this so the check and the write are atomic; this
+        default falls back to get/set.
+        
+        Args:
+            session_id: Session identifier
+            folded: Turns to drop from the start of the history
+            metadata: New session metadata
+            
+        Returns:
+            True if compacted, False if the session is gone or its history changed
+        """
+        session = await self.get(session_id)
+        ttl = await self.get_ttl(session_id)
+        if session is None or ttl is None or session.conversation_history[:len(folded)] != folded:
+            return False
+        
+        await self.set(session_id, session.model_copy(update={
+            "conversation_history": session.conversation_history[len(folded):],
+            "metadata": metadata,
+        }), ttl)
+        return True
+    
+    async def get_many(
+        self,
+        session_ids: Iterable[str],
+        max_turns: Optional[int] = None
+    ) -> Dict[str, Optional[SessionData]]:
+        """
+        Retrieve several sessions.
+        
+        Backends with network round trips should override this to batch
+        the lookups; this default calls ``get`` for each ID.
+        
+        Args:
+            session_ids: Session identifiers
+            max_turns: If set, only the last ``max_turns`` turns are loaded
+            
+        Returns:
+            Mapping of session ID to SessionData, or None if not found
+        """
+        return {
+            session_id: await self.get(session_id, max_turns=max_turns)
+            for session_id in dict.fromkeys(session_ids)
+        }
+    
+    async def set_many(self, sessions: Dict[str, SessionData], ttl: int) -> None:
+        """
+        Store several sessions with the same TTL.
+        
+        Args:
+            sessions: Mapping of session ID to session data
+            ttl: Time to live in seconds
+        """
+        for session_id, session_data in sessions.items():
+            await self.set(session_id, session_data, ttl)
+    
+    async def delete_many(self, session_ids: Iterable[str]) -> int:
+        """
+        Delete several sessions.
+        
+        Args:
+            session_ids: Session identifiers
+            
+        Returns:
+            Number of sessions deleted
+        """
+        deleted = 0
+        for session_id in session_ids:
+            deleted += await self.delete(session_id)
+        return deleted
+    
     @abstractmethod
     async def ping(self) -> bool:
         """
@@ -0,0 +1,457 @@
+"""Shared-memory session storage for several workers on one host."""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from app.storage.session_store import SessionStore, AppendResult
+from app.storage import codec
+from app.models.internal import SessionData, ConversationTurn
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_MAGIC = b"CHATSHM1"
+_LAYOUT_VERSION = 1
+
+# magic, layout version, slot count, slot size, ways
+_HEADER = struct.Struct("<8sIIII")
+_HEADER_SIZE = 64
+
+# seq, key hash, expiry, payload length, payload crc32, key length
+_SLOT = struct.Struct("<QQdIIH6x")
+_SEQ = struct.Struct("<Q")
+_KEY_MAX = 128
+_PAYLOAD_OFFSET = _SLOT.size + _KEY_MAX
+
+# Optimistic reads retried before taking the bucket lock
+_READ_ATTEMPTS = 3
+
+
+def _hash_key(session_id: bytes) -> int:
+    """Stable 64-bit key hash (the built-in hash is salted per process); never 0."""
+    return int.from_bytes(hashlib.blake2b(session_id, digest_size=8).digest(), "little") or 1
+
+
+class SharedMemorySessionStore(SessionStore):
+    """
+    Session storage in a memory-mapped file shared by all workers on a host.
+
+    The file (under ``/dev/shm`` by default) holds a fixed number of
+    fixed-size slots, so its size is the memory budget. Slots are grouped
+    into buckets of ``ways`` slots; a session lives in one slot of the
+    bucket its ID hashes to. When a bucket is full, the slot whose expiry
+    is nearest is reused, which approximates LRU because every append
+    resets the TTL.
+
+    Reads take no lock: each slot carries a sequence number that is odd
+    while a write is in progress (a seqlock) and a CRC of its payload, and
+    a read that overlaps a write is retried. Writes lock only their bucket
+    with an ``fcntl`` byte-range lock, so workers writing different
+    sessions do not contend, and an append is atomic across workers.
+    Expired slots are ignored on read and reused on write, so no cleanup
+    task is needed.
+
+    Sessions larger than a slot lose their oldest turns until they fit.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 32 * 1024 * 1024,
+        slot_bytes: int = 16 * 1024,
+        ways: int = 8
+    ):
+        """
+        Open or create the shared session file.
+
+        Workers configured alike attach to the same file. A file with a
+        different layout is replaced (atomically, so workers still mapping
+        the old one are unaffected).
+
+        Args:
+            path: File to map; use a tmpfs such as /dev/shm so it stays in memory
+            max_bytes: Memory budget for all slots
+            slot_bytes: Size of one slot, bounding a single session's encoded size
+            ways: Slots per bucket
+
+        Raises:
+            ValueError: If the budget is too small for one bucket
+            OSError: If the file cannot be created or mapped
+        """
+        if slot_bytes <= _PAYLOAD_OFFSET:
+            raise ValueError(f"slot_bytes must be larger than {_PAYLOAD_OFFSET}")
+        self.path = path
+        self.slot_bytes = slot_bytes
+        self.ways = ways
+        self.bucket_count = max_bytes // (slot_bytes * ways)
+        if self.bucket_count < 1:
+            raise ValueError("max_bytes is too small for one bucket of slots")
+        self.slot_count = self.bucket_count * ways
+        self.payload_capacity = slot_bytes - _PAYLOAD_OFFSET
+        self._size = _HEADER_SIZE + self.slot_count * slot_bytes
+        self._fd, self._mm = self._open()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.truncations = 0
+        self.read_retries = 0
+
+    def _expected_header(self) -> bytes:
+        return _HEADER.pack(_MAGIC, _LAYOUT_VERSION, self.slot_count, self.slot_bytes, self.ways)
+
+    def _open(self) -> Tuple[int, mmap.mmap]:
+        """Attach to the shared file, creating or replacing it if its layout differs."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = self._expected_header()
+
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX, _HEADER_SIZE, 0, os.SEEK_SET)
+                # Another worker may have replaced the file while we waited
+                if os.fstat(fd).st_ino != os.stat(self.path).st_ino:
+                    os.close(fd)
+                    continue
+                if os.fstat(fd).st_size != self._size or os.pread(fd, _HEADER.size, 0) != header:
+                    self._replace_file(header)
+                    os.close(fd)
+                    continue
+                mm = mmap.mmap(fd, self._size)
+                fcntl.lockf(fd, fcntl.LOCK_UN, _HEADER_SIZE, 0, os.SEEK_SET)
+                logger.info("shm_store_attached", path=self.path, slots=self.slot_count, bytes=self._size)
+                return fd, mm
+            except BaseException:
+                os.close(fd)
+                raise
+
+    def _replace_file(self, header: bytes) -> None:
+        """Write an empty file with the current layout and move it into place."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(fd, self._size)
+            os.pwrite(fd, header, 0)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, self.path)
+        logger.info("shm_store_initialized", path=self.path, slots=self.slot_count, bytes=self._size)
+
+    def _bucket(self, key_hash: int) -> int:
+        return _HEADER_SIZE + (key_hash % self.bucket_count) * self.ways * self.slot_bytes
+
+    def _lock(self, bucket: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, bucket, os.SEEK_SET)
+
+    def _unlock(self, bucket: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, bucket, os.SEEK_SET)
+
+    def _read_slot(self, offset: int, key: bytes, key_hash: int, now: float) -> Optional[Tuple[float, bytes]]:
+        """
+        Read a slot if it holds ``key`` and has not expired.
+
+        Returns:
+            (expiry, payload), or None if the slot holds something else
+
+        Raises:
+            BlockingIOError: If every attempt overlapped a write
+        """
+        mm = self._mm
+        for _ in range(_READ_ATTEMPTS):
+            seq, slot_hash, expiry, length, crc, key_len = _SLOT.unpack_from(mm, offset)
+            if seq & 1:
+                self.read_retries += 1
+                continue
+            if slot_hash != key_hash or expiry <= now:
+                # A concurrent write could be moving the key here; recheck seq
+                if _SEQ.unpack_from(mm, offset)[0] == seq:
+                    return None
+                self.read_retries += 1
+                continue
+            slot_key = mm[offset + _SLOT.size:offset + _SLOT.size + key_len]
+            payload = mm[offset + _PAYLOAD_OFFSET:offset + _PAYLOAD_OFFSET + length]
+            if _SEQ.unpack_from(mm, offset)[0] == seq and zlib.crc32(payload) == crc:
+                return (expiry, payload) if slot_key == key else None
+            self.read_retries += 1
+        raise BlockingIOError("slot kept changing during read")
+
+    def _find(self, key: bytes, key_hash: int, now: float) -> Optional[Tuple[float, bytes]]:
+        """Lock-free lookup, falling back to the bucket lock if reads keep colliding with writes."""
+        bucket = self._bucket(key_hash)
+        try:
+            for way in range(self.ways):
+                found = self._read_slot(bucket + way * self.slot_bytes, key, key_hash, now)
+                if found is not None:
+                    return found
+            return None
+        except BlockingIOError:
+            pass
+
+        self._lock(bucket)
+        try:
+            return self._locate_locked(bucket, key, key_hash, now)[1]
+        finally:
+            self._unlock(bucket)
+
+    def _locate_locked(
+        self,
+        bucket: int,
+        key: bytes,
+        key_hash: int,
+        now: float
+    ) -> Tuple[int, Optional[Tuple[float, bytes]]]:
+        """
+        Choose the slot for ``key`` while holding the bucket lock.
+
+        A slot left mid-write by a worker that died is cleared here, since
+        no live writer can hold the lock.
+
+        Returns:
+            (slot offset, (expiry, payload) if the slot holds a live copy of ``key``)
+        """
+        mm = self._mm
+        free = None
+        victim, victim_expiry = bucket, float("inf")
+        for way in range(self.ways):
+            offset = bucket + way * self.slot_bytes
+            seq, slot_hash, expiry, length, crc, key_len = _SLOT.unpack_from(mm, offset)
+            if seq & 1:
+                self._clear_locked(offset)
+                slot_hash = 0
+            if slot_hash == key_hash and mm[offset + _SLOT.size:offset + _SLOT.size + key_len] == key:
+                if expiry <= now:
+                    return offset, None
+                payload = mm[offset + _PAYLOAD_OFFSET:offset + _PAYLOAD_OFFSET + length]
+                if zlib.crc32(payload) != crc:
+                    self._clear_locked(offset)
+                    return offset, None
+                return offset, (expiry, payload)
+            if slot_hash == 0 or expiry <= now:
+                if free is None:
+                    free = offset
+            elif expiry < victim_expiry:
+                victim, victim_expiry = offset, expiry
+        return (free if free is not None else victim), None
+
+    def _begin_write(self, offset: int) -> int:
+        """Mark a slot as being written; returns the odd sequence number."""
+        seq = _SEQ.unpack_from(self._mm, offset)[0] | 1
+        _SEQ.pack_into(self._mm, offset, seq)
+        return seq
+
+    def _write_locked(self, offset: int, key: bytes, key_hash: int, expiry: float, payload: bytes) -> None:
+        """Write a slot under the bucket lock, bracketed by odd/even sequence numbers."""
+        mm = self._mm
+        _, slot_hash, slot_expiry, _, _, _ = _SLOT.unpack_from(mm, offset)
+        if slot_hash not in (0, key_hash) and slot_expiry > time.time():
+            self.evictions += 1
+        seq = self._begin_write(offset)
+        mm[offset + _SLOT.size:offset + _SLOT.size + len(key)] = key
+        mm[offset + _PAYLOAD_OFFSET:offset + _PAYLOAD_OFFSET + len(payload)] = payload
+        _SLOT.pack_into(mm, offset, seq, key_hash, expiry, len(payload), zlib.crc32(payload), len(key))
+        _SEQ.pack_into(mm, offset, seq + 1)
+
+    def _clear_locked(self, offset: int) -> None:
+        seq = self._begin_write(offset)
+        _SLOT.pack_into(self._mm, offset, seq, 0, 0.0, 0, 0, 0)
+        _SEQ.pack_into(self._mm, offset, seq + 1)
+
+    @staticmethod
+    def _key(session_id: str) -> bytes:
+        key = session_id.encode("utf-8")
+        if len(key) > _KEY_MAX:
+            raise ValueError(f"Session ID longer than {_KEY_MAX} bytes")
+        return key
+
+    def _encode(self, session_data: SessionData) -> bytes:
+        """Encode a session, dropping its oldest turns until it fits in a slot."""
+        history = session_data.conversation_history
+        turns = [[turn.role, turn.content, turn.timestamp] for turn in history]
+        while True:
+            payload = codec.encode([session_data.created_at, session_data.last_activity, session_data.metadata, turns])
+            if len(payload) <= self.payload_capacity:
+                if len(turns) < len(history):
+                    self.truncations += 1
+                    logger.warning("shm_session_truncated", session_id=session_data.session_id, kept_turns=len(turns))
+                return payload
+            if not turns:
+                raise ValueError("Session metadata does not fit in a shared memory slot")
+            del turns[0]
+
+    @staticmethod
+    def _decode(session_id: str, payload: bytes, max_turns: Optional[int] = None) -> SessionData:
+        created_at, last_activity, metadata, turns = codec.decode(payload)
+        if max_turns:
+            turns = turns[-max_turns:]
+        return SessionData.model_construct(
+            session_id=session_id,
+            conversation_history=[
+                ConversationTurn.model_construct(role=role, content=content, timestamp=timestamp)
+                for role, content, timestamp in turns
+            ],
+            created_at=created_at,
+            last_activity=last_activity,
+            metadata=metadata,
+        )
+
+    async def get(self, session_id: str, max_turns: Optional[int] = None) -> Optional[SessionData]:
+        """Retrieve session data without taking a lock."""
+        key = self._key(session_id)
+        found = self._find(key, _hash_key(key), time.time())
+        if found is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._decode(session_id, found[1], max_turns)
+
+    async def set(self, session_id: str, session_data: SessionData, ttl: int) -> None:
+        """Store session data with TTL, replacing any previous value."""
+        key = self._key(session_id)
+        key_hash = _hash_key(key)
+        payload = self._encode(session_data)
+        now = time.time()
+        bucket = self._bucket(key_hash)
+        self._lock(bucket)
+        try:
+            offset, _ = self._locate_locked(bucket, key, key_hash, now)
+            self._write_locked(offset, key, key_hash, now + ttl, payload)
+        finally:
+            self._unlock(bucket)
+        logger.debug("shm_set", session_id=session_id, ttl=ttl)
+
+    async def append_turns(
+        self,
+        session_id: str,
+        turns: List[ConversationTurn],
+        max_turns: int,
+        ttl: int
+    ) -> AppendResult:
+        """Append turns atomically across workers under the bucket lock."""
+        key = self._key(session_id)
+        key_hash = _hash_key(key)
+        now = time.time()
+        bucket = self._bucket(key_hash)
+        self._lock(bucket)
+        try:
+            offset, found = self._locate_locked(bucket, key, key_hash, now)
+            if found is not None:
+                session_data = self._decode(session_id, found[1])
+            else:
+                session_data = SessionData(session_id=session_id, created_at=int(now), last_activity=int(now))
+
+            history = session_data.conversation_history
+            history.extend(turns)
+            if max_turns > 0 and len(history) > max_turns:
+                del history[:-max_turns]
+            session_data.last_activity = int(now)
+
+            self._write_locked(offset, key, key_hash, now + ttl, self._encode(session_data))
+        finally:
+            self._unlock(bucket)
+        return AppendResult(len(history), ttl)
+
+    async def compact_history(
+        self,
+        session_id: str,
+        folded: List[ConversationTurn],
+        metadata: Dict[str, Any]
+    ) -> bool:
+        """Compact under the bucket lock, keeping the slot's expiry."""
+        key = self._key(session_id)
+        key_hash = _hash_key(key)
+        bucket = self._bucket(key_hash)
+        self._lock(bucket)
+        try:
+            offset, found = self._locate_locked(bucket, key, key_hash, time.time())
+            if found is None:
+                return False
+            session_data = self._decode(session_id, found[1])
+            history = session_data.conversation_history
+            if history[:len(folded)] != folded:
+                return False
+
+            del history[:len(folded)]
+            session_data.metadata = metadata
+            self._write_locked(offset, key, key_hash, found[0], self._encode(session_data))
+            return True
+        finally:
+            self._unlock(bucket)
+
+    async def delete(self, session_id: str) -> bool:
+        """Delete a session."""
+        key = self._key(session_id)
+        key_hash = _hash_key(key)
+        bucket = self._bucket(key_hash)
+        self._lock(bucket)
+        try:
+            offset, found = self._locate_locked(bucket, key, key_hash, time.time())
+            if found is not None:
+                self._clear_locked(offset)
+            return found is not None
+        finally:
+            self._unlock(bucket)
+
+    async def update_ttl(self, session_id: str, ttl: int) -> bool:
+        """Reset a session's TTL."""
+        key = self._key(session_id)
+        key_hash = _hash_key(key)
+        now = time.time()
+        bucket = self._bucket(key_hash)
+        self._lock(bucket)
+        try:
+            offset, found = self._locate_locked(bucket, key, key_hash, now)
+            if found is None:
+                return False
+            self._write_locked(offset, key, key_hash, now + ttl, found[1])
+            return True
+        finally:
+            self._unlock(bucket)
+
+    async def get_ttl(self, session_id: str) -> Optional[int]:
+        """Get remaining TTL without taking a lock."""
+        key = self._key(session_id)
+        now = time.time()
+        found = self._find(key, _hash_key(key), now)
+        if found is None:
+            return None
+        return int(found[0] - now)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return occupancy of the shared file and this worker's counters."""
+        now = time.time()
+        sessions = 0
+        for slot in range(self.slot_count):
+            _, slot_hash, expiry, _, _, _ = _SLOT.unpack_from(self._mm, _HEADER_SIZE + slot * self.slot_bytes)
+            if slot_hash and expiry > now:
+                sessions += 1
+        lookups = self.hits + self.misses
+        return {
+            "backend": "shared_memory",
+            "path": self.path,
+            "sessions": sessions,
+            "slots": self.slot_count,
+            "slot_bytes": self.slot_bytes,
+            "max_bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "truncations": self.truncations,
+            "read_retries": self.read_retries,
+        }
+
+    async def ping(self) -> bool:
+        """Shared memory is available while the file is mapped."""
+        return not self._mm.closed
+
+    async def close(self) -> None:
+        """Unmap the file; it stays in place for the other workers."""
+        if not self._mm.closed:
+            self._mm.close()
+            os.close(self._fd)
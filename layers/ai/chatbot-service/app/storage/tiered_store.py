@@ -0,0 +1,294 @@
+"""Session store with an in-process near cache in front of a shared backend."""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.storage.session_store import SessionStore, AppendResult
+from app.storage.redis_store import RedisSessionStore
+from app.models.internal import SessionData, ConversationTurn
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class TieredSessionStore(SessionStore):
+    """
+    Near-cache wrapper around another session store.
+    
+    Recently used sessions are kept in a small per-worker LRU so repeated
+    reads of a hot session skip the network. Every write goes through to
+    the backend first. When the backend is Redis, each write also publishes
+    the session ID on an invalidation channel; other workers drop their
+    copy when they receive it. Entries also expire after a short TTL, which
+    bounds staleness if an invalidation is missed, and the cache is bypassed
+    while the subscription is down.
+    """
+    
+    INVALIDATION_CHANNEL = "session:invalidate"
+    
+    # Seconds to wait before resubscribing after the listener fails
+    RESUBSCRIBE_DELAY = 1.0
+    
+    def __init__(self, backend: SessionStore, max_entries: int = 1024, ttl: float = 30.0):
+        """
+        Initialize tiered store.
+        
+        Args:
+            backend: Shared session store that holds the source of truth
+            max_entries: Maximum sessions kept in the near cache
+            ttl: Seconds a cached session may be served without revalidation
+        """
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # session_id -> (data, expiry, turns_loaded); turns_loaded is None for full history
+        self._cache: "OrderedDict[str, Tuple[SessionData, float, Optional[int]]]" = OrderedDict()
+        self._worker_id = uuid.uuid4().hex
+        self._listener_task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Without a shared backend there is no other writer to hear from
+        self._distributed = isinstance(backend, RedisSessionStore)
+        self._subscribed = not self._distributed
+        # session_id -> [reads in flight, version]; only sessions being read
+        # through are tracked, and a write bumps that session's version so a
+        # read that raced it is not cached
+        self._fills: Dict[str, List[int]] = {}
+        # Bumped when the subscription drops, as invalidations may be missed
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations_sent = 0
+        self.invalidations_received = 0
+    
+    def _cache_get(self, session_id: str, max_turns: Optional[int]) -> Optional[SessionData]:
+        """Return a copy of a cached session that satisfies ``max_turns``."""
+        entry = self._cache.get(session_id)
+        if entry is None:
+            return None
+        
+        session_data, expiry, turns_loaded = entry
+        if expiry < time.monotonic():
+            del self._cache[session_id]
+            return None
+        if turns_loaded is not None and not (max_turns and max_turns <= turns_loaded):
+            return None
+        
+        self._cache.move_to_end(session_id)
+        history = session_data.conversation_history
+        return session_data.model_copy(
+            update={"conversation_history": history[-max_turns:] if max_turns else list(history)}
+        )
+    
+    def _cache_put(self, session_id: str, session_data: SessionData, turns_loaded: Optional[int]) -> None:
+        """Store a private copy of a session."""
+        if not self._subscribed:
+            return
+        
+        # A partial read that returned fewer turns than requested is the full history
+        if turns_loaded is not None and len(session_data.conversation_history) < turns_loaded:
+            turns_loaded = None
+        
+        copy = session_data.model_copy(
+            update={"conversation_history": list(session_data.conversation_history)}
+        )
+        self._cache[session_id] = (copy, time.monotonic() + self.ttl, turns_loaded)
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+    
+    def _invalidate_fills(self, session_id: str) -> None:
+        """Keep in-flight reads of a session from caching what they fetched."""
+        fill = self._fills.get(session_id)
+        if fill is not None:
+            fill[1] += 1
+    
+    def _start_listener(self) -> None:
+        """Start the invalidation subscriber if the backend is shared."""
+        if self._closing or not self._distributed:
+            return
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen())
+    
+    async def _listen(self) -> None:
+        """Drop cached sessions written by other workers."""
+        while not self._closing:
+            pubsub = None
+            try:
+                client = await self.backend.get_client()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                self._subscribed = True
+                logger.info("near_cache_subscribed", channel=self.INVALIDATION_CHANNEL)
+                
+                # Poll with a timeout so shutdown is noticed even if cancellation is absorbed
+                while not self._closing:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None:
+                        continue
+                    worker_id, _, session_id = message["data"].decode().partition(":")
+                    if worker_id != self._worker_id:
+                        self._invalidate_fills(session_id)
+                        self._cache.pop(session_id, None)
+                        self.invalidations_received += 1
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("near_cache_subscription_error", error=str(e))
+            finally:
+                # Missed invalidations are possible from here on; stop serving cached data
+                self._subscribed = False
+                self._epoch += 1
+                self._cache.clear()
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+            
+            if not self._closing:
+                await asyncio.sleep(self.RESUBSCRIBE_DELAY)
+    
+    async def _publish_invalidation(self, session_id: str) -> None:
+        """Tell other workers to drop their copy of a session."""
+        if not self._distributed:
+            return
+        try:
+            client = await self.backend.get_client()
+            await client.publish(self.INVALIDATION_CHANNEL, f"{self._worker_id}:{session_id}")
+            self.invalidations_sent += 1
+        except Exception as e:
+            logger.warning("near_cache_publish_error", session_id=session_id, error=str(e))
+    
+    async def get(self, session_id: str, max_turns: Optional[int] = None) -> Optional[SessionData]:
+        """Serve from the near cache, falling back to the backend."""
+        self._start_listener()
+        
+        if self._subscribed:
+            cached = self._cache_get(session_id, max_turns)
+            if cached is not None:
+                self.hits += 1
+                return cached
+        
+        self.misses += 1
+        fill = self._fills.setdefault(session_id, [0, 0])
+        fill[0] += 1
+        version, epoch = fill[1], self._epoch
+        try:
+            session_data = await self.backend.get(session_id, max_turns=max_turns)
+        finally:
+            fill[0] -= 1
+            if fill[0] == 0:
+                del self._fills[session_id]
+        if session_data is not None and fill[1] == version and epoch == self._epoch:
+            self._cache_put(session_id, session_data, max_turns)
+        return session_data
+    
+    async def set(self, session_id: str, session_data: SessionData, ttl: int) -> None:
+        """Write through to the backend and refresh the local copy."""
+        self._start_listener()
+        
+        self._invalidate_fills(session_id)
+        await self.backend.set(session_id, session_data, ttl)
+        self._cache_put(session_id, session_data, None)
+        await self._publish_invalidation(session_id)
+    
+    async def append_turns(
+        self,
+        session_id: str,
+        turns: List[ConversationTurn],
+        max_turns: int,
+        ttl: int
+    ) -> AppendResult:
+        """Append through the backend and apply the same change locally."""
+        self._start_listener()
+        
+        self._invalidate_fills(session_id)
+        result = await self.backend.append_turns(session_id, turns, max_turns, ttl)
+        
+        entry = self._cache.get(session_id)
+        if entry is not None:
+            session_data, _, turns_loaded = entry
+            history = session_data.conversation_history
+            history.extend(turns)
+            if max_turns > 0 and len(history) > max_turns:
+                del history[:-max_turns]
+            
+            # The backend's length doubles as a version check for full copies
+            if turns_loaded is None and len(history) != result.history_length:
+                del self._cache[session_id]
+            else:
+                session_data.last_activity = int(time.time())
+                self._cache[session_id] = (session_data, time.monotonic() + self.ttl, turns_loaded)
+        
+        await self._publish_invalidation(session_id)
+        return result
+    
+    async def compact_history(
+        self,
+        session_id: str,
+        folded: List[ConversationTurn],
+        metadata: Dict[str, Any]
+    ) -> bool:
+        """Compact in the backend and drop the local copy."""
+        self._start_listener()
+        
+        self._invalidate_fills(session_id)
+        compacted = await self.backend.compact_history(session_id, folded, metadata)
+        if compacted:
+            self._cache.pop(session_id, None)
+            await self._publish_invalidation(session_id)
+        return compacted
+    
+    async def delete(self, session_id: str) -> bool:
+        """Delete from the backend and drop the local copy."""
+        self._invalidate_fills(session_id)
+        self._cache.pop(session_id, None)
+        deleted = await self.backend.delete(session_id)
+        await self._publish_invalidation(session_id)
+        return deleted
+    
+    async def update_ttl(self, session_id: str, ttl: int) -> bool:
+        """Update TTL in the backend."""
+        return await self.backend.update_ttl(session_id, ttl)
+    
+    async def get_ttl(self, session_id: str) -> Optional[int]:
+        """Get remaining TTL from the backend."""
+        return await self.backend.get_ttl(session_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return near-cache counters and backend stats."""
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": "tiered",
+            "near_cache": {
+                "entries": len(self._cache),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "subscribed": self._subscribed,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations_sent": self.invalidations_sent,
+                "invalidations_received": self.invalidations_received,
+            },
+        }
+        if hasattr(self.backend, "stats"):
+            stats["shared"] = self.backend.stats()
+        return stats
+    
+    async def ping(self) -> bool:
+        """Check backend availability."""
+        return await self.backend.ping()
+    
+    async def close(self) -> None:
+        """Stop the invalidation listener and close the backend."""
+        self._closing = True
+        if self._listener_task and not self._listener_task.done():
+            self._listener_task.cancel()
+            await asyncio.wait({self._listener_task}, timeout=2.0)
+        self._cache.clear()
+        await self.backend.close()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: serialization cost of the /chat response.
+
+Compares FastAPI's default path (response_model re-validation,
+``jsonable_encoder`` and ``JSONResponse``) with returning
+``FastJSONResponse`` directly, across explanation sizes. Both paths include
+building the validated ``ChatResponse``, and both bodies are checked to
+decode to the same document.
+
+Usage (from the service root):
+    python -m benchmarks.bench_fast_json [--number N]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.api.responses import FastJSONResponse
+from app.models.enums import Timeframe
+from app.models.responses import ChatData, ChatResponse, ResponseMetadata
+
+PROMPTS = ["Why is BTC moving?", "Show BTC all time", "Compare BTC and ETH"]
+
+
+def response_field():
+    """The response field FastAPI builds for ``response_model=ChatResponse``."""
+    app = FastAPI()
+
+    @app.post("/chat", response_model=ChatResponse)
+    async def chat():
+        pass
+
+    return app.router.routes[-1].response_field
+
+
+def make_parts(explanation_chars: int):
+    sentence = "Bitcoin rose 4.2% over the week as ETF inflows continued. "
+    explanation = (sentence * (explanation_chars // len(sentence) + 1))[:explanation_chars]
+    data = ChatData(coins=["BTC", "ETH"], timeframe=Timeframe.ONE_MONTH, explanation=explanation)
+    return data, dict(session_id="0f8fad5b-d9cb-469f-a165-70867728950e", ttl_remaining_sec=3600, generated_at=1700000000, cache_hit=False)
+
+
+async def default_path(field, data, meta) -> bytes:
+    response = ChatResponse(data=data, suggested_next_prompts=PROMPTS, meta=ResponseMetadata(**meta))
+    content = await serialize_response(field=field, response_content=response)
+    return JSONResponse(content).body
+
+
+async def fast_path(field, data, meta) -> bytes:
+    response = ChatResponse(data=data, suggested_next_prompts=PROMPTS, meta=ResponseMetadata(**meta))
+    return FastJSONResponse(response).body
+
+
+IMPLEMENTATIONS = {
+    "default": default_path,
+    "fast": fast_path,
+}
+
+
+async def measure(fn, args, number: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(number):
+            await fn(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+async def run(number: int) -> None:
+    field = response_field()
+    print(f"{'size':>8} " + " ".join(f"{name:>12}" for name in IMPLEMENTATIONS) + f" {'speedup':>8}")
+    for size in [200, 1_000, 2_000]:
+        data, meta = make_parts(size)
+        args = (field, data, meta)
+        bodies = [json.loads(await fn(*args)) for fn in IMPLEMENTATIONS.values()]
+        assert all(body == bodies[0] for body in bodies), "serialized bodies differ"
+
+        timings = [await measure(fn, args, number) for fn in IMPLEMENTATIONS.values()]
+        print(
+            f"{size:>8} "
+            + " ".join(f"{seconds * 1e6:>9.1f} us" for seconds in timings)
+            + f" {timings[0] / timings[1]:>7.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="Calls per timing sample")
+    args = parser.parse_args()
+    asyncio.run(run(args.number))
+
+
+if __name__ == "__main__":
+    main()
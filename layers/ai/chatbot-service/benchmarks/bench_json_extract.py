@@ -0,0 +1,125 @@
+"""
+Micro-benchmark: JSON extraction from model output.
+
+Compares ``app.agents.json_extract.extract_json`` with verbatim copies of the
+``_extract_json`` implementations it replaced in ``gemini_client`` and
+``gemini_new``, across response sizes and shapes.
+
+Usage (from the service root):
+    python -m benchmarks.bench_json_extract [--number N]
+"""
+
+import argparse
+import json
+import re
+import timeit
+
+from app.agents.json_extract import extract_json
+
+
+def legacy_gemini_client(text: str) -> dict:
+    """Previous ``gemini_client.GeminiClient._extract_json``."""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    elif text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+
+    text = text.strip()
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        json_match = re.search(r'\{.*\}', text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+        raise
+
+
+def legacy_gemini_new(text: str) -> dict:
+    """Previous ``gemini_new.GeminiClient._extract_json``."""
+    cleaned = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F]', '', text)
+
+    json_match = re.search(r'```json\s*(\{.*?\})\s*```', cleaned, re.DOTALL)
+    if json_match:
+        cleaned = json_match.group(1)
+    else:
+        start_idx = cleaned.find('{')
+        if start_idx != -1:
+            brace_count = 0
+            for i in range(start_idx, len(cleaned)):
+                if cleaned[i] == '{':
+                    brace_count += 1
+                elif cleaned[i] == '}':
+                    brace_count -= 1
+                    if brace_count == 0:
+                        cleaned = cleaned[start_idx:i+1]
+                        break
+
+    return json.loads(cleaned)
+
+
+IMPLEMENTATIONS = {
+    "extract_json": extract_json,
+    "legacy_gemini_client": legacy_gemini_client,
+    "legacy_gemini_new": legacy_gemini_new,
+}
+
+
+def make_document(explanation_chars: int) -> dict:
+    """Build a response shaped like the chat schema."""
+    sentence = "Bitcoin rose 4.2% over the week as ETF inflows continued. "
+    explanation = (sentence * (explanation_chars // len(sentence) + 1))[:explanation_chars]
+    return {
+        "data": {
+            "coins": ["BTC", "ETH"],
+            "type": "comparison",
+            "timeframe": "7d",
+            "explanation": explanation,
+        },
+        "suggested_next_prompts": [
+            "How does ETH compare over 30 days?",
+            "What drove the inflows?",
+            "Show me SOL",
+        ],
+    }
+
+
+def make_cases(size: int) -> dict:
+    """Input variants for one explanation size."""
+    doc = json.dumps(make_document(size), indent=2)
+    return {
+        "bare": doc,
+        "fenced": f"Here is the analysis:\n```json\n{doc}\n```\n",
+        "prose+duplicate": f"Sure! {doc}\n{doc}",
+    }
+
+
+def run(number: int) -> None:
+    sizes = [200, 2_000, 20_000, 100_000]
+    print(f"{'size':>8} {'case':<16} " + " ".join(f"{name:>22}" for name in IMPLEMENTATIONS))
+    for size in sizes:
+        for case, text in make_cases(size).items():
+            row = []
+            for name, fn in IMPLEMENTATIONS.items():
+                try:
+                    fn(text)
+                except Exception:
+                    row.append(f"{'error':>22}")
+                    continue
+                seconds = min(timeit.repeat(lambda: fn(text), number=number, repeat=3)) / number
+                row.append(f"{seconds * 1e6:>19.1f} us")
+            print(f"{size:>8} {case:<16} " + " ".join(row))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200, help="Calls per timing sample")
+    args = parser.parse_args()
+    run(args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+Load test: /chat throughput and tail latency against a local Gemini stand-in.
+
+Starts the chatbot app with uvicorn in a separate process, with the Gemini
+SDK client replaced by a stand-in that answers after a sampled latency, and
+drives it over HTTP with closed-loop virtual users. Everything between the
+HTTP request and the SDK call is the real service: admission control, fast
+path, response cache, coalescing, the generation limiter, retries and the
+circuit breaker, the session store and history compaction.
+
+Each virtual user sends a message, waits for the answer and sends the next,
+reusing its session for ``--turns`` messages. For every session store and
+concurrency level the report gives p50/p95/p99 latency, throughput and
+error rate, and the results are written as JSON so runs can be compared.
+
+Latency distributions (seconds):
+    const:0.8            always 0.8
+    uniform:0.2:1.5      uniform between 0.2 and 1.5
+    lognormal:0.8:0.5    median 0.8, shape 0.5 (long right tail)
+    exp:0.5              exponential with mean 0.5
+
+The Redis store uses ``--redis-url`` and is skipped if no server answers;
+the shared memory store uses a fresh file in ``--shm-dir``.
+Per-client rate limiting is disabled unless ``--rate-limit`` is given. The
+load generator shares this machine, so at very high request rates it can
+become the bottleneck; compare runs made on the same host.
+
+Usage (from the service root):
+    python -m benchmarks.bench_load [--stores memory,shm,redis] [--concurrency 1,16,64]
+        [--duration 10] [--latency lognormal:0.8:0.5] [--output load.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("GEMINI_API_KEY", "load-test")
+
+import httpx
+
+COINS = ["BTC", "ETH", "SOL", "XRP", "ADA", "DOGE", "AVAX", "DOT"]
+QUESTIONS = [
+    "Why is {coin} moving today?",
+    "What is driving {coin} sentiment this week?",
+    "Is {coin} overbought after the recent rally?",
+    "How did ETF flows affect {coin} this month?",
+]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Sampler for a latency distribution spec such as ``lognormal:0.8:0.5``."""
+    kind, *params = spec.split(":")
+    try:
+        values = [float(p) for p in params]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid latency distribution: {spec}")
+    if kind == "const" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exp" and len(values) == 1:
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    raise argparse.ArgumentTypeError(f"invalid latency distribution: {spec}")
+
+
+def latency_spec(spec: str) -> str:
+    """argparse type: validate a latency spec but keep it as text for the server process."""
+    parse_latency(spec)
+    return spec
+
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def make_document(explanation_chars: int) -> str:
+    """A chat response document with an explanation of the given size."""
+    sentence = "Bitcoin rose 4.2% over the week as ETF inflows continued. "
+    explanation = (sentence * (explanation_chars // len(sentence) + 1))[:explanation_chars]
+    return json.dumps({
+        "data": {"coins": ["BTC"], "timeframe": "1m", "explanation": explanation},
+        "suggested_next_prompts": ["Show ETH", "Compare BTC and SOL", "What moved BTC?"],
+    })
+
+
+class StandInModels:
+    """Async ``models`` API of the Gemini SDK, answering after a sampled latency."""
+
+    def __init__(self, latency: Callable[[random.Random], float], document: str, fail_rate: float, seed: int):
+        self.latency = latency
+        self.document = document
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+
+    def _maybe_fail(self) -> None:
+        if self.rng.random() < self.fail_rate:
+            from google.genai import errors
+            raise errors.ServerError(503, {"error": {"code": 503, "message": "stand-in overload", "status": "UNAVAILABLE"}})
+
+    async def generate_content(self, model: str, contents, config=None):
+        await asyncio.sleep(self.latency(self.rng))
+        self._maybe_fail()
+        return SimpleNamespace(text=self.document, usage_metadata=None)
+
+    async def generate_content_stream(self, model: str, contents, config=None):
+        self._maybe_fail()
+        chunk_size = 64
+        chunks = [self.document[i:i + chunk_size] for i in range(0, len(self.document), chunk_size)]
+        delay = self.latency(self.rng) / len(chunks)
+
+        async def stream():
+            for chunk in chunks:
+                await asyncio.sleep(delay)
+                yield SimpleNamespace(text=chunk)
+
+        return stream()
+
+    async def get(self, model: str):
+        return SimpleNamespace(name=model)
+
+
+class StandInAio:
+    def __init__(self, models: StandInModels):
+        self.models = models
+
+    async def aclose(self) -> None:
+        pass
+
+
+def shm_path(args: argparse.Namespace) -> str:
+    """Shared memory store file for this run (the server's parent is the benchmark)."""
+    pid = os.getpid() if multiprocessing.parent_process() is None else os.getppid()
+    return os.path.join(args.shm_dir, f"chatbot-bench-{pid}")
+
+
+def serve(store: str, port: int, args: argparse.Namespace, conn) -> None:
+    """Server process entry point: run the app on ``port`` until terminated."""
+    asyncio.run(_serve(store, port, args, conn))
+
+
+async def _serve(store: str, port: int, args: argparse.Namespace, conn) -> None:
+    import uvicorn
+
+    from app.core.config import settings
+    settings.log_level = "WARNING"
+    settings.use_redis = store == "redis"
+    settings.redis_url = args.redis_url
+    settings.shm_store_enabled = store == "shm"
+    settings.shm_store_path = shm_path(args)
+    settings.rate_limit_per_minute = args.rate_limit
+    # The stand-in has no cached content API
+    settings.prompt_cache_enabled = False
+
+    from app.agents.gemini_client import GeminiClient
+    from app.api import dependencies
+    from app.main import app
+    from app.storage.memory_store import MemorySessionStore
+    from app.storage.redis_store import RedisSessionStore
+    from app.storage.shm_store import SharedMemorySessionStore
+
+    models = StandInModels(parse_latency(args.latency), make_document(args.response_chars), args.fail_rate, args.seed)
+
+    class StandInGeminiClient(GeminiClient):
+        """GeminiClient whose SDK client is the local stand-in."""
+
+        def __init__(self, api_key: Optional[str] = None):
+            super().__init__(api_key)
+            self.client = SimpleNamespace(aio=StandInAio(models))
+
+    dependencies.GeminiClient = StandInGeminiClient
+    try:
+        shared_store = await dependencies.get_session_store()
+        expected = {"memory": MemorySessionStore, "shm": SharedMemorySessionStore, "redis": RedisSessionStore}[store]
+        if not isinstance(shared_store, expected):
+            raise RuntimeError(f"{store} session store unavailable")
+        services = await dependencies.ServiceContainer.create()
+        await services.warmup()
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+
+    app.state.services = services
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=port, lifespan="off", log_level="warning", access_log=False
+    ))
+    conn.send(("ready", None))
+    try:
+        await server.serve()
+    finally:
+        await services.close()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def start_server(store: str, args: argparse.Namespace) -> Tuple[Optional[multiprocessing.Process], str]:
+    """
+    Start the app for ``store`` in a fresh process.
+
+    Returns:
+        The process and its base URL, or None and the reason it did not start
+    """
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe()
+    port = free_port()
+    process = ctx.Process(target=serve, args=(store, port, args, child_conn), daemon=True)
+    process.start()
+
+    ready = await asyncio.to_thread(parent_conn.poll, 60)
+    status, reason = parent_conn.recv() if ready else ("error", "server did not start within 60s")
+    if status != "ready":
+        process.terminate()
+        process.join()
+        return None, reason
+
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(100):
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return process, base_url
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    process.terminate()
+    process.join()
+    return None, "server did not answer /health"
+
+
+def stop_server(process: multiprocessing.Process) -> None:
+    process.terminate()
+    process.join(10)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+
+def message(rng: random.Random, distinct: int, user: int, seq: int) -> str:
+    """Next message: one of ``distinct`` repeated questions, or a unique one when 0."""
+    if distinct:
+        k = rng.randrange(distinct)
+        return QUESTIONS[k % len(QUESTIONS)].format(coin=COINS[k // len(QUESTIONS) % len(COINS)]) + f" ({k})"
+    return QUESTIONS[seq % len(QUESTIONS)].format(coin=COINS[user % len(COINS)]) + f" ({user}-{seq})"
+
+
+def session_from(endpoint: str, response: httpx.Response) -> Optional[str]:
+    """Session id from a successful response, to continue the conversation."""
+    if endpoint == "/chat":
+        return response.json()["meta"]["session_id"]
+    # Last SSE frame is ``done`` with the full response
+    for line in reversed(response.text.splitlines()):
+        if line.startswith("data: "):
+            return json.loads(line[len("data: "):]).get("meta", {}).get("session_id")
+    return None
+
+
+async def run_level(base_url: str, concurrency: int, args: argparse.Namespace) -> List[Tuple[float, str]]:
+    """
+    Drive ``concurrency`` virtual users for the warmup and measured windows.
+
+    Returns:
+        (latency seconds, status) for requests sent in the measured window;
+        the status is the HTTP code or the transport error name
+    """
+    samples: List[Tuple[float, str]] = []
+    start = time.perf_counter()
+    measure_from = start + args.warmup
+    stop_at = measure_from + args.duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        async def user(index: int) -> None:
+            rng = random.Random(args.seed * 1_000_003 + index)
+            headers = {"X-Client-Id": f"load-{index}"}
+            session_id = None
+            turns = 0
+            seq = 0
+            while True:
+                sent = time.perf_counter()
+                if sent >= stop_at:
+                    return
+                body = {"user_message": message(rng, args.distinct, index, seq)}
+                if session_id:
+                    body["session_id"] = session_id
+                try:
+                    response = await client.post(args.endpoint, json=body, headers=headers)
+                    status = str(response.status_code)
+                    if response.status_code == 200:
+                        session_id = session_from(args.endpoint, response)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                if sent >= measure_from:
+                    samples.append((time.perf_counter() - sent, status))
+                seq += 1
+                turns += 1
+                if turns >= args.turns:
+                    session_id = None
+                    turns = 0
+
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return samples
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile of already sorted values."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(samples: List[Tuple[float, str]], duration: float) -> Dict:
+    latencies = sorted(latency * 1000 for latency, _ in samples)
+    ok = sum(1 for _, status in samples if status == "200")
+    errors = len(samples) - ok
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value, 2) if value is not None else None
+
+    return {
+        "requests": len(samples),
+        "ok": ok,
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(ok / duration, 2),
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 0.50)),
+            "p95": ms(percentile(latencies, 0.95)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+        "status_codes": dict(sorted(Counter(status for _, status in samples).items())),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    report = {
+        "benchmark": "chat_load",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "results": [],
+        "skipped": [],
+    }
+
+    print(f"{'store':<8} {'conc':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    for store in args.stores:
+        process, base_url = await start_server(store, args)
+        if process is None:
+            print(f"{store:<8} skipped: {base_url}")
+            report["skipped"].append({"store": store, "reason": base_url})
+            continue
+        try:
+            for concurrency in args.concurrency:
+                samples = await run_level(base_url, concurrency, args)
+                result = {"store": store, "concurrency": concurrency, **summarize(samples, args.duration)}
+                report["results"].append(result)
+                latency = result["latency_ms"]
+                print(
+                    f"{store:<8} {concurrency:>5} {result['throughput_rps']:>9.1f} "
+                    f"{latency['p50'] or 0:>9.1f} {latency['p95'] or 0:>9.1f} {latency['p99'] or 0:>9.1f} "
+                    f"{result['error_rate']:>7.1%}"
+                )
+            async with httpx.AsyncClient(base_url=base_url) as client:
+                health = (await client.get("/health")).json()
+            report["results"][-1]["server_stats"] = {
+                key: health[key] for key in ("gemini", "gemini_resilience", "session_store", "response_cache", "coalescing")
+                if key in health
+            }
+        finally:
+            stop_server(process)
+            if store == "shm" and os.path.exists(shm_path(args)):
+                os.unlink(shm_path(args))
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=lambda v: v.split(","), default=["memory", "shm", "redis"],
+                        help="Session stores to test: memory, shm, redis")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--shm-dir", default="/dev/shm", help="Directory for the shared memory store file")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32, 64], help="Virtual users per run, comma-separated")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each level")
+    parser.add_argument("--endpoint", choices=["/chat", "/chat/stream"], default="/chat")
+    parser.add_argument("--latency", type=latency_spec, default="lognormal:0.8:0.5", help="Stand-in Gemini latency distribution")
+    parser.add_argument("--response-chars", type=int, default=800, help="Explanation length of stand-in answers")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of stand-in calls failing with a 503")
+    parser.add_argument("--distinct", type=int, default=0,
+                        help="Number of distinct questions to repeat (exercises caching); 0 makes every message unique")
+    parser.add_argument("--turns", type=int, default=5, help="Messages per session before a user starts a new one")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Per-client requests per minute; 0 disables rate limiting")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Client timeout per request in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="load_results.json", help="JSON report path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
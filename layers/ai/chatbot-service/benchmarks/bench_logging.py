@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: cost of a log call on the calling thread.
+
+Times ``logger.info`` with the event written synchronously and through the
+background queue, plus a sampled-out event and a debug event below the
+configured level. Output goes to /dev/null, so the synchronous numbers are
+a lower bound; a slow pipe or terminal only makes them worse.
+
+Usage (from the service root):
+    python -m benchmarks.bench_logging [--number N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+from app.core import logging as app_logging
+from app.core.config import settings
+
+
+def time_call(fn, number: int) -> float:
+    """Best per-call time in microseconds."""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def run(number: int) -> None:
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    settings.log_queue_size = number * 10
+    settings.log_sample_rates = "sampled_event=0.0"
+    payload = {"session_id": "0f8fad5b-d9cb-469f-a165-70867728950e", "message_length": 142, "cache_hit": False}
+
+    rows = []
+    try:
+        for log_async in (False, True):
+            settings.log_async = log_async
+            app_logging.setup_logging()
+            logger = app_logging.get_logger("bench")
+            mode = "queue" if log_async else "sync"
+            rows.append((f"info ({mode})", time_call(lambda: logger.info("message_processed", **payload), number)))
+            if log_async:
+                rows.append(("info (sampled out)", time_call(lambda: logger.info("sampled_event", **payload), number)))
+                rows.append(("debug (filtered)", time_call(lambda: logger.debug("message_processed", **payload), number)))
+            app_logging.shutdown_logging()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    for name, micros in rows:
+        print(f"{name:<20} {micros:>8.2f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="Calls per timing sample")
+    args = parser.parse_args()
+    run(args.number)
+
+
+if __name__ == "__main__":
+    main()
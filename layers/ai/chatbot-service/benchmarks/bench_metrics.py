@@ -0,0 +1,55 @@
+"""
+Micro-benchmark: per-call cost of the chat pipeline instrumentation.
+
+Times ``Histogram.time`` around an empty block, a bare ``observe`` and a
+``Counter.inc``, next to an empty baseline loop, and renders a registry
+with one series per pipeline stage.
+
+Usage (from the service root):
+    python -m benchmarks.bench_metrics [--number N]
+"""
+
+import argparse
+import timeit
+
+from app.core.metrics import Counter, Histogram, Registry
+
+STAGES = [
+    "fast_path", "cache_lookup", "gemini", "json_extract",
+    "validation", "session_get", "session_set", "prompt_build",
+    "response_build",
+]
+
+
+def run(number: int) -> None:
+    registry = Registry()
+    histogram = registry.register(Histogram("stage_seconds", "Stage latency.", ["stage"]))
+    counter = registry.register(Counter("lookups_total", "Lookups.", ["cache", "result"]))
+    for stage in STAGES:
+        histogram.observe(0.01, stage)
+
+    def timed():
+        with histogram.time("gemini"):
+            pass
+
+    cases = {
+        "baseline": lambda: None,
+        "histogram.time": timed,
+        "histogram.observe": lambda: histogram.observe(0.012, "gemini"),
+        "counter.inc": lambda: counter.inc("response", "hit"),
+        "registry.render": registry.render,
+    }
+    for name, fn in cases.items():
+        seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+        print(f"{name:<20} {seconds * 1e9:>9.0f} ns")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=100_000, help="Calls per timing sample")
+    args = parser.parse_args()
+    run(args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Offline benchmark: prompt prefix caching of the system prompt.
+
+Drives ``PromptPrefixCache`` with ``LocalStubProvider`` and a simulated model
+whose prefill time and bill grow with uncached input tokens. Cached prefix
+tokens are billed at ``--cached-rate`` of the normal price (Gemini bills
+cached input at a discount) and skip prefill.
+
+Usage (from the service root):
+    python -m benchmarks.bench_prompt_cache [--requests N] [--prefix-repeat K]
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.agents.prompt_cache import PromptPrefixCache, LocalStubProvider, estimate_tokens
+from app.services.chat_service import load_system_prompt
+
+MODEL = "gemini-2.5-flash"
+QUESTIONS = [
+    "Show me BTC over the last month",
+    "Compare ETH and SOL this year",
+    "Why did DOGE move today?",
+    "What is the 3 month trend for ADA?",
+]
+
+
+class SimulatedModel:
+    """Charges prefill time and tokens for whatever input is not cached."""
+
+    def __init__(self, provider: LocalStubProvider, prefill_us_per_token: float):
+        self.provider = provider
+        self.prefill = prefill_us_per_token / 1e6
+        self.input_tokens = 0
+        self.cached_tokens = 0
+
+    async def generate(self, prompt: str, system_prompt: str = None, cached_content: str = None) -> None:
+        uncached = estimate_tokens(prompt)
+        if cached_content is not None:
+            prefix, _ = self.provider.resolve(cached_content)
+            self.cached_tokens += estimate_tokens(prefix)
+        else:
+            uncached += estimate_tokens(system_prompt)
+        self.input_tokens += uncached
+        await asyncio.sleep(uncached * self.prefill)
+
+
+async def run(system_prompt: str, requests: int, concurrency: int, use_cache: bool, prefill_us: float) -> dict:
+    provider = LocalStubProvider(latency=0.05)
+    model = SimulatedModel(provider, prefill_us)
+    cache = PromptPrefixCache(provider, min_prefix_tokens=0) if use_cache else None
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            prompt = QUESTIONS[i % len(QUESTIONS)]
+            handle = await cache.handle(MODEL, system_prompt) if cache else None
+            if handle is None:
+                await model.generate(prompt, system_prompt=system_prompt)
+            else:
+                await model.generate(prompt, cached_content=handle)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    latencies.sort()
+    result = {
+        "input_tokens": model.input_tokens,
+        "cached_tokens": model.cached_tokens,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "provider_calls": dict(provider.calls),
+    }
+    if cache is not None:
+        await cache.close()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--prefix-repeat", type=int, default=1,
+                        help="Repeat the system prompt K times to model a larger prefix")
+    parser.add_argument("--prefill-us", type=float, default=20.0,
+                        help="Simulated prefill microseconds per uncached input token")
+    parser.add_argument("--cached-rate", type=float, default=0.25,
+                        help="Price of a cached input token relative to an uncached one")
+    args = parser.parse_args()
+
+    system_prompt = load_system_prompt() * args.prefix_repeat
+    print(f"system prompt ~{estimate_tokens(system_prompt)} tokens, "
+          f"{args.requests} requests, concurrency {args.concurrency}")
+
+    baseline = asyncio.run(run(system_prompt, args.requests, args.concurrency, False, args.prefill_us))
+    cached = asyncio.run(run(system_prompt, args.requests, args.concurrency, True, args.prefill_us))
+
+    billed_base = baseline["input_tokens"]
+    billed_cached = cached["input_tokens"] + cached["cached_tokens"] * args.cached_rate
+    print(f"{'':<10}{'input tok':>12}{'cached tok':>12}{'billed tok':>12}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, result, billed in (("inline", baseline, billed_base), ("cached", cached, billed_cached)):
+        print(f"{name:<10}{result['input_tokens']:>12}{result['cached_tokens']:>12}{billed:>12.0f}"
+              f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}")
+    print(f"billed input tokens saved: {1 - billed_cached / billed_base:.1%}; "
+          f"provider calls: {cached['provider_calls']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 """Pytest configuration and fixtures."""
 
+import os
 import pytest
 import pytest_asyncio
 from typing import AsyncGenerator
 
+# Keep test runs from sharing sessions through the host's shared memory store
+os.environ.setdefault("SHM_STORE_ENABLED", "false")
+
 from app.storage.memory_store import MemorySessionStore
 
 
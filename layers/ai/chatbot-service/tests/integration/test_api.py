@@ -110,3 +110,520 @@ class TestChatEndpoint:
             response = await client.post("/api/chat", json=valid_chat_request)
             
             assert response.status_code in [200, 503, 500]
+
+
+@pytest.mark.asyncio
+class TestServiceContainer:
+    """Tests for the per-worker service container."""
+    
+    async def test_chat_service_is_shared_across_requests(self):
+        """Test that the chat service is built once and reused."""
+        from app.api.dependencies import ServiceContainer
+        
+        services = await ServiceContainer.create()
+        try:
+            assert services.chat_service.gemini_client is services.gemini_client
+            assert services.chat_service.system_prompt == services.system_prompt
+            assert services.system_prompt
+        finally:
+            await services.close()
+
+
+class FakeGeminiClient:
+    """Gemini stand-in that streams a canned JSON document."""
+    
+    DOCUMENT = (
+        '{"data": {"coins": ["BTC"], "timeframe": "1d", '
+        '"explanation": "Bitcoin is trading sideways today."}, '
+        '"suggested_next_prompts": ["Show ETH", "Compare BTC and SOL", "What moved BTC?"]}'
+    )
+    
+    async def agenerate(self, prompt: str, system_prompt: str) -> dict:
+        import json
+        return json.loads(self.DOCUMENT)
+    
+    async def agenerate_stream(self, prompt: str, system_prompt: str):
+        for i in range(0, len(self.DOCUMENT), 16):
+            yield self.DOCUMENT[i:i + 16]
+    
+    async def warmup(self) -> None:
+        pass
+    
+    async def close(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+class TestChatStreamEndpoint:
+    """Tests for the SSE chat endpoint."""
+    
+    async def test_stream_emits_deltas_then_done(self, session_store):
+        """Test that explanation deltas precede the final response."""
+        import json
+        from app.api.dependencies import ServiceContainer
+        
+        app.state.services = ServiceContainer(session_store, FakeGeminiClient(), "system")
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat/stream", json={"user_message": "How is BTC?"})
+            
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            
+            frames = [f for f in response.text.split("\n\n") if f]
+            events = [(f.split("\n")[0][len("event: "):], json.loads(f.split("\n")[1][len("data: "):])) for f in frames]
+            
+            assert events[-1][0] == "done"
+            deltas = "".join(payload["text"] for name, payload in events if name == "delta")
+            assert deltas == "Bitcoin is trading sideways today."
+            
+            final = events[-1][1]
+            assert final["data"]["coins"] == ["BTC"]
+            session = await session_store.get(final["meta"]["session_id"])
+            assert session is not None
+        finally:
+            app.state.services = None
+
+
+    async def test_stream_closed_when_body_never_iterated(self, session_store):
+        """Test that the Gemini stream is closed if the client leaves before the body is sent."""
+        from app.api.dependencies import ServiceContainer
+        from app.api.routes import chat_stream
+        from app.models.requests import ChatRequest
+        
+        gemini = ClosableStreamGeminiClient()
+        services = ServiceContainer(session_store, gemini, "system")
+        
+        response = await chat_stream(ChatRequest(user_message="Why did BTC drop today?"), services.chat_service)
+        assert gemini.started and not gemini.closed
+        
+        # Starlette still runs the background task when the body was never iterated
+        await response.background()
+        assert gemini.closed
+
+
+class ClosableStreamGeminiClient(FakeGeminiClient):
+    """Gemini stand-in recording whether its stream was closed."""
+    
+    def __init__(self):
+        self.started = False
+        self.closed = False
+    
+    async def agenerate_stream(self, prompt: str, system_prompt: str):
+        self.started = True
+        try:
+            async for chunk in super().agenerate_stream(prompt, system_prompt):
+                yield chunk
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+class TestHistoryCompaction:
+    """Tests for background history compaction."""
+    
+    async def test_chat_compacts_history_after_response(self, session_store):
+        """Test that a long session is compacted once /chat has responded."""
+        from app.api.dependencies import ServiceContainer
+        from app.models.internal import ConversationTurn
+        from app.services.compaction import HistoryCompactor, SUMMARY_KEY
+        
+        turns = [ConversationTurn(role="user", content="x" * 400, timestamp=i) for i in range(10)]
+        await session_store.append_turns("long-session", turns, max_turns=0, ttl=3600)
+        compactor = HistoryCompactor(session_store, token_budget=200, keep_recent_turns=4, max_turns=0)
+        
+        app.state.services = ServiceContainer(session_store, FakeGeminiClient(), "system", compactor=compactor)
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post(
+                    "/chat",
+                    json={"user_message": "How is BTC?", "session_id": "long-session"}
+                )
+            
+            assert response.status_code == 200
+            session = await session_store.get("long-session")
+            assert len(session.conversation_history) == 4
+            assert session.metadata[SUMMARY_KEY]
+        finally:
+            app.state.services = None
+
+
+class UnreachableGeminiClient(FakeGeminiClient):
+    """Gemini stand-in that fails the test if it is called."""
+    
+    async def agenerate(self, prompt: str, system_prompt: str) -> dict:
+        raise AssertionError("fast path request reached Gemini")
+    
+    async def agenerate_stream(self, prompt: str, system_prompt: str):
+        raise AssertionError("fast path request reached Gemini")
+        yield
+
+
+@pytest.mark.asyncio
+class TestFastPath:
+    """Tests for answering simple chart requests without Gemini."""
+    
+    async def test_chart_request_answered_locally(self, session_store):
+        """Test that a simple chart request never reaches the model."""
+        from app.api.dependencies import ServiceContainer
+        from app.services.intent import ChartIntentParser
+        
+        parser = ChartIntentParser()
+        app.state.services = ServiceContainer(
+            session_store, UnreachableGeminiClient(), "system", intent_parser=parser
+        )
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat", json={"user_message": "compare BTC and SOL for 1 year"})
+                health = await client.get("/health")
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["data"]["coins"] == ["BTC", "SOL"]
+            assert data["data"]["timeframe"] == "1y"
+            assert len(data["suggested_next_prompts"]) == 3
+            session = await session_store.get(data["meta"]["session_id"])
+            assert len(session.conversation_history) == 2
+            assert health.json()["fast_path"]["matches"] == 1
+        finally:
+            app.state.services = None
+    
+    async def test_other_messages_fall_through(self, session_store):
+        """Test that questions still go to the model."""
+        from app.api.dependencies import ServiceContainer
+        from app.services.intent import ChartIntentParser
+        
+        parser = ChartIntentParser()
+        app.state.services = ServiceContainer(
+            session_store, FakeGeminiClient(), "system", intent_parser=parser
+        )
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat/stream", json={"user_message": "Why did BTC drop today?"})
+            
+            assert response.status_code == 200
+            assert "Bitcoin is trading sideways today." in response.text
+            assert parser.stats() == {"attempts": 1, "matches": 0, "hit_rate": 0.0}
+        finally:
+            app.state.services = None
+
+
+class FailingGeminiClient(FakeGeminiClient):
+    """Gemini stand-in whose circuit is open."""
+    
+    async def agenerate(self, prompt: str, system_prompt: str) -> dict:
+        from app.core.exceptions import CircuitOpenError
+        raise CircuitOpenError(retry_after=12.5)
+
+
+@pytest.mark.asyncio
+class TestResilience:
+    """Tests for Gemini resilience surfaced over HTTP."""
+    
+    async def test_open_circuit_returns_503_with_retry_after(self, session_store):
+        """Test that an open circuit fails fast with a retry hint."""
+        from app.api.dependencies import ServiceContainer
+        
+        app.state.services = ServiceContainer(session_store, FailingGeminiClient(), "system")
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat", json={"user_message": "Why is BTC moving?"})
+            
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "13"
+            assert response.json()["error"] == "circuit_open"
+        finally:
+            app.state.services = None
+    
+    async def test_health_reports_circuit_state(self):
+        """Test that /health shows the breaker state."""
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/health")
+        
+        assert response.json()["gemini_resilience"]["circuit"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+class TestAdmissionControl:
+    """Tests for admission control on chat endpoints."""
+    
+    async def test_rate_limit_returns_429(self, session_store):
+        """Test that a client over its rate limit is rejected immediately."""
+        from app.api.dependencies import ServiceContainer
+        from app.services.admission import AdmissionController
+        from app.storage.rate_limit import MemoryRateLimiter
+        
+        admission = AdmissionController(MemoryRateLimiter(60, 1), max_in_flight=10)
+        app.state.services = ServiceContainer(session_store, FakeGeminiClient(), "system", admission=admission)
+        try:
+            def client_at(address):
+                transport = ASGITransport(app=app, client=(address, 40000))
+                return AsyncClient(transport=transport, base_url="http://test")
+            
+            async with client_at("10.0.0.1") as client:
+                first = await client.post("/chat", json={"user_message": "How is BTC?"})
+                # Untrusted peers cannot pick a fresh bucket by naming a client
+                second = await client.post("/chat", json={"user_message": "How is BTC?"}, headers={"X-Client-Id": "new"})
+            async with client_at("10.0.0.2") as client:
+                other = await client.post("/chat", json={"user_message": "How is BTC?"})
+            
+            assert first.status_code == 200
+            assert second.status_code == 429
+            assert second.headers["retry-after"] == "1"
+            assert second.json()["error"] == "rate_limit_error"
+            assert other.status_code == 200
+            assert admission.stats()["in_flight"] == 0
+        finally:
+            app.state.services = None
+    
+    async def test_low_priority_shed_with_503(self, session_store):
+        """Test that low-priority requests are shed under load while others pass."""
+        from app.api.dependencies import ServiceContainer
+        from app.services.admission import AdmissionController
+        
+        admission = AdmissionController(None, max_in_flight=2, priorities={"batch": "low", "web": "high"})
+        admission.in_flight = 1
+        app.state.services = ServiceContainer(session_store, FakeGeminiClient(), "system", admission=admission)
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                def body(source):
+                    return {"user_message": "How is BTC?", "metadata": {"ui_source": source, "client_ts": 1}}
+                low = await client.post("/chat", json=body("batch"))
+                high = await client.post("/chat", json=body("web"))
+            
+            assert low.status_code == 503
+            assert low.headers["retry-after"] == "2"
+            assert high.status_code == 200
+            assert high.json()["data"]["coins"] == ["BTC"]
+        finally:
+            app.state.services = None
+
+
+@pytest.mark.asyncio
+class TestMetricsEndpoint:
+    """Tests for the Prometheus metrics endpoint."""
+    
+    async def test_metrics_report_chat_stages(self, session_store):
+        """Test that a /chat request shows up in the stage and request histograms."""
+        from app.api.dependencies import ServiceContainer
+        from app.core.metrics import CONTENT_TYPE, REQUEST_SECONDS, STAGE_SECONDS
+        
+        requests_before = REQUEST_SECONDS.count("chat")
+        gemini_before = STAGE_SECONDS.count("gemini")
+        validation_before = STAGE_SECONDS.count("validation")
+        app.state.services = ServiceContainer(session_store, FakeGeminiClient(), "system")
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                chat = await client.post("/chat", json={"user_message": "How is BTC?"})
+                response = await client.get("/metrics")
+            
+            assert chat.status_code == 200
+            assert response.status_code == 200
+            assert response.headers["content-type"] == CONTENT_TYPE
+            assert REQUEST_SECONDS.count("chat") == requests_before + 1
+            assert STAGE_SECONDS.count("gemini") == gemini_before + 1
+            # Each stage is observed once per request
+            assert STAGE_SECONDS.count("validation") == validation_before + 1
+            assert 'chatbot_stage_duration_seconds_bucket{stage="session_set",le="+Inf"}' in response.text
+            assert 'chatbot_request_duration_seconds_count{endpoint="chat"}' in response.text
+            # The scrape itself is not counted as in flight
+            assert "chatbot_requests_in_flight 0.0" in response.text
+        finally:
+            app.state.services = None
+
+
+@pytest.mark.asyncio
+class TestTracing:
+    """Tests for trace propagation through the API."""
+    
+    async def test_chat_continues_caller_trace(self, session_store, tmp_path):
+        """Test that /chat spans join the trace from the traceparent header."""
+        import json
+        from app.api.dependencies import ServiceContainer
+        from app.core.tracing import configure_tracing, shutdown_tracing
+        
+        path = tmp_path / "spans.jsonl"
+        configure_tracing("chatbot-service", str(path))
+        app.state.services = ServiceContainer(session_store, FakeGeminiClient(), "system")
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post(
+                    "/chat",
+                    json={"user_message": "How is BTC?"},
+                    headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+                )
+        finally:
+            app.state.services = None
+            shutdown_tracing()
+        
+        assert response.status_code == 200
+        spans = {span["name"]: span for span in map(json.loads, path.read_text().splitlines())}
+        server = spans["POST /chat"]
+        assert server["kind"] == "server"
+        assert server["trace_id"] == trace_id
+        assert server["parent_span_id"] == "00f067aa0ba902b7"
+        assert server["attributes"]["http.status_code"] == 200
+        assert spans["session.append_turns"]["trace_id"] == trace_id
+        assert spans["session.append_turns"]["parent_span_id"] == server["span_id"]
+
+
+class CountingGeminiClient(FakeGeminiClient):
+    """Gemini stand-in recording peak concurrency; fails prompts mentioning "fail"."""
+    
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+    
+    async def agenerate(self, prompt: str, system_prompt: str) -> dict:
+        import asyncio
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if "fail" in prompt:
+                raise RuntimeError("upstream exploded")
+            return await super().agenerate(prompt, system_prompt)
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.asyncio
+class TestChatBatchEndpoint:
+    """Tests for the batch chat endpoint."""
+    
+    async def test_results_in_order_with_item_errors(self, session_store):
+        """Test that a failed item is reported without failing the batch."""
+        from app.api.dependencies import ServiceContainer
+        
+        app.state.services = ServiceContainer(session_store, CountingGeminiClient(), "system")
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat/batch", json={"requests": [
+                    {"user_message": "How is BTC?"},
+                    {"user_message": "Why did BTC fail?"},
+                    {"user_message": "How is ETH?"},
+                ]})
+            
+            assert response.status_code == 200
+            body = response.json()
+            assert [result["index"] for result in body["results"]] == [0, 1, 2]
+            assert body["succeeded"] == 2
+            assert body["failed"] == 1
+            assert body["results"][0]["response"]["data"]["coins"] == ["BTC"]
+            assert body["results"][1]["response"] is None
+            assert body["results"][1]["error"]["type"] == "ai_service_error"
+            assert "exploded" not in body["results"][1]["error"]["message"]
+            assert body["results"][2]["error"] is None
+        finally:
+            app.state.services = None
+    
+    async def test_concurrency_is_capped(self, session_store):
+        """Test that no more than max_concurrency items run at once."""
+        from app.api.dependencies import ServiceContainer
+        
+        gemini = CountingGeminiClient()
+        app.state.services = ServiceContainer(session_store, gemini, "system")
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat/batch", json={
+                    "requests": [{"user_message": f"Why did BTC move {i}?"} for i in range(6)],
+                    "max_concurrency": 2
+                })
+            
+            assert response.status_code == 200
+            assert response.json()["succeeded"] == 6
+            assert gemini.calls == 6
+            assert gemini.peak == 2
+        finally:
+            app.state.services = None
+    
+    async def test_same_session_items_run_in_order(self, session_store):
+        """Test that items sharing a session extend its history in batch order."""
+        from app.api.dependencies import ServiceContainer
+        
+        app.state.services = ServiceContainer(session_store, CountingGeminiClient(), "system")
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat/batch", json={"requests": [
+                    {"session_id": "shared", "user_message": f"Question {i} about BTC?"} for i in range(3)
+                ]})
+            
+            assert response.status_code == 200
+            session = await session_store.get("shared")
+            user_turns = [turn.content for turn in session.conversation_history if turn.role == "user"]
+            assert user_turns == ["Question 0 about BTC?", "Question 1 about BTC?", "Question 2 about BTC?"]
+        finally:
+            app.state.services = None
+    
+    async def test_oversized_batch_rejected(self, session_store):
+        """Test that a batch over the item limit is rejected with 400."""
+        from app.api.dependencies import ServiceContainer
+        from app.core.config import settings
+        
+        app.state.services = ServiceContainer(session_store, CountingGeminiClient(), "system")
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat/batch", json={
+                    "requests": [{"user_message": "How is BTC?"}] * (settings.chat_batch_max_items + 1)
+                })
+            
+            assert response.status_code == 400
+            assert response.json()["error"] == "validation_error"
+        finally:
+            app.state.services = None
+    
+    async def test_batch_charged_per_item(self, session_store):
+        """Test that a batch needs a token per item and is rejected whole without them."""
+        from app.api.dependencies import ServiceContainer
+        from app.services.admission import AdmissionController
+        from app.storage.rate_limit import MemoryRateLimiter
+        
+        gemini = CountingGeminiClient()
+        admission = AdmissionController(MemoryRateLimiter(60, 3), max_in_flight=10)
+        app.state.services = ServiceContainer(session_store, gemini, "system", admission=admission)
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                def batch(size):
+                    return {"requests": [{"user_message": f"Why did BTC move {i}?"} for i in range(size)]}
+                accepted = await client.post("/chat/batch", json=batch(3))
+                rejected = await client.post("/chat/batch", json=batch(2))
+                drained = await client.post("/chat", json={"user_message": "How is BTC?"})
+            
+            assert accepted.status_code == 200
+            assert rejected.status_code == 429
+            assert gemini.calls == 3
+            assert drained.status_code == 429
+            assert admission.stats()["in_flight"] == 0
+            assert admission.stats()["peak_in_flight"] == 3
+        finally:
+            app.state.services = None
+    
+    async def test_batch_larger_than_burst_not_retryable(self, session_store):
+        """Test that a batch needing more tokens than the burst gets 400 without Retry-After."""
+        from app.api.dependencies import ServiceContainer
+        from app.services.admission import AdmissionController
+        from app.storage.rate_limit import MemoryRateLimiter
+        
+        gemini = CountingGeminiClient()
+        admission = AdmissionController(MemoryRateLimiter(60, 3), max_in_flight=10)
+        app.state.services = ServiceContainer(session_store, gemini, "system", admission=admission)
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat/batch", json={
+                    "requests": [{"user_message": f"Why did BTC move {i}?"} for i in range(4)]
+                })
+                single = await client.post("/chat", json={"user_message": "How is BTC?"})
+            
+            assert response.status_code == 400
+            assert "retry-after" not in response.headers
+            assert response.json()["error"] == "validation_error"
+            # No tokens were spent on the rejected batch, and only the single request reached Gemini
+            assert single.status_code == 200
+            assert gemini.calls == 1
+            assert admission.stats()["too_large"] == 1
+            assert admission.stats()["in_flight"] == 0
+        finally:
+            app.state.services = None
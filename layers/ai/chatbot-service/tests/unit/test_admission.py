@@ -0,0 +1,196 @@
+"""Tests for rate limiting and admission control."""
+
+import ipaddress
+
+import pytest
+import pytest_asyncio
+
+from app.api.middleware import _client_id
+from app.services.admission import AdmissionController, parse_priorities
+from app.storage.rate_limit import MemoryRateLimiter
+
+
+@pytest_asyncio.fixture
+async def redis_store():
+    """Redis session store backed by fakeredis."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSessionStore
+    
+    store = RedisSessionStore("redis://localhost:6379/0")
+    store.redis = fakeredis.FakeAsyncRedis()
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio
+class TestRateLimiters:
+    """Tests for token bucket limiters."""
+    
+    async def test_memory_burst_then_limited(self):
+        """Test that a client may burst, then must wait for refill."""
+        limiter = MemoryRateLimiter(rate_per_minute=60, burst=3)
+        
+        results = [await limiter.acquire("client") for _ in range(4)]
+        
+        assert [allowed for allowed, _ in results] == [True, True, True, False]
+        assert 0 < results[-1][1] <= 1.0
+        assert (await limiter.acquire("other"))[0] is True
+    
+    async def test_memory_refill(self):
+        """Test that tokens refill at the configured rate."""
+        limiter = MemoryRateLimiter(rate_per_minute=60, burst=1)
+        await limiter.acquire("client")
+        limiter._buckets["client"][1] -= 1.0
+        
+        assert (await limiter.acquire("client"))[0] is True
+    
+    async def test_memory_bounded_clients(self):
+        """Test that idle buckets are dropped beyond max_clients."""
+        limiter = MemoryRateLimiter(rate_per_minute=60, burst=1, max_clients=2)
+        for client in ("a", "b", "c"):
+            await limiter.acquire(client)
+        
+        assert list(limiter._buckets) == ["b", "c"]
+    
+    async def test_memory_cost_taken_all_or_none(self):
+        """Test that a multi-token take fails whole and leaves the bucket intact."""
+        limiter = MemoryRateLimiter(rate_per_minute=60, burst=3)
+        
+        allowed, retry_after = await limiter.acquire("client", cost=4)
+        assert allowed is False
+        assert retry_after > 0
+        assert (await limiter.acquire("client", cost=3))[0] is True
+        assert (await limiter.acquire("client"))[0] is False
+    
+    async def test_redis_shared_bucket(self, redis_store):
+        """Test that the Redis limiter enforces the bucket atomically."""
+        from app.storage.rate_limit import RedisRateLimiter
+        
+        limiter = RedisRateLimiter(redis_store, rate_per_minute=60, burst=2)
+        results = [await limiter.acquire("client") for _ in range(3)]
+        
+        assert [allowed for allowed, _ in results] == [True, True, False]
+        assert results[-1][1] > 0
+        assert limiter.stats()["limited"] == 1
+    
+    async def test_redis_cost(self, redis_store):
+        """Test that the Redis limiter takes several tokens at once."""
+        from app.storage.rate_limit import RedisRateLimiter
+        
+        limiter = RedisRateLimiter(redis_store, rate_per_minute=60, burst=3)
+        
+        assert (await limiter.acquire("client", cost=4))[0] is False
+        assert (await limiter.acquire("client", cost=3))[0] is True
+        assert (await limiter.acquire("client"))[0] is False
+
+
+@pytest.mark.asyncio
+class TestAdmissionController:
+    """Tests for AdmissionController."""
+    
+    async def test_rate_limited_client_gets_429(self):
+        """Test that an exhausted bucket rejects with 429."""
+        controller = AdmissionController(MemoryRateLimiter(60, 1), max_in_flight=10)
+        
+        assert (await controller.admit("client")).admitted
+        decision = await controller.admit("client")
+        
+        assert (decision.admitted, decision.status_code) == (False, 429)
+        assert decision.retry_after > 0
+    
+    async def test_shed_request_costs_no_token(self):
+        """Test that a request shed with 503 leaves the client's tokens intact."""
+        controller = AdmissionController(MemoryRateLimiter(60, 1), max_in_flight=1)
+        controller.in_flight = 1
+        
+        assert (await controller.admit("client")).status_code == 503
+        
+        controller.in_flight = 0
+        assert (await controller.admit("client")).admitted
+        assert controller.stats()["rate_limited"] == 0
+    
+    async def test_cost_charges_tokens_and_in_flight(self):
+        """Test that a batch takes one token and one in-flight unit per item."""
+        controller = AdmissionController(MemoryRateLimiter(60, 5), max_in_flight=10)
+        
+        assert (await controller.admit("client", cost=3)).admitted
+        assert controller.in_flight == 3
+        assert (await controller.admit("client", cost=3)).status_code == 429
+        assert controller.in_flight == 3
+        
+        controller.release(3)
+        assert controller.in_flight == 0
+    
+    async def test_cost_that_can_never_fit_is_rejected_with_400(self):
+        """Test that a cost above the burst or the in-flight cap is not retryable."""
+        controller = AdmissionController(MemoryRateLimiter(60, 5), max_in_flight=4)
+        
+        over_burst = await controller.admit("client", cost=6)
+        over_cap = await controller.admit("client", cost=5)
+        
+        assert (over_burst.status_code, over_burst.reason) == (400, "too_large")
+        assert over_cap.status_code == 400
+        assert controller.in_flight == 0
+        assert (await controller.admit("client", cost=4)).admitted
+    
+    async def test_low_priority_shed_first(self):
+        """Test that lower classes are shed as in-flight load rises."""
+        controller = AdmissionController(
+            None,
+            max_in_flight=10,
+            priorities=parse_priorities("web:high,batch:low")
+        )
+        for _ in range(5):
+            assert (await controller.admit("c", "web")).admitted
+        
+        low = await controller.admit("c", "batch")
+        assert (low.admitted, low.status_code) == (False, 503)
+        assert (await controller.admit("c", "dashboard")).admitted
+        
+        for _ in range(3):
+            await controller.admit("c", "web")
+        assert not (await controller.admit("c", None)).admitted
+        assert (await controller.admit("c", "web")).admitted
+        assert not (await controller.admit("c", "web")).admitted
+        
+        controller.release()
+        assert controller.stats()["in_flight"] == 9
+        assert controller.stats()["shed"] == {"high": 1, "normal": 1, "low": 1}
+
+
+def test_parse_priorities():
+    """Test that priority specs are parsed and validated."""
+    assert parse_priorities(" web:HIGH , batch:low,") == {"web": "high", "batch": "low"}
+    with pytest.raises(ValueError):
+        parse_priorities("web:urgent")
+
+
+class TestClientId:
+    """Tests for client identification in AdmissionMiddleware."""
+    
+    @staticmethod
+    def scope(peer, **headers):
+        encoded = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+        return {"client": (peer, 40000), "headers": encoded}
+    
+    def test_headers_ignored_from_untrusted_peer(self):
+        """Test that a direct client cannot choose its identity."""
+        proxies = [ipaddress.ip_network("10.0.0.0/8")]
+        scope = self.scope("203.0.113.5", x_client_id="spoofed", x_forwarded_for="198.51.100.1")
+        
+        assert _client_id(scope, proxies) == "203.0.113.5"
+        assert _client_id(scope, []) == "203.0.113.5"
+    
+    def test_client_id_from_trusted_proxy(self):
+        """Test that X-Client-Id set by a trusted gateway is used."""
+        proxies = [ipaddress.ip_network("10.0.0.0/8")]
+        
+        assert _client_id(self.scope("10.1.2.3", x_client_id="client-a"), proxies) == "client-a"
+    
+    def test_nearest_untrusted_forwarded_hop(self):
+        """Test that forged hops prepended by the client are skipped."""
+        proxies = [ipaddress.ip_network("10.0.0.0/8")]
+        scope = self.scope("10.1.2.3", x_forwarded_for="1.2.3.4, 198.51.100.7, 10.9.9.9")
+        
+        assert _client_id(scope, proxies) == "198.51.100.7"
+        assert _client_id(self.scope("10.1.2.3"), proxies) == "10.1.2.3"
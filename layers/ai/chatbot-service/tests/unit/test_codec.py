@@ -0,0 +1,47 @@
+"""Tests for the binary session encoding."""
+
+import json
+import pytest
+from app.models.internal import ConversationTurn
+from app.storage import codec
+
+
+class TestCodec:
+    """Tests for encode/decode."""
+    
+    def test_round_trip(self):
+        """Test that values survive encoding."""
+        value = {"summary": "hello", "turns": 3, "nested": [1, 2.5, None]}
+        encoded = codec.encode(value)
+        
+        assert encoded[0] == codec.FORMAT_MSGPACK
+        assert codec.decode(encoded) == value
+    
+    def test_large_payload_is_compressed(self):
+        """Test that large repetitive payloads are compressed."""
+        value = {"summary": "bitcoin " * 500}
+        encoded = codec.encode(value)
+        
+        assert encoded[0] == codec.FORMAT_MSGPACK_ZLIB
+        assert len(encoded) < len(json.dumps(value))
+        assert codec.decode(encoded) == value
+    
+    def test_legacy_json(self):
+        """Test that untagged JSON is still decoded."""
+        assert codec.decode(b'{"a": 1}') == {"a": 1}
+        assert codec.decode(b'["user", "hi", 1]') == ["user", "hi", 1]
+    
+    def test_unknown_format(self):
+        """Test that unknown format bytes are rejected."""
+        with pytest.raises(ValueError):
+            codec.decode(b"\x7fdata")
+        with pytest.raises(ValueError):
+            codec.decode(b"")
+    
+    def test_turn_round_trip(self):
+        """Test compact turn encoding."""
+        turn = ConversationTurn(role="assistant", content="Price is up 5% 🚀", timestamp=1700000000)
+        encoded = codec.encode_turn(turn)
+        
+        assert codec.decode_turn(encoded) == turn
+        assert len(encoded) < len(turn.model_dump_json())
@@ -0,0 +1,136 @@
+"""Tests for conversation history compaction."""
+
+import pytest
+from app.models.internal import ConversationTurn, SessionData
+from app.services.compaction import (
+    HistoryCompactor,
+    SUMMARY_KEY,
+    SUMMARIZED_TURNS_KEY,
+    extractive_summary,
+    history_tokens,
+)
+
+
+def _turns(count: int, size: int = 40) -> list:
+    return [
+        ConversationTurn(
+            role="user" if i % 2 == 0 else "assistant",
+            content=f"turn {i} " + "x" * size,
+            timestamp=i
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+class TestHistoryCompactor:
+    """Tests for HistoryCompactor."""
+    
+    async def test_under_budget_is_untouched(self, session_store, sample_session_id):
+        """Test that short sessions are not compacted."""
+        await session_store.append_turns(sample_session_id, _turns(4), max_turns=0, ttl=3600)
+        compactor = HistoryCompactor(session_store, token_budget=10_000)
+        
+        assert await compactor.compact(sample_session_id) is False
+        session = await session_store.get(sample_session_id)
+        assert len(session.conversation_history) == 4
+    
+    async def test_over_budget_folds_older_turns(self, session_store, sample_session_id):
+        """Test that older turns move into the summary and recent ones stay."""
+        await session_store.append_turns(sample_session_id, _turns(10, size=400), max_turns=0, ttl=3600)
+        compactor = HistoryCompactor(session_store, token_budget=200, keep_recent_turns=4, max_turns=0)
+        
+        assert await compactor.compact(sample_session_id) is True
+        
+        session = await session_store.get(sample_session_id)
+        assert [t.content.split()[1] for t in session.conversation_history] == ["6", "7", "8", "9"]
+        assert "turn 0" in session.metadata[SUMMARY_KEY]
+        assert session.metadata[SUMMARIZED_TURNS_KEY] == 6
+    
+    async def test_compacts_before_turn_cap(self, session_store, sample_session_id):
+        """Test that compaction runs before the append cap would drop turns."""
+        await session_store.append_turns(sample_session_id, _turns(19, size=1), max_turns=20, ttl=3600)
+        compactor = HistoryCompactor(session_store, token_budget=10_000, keep_recent_turns=4, max_turns=20)
+        
+        assert await compactor.compact(sample_session_id) is True
+        assert len((await session_store.get(sample_session_id)).conversation_history) == 4
+    
+    async def test_prompt_size_stays_flat(self, session_store, sample_session_id):
+        """Test that repeated compaction keeps history within budget."""
+        compactor = HistoryCompactor(
+            session_store, token_budget=300, keep_recent_turns=2, max_turns=0, summary_max_chars=600
+        )
+        
+        for _ in range(20):
+            await session_store.append_turns(sample_session_id, _turns(2, size=200), max_turns=0, ttl=3600)
+            await compactor.compact(sample_session_id)
+        
+        session = await session_store.get(sample_session_id)
+        assert history_tokens(session) <= 300 + 2 * 60
+        assert session.metadata[SUMMARIZED_TURNS_KEY] >= 30
+    
+    async def test_uses_summarizer(self, session_store, sample_session_id):
+        """Test that the model summarizer output is stored."""
+        prompts = []
+        
+        async def summarizer(prompt, max_chars):
+            prompts.append(prompt)
+            return "User is tracking BTC."
+        
+        await session_store.append_turns(sample_session_id, _turns(8, size=400), max_turns=0, ttl=3600)
+        compactor = HistoryCompactor(session_store, summarizer=summarizer, token_budget=100, max_turns=0)
+        
+        await compactor.compact(sample_session_id)
+        
+        session = await session_store.get(sample_session_id)
+        assert session.metadata[SUMMARY_KEY] == "User is tracking BTC."
+        assert "turn 0" in prompts[0]
+    
+    async def test_summarizer_failure_falls_back(self, session_store, sample_session_id):
+        """Test that a failing summarizer does not block compaction."""
+        async def summarizer(prompt, max_chars):
+            raise RuntimeError("quota")
+        
+        await session_store.append_turns(sample_session_id, _turns(8, size=400), max_turns=0, ttl=3600)
+        compactor = HistoryCompactor(session_store, summarizer=summarizer, token_budget=100, max_turns=0)
+        
+        assert await compactor.compact(sample_session_id) is True
+        assert compactor.stats()["summarizer_failures"] == 1
+    
+    async def test_skips_if_history_changed(self, session_store, sample_session_id):
+        """Test that a concurrent rewrite of the history aborts compaction."""
+        async def summarizer(prompt, max_chars):
+            session = await session_store.get(sample_session_id)
+            session.conversation_history = session.conversation_history[2:]
+            await session_store.set(sample_session_id, session, ttl=3600)
+            return "summary"
+        
+        await session_store.append_turns(sample_session_id, _turns(8, size=400), max_turns=0, ttl=3600)
+        compactor = HistoryCompactor(session_store, summarizer=summarizer, token_budget=100, max_turns=0)
+        
+        assert await compactor.compact(sample_session_id) is False
+
+    
+    async def test_keeps_turns_appended_during_summary(self, session_store, sample_session_id):
+        """Test that a turn appended while the summary is produced survives compaction."""
+        async def summarizer(prompt, max_chars):
+            await session_store.append_turns(sample_session_id, _turns(1, size=1), max_turns=0, ttl=3600)
+            return "summary"
+        
+        await session_store.append_turns(sample_session_id, _turns(8, size=400), max_turns=0, ttl=3600)
+        compactor = HistoryCompactor(session_store, summarizer=summarizer, token_budget=100, keep_recent_turns=4, max_turns=0)
+        
+        assert await compactor.compact(sample_session_id) is True
+        
+        session = await session_store.get(sample_session_id)
+        assert len(session.conversation_history) == 5
+        assert session.conversation_history[-1].content == "turn 0 x"
+        assert session.metadata[SUMMARY_KEY] == "summary"
+
+
+def test_extractive_summary_is_bounded():
+    """Test that the fallback summary never exceeds its limit."""
+    summary = ""
+    for i in range(50):
+        summary = extractive_summary(summary, _turns(2, size=300), max_chars=500)
+    assert len(summary) <= 500
@@ -0,0 +1,115 @@
+"""Tests for the Gemini concurrency limiter."""
+
+import asyncio
+import pytest
+
+from app.agents.concurrency import ConcurrencyLimiter
+from app.core.exceptions import RateLimitError, TimeoutError
+
+
+@pytest.mark.asyncio
+class TestConcurrencyLimiter:
+    """Tests for ConcurrencyLimiter."""
+
+    async def test_caps_in_flight_calls(self):
+        """Test that no more than max_in_flight calls run at once."""
+        limiter = ConcurrencyLimiter(max_in_flight=2, max_queue=10, queue_timeout=5)
+        running = 0
+        peak = 0
+
+        async def work():
+            nonlocal running, peak
+            async with limiter.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(work() for _ in range(8)))
+
+        assert peak == 2
+        stats = limiter.stats()
+        assert stats["acquired_total"] == 8
+        assert stats["in_flight"] == 0
+        assert stats["queue_depth"] == 0
+        assert stats["peak_queue_depth"] >= 1
+
+    async def test_rejects_when_queue_full(self):
+        """Test that callers are rejected once the queue is full."""
+        limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=1, queue_timeout=5)
+        await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+
+        with pytest.raises(RateLimitError):
+            await limiter.acquire()
+
+        limiter.release()
+        await waiter
+        limiter.release()
+        assert limiter.stats()["rejected_total"] == 1
+
+    async def test_queue_timeout(self):
+        """Test that waiters give up after queue_timeout."""
+        limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5, queue_timeout=0.01)
+        await limiter.acquire()
+
+        with pytest.raises(TimeoutError):
+            await limiter.acquire()
+
+        assert limiter.queue_depth == 0
+        assert limiter.stats()["timeouts_total"] == 1
+
+        # Slot is still usable after a timed-out waiter
+        limiter.release()
+        await limiter.acquire()
+        assert limiter.in_flight == 1
+
+    async def test_slot_granted_as_timeout_fires_is_passed_on(self, monkeypatch):
+        """Test that a slot handed to a waiter that then times out is not leaked."""
+        limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5, queue_timeout=5)
+        await limiter.acquire()
+
+        async def release_then_time_out(waiter, timeout):
+            # release() hands the slot to the waiter, then the timeout wins
+            limiter.release()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", release_then_time_out)
+        with pytest.raises(TimeoutError):
+            await limiter.acquire()
+        monkeypatch.undo()
+
+        assert limiter.in_flight == 0
+        assert limiter.queue_depth == 0
+        await limiter.acquire()
+        assert limiter.in_flight == 1
+
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        """Test that cancelling a waiter keeps slot accounting intact."""
+        limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5, queue_timeout=5)
+        await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        limiter.release()
+        assert limiter.in_flight == 0
+        assert limiter.queue_depth == 0
+
+    async def test_try_acquire_never_waits(self):
+        """Test that try_acquire takes only a free slot and never queues."""
+        limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5, queue_timeout=5)
+
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is False
+        assert limiter.in_flight == 1
+        assert limiter.queue_depth == 0
+
+        limiter.release()
+        assert limiter.in_flight == 0
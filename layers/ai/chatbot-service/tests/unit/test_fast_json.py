@@ -0,0 +1,39 @@
+"""Tests for the fast JSON response path."""
+
+import json
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.api.responses import FastJSONResponse
+from app.models.enums import Timeframe
+from app.models.responses import ChatData, ChatResponse, ResponseMetadata
+
+
+def make_response() -> ChatResponse:
+    return ChatResponse(
+        data=ChatData(coins=["BTC", "ETH"], timeframe=Timeframe.ONE_MONTH, explanation="Kenaikan harga – “BTC” naik 5%"),
+        suggested_next_prompts=["Why is BTC moving?", "Show BTC all time", "Compare BTC and ETH"],
+        meta=ResponseMetadata(session_id="abc", ttl_remaining_sec=3600, generated_at=1700000000, cache_hit=True),
+    )
+
+
+class TestFastJSONResponse:
+    """Tests for FastJSONResponse."""
+
+    def test_matches_default_encoding(self):
+        """Test that the fast body decodes to the same document as FastAPI's default path."""
+        response = make_response()
+
+        fast = FastJSONResponse(response).body
+        default = JSONResponse(jsonable_encoder(ChatResponse.model_validate(response.model_dump()))).body
+
+        assert json.loads(fast) == json.loads(default)
+        assert "“BTC”".encode("utf-8") in fast
+
+    def test_plain_content(self):
+        """Test that non-model content is encoded compactly."""
+        body = FastJSONResponse({"a": [1, 2.5, None], "b": "é"}).body
+
+        assert json.loads(body) == {"a": [1, 2.5, None], "b": "é"}
+        assert b" " not in body
@@ -0,0 +1,61 @@
+"""Tests for adaptive search grounding."""
+
+import pytest
+
+from app.models.requests import ChatRequest
+from app.services.grounding import GroundingClassifier
+
+CONTEXT = {"symbol": "BTC", "price": 64000.0, "change_24h": -2.1}
+
+
+class TestGroundingClassifier:
+    """Tests for GroundingClassifier."""
+    
+    @pytest.mark.parametrize("message,context,expected", [
+        ("What is staking?", None, (False, "conceptual")),
+        ("How does proof of stake work?", None, (False, "conceptual")),
+        ("Why is ETH dropping today?", None, (True, "fresh")),
+        ("What is the latest news on SOL?", None, (True, "fresh")),
+        ("What is the BTC price right now?", None, (True, "fresh")),
+        ("What is the BTC price right now?", CONTEXT, (False, "context")),
+        ("Is BTC up?", CONTEXT, (False, "context")),
+        ("Why is BTC crashing right now?", CONTEXT, (True, "fresh")),
+        ("Should I buy SOL?", None, (True, "live")),
+        ("Should I diversify?", None, (True, "default")),
+        ("What does bearish mean?", None, (False, "conceptual")),
+        # Conceptual phrasing must not win over live-data cues
+        ("What is the price of bitcoin?", None, (True, "live")),
+        ("What is the price of bitcoin?", CONTEXT, (False, "context")),
+        ("How is BTC doing?", None, (True, "live")),
+        ("What is BTC trading at?", None, (True, "live")),
+        ("What are the top gainers?", None, (True, "live")),
+        ("Tell me about the SOL market", None, (True, "live")),
+        ("What does the ETH chart look like?", None, (True, "live")),
+    ])
+    def test_auto_mode(self, message, context, expected):
+        """Test that only questions needing fresh data are grounded."""
+        request = ChatRequest(user_message=message, crypto_context=context)
+        
+        assert GroundingClassifier("auto").decide(request) == expected
+    
+    def test_mode_overrides(self):
+        """Test that always and never bypass the classifier."""
+        request = ChatRequest(user_message="What is staking?")
+        
+        assert GroundingClassifier("always").decide(request) == (True, "forced")
+        assert GroundingClassifier("never").decide(ChatRequest(user_message="BTC news today")) == (False, "disabled")
+    
+    def test_unknown_mode_rejected(self):
+        """Test that a misconfigured mode fails fast."""
+        with pytest.raises(ValueError):
+            GroundingClassifier("sometimes")
+    
+    def test_stats(self):
+        """Test that decisions are counted by reason."""
+        classifier = GroundingClassifier()
+        classifier.decide(ChatRequest(user_message="What is staking?"))
+        classifier.decide(ChatRequest(user_message="ETH news"))
+        
+        stats = classifier.stats()
+        assert stats["decisions"] == {"conceptual": 1, "fresh": 1}
+        assert stats["grounded_ratio"] == 0.5
@@ -0,0 +1,81 @@
+"""Tests for the chart-request fast path."""
+
+import pytest
+
+from app.services.intent import ChartIntentParser
+
+
+class TestChartIntentParser:
+    """Tests for ChartIntentParser."""
+    
+    @pytest.mark.parametrize("message,coins,timeframe", [
+        ("show me ETH for 1 year", ["ETH"], "1y"),
+        ("ETH 1y", ["ETH"], "1y"),
+        ("compare BTC and SOL", ["BTC", "SOL"], "1m"),
+        ("Compare bitcoin vs ethereum over the last 3 months", ["BTC", "ETH"], "3m"),
+        ("plot solana, cardano and doge this year", ["SOL", "ADA", "DOGE"], "1y"),
+        ("show BTC last 24 hours", ["BTC"], "1d"),
+        ("give me one month of XRP", ["XRP"], "1m"),
+        ("show DOT all-time", ["DOT"], "all"),
+        ("Show BTC since inception", ["BTC"], "all"),
+        ("chart 90d LINK", ["LINK"], "3m"),
+    ])
+    def test_simple_requests_match(self, message, coins, timeframe):
+        """Test that chart requests are parsed into coins and timeframe."""
+        intent = ChartIntentParser().parse(message)
+        
+        assert intent is not None
+        assert intent.coins == coins
+        assert intent.timeframe == timeframe
+    
+    @pytest.mark.parametrize("message", [
+        "BTC",
+        "BTC price",
+        "why did BTC drop today?",
+        "show BTC for 6 months",
+        "show me the past week of BTC",
+        "show BTC 50",
+        "compare BTC",
+        "show dot",
+        "show BTC and ETH today and this year",
+        "show me the news about ETH",
+        "show PEPE",
+    ])
+    def test_other_messages_fall_through(self, message):
+        """Test that anything beyond a plain chart request is left to the LLM."""
+        assert ChartIntentParser().parse(message) is None
+    
+    def test_context_symbol_used_without_coin(self):
+        """Test that the crypto context supplies the coin for timeframe-only requests."""
+        parser = ChartIntentParser()
+        
+        intent = parser.parse("show the 1 year chart", context_symbol="SOL")
+        
+        assert intent.coins == ["SOL"]
+        assert parser.parse("show the chart", context_symbol="SOL") is None
+    
+    def test_long_messages_skipped(self):
+        """Test that messages over the length limit are not parsed."""
+        parser = ChartIntentParser(max_length=20)
+        
+        assert parser.parse("show me the bitcoin chart for one year please") is None
+    
+    def test_response_matches_model_format(self):
+        """Test that local responses have the model's JSON shape."""
+        parser = ChartIntentParser()
+        
+        data = parser.respond(parser.parse("compare BTC and SOL for 1 year"))
+        
+        assert data["data"]["coins"] == ["BTC", "SOL"]
+        assert data["data"]["timeframe"] == "1y"
+        assert "Bitcoin (BTC) and Solana (SOL)" in data["data"]["explanation"]
+        assert len(data["suggested_next_prompts"]) == 3
+        assert all(2 <= len(p.split()) <= 5 for p in data["suggested_next_prompts"])
+    
+    def test_hit_rate(self):
+        """Test that matches are reported as a hit rate."""
+        parser = ChartIntentParser()
+        parser.parse("show ETH")
+        parser.parse("what is ETH?")
+        
+        assert parser.stats() == {"attempts": 2, "matches": 1, "hit_rate": 0.5}
@@ -0,0 +1,102 @@
+"""Tests for the incremental JSON object extractor."""
+
+import json
+import pytest
+from app.agents.json_extract import JSONObjectExtractor, extract_json
+
+
+SAMPLE = {
+    "data": {"coins": ["BTC"], "type": "single", "timeframe": "7d",
+             "explanation": "Braces } and { and \"quotes\" \\ inside"},
+    "suggested_next_prompts": ["a", "b", "c"],
+}
+
+
+class TestExtractJson:
+    """Tests for one-shot extraction."""
+    
+    def test_plain_object(self):
+        """Test a bare JSON document."""
+        assert extract_json(json.dumps(SAMPLE)) == SAMPLE
+    
+    def test_braces_inside_strings(self):
+        """Test that braces in string values do not end the object early."""
+        text = 'Answer: {"a": "}", "b": {"c": "{{"}} trailing }'
+        assert extract_json(text) == {"a": "}", "b": {"c": "{{"}}
+    
+    def test_escaped_quotes(self):
+        """Test that escaped quotes do not toggle string state."""
+        text = '{"a": "say \\"}\\" now", "b": 1}'
+        assert extract_json(text) == {"a": 'say "}" now', "b": 1}
+    
+    def test_markdown_fence_preferred(self):
+        """Test that a json fence wins over braces in preceding prose."""
+        text = 'Use {placeholders} like this:\n```json\n{"a": 1}\n```'
+        assert extract_json(text) == {"a": 1}
+    
+    def test_first_of_duplicated_objects(self):
+        """Test that only the first complete object is returned."""
+        text = '{"explanation": "first"}\n{"explanation": "second"}'
+        assert extract_json(text) == {"explanation": "first"}
+    
+    def test_control_characters(self):
+        """Test raw control characters inside and outside strings."""
+        assert extract_json('{"a": "line\nbreak\x00"}') == {"a": "line\nbreak\x00"}
+        assert extract_json('{"a":\x00 1}') == {"a": 1}
+    
+    def test_skips_invalid_candidate(self):
+        """Test that an unparseable balanced block is skipped."""
+        assert extract_json('{not json} then {"a": 1}') == {"a": 1}
+    
+    def test_malformed_document_not_replaced_by_nested_object(self):
+        """Test that a broken top-level object does not yield its inner object."""
+        with pytest.raises(ValueError):
+            extract_json('{"data": {"coins": ["BTC"]}, "note": oops}')
+    
+    def test_control_character_between_tokens(self):
+        """Test that a stray control character outside strings keeps the whole document."""
+        text = '{"data": {"coins": ["BTC"]},\x0b "note": "ok"}'
+        assert extract_json(text) == {"data": {"coins": ["BTC"]}, "note": "ok"}
+    
+    def test_no_object(self):
+        """Test that missing or truncated objects raise ValueError."""
+        with pytest.raises(ValueError):
+            extract_json("no json here")
+        with pytest.raises(ValueError):
+            extract_json('{"a": "unterminated')
+
+
+class TestJSONObjectExtractor:
+    """Tests for chunked extraction."""
+    
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+    def test_any_chunking(self, size):
+        """Test that results do not depend on chunk boundaries."""
+        text = "prefix " + json.dumps(SAMPLE) + " suffix"
+        extractor = JSONObjectExtractor()
+        result = None
+        for i in range(0, len(text), size):
+            result = extractor.feed(text[i:i + size])
+            if result is not None:
+                break
+        
+        assert result == SAMPLE
+        assert extractor.done
+    
+    def test_escape_split_across_chunks(self):
+        """Test a backslash at the end of a chunk."""
+        extractor = JSONObjectExtractor()
+        assert extractor.feed('{"a": "x\\') is None
+        assert extractor.feed('"}"}') == {"a": 'x"}'}
+    
+    def test_result_is_sticky(self):
+        """Test that later chunks do not change the result."""
+        extractor = JSONObjectExtractor()
+        extractor.feed('{"a": 1}')
+        assert extractor.feed('{"b": 2}') == {"a": 1}
+    
+    def test_failed_candidate_skipped_whole(self):
+        """Test that scanning resumes after a malformed object, not inside it."""
+        extractor = JSONObjectExtractor()
+        assert extractor.feed('{"data": {"coins": ["BTC"]}, "note": oops}') is None
+        assert extractor.feed(' {"a": 1}') == {"a": 1}
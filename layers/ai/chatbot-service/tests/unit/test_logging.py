@@ -0,0 +1,163 @@
+"""Tests for the logging pipeline."""
+
+import io
+import json
+import logging
+import threading
+
+import pytest
+import structlog
+
+from app.core.config import settings
+from app.core.logging import (
+    _LogWriter,
+    cap_values,
+    get_logger,
+    sample_events,
+    setup_logging,
+    shutdown_logging,
+)
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+
+@pytest.fixture
+def configure(monkeypatch, capsys):
+    """Set up logging with overridden settings, writing to the captured stdout."""
+    def apply(**overrides):
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        setup_logging()
+    yield apply
+    shutdown_logging()
+    monkeypatch.undo()
+    setup_logging()
+
+
+def read_events(capsys):
+    shutdown_logging()
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+class TestProcessors:
+    """Tests for the sampling and payload cap processors."""
+    
+    def test_sampled_out_event_dropped(self):
+        """Test that an event with rate 0 is dropped."""
+        processor = sample_events({"hot_event": 0.0})
+        
+        with pytest.raises(structlog.DropEvent):
+            processor(None, "info", {"event": "hot_event"})
+    
+    def test_kept_event_carries_rate(self):
+        """Test that kept sampled events record their sample rate."""
+        processor = sample_events({"hot_event": 1.0})
+        
+        assert processor(None, "info", {"event": "hot_event"}) == {"event": "hot_event", "sample_rate": 1.0}
+        assert processor(None, "info", {"event": "other"}) == {"event": "other"}
+    
+    def test_warnings_never_sampled(self):
+        """Test that warnings and errors are kept whatever the rate."""
+        processor = sample_events({"hot_event": 0.0})
+        
+        assert processor(None, "warning", {"event": "hot_event"}) == {"event": "hot_event"}
+    
+    def test_long_values_truncated(self):
+        """Test that long strings and containers are cut to the cap."""
+        processor = cap_values(10)
+        
+        event = processor(None, "info", {
+            "event": "e",
+            "text": "x" * 25,
+            "items": list(range(20)),
+            "count": 12345678901234,
+            "exception": "y" * 25,
+        })
+        
+        assert event["text"] == "x" * 10 + "...[15 more chars]"
+        assert event["items"].startswith("[0, 1, 2, ")
+        assert event["items"].endswith("more chars]")
+        assert event["count"] == 12345678901234
+        assert event["exception"] == "y" * 25
+
+
+class TestLogWriter:
+    """Tests for the background log writer."""
+    
+    def test_full_queue_drops_event(self):
+        """Test that events are dropped and counted instead of blocking."""
+        writing, release = threading.Event(), threading.Event()
+        
+        class SlowStream(io.StringIO):
+            def write(self, text):
+                writing.set()
+                release.wait(5)
+                return super().write(text)
+        
+        stream = SlowStream()
+        writer = _LogWriter(stream, [lambda logger, name, event: event["event"]], background=True, queue_size=1)
+        before = LOG_RECORDS_DROPPED.value()
+        
+        writer.submit({"event": "first"})
+        assert writing.wait(5)
+        writer.submit({"event": "second"})
+        writer.submit({"event": "third"})
+        release.set()
+        writer.close()
+        
+        assert stream.getvalue().split() == ["first", "second"]
+        assert LOG_RECORDS_DROPPED.value() == before + 1
+    
+    def test_stdlib_record_formatted_by_writer(self):
+        """Test that stdlib records keep their arguments until the writer renders them."""
+        stream = io.StringIO()
+        writer = _LogWriter(stream, [lambda logger, name, event: json.dumps(event)], background=False, queue_size=1)
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "message %s", ("arg",), None)
+        
+        writer.submit(record)
+        
+        assert record.msg == "message %s"
+        assert json.loads(stream.getvalue())["event"] == "message arg"
+
+
+class TestSetup:
+    """Tests for the configured pipeline."""
+    
+    @pytest.mark.parametrize("log_async", [True, False])
+    def test_events_rendered_as_json(self, configure, capsys, log_async):
+        """Test that events reach stdout as JSON with and without the queue."""
+        configure(log_async=log_async, log_format="json", log_max_value_chars=10)
+        
+        get_logger("test.ev").info("done", detail="abcdefghijklm")
+        logging.getLogger("test.stdlib").warning("plain %s", "rec")
+        
+        events = read_events(capsys)
+        assert events[0]["event"] == "done"
+        assert events[0]["detail"] == "abcdefghij...[3 more chars]"
+        assert events[0]["level"] == "info"
+        assert events[0]["logger"] == "test.ev"
+        assert "timestamp" in events[0]
+        assert events[1]["event"] == "plain rec"
+        assert events[1]["level"] == "warning"
+    
+    def test_disabled_level_and_sampled_events_skipped(self, configure, capsys):
+        """Test that filtered and sampled-out events are never written."""
+        configure(log_level="INFO", log_sample_rates="noisy_event=0")
+        
+        logger = get_logger("test.filter")
+        logger.debug("debug_event")
+        logger.info("noisy_event")
+        logger.info("kept_event")
+        
+        assert [event["event"] for event in read_events(capsys)] == ["kept_event"]
+    
+    def test_exception_formatted_on_caller(self, configure, capsys):
+        """Test that exc_info is resolved where the exception was caught."""
+        configure()
+        
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            get_logger("test.exc").error("failed", exc_info=True)
+        
+        [event] = read_events(capsys)
+        assert "ValueError: boom" in event["exception"]
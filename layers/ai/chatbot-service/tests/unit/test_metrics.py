@@ -0,0 +1,92 @@
+"""Tests for the Prometheus metrics registry."""
+
+import pytest
+
+from app.core.metrics import Counter, Gauge, Histogram, Metric, Registry
+
+
+class TestExposition:
+    """Tests for the text exposition format."""
+    
+    def test_counter_renders_help_type_and_labels(self):
+        """Test that counters render one sample per label set."""
+        registry = Registry()
+        counter = registry.register(Counter("lookups_total", "Cache lookups.", ["cache", "result"]))
+        counter.inc("response", "hit")
+        counter.inc("response", "hit")
+        counter.inc("response", "miss", amount=0.5)
+        
+        assert registry.render() == (
+            "# HELP lookups_total Cache lookups.\n"
+            "# TYPE lookups_total counter\n"
+            'lookups_total{cache="response",result="hit"} 2.0\n'
+            'lookups_total{cache="response",result="miss"} 0.5\n'
+        )
+    
+    def test_label_values_are_escaped(self):
+        """Test that quotes, backslashes and newlines in label values are escaped."""
+        counter = Counter("errors_total", "Errors.", ["type"])
+        counter.inc('a"b\\c\nd')
+        
+        assert counter.samples() == ['errors_total{type="a\\"b\\\\c\\nd"} 1.0']
+    
+    def test_duplicate_registration_rejected(self):
+        """Test that a metric name can only be registered once."""
+        registry = Registry()
+        registry.register(Counter("x_total", "X."))
+        
+        with pytest.raises(ValueError):
+            registry.register(Gauge("x_total", "X."))
+    
+    def test_metric_without_samples_cannot_be_created(self):
+        """Test that the base class must be subclassed with a samples method."""
+        with pytest.raises(TypeError):
+            Metric("x_total", "X.")
+
+
+class TestHistogram:
+    """Tests for histogram buckets."""
+    
+    def test_buckets_are_cumulative(self):
+        """Test that bucket counts include every smaller bucket."""
+        histogram = Histogram("latency_seconds", "Latency.", ["stage"], buckets=[0.1, 1.0])
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "gemini")
+        
+        assert histogram.samples() == [
+            'latency_seconds_bucket{stage="gemini",le="0.1"} 2',
+            'latency_seconds_bucket{stage="gemini",le="1.0"} 3',
+            'latency_seconds_bucket{stage="gemini",le="+Inf"} 4',
+            'latency_seconds_sum{stage="gemini"} 3.65',
+            'latency_seconds_count{stage="gemini"} 4',
+        ]
+        assert histogram.count("gemini") == 4
+        assert histogram.count("other") == 0
+    
+    def test_timer_observes_block_that_raises(self):
+        """Test that a timed block is recorded even if it raises."""
+        histogram = Histogram("latency_seconds", "Latency.", ["stage"])
+        
+        with pytest.raises(RuntimeError):
+            with histogram.time("session_set"):
+                raise RuntimeError("boom")
+        
+        assert histogram.count("session_set") == 1
+
+
+class TestGauge:
+    """Tests for gauges."""
+    
+    def test_callback_replaces_stored_values(self):
+        """Test that a callback is read at render time."""
+        gauge = Gauge("pool_connections", "Pool usage.", ["state"])
+        gauge.set(5, "idle")
+        gauge.set_callback(lambda: {("in_use",): 2, ("idle",): 8})
+        
+        assert gauge.samples() == [
+            'pool_connections{state="idle"} 8.0',
+            'pool_connections{state="in_use"} 2.0',
+        ]
+        
+        gauge.set_callback(None)
+        assert gauge.samples() == ['pool_connections{state="idle"} 5.0']
@@ -0,0 +1,168 @@
+"""Tests for the prompt prefix cache."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors
+
+from app.agents.gemini_client import GeminiClient
+from app.core.metrics import GEMINI_SECONDS
+from app.agents.prompt_cache import PromptPrefixCache, LocalStubProvider
+
+MODEL = "gemini-2.5-flash"
+PREFIX = "You are a cryptocurrency market analysis assistant. " * 100
+
+
+class FailingProvider(LocalStubProvider):
+    """Stub provider whose creates always fail."""
+
+    async def create(self, model, prefix, ttl_seconds):
+        self.calls["create"] += 1
+        raise RuntimeError("caching unavailable")
+
+
+@pytest.mark.asyncio
+class TestPromptPrefixCache:
+    """Tests for PromptPrefixCache."""
+
+    async def test_prefix_registered_once(self):
+        """Test that concurrent first calls share a single registration."""
+        provider = LocalStubProvider(latency=0.01)
+        cache = PromptPrefixCache(provider, min_prefix_tokens=0)
+
+        handles = await asyncio.gather(*(cache.handle(MODEL, PREFIX) for _ in range(10)))
+        handles.append(await cache.handle(MODEL, PREFIX))
+
+        assert provider.calls["create"] == 1
+        assert len(set(handles)) == 1
+        assert provider.resolve(handles[0])[0] == PREFIX
+        stats = cache.stats()
+        assert stats["hits"] == 11
+        assert stats["est_tokens_saved"] == 11 * (len(PREFIX) // 4 + 1)
+
+    async def test_small_prefix_sent_inline(self):
+        """Test that prefixes below the provider minimum are not cached."""
+        provider = LocalStubProvider()
+        cache = PromptPrefixCache(provider, min_prefix_tokens=1024)
+
+        assert await cache.handle(MODEL, "short prompt") is None
+        assert provider.calls["create"] == 0
+        assert cache.stats()["inline"] == 1
+
+    async def test_handle_refreshed_before_expiry(self):
+        """Test that a handle inside the refresh margin is extended in the background."""
+        provider = LocalStubProvider()
+        cache = PromptPrefixCache(provider, ttl_seconds=3600, refresh_margin_seconds=300, min_prefix_tokens=0)
+
+        handle = await cache.handle(MODEL, PREFIX)
+        entry = next(iter(cache._entries.values()))
+        entry.expires_at = time.time() + 100
+
+        assert await cache.handle(MODEL, PREFIX) == handle
+        await asyncio.sleep(0)
+
+        assert provider.calls["refresh"] == 1
+        assert entry.expires_at > time.time() + 3000
+        assert provider.calls["create"] == 1
+
+    async def test_expired_handle_recreated(self):
+        """Test that an expired handle is replaced and the old one released."""
+        provider = LocalStubProvider()
+        cache = PromptPrefixCache(provider, min_prefix_tokens=0)
+
+        first = await cache.handle(MODEL, PREFIX)
+        next(iter(cache._entries.values())).expires_at = time.time() + 1
+        second = await cache.handle(MODEL, PREFIX)
+
+        assert second != first
+        assert provider.calls["create"] == 2
+        assert first not in provider.prefixes
+
+    async def test_create_failure_falls_back_with_backoff(self):
+        """Test that a failed registration is not retried on every call."""
+        provider = FailingProvider()
+        cache = PromptPrefixCache(provider, min_prefix_tokens=0, retry_after_seconds=60)
+
+        assert await cache.handle(MODEL, PREFIX) is None
+        assert await cache.handle(MODEL, PREFIX) is None
+
+        assert provider.calls["create"] == 1
+        assert cache.stats()["failures"] == 1
+        assert cache.stats()["inline"] == 2
+
+    async def test_invalidate_and_close(self):
+        """Test that invalidated handles are recreated and close releases handles."""
+        provider = LocalStubProvider()
+        cache = PromptPrefixCache(provider, min_prefix_tokens=0)
+
+        first = await cache.handle(MODEL, PREFIX)
+        cache.invalidate(first)
+        second = await cache.handle(MODEL, PREFIX)
+        assert second != first
+
+        await cache.close()
+        assert second not in provider.prefixes
+        assert cache.stats()["handles"] == 0
+
+
+class FakeModels:
+    """Records generate_content calls; rejects a configured handle."""
+
+    def __init__(self, rejected_handle=None):
+        self.configs = []
+        self.rejected_handle = rejected_handle
+
+    async def generate_content(self, model, contents, config):
+        self.configs.append(config)
+        if config.cached_content and config.cached_content == self.rejected_handle:
+            raise errors.ClientError(404, {"error": {"message": "cached content not found"}})
+        usage = SimpleNamespace(cached_content_token_count=700 if config.cached_content else None)
+        return SimpleNamespace(text='{"ok": true}', usage_metadata=usage)
+
+
+@pytest.mark.asyncio
+class TestGeminiClientPrefixCache:
+    """Tests for GeminiClient's use of the prefix cache."""
+
+    def _client(self, models):
+        client = GeminiClient(api_key="test-key")
+        client.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+        client.prefix_cache = PromptPrefixCache(LocalStubProvider(), min_prefix_tokens=0)
+        return client
+
+    async def test_system_prompt_sent_by_handle(self):
+        """Test that cached calls reference the handle instead of the instruction."""
+        models = FakeModels()
+        client = self._client(models)
+
+        assert await client.agenerate("How is BTC?", PREFIX) == {"ok": True}
+
+        config = models.configs[0]
+        assert config.cached_content.startswith("cachedContents/")
+        assert config.system_instruction is None
+        assert config.response_schema is not None
+        assert client.prefix_cache.stats()["cached_tokens_reported"] == 700
+
+    async def test_rejected_handle_retried_inline(self):
+        """Test that a stale handle falls back to the inline system prompt."""
+        client = self._client(None)
+        handle = await client.prefix_cache.handle(client.MODEL_NAME, PREFIX)
+        models = FakeModels(rejected_handle=handle)
+        client.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+
+        assert await client.agenerate("How is BTC?", PREFIX) == {"ok": True}
+
+        assert [c.cached_content for c in models.configs] == [handle, None]
+        assert models.configs[1].system_instruction == PREFIX
+        assert client.prefix_cache.stats()["invalidations"] == 1
+
+    async def test_call_latency_recorded_as_ungrounded(self):
+        """Test that schema-constrained calls are timed under grounded="false"."""
+        client = self._client(FakeModels())
+        before = GEMINI_SECONDS.count("false")
+
+        await client.agenerate("How is BTC?", PREFIX)
+
+        assert GEMINI_SECONDS.count("false") == before + 1
@@ -0,0 +1,85 @@
+"""Tests for the instrumented Redis connection pool and client init."""
+
+import asyncio
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.storage.redis_pool import InstrumentedConnectionPool
+from app.storage.redis_store import RedisSessionStore
+
+
+def _pool(max_connections: int = 2, timeout: float = 0.05) -> InstrumentedConnectionPool:
+    """Pool of fake connections sharing one in-memory server."""
+    return InstrumentedConnectionPool(
+        connection_class=FakeAsyncRedisConnection,
+        server=fakeredis.FakeServer(),
+        max_connections=max_connections,
+        timeout=timeout
+    )
+
+
+@pytest.mark.asyncio
+class TestInstrumentedConnectionPool:
+    """Tests for pool metrics."""
+    
+    async def test_records_acquisitions(self):
+        """Test that checkouts are counted."""
+        pool = _pool()
+        connection = await pool.get_connection()
+        
+        stats = pool.stats()
+        assert stats["acquired"] == 1
+        assert stats["in_use"] == 1
+        assert stats["saturation"] == 0.5
+        
+        await pool.release(connection)
+        assert pool.stats()["in_use"] == 0
+        await pool.disconnect()
+    
+    async def test_exhaustion_times_out(self):
+        """Test that a saturated pool fails after its timeout and records it."""
+        pool = _pool(max_connections=1)
+        connection = await pool.get_connection()
+        
+        with pytest.raises(RedisConnectionError):
+            await pool.get_connection()
+        
+        stats = pool.stats()
+        assert stats["timeouts"] == 1
+        assert stats["saturation"] == 1.0
+        await pool.release(connection)
+        await pool.disconnect()
+    
+    async def test_waiters_get_released_connections(self):
+        """Test that callers wait for a free connection instead of failing."""
+        pool = _pool(max_connections=1, timeout=1.0)
+        connection = await pool.get_connection()
+        
+        waiter = asyncio.create_task(pool.get_connection())
+        await asyncio.sleep(0.02)
+        await pool.release(connection)
+        second = await waiter
+        
+        stats = pool.stats()
+        assert stats["waited"] >= 1
+        assert stats["max_wait_ms"] >= 10
+        await pool.release(second)
+        await pool.disconnect()
+
+
+@pytest.mark.asyncio
+class TestRedisClientInit:
+    """Tests for RedisSessionStore client creation."""
+    
+    async def test_concurrent_first_use_creates_one_client(self):
+        """Test that concurrent callers share a single client and pool."""
+        store = RedisSessionStore("redis://localhost:6379/0", max_connections=8)
+        
+        clients = await asyncio.gather(*(store._get_client() for _ in range(10)))
+        
+        assert all(client is clients[0] for client in clients)
+        assert store.stats()["pool"]["max_connections"] == 8
+        await store.close()
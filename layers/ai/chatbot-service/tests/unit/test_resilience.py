@@ -0,0 +1,199 @@
+"""Tests for Gemini call deadlines, retries, hedging and circuit breaking."""
+
+import asyncio
+import time
+
+import pytest
+from google.genai import errors
+
+from app.agents.concurrency import ConcurrencyLimiter
+from app.agents.resilience import CircuitBreaker, ResilientCaller, request_deadline
+from app.core.exceptions import CircuitOpenError, TimeoutError
+
+
+def server_error():
+    return errors.ServerError(503, {"error": {"message": "unavailable"}})
+
+
+def caller(**kwargs):
+    options = {"budget_seconds": 5.0, "attempt_timeout": 1.0, "max_attempts": 3, "base_delay": 0.001, "max_delay": 0.002}
+    options.update(kwargs)
+    breaker = options.pop("breaker", None) or CircuitBreaker(failure_threshold=10)
+    return ResilientCaller(breaker, **options)
+
+
+@pytest.mark.asyncio
+class TestResilientCaller:
+    """Tests for ResilientCaller."""
+    
+    async def test_transient_failures_retried(self):
+        """Test that 5xx errors are retried until a success."""
+        calls = 0
+        
+        async def flaky():
+            nonlocal calls
+            calls += 1
+            if calls < 3:
+                raise server_error()
+            return "ok"
+        
+        c = caller()
+        
+        assert await c.call(flaky) == "ok"
+        assert calls == 3
+        assert c.stats()["retries_total"] == 2
+    
+    async def test_client_errors_not_retried(self):
+        """Test that a bad request fails immediately."""
+        calls = 0
+        
+        async def bad_request():
+            nonlocal calls
+            calls += 1
+            raise errors.ClientError(400, {"error": {"message": "bad"}})
+        
+        c = caller()
+        
+        with pytest.raises(errors.ClientError):
+            await c.call(bad_request)
+        assert calls == 1
+        assert c.breaker.stats()["consecutive_failures"] == 0
+    
+    async def test_hung_attempts_time_out(self):
+        """Test that hung attempts are cut off and surface as TimeoutError."""
+        async def hang():
+            await asyncio.sleep(10)
+        
+        c = caller(attempt_timeout=0.02, max_attempts=2)
+        start = time.monotonic()
+        
+        with pytest.raises(TimeoutError):
+            await c.call(hang)
+        assert time.monotonic() - start < 0.5
+        assert c.stats()["timeouts_total"] == 1
+    
+    async def test_request_deadline_caps_budget(self):
+        """Test that the enclosing request deadline bounds all attempts."""
+        async def hang():
+            await asyncio.sleep(10)
+        
+        c = caller(attempt_timeout=5.0, max_attempts=5)
+        start = time.monotonic()
+        
+        with request_deadline(0.05):
+            with pytest.raises(TimeoutError):
+                await c.call(hang)
+        assert time.monotonic() - start < 0.5
+    
+    async def test_hedge_wins_when_primary_is_slow(self):
+        """Test that a backup attempt is raced against a slow primary."""
+        calls = 0
+        
+        async def slow_then_fast():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(1.0 if calls == 1 else 0.001)
+            return calls
+        
+        c = caller(hedge_enabled=True, hedge_min_delay=0.01)
+        for _ in range(20):
+            c.latency.record(0.01)
+        
+        assert await c.call(slow_then_fast) == 2
+        stats = c.stats()
+        assert stats["hedges_total"] == 1
+        assert stats["hedge_wins_total"] == 1
+    
+    async def test_hedge_takes_its_own_limiter_slot(self):
+        """Test that a hedged attempt holds a second slot until it finishes."""
+        limiter = ConcurrencyLimiter(max_in_flight=2, max_queue=0, queue_timeout=1)
+        held = []
+        calls = 0
+        
+        async def slow_then_fast():
+            nonlocal calls
+            calls += 1
+            held.append(limiter.in_flight)
+            await asyncio.sleep(1.0 if calls == 1 else 0.001)
+            return calls
+        
+        c = caller(hedge_enabled=True, hedge_min_delay=0.01, limiter=limiter)
+        for _ in range(20):
+            c.latency.record(0.01)
+        
+        async with limiter.slot():
+            assert await c.call(slow_then_fast) == 2
+        assert held == [1, 2]
+        assert limiter.in_flight == 0
+    
+    async def test_hedge_skipped_without_free_slot(self):
+        """Test that no backup is sent when the limiter is full."""
+        limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=0, queue_timeout=1)
+        calls = 0
+        
+        async def slow():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return calls
+        
+        c = caller(hedge_enabled=True, hedge_min_delay=0.01, limiter=limiter)
+        for _ in range(20):
+            c.latency.record(0.01)
+        
+        async with limiter.slot():
+            assert await c.call(slow) == 1
+        stats = c.stats()
+        assert stats["hedges_total"] == 0
+        assert stats["hedges_skipped_total"] == 1
+        assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker."""
+    
+    async def test_opens_and_fails_fast(self):
+        """Test that consecutive failures open the circuit and reject calls."""
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        c = caller(breaker=breaker, max_attempts=1)
+        
+        async def fail():
+            raise server_error()
+        
+        for _ in range(2):
+            with pytest.raises(errors.ServerError):
+                await c.call(fail)
+        
+        with pytest.raises(CircuitOpenError) as exc_info:
+            await c.call(fail)
+        assert exc_info.value.retry_after > 0
+        assert breaker.stats()["state"] == "open"
+        assert breaker.stats()["rejected_total"] == 1
+    
+    async def test_half_open_probe_closes_circuit(self):
+        """Test that a successful probe after the recovery timeout closes the circuit."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+        breaker.record_failure()
+        assert breaker.state == "open"
+        
+        await asyncio.sleep(0.02)
+        assert breaker.state == "half_open"
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        
+        breaker.record_success()
+        assert breaker.state == "closed"
+    
+    async def test_failed_probe_reopens(self):
+        """Test that a failed probe opens the circuit again."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+        breaker.record_failure()
+        await asyncio.sleep(0.02)
+        breaker.before_call()
+        
+        breaker.record_failure()
+        
+        assert breaker.state == "open"
+        assert breaker.stats()["opened_total"] == 2
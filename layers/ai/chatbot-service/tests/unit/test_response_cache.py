@@ -0,0 +1,96 @@
+"""Tests for the chat response cache."""
+
+import pytest
+
+from app.models.requests import ChatRequest, CryptoContext
+from app.services.chat_service import ChatService
+from app.storage.response_cache import MemoryResponseCache, make_cache_key, normalize_message
+
+
+RESPONSE_DATA = {
+    "data": {"coins": ["BTC"], "timeframe": "1d", "explanation": "BTC is flat today."},
+    "suggested_next_prompts": ["Show ETH", "Compare BTC and SOL", "Why is BTC flat?"]
+}
+
+
+class CountingGeminiClient:
+    """Gemini stand-in that counts generation calls."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def agenerate(self, prompt: str, system_prompt: str) -> dict:
+        self.calls += 1
+        return RESPONSE_DATA
+
+
+class TestCacheKey:
+    """Tests for message normalization and keys."""
+    
+    def test_normalizes_case_whitespace_and_punctuation(self):
+        """Test that trivial variations normalize identically."""
+        assert normalize_message("  What's happening with BTC   today?? ") == "what's happening with btc today"
+    
+    def test_key_includes_symbol(self):
+        """Test that context symbol separates entries."""
+        assert make_cache_key("price?", "BTC") != make_cache_key("price?", "ETH")
+        assert make_cache_key("Price?", "btc") == make_cache_key("price", "BTC")
+
+
+@pytest.mark.asyncio
+class TestMemoryResponseCache:
+    """Tests for MemoryResponseCache."""
+    
+    async def test_hit_and_miss_counters(self):
+        """Test hit ratio accounting."""
+        cache = MemoryResponseCache(ttl=60, max_entries=10)
+        assert await cache.get("k") is None
+        await cache.set("k", RESPONSE_DATA)
+        assert await cache.get("k") == RESPONSE_DATA
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+    
+    async def test_lru_eviction(self):
+        """Test that least recently used entries are evicted first."""
+        cache = MemoryResponseCache(ttl=60, max_entries=2)
+        await cache.set("a", {"v": 1})
+        await cache.set("b", {"v": 2})
+        await cache.get("a")
+        await cache.set("c", {"v": 3})
+        
+        assert await cache.get("b") is None
+        assert await cache.get("a") == {"v": 1}
+        assert cache.stats()["evictions"] == 1
+    
+    async def test_expiry(self):
+        """Test that expired entries are not returned."""
+        cache = MemoryResponseCache(ttl=-1, max_entries=10)
+        await cache.set("k", RESPONSE_DATA)
+        assert await cache.get("k") is None
+
+
+@pytest.mark.asyncio
+class TestChatServiceCaching:
+    """Tests for response caching in ChatService."""
+    
+    async def test_repeated_question_skips_gemini(self, session_store):
+        """Test that an identical question is served from cache."""
+        gemini = CountingGeminiClient()
+        service = ChatService(
+            session_store,
+            gemini_client=gemini,
+            system_prompt="system",
+            response_cache=MemoryResponseCache(ttl=60, max_entries=10)
+        )
+        context = CryptoContext(symbol="BTC")
+        
+        first = await service.process_message(ChatRequest(user_message="What's up with BTC?", crypto_context=context))
+        second = await service.process_message(ChatRequest(user_message="what's up with btc", crypto_context=context))
+        
+        assert gemini.calls == 1
+        assert first.meta.cache_hit is False
+        assert second.meta.cache_hit is True
+        assert second.data == first.data
@@ -1,6 +1,8 @@
 """Tests for session storage."""
 
+import asyncio
 import pytest
+import pytest_asyncio
 import time
 from app.models.internal import SessionData, ConversationTurn
 
@@ -114,3 +116,319 @@ class TestMemorySessionStore:
         assert len(retrieved.conversation_history) == 2
         assert retrieved.conversation_history[0].role == "user"
         assert retrieved.conversation_history[1].role == "assistant"
+    
+    async def test_append_turns_creates_session(self, session_store, sample_session_id):
+        """Test appending to a new session creates it."""
+        turn = ConversationTurn(role="user", content="Hello", timestamp=int(time.time()))
+        
+        result = await session_store.append_turns(sample_session_id, [turn], max_turns=10, ttl=3600)
+        
+        assert result.history_length == 1
+        assert 0 < result.ttl_remaining <= 3600
+        retrieved = await session_store.get(sample_session_id)
+        assert retrieved.conversation_history[0].content == "Hello"
+    
+    async def test_append_turns_trims_history(self, session_store, sample_session_id):
+        """Test that only the last max_turns turns are kept."""
+        for i in range(5):
+            turns = [
+                ConversationTurn(role="user", content=f"q{i}", timestamp=int(time.time())),
+                ConversationTurn(role="assistant", content=f"a{i}", timestamp=int(time.time())),
+            ]
+            result = await session_store.append_turns(sample_session_id, turns, max_turns=4, ttl=3600)
+        
+        assert result.history_length == 4
+        retrieved = await session_store.get(sample_session_id)
+        assert [t.content for t in retrieved.conversation_history] == ["q3", "a3", "q4", "a4"]
+    
+    async def test_concurrent_appends_are_not_lost(self, session_store, sample_session_id):
+        """Test that concurrent appends to one session all persist."""
+        import asyncio
+        
+        async def append(i):
+            turn = ConversationTurn(role="user", content=str(i), timestamp=int(time.time()))
+            await session_store.append_turns(sample_session_id, [turn], max_turns=0, ttl=3600)
+        
+        await asyncio.gather(*(append(i) for i in range(20)))
+        
+        retrieved = await session_store.get(sample_session_id)
+        assert len(retrieved.conversation_history) == 20
+    
+    async def test_get_last_turns_only(self, session_store, sample_session_id):
+        """Test that max_turns limits the returned history without truncating storage."""
+        turns = [
+            ConversationTurn(role="user", content=str(i), timestamp=int(time.time()))
+            for i in range(6)
+        ]
+        await session_store.append_turns(sample_session_id, turns, max_turns=0, ttl=3600)
+        
+        recent = await session_store.get(sample_session_id, max_turns=2)
+        assert [t.content for t in recent.conversation_history] == ["4", "5"]
+        
+        full = await session_store.get(sample_session_id)
+        assert len(full.conversation_history) == 6
+
+
+@pytest_asyncio.fixture
+async def redis_store():
+    """Redis session store backed by fakeredis."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSessionStore
+    
+    store = RedisSessionStore("redis://localhost:6379/0")
+    store.redis = fakeredis.FakeAsyncRedis()
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio
+class TestRedisSessionStore:
+    """Tests for RedisSessionStore's list-based layout."""
+    
+    async def test_append_and_get(self, redis_store, sample_session_id):
+        """Test that appended turns round-trip through the binary encoding."""
+        turns = [
+            ConversationTurn(role="user", content="Hello", timestamp=1),
+            ConversationTurn(role="assistant", content="Hi ✓", timestamp=2),
+        ]
+        
+        result = await redis_store.append_turns(sample_session_id, turns, max_turns=10, ttl=3600)
+        
+        assert result.history_length == 2
+        session = await redis_store.get(sample_session_id)
+        assert session.conversation_history == turns
+        assert session.metadata == {}
+        assert 0 < await redis_store.get_ttl(sample_session_id) <= 3600
+    
+    async def test_append_trims_and_reads_tail(self, redis_store, sample_session_id):
+        """Test capped turn list and partial reads."""
+        for i in range(5):
+            turn = ConversationTurn(role="user", content=str(i), timestamp=i)
+            result = await redis_store.append_turns(sample_session_id, [turn], max_turns=3, ttl=3600)
+        
+        assert result.history_length == 3
+        session = await redis_store.get(sample_session_id, max_turns=2)
+        assert [t.content for t in session.conversation_history] == ["3", "4"]
+    
+    async def test_set_replaces_session(self, redis_store, sample_session_id):
+        """Test that set overwrites header, turns and metadata."""
+        turn = ConversationTurn(role="user", content="old", timestamp=1)
+        await redis_store.append_turns(sample_session_id, [turn], max_turns=10, ttl=3600)
+        
+        session = SessionData(
+            session_id=sample_session_id,
+            created_at=5,
+            last_activity=6,
+            metadata={"summary": "x"}
+        )
+        await redis_store.set(sample_session_id, session, ttl=3600)
+        
+        retrieved = await redis_store.get(sample_session_id)
+        assert retrieved.conversation_history == []
+        assert retrieved.created_at == 5
+        assert retrieved.metadata == {"summary": "x"}
+    
+    async def test_legacy_json_session(self, redis_store, sample_session_id):
+        """Test that JSON sessions from older versions are read and migrated on append."""
+        legacy = SessionData(
+            session_id=sample_session_id,
+            created_at=1,
+            last_activity=1,
+            conversation_history=[ConversationTurn(role="user", content="old", timestamp=1)]
+        )
+        await redis_store.redis.set(f"session:{sample_session_id}", legacy.model_dump_json(), ex=3600)
+        
+        retrieved = await redis_store.get(sample_session_id)
+        assert retrieved.conversation_history[0].content == "old"
+        
+        turn = ConversationTurn(role="user", content="new", timestamp=2)
+        result = await redis_store.append_turns(sample_session_id, [turn], max_turns=10, ttl=3600)
+        
+        assert result.history_length == 2
+        migrated = await redis_store.get(sample_session_id)
+        assert [t.content for t in migrated.conversation_history] == ["old", "new"]
+        assert migrated.created_at == 1
+    
+    async def test_delete_removes_turns(self, redis_store, sample_session_id):
+        """Test that delete removes both the header and the turn list."""
+        turn = ConversationTurn(role="user", content="x", timestamp=1)
+        await redis_store.append_turns(sample_session_id, [turn], max_turns=10, ttl=3600)
+        
+        assert await redis_store.delete(sample_session_id) is True
+        assert await redis_store.get(sample_session_id) is None
+        assert await redis_store.redis.exists(f"session:{sample_session_id}:turns") == 0
+
+
+def _session(session_id: str, content: str = "") -> SessionData:
+    """Build a session with one turn of the given content."""
+    now = int(time.time())
+    history = [ConversationTurn(role="user", content=content, timestamp=now)] if content else []
+    return SessionData(session_id=session_id, created_at=now, last_activity=now, conversation_history=history)
+
+
+@pytest.mark.asyncio
+class TestMemorySessionStoreLimits:
+    """Tests for expiry and eviction in MemorySessionStore."""
+    
+    async def test_lru_eviction_by_count(self):
+        """Test that the least recently used session is evicted first."""
+        from app.storage.memory_store import MemorySessionStore
+        store = MemorySessionStore(max_sessions=2)
+        
+        await store.set("a", _session("a"), ttl=3600)
+        await store.set("b", _session("b"), ttl=3600)
+        await store.get("a")  # "b" is now least recently used
+        await store.set("c", _session("c"), ttl=3600)
+        
+        assert await store.get("a") is not None
+        assert await store.get("b") is None
+        assert await store.get("c") is not None
+        assert store.stats()["evictions"] == 1
+        await store.close()
+    
+    async def test_eviction_by_bytes(self):
+        """Test that resident size stays within max_bytes."""
+        from app.storage.memory_store import MemorySessionStore
+        store = MemorySessionStore(max_bytes=5000)
+        
+        for i in range(10):
+            await store.set(str(i), _session(str(i), "x" * 1000), ttl=3600)
+        
+        stats = store.stats()
+        assert stats["resident_bytes"] <= 5000
+        assert stats["sessions"] < 10
+        assert await store.get("9") is not None
+        await store.close()
+    
+    async def test_expired_sessions_are_purged(self):
+        """Test that expired sessions are removed without a full scan."""
+        from app.storage.memory_store import MemorySessionStore
+        store = MemorySessionStore()
+        
+        await store.set("old", _session("old", "hi"), ttl=-1)
+        await store.set("new", _session("new", "hi"), ttl=3600)
+        
+        stats = store.stats()
+        assert stats["sessions"] == 1
+        assert stats["expirations"] == 1
+        assert await store.get("old") is None
+        await store.close()
+    
+    async def test_ttl_refresh_keeps_session(self):
+        """Test that stale heap entries do not expire a refreshed session."""
+        from app.storage.memory_store import MemorySessionStore
+        store = MemorySessionStore()
+        
+        await store.set("s", _session("s"), ttl=3600)
+        await store.update_ttl("s", 7200)
+        assert store._purge_expired(time.time() + 3601) == 0
+        assert await store.get("s") is not None
+        await store.close()
+    
+    async def test_hit_and_resident_size_stats(self, session_store):
+        """Test hit counters and size accounting."""
+        await session_store.set("s", _session("s", "hello"), ttl=3600)
+        await session_store.get("s")
+        await session_store.get("missing")
+        await session_store.delete("s")
+        
+        stats = session_store.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["resident_bytes"] == 0
+
+
+@pytest.mark.asyncio
+class TestSessionStoreBatch:
+    """Tests for the batch API on both backends."""
+    
+    @pytest.fixture(params=["memory", "redis"])
+    def store(self, request, session_store):
+        if request.param == "memory":
+            return session_store
+        return request.getfixturevalue("redis_store")
+    
+    async def test_set_many_and_get_many(self, store):
+        """Test storing and loading several sessions at once."""
+        await store.set_many({"a": _session("a", "x"), "b": _session("b", "y")}, ttl=3600)
+        
+        results = await store.get_many(["a", "b", "missing"])
+        
+        assert results["a"].conversation_history[0].content == "x"
+        assert results["b"].conversation_history[0].content == "y"
+        assert results["missing"] is None
+    
+    async def test_delete_many(self, store):
+        """Test deleting several sessions at once."""
+        await store.set_many({"a": _session("a"), "b": _session("b")}, ttl=3600)
+        
+        await store.delete_many(["a", "b"])
+        
+        assert await store.get_many(["a", "b"]) == {"a": None, "b": None}
+
+
+@pytest.fixture
+def shm_session_store(tmp_path):
+    """Shared-memory session store on a temporary file."""
+    from app.storage.shm_store import SharedMemorySessionStore
+    
+    store = SharedMemorySessionStore(str(tmp_path / "sessions"), max_bytes=64 * 1024, slot_bytes=8 * 1024)
+    yield store
+    asyncio.run(store.close())
+
+
+@pytest.mark.asyncio
+class TestCompactHistory:
+    """Tests for atomic history compaction on every backend."""
+    
+    @pytest.fixture(params=["memory", "redis", "shared_memory"])
+    def store(self, request, session_store):
+        if request.param == "memory":
+            return session_store
+        if request.param == "redis":
+            return request.getfixturevalue("redis_store")
+        return request.getfixturevalue("shm_session_store")
+    
+    @staticmethod
+    def _turns(*contents):
+        return [ConversationTurn(role="user", content=content, timestamp=1) for content in contents]
+    
+    async def test_drops_folded_turns_and_keeps_ttl(self, store):
+        """Test that folded turns go, metadata is replaced and the TTL stays."""
+        await store.append_turns("s", self._turns("a", "b", "c", "d"), max_turns=0, ttl=3600)
+        session = await store.get("s")
+        
+        assert await store.compact_history("s", session.conversation_history[:3], {"summary": "abc"}) is True
+        
+        compacted = await store.get("s")
+        assert [turn.content for turn in compacted.conversation_history] == ["d"]
+        assert compacted.metadata == {"summary": "abc"}
+        assert await store.get_ttl("s") > 3500
+    
+    async def test_turns_appended_after_read_are_kept(self, store):
+        """Test that a concurrent append between read and compaction is not lost."""
+        await store.append_turns("s", self._turns("a", "b", "c"), max_turns=0, ttl=3600)
+        folded = (await store.get("s")).conversation_history[:2]
+        await store.append_turns("s", self._turns("new"), max_turns=0, ttl=3600)
+        
+        assert await store.compact_history("s", folded, {"summary": "ab"}) is True
+        
+        compacted = await store.get("s")
+        assert [turn.content for turn in compacted.conversation_history] == ["c", "new"]
+    
+    async def test_changed_history_is_left_alone(self, store):
+        """Test that compaction is refused once the folded turns are no longer the oldest."""
+        await store.append_turns("s", self._turns("a", "b", "c"), max_turns=3, ttl=3600)
+        folded = (await store.get("s")).conversation_history[:2]
+        # The turn cap drops "a", shifting the history
+        await store.append_turns("s", self._turns("d"), max_turns=3, ttl=3600)
+        
+        assert await store.compact_history("s", folded, {"summary": "ab"}) is False
+        
+        session = await store.get("s")
+        assert [turn.content for turn in session.conversation_history] == ["b", "c", "d"]
+        assert session.metadata == {}
+    
+    async def test_missing_session(self, store):
+        """Test compacting a session that does not exist."""
+        assert await store.compact_history("missing", self._turns("a"), {}) is False
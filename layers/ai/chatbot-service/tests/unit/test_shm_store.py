@@ -0,0 +1,202 @@
+"""Tests for the shared-memory session store."""
+
+import asyncio
+import multiprocessing
+import os
+import pytest
+import time
+from app.models.internal import SessionData, ConversationTurn
+from app.storage.shm_store import SharedMemorySessionStore, _SEQ, _HEADER_SIZE
+
+
+def make_session(session_id: str, turns: int = 0) -> SessionData:
+    now = int(time.time())
+    return SessionData(
+        session_id=session_id,
+        created_at=now,
+        last_activity=now,
+        conversation_history=[
+            ConversationTurn(role="user", content=f"message {i}", timestamp=now)
+            for i in range(turns)
+        ]
+    )
+
+
+def append_many(path: str, session_id: str, count: int) -> None:
+    """Worker process appending one turn at a time to a shared session."""
+    store = SharedMemorySessionStore(path, max_bytes=64 * 1024, slot_bytes=8 * 1024, ways=2)
+    
+    async def run():
+        for i in range(count):
+            turn = ConversationTurn(role="user", content=f"{os.getpid()}-{i}", timestamp=0)
+            await store.append_turns(session_id, [turn], max_turns=0, ttl=60)
+        await store.close()
+    
+    asyncio.run(run())
+
+
+@pytest.fixture
+def shm_path(tmp_path):
+    return str(tmp_path / "sessions")
+
+
+@pytest.fixture
+def shm_store(shm_path):
+    store = SharedMemorySessionStore(shm_path, max_bytes=64 * 1024, slot_bytes=8 * 1024, ways=2)
+    yield store
+    asyncio.run(store.close())
+
+
+@pytest.mark.asyncio
+class TestSharedMemorySessionStore:
+    """Tests for SharedMemorySessionStore."""
+    
+    async def test_set_and_get_session(self, shm_store):
+        """Test round trip of a session with history."""
+        await shm_store.set("s1", make_session("s1", turns=3), ttl=60)
+        
+        retrieved = await shm_store.get("s1")
+        assert retrieved.session_id == "s1"
+        assert [turn.content for turn in retrieved.conversation_history] == ["message 0", "message 1", "message 2"]
+        
+        limited = await shm_store.get("s1", max_turns=2)
+        assert [turn.content for turn in limited.conversation_history] == ["message 1", "message 2"]
+    
+    async def test_get_nonexistent_session(self, shm_store):
+        """Test getting non-existent session."""
+        assert await shm_store.get("missing") is None
+        assert await shm_store.get_ttl("missing") is None
+    
+    async def test_expired_session_is_not_returned(self, shm_store):
+        """Test that a session past its TTL is ignored."""
+        await shm_store.set("s1", make_session("s1"), ttl=-1)
+        
+        assert await shm_store.get("s1") is None
+        assert shm_store.stats()["sessions"] == 0
+    
+    async def test_delete_session(self, shm_store):
+        """Test deleting session."""
+        await shm_store.set("s1", make_session("s1"), ttl=60)
+        
+        assert await shm_store.delete("s1") is True
+        assert await shm_store.get("s1") is None
+        assert await shm_store.delete("s1") is False
+    
+    async def test_update_and_get_ttl(self, shm_store):
+        """Test resetting a session's TTL."""
+        await shm_store.set("s1", make_session("s1", turns=1), ttl=100)
+        
+        assert await shm_store.update_ttl("s1", 200) is True
+        assert 190 < await shm_store.get_ttl("s1") <= 200
+        assert len((await shm_store.get("s1")).conversation_history) == 1
+        assert await shm_store.update_ttl("missing", 200) is False
+    
+    async def test_append_turns_trims_history(self, shm_store):
+        """Test appending turns keeps only the newest max_turns."""
+        for i in range(5):
+            turn = ConversationTurn(role="user", content=f"turn {i}", timestamp=0)
+            result = await shm_store.append_turns("s1", [turn], max_turns=3, ttl=60)
+        
+        assert result.history_length == 3
+        session = await shm_store.get("s1")
+        assert [turn.content for turn in session.conversation_history] == ["turn 2", "turn 3", "turn 4"]
+    
+    async def test_sessions_shared_between_instances(self, shm_store, shm_path):
+        """Test that a second store on the same file sees the same sessions."""
+        other = SharedMemorySessionStore(shm_path, max_bytes=64 * 1024, slot_bytes=8 * 1024, ways=2)
+        try:
+            await shm_store.set("s1", make_session("s1", turns=1), ttl=60)
+            assert (await other.get("s1")).conversation_history[0].content == "message 0"
+            
+            await other.delete("s1")
+            assert await shm_store.get("s1") is None
+        finally:
+            await other.close()
+    
+    async def test_appends_from_several_processes_are_not_lost(self, shm_store, shm_path):
+        """Test that concurrent appends from separate processes are atomic."""
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=append_many, args=(shm_path, "shared", 50)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=30)
+        
+        session = await shm_store.get("shared")
+        assert len(session.conversation_history) == 150
+    
+    async def test_full_bucket_evicts_nearest_expiry(self, shm_path):
+        """Test that a full bucket reuses the slot that expires first."""
+        store = SharedMemorySessionStore(shm_path, max_bytes=16 * 1024, slot_bytes=8 * 1024, ways=2)
+        try:
+            await store.set("a", make_session("a"), ttl=10)
+            await store.set("b", make_session("b"), ttl=100)
+            await store.set("c", make_session("c"), ttl=100)
+            
+            assert await store.get("a") is None
+            assert await store.get("b") is not None
+            assert await store.get("c") is not None
+            assert store.stats()["evictions"] == 1
+        finally:
+            await store.close()
+    
+    async def test_oversized_session_drops_oldest_turns(self, shm_store):
+        """Test that a session larger than a slot keeps its newest turns."""
+        session = make_session("s1")
+        session.conversation_history = [
+            ConversationTurn(role="user", content=f"{i} " + os.urandom(500).hex(), timestamp=0)
+            for i in range(20)
+        ]
+        
+        await shm_store.set("s1", session, ttl=60)
+        
+        kept = (await shm_store.get("s1")).conversation_history
+        assert 0 < len(kept) < 20
+        assert kept[-1].content.startswith("19 ")
+        assert shm_store.stats()["truncations"] == 1
+    
+    async def test_interrupted_write_is_recovered(self, shm_store):
+        """Test that a slot left mid-write by a dead worker is cleared."""
+        await shm_store.set("s1", make_session("s1"), ttl=60)
+        for slot in range(shm_store.slot_count):
+            offset = _HEADER_SIZE + slot * shm_store.slot_bytes
+            seq = _SEQ.unpack_from(shm_store._mm, offset)[0]
+            if seq:
+                _SEQ.pack_into(shm_store._mm, offset, seq + 1)
+        
+        assert await shm_store.get("s1") is None
+        assert shm_store.stats()["read_retries"] > 0
+        
+        await shm_store.set("s1", make_session("s1"), ttl=60)
+        assert await shm_store.get("s1") is not None
+    
+    async def test_layout_change_replaces_file(self, shm_store, shm_path):
+        """Test that a store with a different layout starts from a fresh file."""
+        await shm_store.set("s1", make_session("s1"), ttl=60)
+        
+        resized = SharedMemorySessionStore(shm_path, max_bytes=32 * 1024, slot_bytes=8 * 1024, ways=2)
+        try:
+            assert await resized.get("s1") is None
+            assert os.path.getsize(shm_path) == _HEADER_SIZE + 4 * 8 * 1024
+            # The old mapping keeps working for workers that still hold it
+            assert await shm_store.get("s1") is not None
+        finally:
+            await resized.close()
+    
+    async def test_stats(self, shm_store):
+        """Test store statistics."""
+        await shm_store.set("s1", make_session("s1"), ttl=60)
+        await shm_store.get("s1")
+        await shm_store.get("missing")
+        
+        stats = shm_store.stats()
+        assert stats["backend"] == "shared_memory"
+        assert stats["sessions"] == 1
+        assert stats["slots"] == 8
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+    
+    async def test_budget_too_small(self, shm_path):
+        """Test that a budget below one bucket is rejected."""
+        with pytest.raises(ValueError):
+            SharedMemorySessionStore(shm_path, max_bytes=1024, slot_bytes=8 * 1024, ways=2)
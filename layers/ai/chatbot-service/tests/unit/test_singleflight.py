@@ -0,0 +1,178 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+import pytest
+import pytest_asyncio
+
+from app.agents.singleflight import SingleFlight, RedisSingleFlight
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+    
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test that identical concurrent calls run once."""
+        flight = SingleFlight()
+        calls = 0
+        
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"answer": 42}
+        
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(10)))
+        
+        assert calls == 1
+        assert all(r == {"answer": 42} for r in results)
+        stats = flight.stats()
+        assert stats["leaders"] == 1
+        assert stats["coalesced"] == 9
+        assert stats["in_flight"] == 0
+    
+    async def test_different_keys_run_separately(self):
+        """Test that distinct keys are not coalesced."""
+        flight = SingleFlight()
+        
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+        
+        results = await asyncio.gather(flight.do("a", lambda: work(1)), flight.do("b", lambda: work(2)))
+        
+        assert results == [1, 2]
+        assert flight.stats()["coalesced"] == 0
+    
+    async def test_errors_propagate_to_all_callers(self):
+        """Test that a failed call fails every waiter, then resets."""
+        flight = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+        
+        results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        
+        async def ok():
+            return "ok"
+        
+        assert await flight.do("k", ok) == "ok"
+    
+    async def test_cancelled_caller_does_not_cancel_shared_call(self):
+        """Test that followers still get a result if the leader is cancelled."""
+        flight = SingleFlight()
+        
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+        
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        
+        assert await follower == "done"
+
+
+@pytest_asyncio.fixture
+async def redis_store():
+    """Redis session store backed by fakeredis, shared by the "workers" of a test."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSessionStore
+    
+    store = RedisSessionStore("redis://localhost:6379/0")
+    store.redis = fakeredis.FakeAsyncRedis()
+    yield store
+    await store.close()
+
+
+class BrokenStore:
+    """Store whose Redis connection always fails."""
+    
+    async def get_client(self):
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.asyncio
+class TestRedisSingleFlight:
+    """Tests for RedisSingleFlight coalescing across workers."""
+    
+    async def test_follower_shares_leader_result(self, redis_store):
+        """Test that a second worker waits for the first worker's result."""
+        worker_a = RedisSingleFlight(redis_store, poll_interval=0.005)
+        worker_b = RedisSingleFlight(redis_store, poll_interval=0.005)
+        calls = []
+        
+        async def work(name):
+            calls.append(name)
+            await asyncio.sleep(0.05)
+            return {"answer": name}
+        
+        leader = asyncio.create_task(worker_a.do("k", lambda: work("a")))
+        await asyncio.sleep(0.01)
+        follower = await worker_b.do("k", lambda: work("b"))
+        
+        assert await leader == {"answer": "a"}
+        assert follower == {"answer": "a"}
+        assert calls == ["a"]
+        assert worker_a.stats()["remote_leaders"] == 1
+        assert worker_b.stats()["remote_coalesced"] == 1
+        # Lock is released once the result is published
+        assert not await redis_store.redis.exists(RedisSingleFlight.LOCK_PREFIX + "k")
+    
+    async def test_failed_leader_lets_follower_call_itself(self, redis_store):
+        """Test that a follower falls back when the leader fails without a result."""
+        worker_a = RedisSingleFlight(redis_store, poll_interval=0.005)
+        worker_b = RedisSingleFlight(redis_store, poll_interval=0.005)
+        
+        async def fail():
+            await asyncio.sleep(0.03)
+            raise ValueError("boom")
+        
+        async def work():
+            return "fallback"
+        
+        leader = asyncio.create_task(worker_a.do("k", fail))
+        await asyncio.sleep(0.01)
+        follower = await worker_b.do("k", work)
+        
+        with pytest.raises(ValueError):
+            await leader
+        assert follower == "fallback"
+        assert worker_b.stats()["remote_fallbacks"] == 1
+        assert worker_b.stats()["remote_coalesced"] == 0
+    
+    async def test_expired_lock_of_dead_leader(self, redis_store):
+        """Test that a lock left by a dead worker stops blocking once it expires."""
+        await redis_store.redis.set(RedisSingleFlight.LOCK_PREFIX + "k", "dead-worker", px=50)
+        flight = RedisSingleFlight(redis_store, wait_timeout=5, poll_interval=0.005)
+        
+        async def work():
+            return "fresh"
+        
+        assert await flight.do("k", work) == "fresh"
+        assert flight.stats()["remote_fallbacks"] == 1
+    
+    async def test_wait_timeout_falls_back(self, redis_store):
+        """Test that a follower gives up waiting after wait_timeout."""
+        await redis_store.redis.set(RedisSingleFlight.LOCK_PREFIX + "k", "slow-worker", px=10000)
+        flight = RedisSingleFlight(redis_store, wait_timeout=0.05, poll_interval=0.005)
+        
+        async def work():
+            return "own"
+        
+        assert await flight.do("k", work) == "own"
+        assert flight.stats()["remote_fallbacks"] == 1
+    
+    async def test_redis_failure_falls_back_to_local_call(self):
+        """Test that a Redis error runs the call locally."""
+        flight = RedisSingleFlight(BrokenStore())
+        
+        async def work():
+            return "local"
+        
+        assert await flight.do("k", work) == "local"
+        assert flight.stats()["remote_fallbacks"] == 1
@@ -0,0 +1,51 @@
+"""Tests for streaming helpers."""
+
+import json
+import pytest
+
+from app.services.streaming import ExplanationStreamer, format_sse
+
+
+class TestExplanationStreamer:
+    """Tests for incremental explanation decoding."""
+    
+    DOCUMENT = json.dumps({
+        "data": {
+            "coins": ["BTC"],
+            "timeframe": "1d",
+            "explanation": "Bitcoin is \"up\" 5%\nETH é \U0001F680 \\ done"
+        },
+        "suggested_next_prompts": ["a", "b", "c"]
+    })
+    
+    def _stream(self, chunk_size: int) -> str:
+        streamer = ExplanationStreamer()
+        out = []
+        for i in range(0, len(self.DOCUMENT), chunk_size):
+            out.append(streamer.feed(self.DOCUMENT[i:i + chunk_size]))
+        assert streamer.done
+        return "".join(out)
+    
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+    def test_decodes_across_chunk_boundaries(self, chunk_size):
+        """Test that output is identical regardless of chunking."""
+        expected = json.loads(self.DOCUMENT)["data"]["explanation"]
+        assert self._stream(chunk_size) == expected
+    
+    def test_ignores_text_after_explanation(self):
+        """Test that nothing is emitted once the string is closed."""
+        streamer = ExplanationStreamer()
+        assert streamer.feed('{"data": {"explanation": "hi"') == "hi"
+        assert streamer.feed(', "coins": ["explanation"]}}') == ""
+    
+    def test_no_explanation_yet(self):
+        """Test that nothing is emitted before the key appears."""
+        streamer = ExplanationStreamer()
+        assert streamer.feed('{"data": {"coins": ["BTC"], "expla') == ""
+        assert streamer.feed('nation": "ok"') == "ok"
+
+
+def test_format_sse():
+    """Test SSE frame encoding."""
+    assert format_sse("delta", {"text": "hi"}) == 'event: delta\ndata: {"text": "hi"}\n\n'
+    assert format_sse("done", '{"a":1}') == 'event: done\ndata: {"a":1}\n\n'
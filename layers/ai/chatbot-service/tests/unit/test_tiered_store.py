@@ -0,0 +1,208 @@
+"""Tests for the tiered (near cache + shared backend) session store."""
+
+import asyncio
+import time
+import pytest
+import pytest_asyncio
+
+from app.models.internal import SessionData, ConversationTurn
+from app.storage.memory_store import MemorySessionStore
+from app.storage.tiered_store import TieredSessionStore
+
+
+def _turn(content: str) -> ConversationTurn:
+    return ConversationTurn(role="user", content=content, timestamp=int(time.time()))
+
+
+class CountingStore(MemorySessionStore):
+    """Memory store that counts backend reads."""
+    
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+    
+    async def get(self, session_id, max_turns=None):
+        self.reads += 1
+        return await super().get(session_id, max_turns=max_turns)
+
+
+
+class SlowReadStore(CountingStore):
+    """Memory store whose reads wait until released."""
+    
+    def __init__(self):
+        super().__init__()
+        self.reading = asyncio.Event()
+        self.release = asyncio.Event()
+    
+    async def get(self, session_id, max_turns=None):
+        # Snapshot, as a network read would return
+        session = (await super().get(session_id, max_turns=max_turns)).model_copy(deep=True)
+        self.reading.set()
+        await self.release.wait()
+        return session
+
+
+@pytest.mark.asyncio
+class TestTieredSessionStore:
+    """Tests for near-cache behaviour."""
+    
+    async def test_hot_reads_skip_backend(self):
+        """Test that repeated reads are served locally."""
+        backend = CountingStore()
+        store = TieredSessionStore(backend)
+        await store.append_turns("s", [_turn("hi")], max_turns=10, ttl=3600)
+        
+        for _ in range(5):
+            session = await store.get("s")
+        
+        assert session.conversation_history[0].content == "hi"
+        assert backend.reads == 1
+        assert store.stats()["near_cache"]["hits"] == 4
+        await store.close()
+    
+    async def test_append_updates_local_copy(self):
+        """Test that appends are applied to the cached session."""
+        backend = CountingStore()
+        store = TieredSessionStore(backend)
+        await store.append_turns("s", [_turn("a")], max_turns=2, ttl=3600)
+        await store.get("s")
+        
+        await store.append_turns("s", [_turn("b"), _turn("c")], max_turns=2, ttl=3600)
+        session = await store.get("s")
+        
+        assert [t.content for t in session.conversation_history] == ["b", "c"]
+        assert backend.reads == 1
+        await store.close()
+    
+    async def test_returned_sessions_are_copies(self):
+        """Test that callers cannot mutate the cached session."""
+        store = TieredSessionStore(MemorySessionStore())
+        await store.append_turns("s", [_turn("a")], max_turns=10, ttl=3600)
+        
+        session = await store.get("s")
+        session.conversation_history.append(_turn("local only"))
+        
+        assert len((await store.get("s")).conversation_history) == 1
+        await store.close()
+    
+    async def test_partial_read_does_not_serve_full_history(self):
+        """Test that a max_turns read is not reused for a larger read."""
+        backend = CountingStore()
+        store = TieredSessionStore(backend)
+        await store.append_turns("s", [_turn(str(i)) for i in range(6)], max_turns=0, ttl=3600)
+        
+        assert len((await store.get("s", max_turns=2)).conversation_history) == 2
+        assert len((await store.get("s", max_turns=1)).conversation_history) == 1
+        assert len((await store.get("s")).conversation_history) == 6
+        assert backend.reads == 2
+        await store.close()
+    
+    async def test_write_to_other_session_does_not_cancel_fill(self):
+        """Test that a read racing a write to another session is still cached."""
+        backend = SlowReadStore()
+        store = TieredSessionStore(backend)
+        await backend.append_turns("a", [_turn("a")], max_turns=10, ttl=3600)
+        
+        read = asyncio.create_task(store.get("a"))
+        await backend.reading.wait()
+        await store.append_turns("b", [_turn("b")], max_turns=10, ttl=3600)
+        backend.release.set()
+        await read
+        
+        await store.get("a")
+        assert backend.reads == 1
+        assert store._fills == {}
+        await store.close()
+    
+    async def test_write_to_same_session_cancels_fill(self):
+        """Test that a read racing a write to its own session is not cached."""
+        backend = SlowReadStore()
+        store = TieredSessionStore(backend)
+        await backend.append_turns("a", [_turn("a")], max_turns=10, ttl=3600)
+        
+        read = asyncio.create_task(store.get("a"))
+        await backend.reading.wait()
+        await store.append_turns("a", [_turn("b")], max_turns=10, ttl=3600)
+        backend.release.set()
+        assert len((await read).conversation_history) == 1
+        
+        session = await store.get("a")
+        assert [t.content for t in session.conversation_history] == ["a", "b"]
+        assert backend.reads == 2
+        await store.close()
+
+
+@pytest_asyncio.fixture
+async def redis_pair():
+    """Two tiered stores (two workers) sharing one fake Redis server."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSessionStore
+    
+    server = fakeredis.FakeServer()
+    stores = []
+    for _ in range(2):
+        backend = RedisSessionStore("redis://localhost:6379/0")
+        backend.redis = fakeredis.FakeAsyncRedis(server=server)
+        stores.append(TieredSessionStore(backend))
+    yield stores
+    for store in stores:
+        await store.close()
+
+
+async def _wait_for(predicate, timeout: float = 1.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+@pytest.mark.asyncio
+class TestTieredInvalidation:
+    """Tests for cross-worker invalidation over Redis pub/sub."""
+    
+    async def test_write_on_one_worker_invalidates_other(self, redis_pair):
+        """Test that a write elsewhere drops the local copy."""
+        worker_a, worker_b = redis_pair
+        await worker_a.append_turns("s", [_turn("a")], max_turns=10, ttl=3600)
+        await worker_b.get("s")
+        assert await _wait_for(lambda: worker_a._subscribed and worker_b._subscribed)
+        await worker_b.get("s")
+        assert worker_b.stats()["near_cache"]["hits"] >= 1
+        
+        await worker_a.append_turns("s", [_turn("b")], max_turns=10, ttl=3600)
+        assert await _wait_for(lambda: worker_b.invalidations_received == 1)
+        
+        session = await worker_b.get("s")
+        assert [t.content for t in session.conversation_history] == ["a", "b"]
+    
+    async def test_compaction_invalidates_other_worker(self, redis_pair):
+        """Test that compacting on one worker drops the other worker's copy."""
+        worker_a, worker_b = redis_pair
+        await worker_a.append_turns("s", [_turn("a"), _turn("b")], max_turns=10, ttl=3600)
+        await worker_b.get("s")
+        assert await _wait_for(lambda: worker_a._subscribed and worker_b._subscribed)
+        await worker_b.get("s")
+        
+        folded = (await worker_a.get("s")).conversation_history[:1]
+        assert await worker_a.compact_history("s", folded, {"summary": "a"}) is True
+        assert await _wait_for(lambda: worker_b.invalidations_received == 1)
+        
+        session = await worker_b.get("s")
+        assert [t.content for t in session.conversation_history] == ["b"]
+        assert session.metadata == {"summary": "a"}
+    
+    async def test_cache_bypassed_until_subscribed(self, redis_pair):
+        """Test that nothing is cached before the invalidation channel is live."""
+        worker_a, _ = redis_pair
+        await worker_a.backend.set(
+            "s", SessionData(session_id="s", created_at=1, last_activity=1), ttl=3600
+        )
+        
+        worker_a._start_listener()
+        assert worker_a._subscribed is False
+        await worker_a.get("s")
+        
+        assert worker_a.stats()["near_cache"]["entries"] == 0
@@ -0,0 +1,181 @@
+"""Tests for distributed tracing."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.core.tracing import (
+    CLIENT,
+    JsonlSpanExporter,
+    SpanContext,
+    begin_span,
+    configure_tracing,
+    current_span,
+    format_traceparent,
+    inject,
+    parse_traceparent,
+    shutdown_tracing,
+    start_span,
+    use_span,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+SPAN_ID = "00f067aa0ba902b7"
+
+
+def read_spans(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def spans_path(tmp_path):
+    """Enable tracing into a temporary file for one test."""
+    path = tmp_path / "spans.jsonl"
+    configure_tracing("test-service", str(path))
+    yield path
+    shutdown_tracing()
+
+
+class TestTraceparent:
+    """Tests for W3C traceparent parsing."""
+    
+    def test_round_trip(self):
+        """Test that a header parses and formats back unchanged."""
+        header = f"00-{TRACE_ID}-{SPAN_ID}-01"
+        
+        context = parse_traceparent(header)
+        
+        assert context == SpanContext(TRACE_ID, SPAN_ID, True)
+        assert format_traceparent(context) == header
+    
+    def test_unsampled_flag(self):
+        """Test that the sampled flag is read from the trace flags."""
+        assert parse_traceparent(f"00-{TRACE_ID}-{SPAN_ID}-00").sampled is False
+    
+    @pytest.mark.parametrize("header", [
+        None,
+        "",
+        "garbage",
+        f"ff-{TRACE_ID}-{SPAN_ID}-01",
+        f"00-{'0' * 32}-{SPAN_ID}-01",
+        f"00-{TRACE_ID}-{'0' * 16}-01",
+        f"00-{TRACE_ID[:-1]}-{SPAN_ID}-01",
+    ])
+    def test_invalid_headers_ignored(self, header):
+        """Test that malformed or invalid headers start a new trace."""
+        assert parse_traceparent(header) is None
+
+
+class TestSpans:
+    """Tests for span creation and export."""
+    
+    def test_disabled_tracing_is_noop(self):
+        """Test that spans do nothing while tracing is not configured."""
+        with start_span("work") as span:
+            span.set_attribute("key", "value")
+            assert current_span() is None
+        
+        assert inject({}) == {}
+    
+    def test_children_share_trace_and_nest(self, spans_path):
+        """Test that nested spans form one trace and are exported on end."""
+        with start_span("parent") as parent:
+            with start_span("child", CLIENT, {"db.system": "redis"}) as child:
+                headers = inject({})
+        shutdown_tracing()
+        
+        spans = {span["name"]: span for span in read_spans(spans_path)}
+        assert set(spans) == {"parent", "child"}
+        assert spans["child"]["trace_id"] == spans["parent"]["trace_id"]
+        assert spans["child"]["parent_span_id"] == spans["parent"]["span_id"]
+        assert spans["parent"]["parent_span_id"] is None
+        assert spans["child"]["kind"] == "client"
+        assert spans["child"]["attributes"] == {"db.system": "redis"}
+        assert spans["child"]["service"] == "test-service"
+        assert headers["traceparent"] == format_traceparent(child.context)
+        assert current_span() is None
+    
+    def test_remote_parent_continues_trace(self, spans_path):
+        """Test that a span with a remote parent joins the caller's trace."""
+        with start_span("handler", parent=SpanContext(TRACE_ID, SPAN_ID, True)):
+            pass
+        shutdown_tracing()
+        
+        [span] = read_spans(spans_path)
+        assert span["trace_id"] == TRACE_ID
+        assert span["parent_span_id"] == SPAN_ID
+    
+    def test_unsampled_trace_propagates_but_is_not_exported(self, spans_path):
+        """Test that the caller's sampling decision is honoured."""
+        with start_span("handler", parent=SpanContext(TRACE_ID, SPAN_ID, False)):
+            headers = inject({})
+        shutdown_tracing()
+        
+        assert headers["traceparent"].endswith("-00")
+        assert read_spans(spans_path) == []
+    
+    def test_exception_recorded(self, spans_path):
+        """Test that an exception leaving the block marks the span as failed."""
+        with pytest.raises(ValueError):
+            with start_span("work"):
+                raise ValueError("bad input")
+        shutdown_tracing()
+        
+        [span] = read_spans(spans_path)
+        assert span["status"] == "error"
+        assert span["attributes"]["error.type"] == "ValueError"
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_tasks_keep_separate_parents(self, spans_path):
+        """Test that the current span is isolated per task."""
+        async def handle(name):
+            with start_span(name):
+                await asyncio.sleep(0)
+                with start_span(f"{name}.child"):
+                    await asyncio.sleep(0)
+        
+        await asyncio.gather(handle("a"), handle("b"))
+        shutdown_tracing()
+        
+        spans = {span["name"]: span for span in read_spans(spans_path)}
+        assert spans["a.child"]["parent_span_id"] == spans["a"]["span_id"]
+        assert spans["b.child"]["parent_span_id"] == spans["b"]["span_id"]
+        assert spans["a"]["trace_id"] != spans["b"]["trace_id"]
+    
+    def test_detached_span_used_for_children(self, spans_path):
+        """Test that a detached span parents blocks it is activated for."""
+        span = begin_span("stream")
+        assert current_span() is None
+        with use_span(span):
+            with start_span("open"):
+                pass
+        span.end()
+        span.end()
+        shutdown_tracing()
+        
+        spans = read_spans(spans_path)
+        assert [s["name"] for s in spans] == ["open", "stream"]
+        assert spans[0]["parent_span_id"] == spans[1]["span_id"]
+
+
+class TestExporter:
+    """Tests for the JSONL exporter."""
+    
+    def test_batches_until_flush(self, tmp_path):
+        """Test that spans are buffered and written on flush."""
+        path = tmp_path / "nested" / "spans.jsonl"
+        exporter = JsonlSpanExporter(str(path), batch_size=3, flush_interval=60)
+        
+        exporter.export({"name": "a"})
+        exporter.export({"name": "b"})
+        assert path.read_text() == ""
+        
+        exporter.export({"name": "c"})
+        exporter.export({"name": "d"})
+        assert [span["name"] for span in read_spans(path)] == ["a", "b", "c"]
+        
+        exporter.close()
+        assert [span["name"] for span in read_spans(path)] == ["a", "b", "c", "d"]
+        assert exporter.stats()["exported"] == 4
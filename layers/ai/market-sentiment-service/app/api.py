@@ -5,6 +5,7 @@ import logging
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, status
 from app.schemas import SentimentRequest, SentimentResponse
+from app.responses import fast_json
 from services.langsearch_client import LangSearchClient
 from services.sentiment_engine import SentimentEngine
 from services.gemini_client import GeminiClient
@@ -27,7 +28,7 @@ async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
     Analyze market sentiment for a given cryptocurrency token.
     """
     try:
-        logger.info(f"Analyzing sentiment for {request.token} over {request.timeframe}")
+        logger.info("Analyzing sentiment for %s over %s", request.token, request.timeframe)
         
         # Get current date for caching check
         current_date = datetime.now().date()
@@ -41,8 +42,9 @@ async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
         )
         
         if cached_sentiment:
-            logger.info("Returning cached sentiment result (no LLM call)")
-            return SentimentResponse(**cached_sentiment)
+            logger.info("Returning cached sentiment result (no LLM call)", extra={"event": "sentiment_cache_hit"})
+            # Cached rows are validated responses already in response shape
+            return fast_json(cached_sentiment)
         
         # Step 2: No cached sentiment - need to generate fresh analysis
         web_texts = []
@@ -56,7 +58,7 @@ async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
         
         if cached_articles:
             web_texts, web_sources = cached_articles
-            logger.info(f"Using {len(web_texts)} cached articles (no LangSearch call)")
+            logger.info("Using %d cached articles (no LangSearch call)", len(web_texts))
         else:
             # Fetch fresh data from LangSearch
             try:
@@ -67,7 +69,7 @@ async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
                 )
                 
                 if web_texts:
-                    logger.info(f"Fetched {len(web_texts)} web results from LangSearch")
+                    logger.info("Fetched %d web results from LangSearch", len(web_texts))
                     # Store articles in cache (30-day TTL)
                     articles_to_cache = [
                         {
@@ -85,26 +87,31 @@ async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
                         articles_to_cache
                     )
                 else:
-                    logger.warning(f"LangSearch returned 0 results for {request.token}")
+                    logger.warning("LangSearch returned 0 results for %s", request.token)
 
             except Exception as e:
-                logger.error(f"LangSearch API error: {str(e)}")
+                logger.error("LangSearch API error: %s", e)
                 # Don't crash here, we will handle empty web_texts below
                 
         # --- FIX: Handle Empty Results Gracefully ---
         # Instead of raising 503, return a Neutral response so the UI doesn't break
         if not web_texts:
             logger.info("No data found. Returning NEUTRAL fallback.")
-            return SentimentResponse(
+            return fast_json(SentimentResponse(
                 sentiment="neutral",
                 confidence=0.0,
                 summary=f"No recent news or data found for {request.token} in the last {request.timeframe}. Insufficient data for analysis.",
                 cited_sources=[]
-            )
+            ))
         
         # Step 3: Perform sentiment analysis
         sentiment_result = sentiment_engine.analyze(web_texts)
-        logger.info(f"Sentiment analysis: {sentiment_result}")
+        # Summary only; the result also carries every article text
+        logger.info(
+            "Sentiment analysis: %d texts, avg compound %.3f",
+            len(sentiment_result["all_texts"]),
+            sentiment_result["avg_compound_score"]
+        )
         
         # Step 4: Send to Gemini for reasoning
         try:
@@ -114,9 +121,9 @@ async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
                 sentiment_data=sentiment_result,
                 sample_texts=sentiment_result.get("all_texts", [])
             )
-            logger.info(f"Gemini summary generated: {gemini_result['sentiment']}")
+            logger.info("Gemini summary generated: %s", gemini_result["sentiment"])
         except Exception as e:
-            logger.error(f"Gemini API error: {str(e)}")
+            logger.error("Gemini API error: %s", e)
             # Fallback if Gemini fails
             gemini_result = {
                 "sentiment": sentiment_result["sentiment"],
@@ -142,16 +149,16 @@ async def analyze_sentiment(request: SentimentRequest) -> SentimentResponse:
                 cited_sources=response.cited_sources
             )
         except Exception as e:
-            logger.error(f"Failed to save sentiment to cache: {e}")
+            logger.error("Failed to save sentiment to cache: %s", e)
         # -----------------------------------------------
         
-        logger.info(f"Sentiment analysis completed: {response.sentiment}")
-        return response
+        logger.info("Sentiment analysis completed: %s", response.sentiment)
+        return fast_json(response)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in sentiment analysis: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in sentiment analysis: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during sentiment analysis"
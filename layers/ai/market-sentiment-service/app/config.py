@@ -37,6 +37,21 @@ class Settings(BaseSettings):
     gemini_temperature: float = 0.3
     gemini_max_tokens: int = 4096  # Increased for 300-500 word responses
     
+    # Response settings
+    fast_json_enabled: bool = True  # Serialize validated responses directly, skipping re-validation
+    
+    # Logging settings
+    log_async: bool = True  # Format and write log records on a background thread
+    log_queue_size: int = 10000  # Records waiting beyond this are dropped
+    log_max_message_chars: int = 2000  # Longer log messages are truncated
+    log_sample_rates: str = ""  # event=rate pairs for hot INFO events, e.g. sentiment_cache_hit=0.1
+    
+    # Tracing settings
+    tracing_enabled: bool = False  # Propagate W3C traceparent and record spans
+    tracing_service_name: str = "market-sentiment-service"
+    tracing_export_path: str = "traces/spans.jsonl"  # Sampled spans are appended here as JSONL
+    tracing_sample_rate: float = 1.0  # Fraction of new traces recorded; continued traces follow the caller
+    
     # Cache settings
     article_cache_ttl_days: int = 30
     max_queries_per_token_timeframe: int = 10
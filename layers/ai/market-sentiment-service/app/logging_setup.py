@@ -0,0 +1,170 @@
+"""
+Non-blocking logging setup.
+
+Log calls only create the record and put it on a queue; a background thread
+formats it and writes it to stdout. Messages use ``%``-style arguments, so
+formatting (including ``repr`` of any logged objects) happens on that thread
+and not at all for records below the level or sampled out.
+
+Hot-path events can be sampled by name: pass ``extra={"event": name}`` to
+the log call, or use the message template itself as the name.
+
+Vendored like ``app/tracing.py``: ``market-sentiment-service`` and
+``user-insights`` carry identical copies, as each is built and run from its
+own directory. Change both copies together.
+"""
+import atexit
+import logging
+import queue
+import random
+import sys
+import threading
+from typing import Dict, List, Optional
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_STOP = object()
+
+_handler: Optional[logging.Handler] = None
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse ``event=rate`` pairs separated by commas."""
+    rates = {}
+    for pair in value.split(","):
+        event, _, rate = pair.partition("=")
+        if event.strip() and rate.strip():
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG and INFO records for the configured events."""
+    
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.rates or record.levelno > logging.INFO:
+            return True
+        rate = self.rates.get(getattr(record, "event", record.msg))
+        return rate is None or random.random() < rate
+
+
+class CappedFormatter(logging.Formatter):
+    """Formatter truncating messages longer than ``max_chars``."""
+    
+    def __init__(self, fmt: str, max_chars: int):
+        super().__init__(fmt)
+        self.max_chars = max_chars
+    
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        if len(record.message) > self.max_chars:
+            extra = len(record.message) - self.max_chars
+            record.message = f"{record.message[:self.max_chars]}...[{extra} more chars]"
+        return super().formatMessage(record)
+
+
+class QueueWriterHandler(logging.Handler):
+    """
+    Handler that queues records and writes them from a background thread.
+    
+    Records are queued unformatted; when ``queue_size`` records are waiting,
+    new ones are dropped and counted instead of blocking the caller.
+    """
+    
+    def __init__(self, stream, queue_size: int = 10000):
+        super().__init__()
+        self.stream = stream
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._queue.qsize() >= self.queue_size:
+            self.dropped += 1
+            return
+        self._queue.put(record)
+    
+    def close(self) -> None:
+        """Write queued records and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        super().close()
+    
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            self._write([record for record in batch if record is not _STOP])
+            if stop:
+                return
+    
+    def _write(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except (OSError, ValueError):
+            pass
+
+
+def setup_logging(
+    level: int,
+    use_queue: bool = True,
+    queue_size: int = 10000,
+    max_message_chars: int = 2000,
+    sample_rates: Optional[Dict[str, float]] = None
+) -> None:
+    """
+    Configure the root logger.
+    
+    Args:
+        level: Root log level
+        use_queue: Write from a background thread instead of the caller's
+        queue_size: Records waiting to be written before new ones are dropped
+        max_message_chars: Longer messages are truncated
+        sample_rates: Event name or message template -> fraction of records kept
+    """
+    global _handler
+    shutdown_logging()
+    
+    if use_queue:
+        _handler = QueueWriterHandler(sys.stdout, queue_size)
+    else:
+        _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(CappedFormatter(LOG_FORMAT, max_message_chars))
+    if sample_rates:
+        _handler.addFilter(SamplingFilter(sample_rates))
+    
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level)
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and detach the handler installed by ``setup_logging``."""
+    global _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler.close()
+        _handler = None
+
+
+atexit.register(shutdown_logging)
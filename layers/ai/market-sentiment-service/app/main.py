@@ -7,13 +7,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.schemas import HealthResponse
 from app.api import router
+from app.logging_setup import parse_sample_rates, setup_logging
+from app.tracing import TracingMiddleware, configure_tracing, shutdown_tracing
 from services.cache_manager import cache_manager
 # Removed duplicate import of cache_manager
 
 # Configure logging
-logging.basicConfig(
+setup_logging(
     level=logging.INFO if not settings.debug else logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    use_queue=settings.log_async,
+    queue_size=settings.log_queue_size,
+    max_message_chars=settings.log_max_message_chars,
+    sample_rates=parse_sample_rates(settings.log_sample_rates)
 )
 
 logger = logging.getLogger(__name__)
@@ -36,6 +41,9 @@ app.add_middleware(
     allow_headers=["Authorization", "Content-Type"],
 )
 
+# Server span per request, continuing the caller's trace
+app.add_middleware(TracingMiddleware)
+
 # Include API routes
 app.include_router(router)
 
@@ -43,6 +51,9 @@ app.include_router(router)
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connection and clean old cache."""
+    if settings.tracing_enabled:
+        configure_tracing(settings.tracing_service_name, settings.tracing_export_path, settings.tracing_sample_rate)
+    
     logger.info("Connecting to database...")
     await cache_manager.connect()
     
@@ -59,6 +70,7 @@ async def shutdown_event():
     logger.info("Closing database connection...")
     await cache_manager.close()
     logger.info("Database connection closed")
+    shutdown_tracing()
 
 
 @app.get("/", response_model=HealthResponse, tags=["Health"])
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark: serialization cost of the /api/v1/sentiment response.
+
+Compares FastAPI's default path (validated ``SentimentResponse``
+construction, response_model re-validation, ``jsonable_encoder`` and
+``JSONResponse``) with the fast path for both ways the endpoint builds a
+response:
+
+- cache hit: the cached document serialized as-is by ``FastJSONResponse``
+- fresh: validated construction plus ``FastJSONResponse``
+
+Both bodies are checked to decode to the same document.
+
+Usage (from the service root):
+    python -m benchmarks.bench_fast_json [--number N]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.responses import FastJSONResponse
+from app.schemas import SentimentResponse
+
+
+def response_field():
+    """The response field FastAPI builds for ``response_model=SentimentResponse``."""
+    app = FastAPI()
+
+    @app.post("/sentiment", response_model=SentimentResponse)
+    async def sentiment():
+        pass
+
+    return app.router.routes[-1].response_field
+
+
+def make_result(sources: int) -> dict:
+    """A sentiment result shaped like a cache row, with a ~400 word summary."""
+    summary = ("Bitcoin sentiment stayed bullish as ETF inflows continued and funding rates normalised. " * 30)[:2800]
+    return {
+        "sentiment": "bullish",
+        "confidence": 0.82,
+        "summary": summary,
+        "cited_sources": [
+            {
+                "title": f"Bitcoin climbs as institutional demand grows ({i})",
+                "url": f"https://news.example.com/markets/bitcoin-{i}",
+                "date": "2025-01-03",
+            }
+            for i in range(sources)
+        ],
+    }
+
+
+async def default_path(field, result) -> bytes:
+    content = await serialize_response(field=field, response_content=SentimentResponse(**result))
+    return JSONResponse(content).body
+
+
+async def fast_cached(field, result) -> bytes:
+    return FastJSONResponse(result).body
+
+
+async def fast_fresh(field, result) -> bytes:
+    return FastJSONResponse(SentimentResponse(**result)).body
+
+
+IMPLEMENTATIONS = {
+    "default": default_path,
+    "fast_cached": fast_cached,
+    "fast_fresh": fast_fresh,
+}
+
+
+async def measure(fn, args, number: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(number):
+            await fn(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+async def run(number: int) -> None:
+    field = response_field()
+    print(f"{'sources':>8} " + " ".join(f"{name:>12}" for name in IMPLEMENTATIONS))
+    for sources in [0, 5, 20]:
+        args = (field, make_result(sources))
+        bodies = [json.loads(await fn(*args)) for fn in IMPLEMENTATIONS.values()]
+        assert all(body == bodies[0] for body in bodies), "serialized bodies differ"
+
+        timings = [await measure(fn, args, number) for fn in IMPLEMENTATIONS.values()]
+        print(f"{sources:>8} " + " ".join(f"{seconds * 1e6:>9.1f} us" for seconds in timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="Calls per timing sample")
+    args = parser.parse_args()
+    asyncio.run(run(args.number))
+
+
+if __name__ == "__main__":
+    main()
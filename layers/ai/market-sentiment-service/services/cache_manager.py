@@ -7,9 +7,12 @@ from datetime import datetime, timedelta, date
 from typing import Optional, Dict, Any, List
 import asyncpg
 from app.config import settings
+from app.tracing import CLIENT, traced
 
 logger = logging.getLogger(__name__)
 
+_DB = {"db.system": "postgresql"}
+
 
 class CacheManager:
     """Manages caching of sentiment analysis and article content using PostgreSQL (optional)."""
@@ -33,7 +36,7 @@ class CacheManager:
             logger.info("✓ PostgreSQL connection pool created - caching enabled")
             await self._init_db()
         except Exception as e:
-            logger.warning(f"\u26a0 PostgreSQL unavailable: {e}")
+            logger.warning("\u26a0 PostgreSQL unavailable: %s", e)
             logger.warning("✓ Service will run WITHOUT caching")
             self.pool = None
     
@@ -91,6 +94,7 @@ class CacheManager:
             """)
             logger.info("Database schema initialized")
     
+    @traced("db.get_cached_articles", CLIENT, _DB)
     async def get_cached_articles(self, token: str, timeframe: str) -> Optional[tuple]:
         """Get cached articles if available."""
         if not self.pool:
@@ -118,13 +122,14 @@ class CacheManager:
                         }
                         for row in rows
                     ]
-                    logger.info(f"Article cache hit for {token} {timeframe}: {len(texts)} articles")
+                    logger.info("Article cache hit for %s %s: %d articles", token, timeframe, len(texts), extra={"event": "article_cache_hit"})
                     return texts, sources
                 return None
         except Exception as e:
-            logger.warning(f"Error reading article cache: {e}")
+            logger.warning("Error reading article cache: %s", e)
             return None
     
+    @traced("db.cache_articles", CLIENT, _DB)
     async def cache_articles(self, token: str, timeframe: str, articles: List[Dict[str, str]]):
         """Store articles in cache (skipped if no DB)."""
         if not self.pool:
@@ -157,10 +162,11 @@ class CacheManager:
                         published_date = EXCLUDED.published_date,
                         fetched_at = CURRENT_TIMESTAMP
                 """, records)
-                logger.info(f"Cached {len(records)} articles for {token} {timeframe}")
+                logger.info("Cached %d articles for %s %s", len(records), token, timeframe)
         except Exception as e:
-            logger.warning(f"Failed to cache articles: {e}")
+            logger.warning("Failed to cache articles: %s", e)
 
+    @traced("db.get_sentiment_cache", CLIENT, _DB)
     async def get_sentiment_cache(self, token: str, timeframe: str, current_date: date) -> Optional[Dict[str, Any]]:
         """Get cached sentiment result if available."""
         if not self.pool:
@@ -182,7 +188,7 @@ class CacheManager:
                         WHERE token = $1 AND timeframe = $2 AND query_date = $3
                     """, token, timeframe, current_date)
                     
-                    logger.info(f"Sentiment cache hit for {token} (View {row['query_count'] + 1})")
+                    logger.info("Sentiment cache hit for %s (View %d)", token, row['query_count'] + 1, extra={"event": "sentiment_cache_hit"})
                     return {
                         "sentiment": row['sentiment'],
                         "confidence": row['confidence'],
@@ -190,13 +196,14 @@ class CacheManager:
                         "cited_sources": json.loads(row['cited_sources']) if row['cited_sources'] else []
                     }
                 elif row:
-                    logger.info(f"Sentiment cache stale (limit reached) for {token}")
+                    logger.info("Sentiment cache stale (limit reached) for %s", token)
                 
                 return None
         except Exception as e:
-            logger.warning(f"Error reading sentiment cache: {e}")
+            logger.warning("Error reading sentiment cache: %s", e)
             return None
 
+    @traced("db.set_sentiment_cache", CLIENT, _DB)
     async def set_sentiment_cache(
         self,
         token: str,
@@ -241,10 +248,11 @@ class CacheManager:
                         last_accessed = CURRENT_TIMESTAMP
                 """, token, timeframe, query_date, sentiment, confidence, summary, sources_json)
                 
-                logger.info(f"Sentiment result saved to cache for {token}")
+                logger.info("Sentiment result saved to cache for %s", token)
         except Exception as e:
-            logger.warning(f"Failed to save sentiment cache: {e}")
+            logger.warning("Failed to save sentiment cache: %s", e)
 
+    @traced("db.cleanup_old_cache", CLIENT, _DB)
     async def cleanup_old_cache(self):
         """Remove old data (skipped if no DB)."""
         if not self.pool:
@@ -260,6 +268,6 @@ class CacheManager:
                 
                 logger.info("Cache cleanup completed")
         except Exception as e:
-            logger.warning(f"Cache cleanup failed: {e}")
+            logger.warning("Cache cleanup failed: %s", e)
 
 cache_manager = CacheManager()
\ No newline at end of file
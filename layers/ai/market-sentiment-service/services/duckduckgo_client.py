@@ -155,15 +155,15 @@ class DuckDuckGoClient:
                         "date": date if date else "Unknown"
                     })
             
-            logger.info(f"Fetched {len(texts)} search results for {token} ({timeframe})")
+            logger.info("Fetched %d search results for %s (%s)", len(texts), token, timeframe)
             return texts, sources
             
         except httpx.HTTPStatusError as e:
-            logger.error(f"DuckDuckGo API HTTP error: {e.response.status_code}")
+            logger.error("DuckDuckGo API HTTP error: %s", e.response.status_code)
             raise Exception(f"Failed to fetch search results: HTTP {e.response.status_code}")
         except httpx.RequestError as e:
-            logger.error(f"DuckDuckGo API request error: {str(e)}")
+            logger.error("DuckDuckGo API request error: %s", e)
             raise Exception(f"Failed to fetch search results: {str(e)}")
         except Exception as e:
-            logger.error(f"Unexpected error in DuckDuckGo search: {str(e)}")
+            logger.error("Unexpected error in DuckDuckGo search: %s", e)
             raise
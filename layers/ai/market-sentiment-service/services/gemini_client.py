@@ -6,6 +6,7 @@ import json
 from typing import Dict, Any, List
 import google.generativeai as genai
 from app.config import settings
+from app.tracing import CLIENT, start_span
 
 logger = logging.getLogger(__name__)
 
@@ -71,7 +72,9 @@ class GeminiClient:
             
             # Generate response (no system prompt, no format reminder - all in user_input)
             logger.info("Sending request to Gemini API")
-            response = self.model.generate_content(user_input)
+            attributes = {"gemini.model": settings.gemini_model, "gemini.prompt_length": len(user_input)}
+            with start_span("gemini.generate", CLIENT, attributes):
+                response = self.model.generate_content(user_input)
             
             if not response or not response.text:
                 raise Exception("Empty response from Gemini API")
@@ -89,11 +92,11 @@ class GeminiClient:
                 "summary": summary
             }
             
-            logger.info(f"Gemini reasoning completed: {sentiment}")
+            logger.info("Gemini reasoning completed: %s", sentiment)
             return result
             
         except Exception as e:
-            logger.error(f"Gemini API error: {str(e)}")
+            logger.error("Gemini API error: %s", e)
             raise
     
     @staticmethod
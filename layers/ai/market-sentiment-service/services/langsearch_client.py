@@ -7,6 +7,8 @@ from typing import List, Dict, Any
 from datetime import datetime
 import httpx
 
+from app.tracing import CLIENT, TracingTransport, traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -82,6 +84,7 @@ class LangSearchClient:
         
         return f"{base_query} {exclusions}"
     
+    @traced("langsearch.search", CLIENT)
     async def search(
         self,
         token: str,
@@ -100,7 +103,7 @@ class LangSearchClient:
             freshness = LangSearchClient.get_freshness_filter(timeframe)
             query = LangSearchClient.build_query(token, timeframe)
             
-            logger.info(f"LangSearch query: '{query}' with freshness: {freshness}")
+            logger.info("LangSearch query: '%s' with freshness: %s", query, freshness)
             
             # Build request payload
             payload = {
@@ -115,7 +118,7 @@ class LangSearchClient:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with httpx.AsyncClient(timeout=10.0, transport=TracingTransport()) as client:
                 response = await client.post(
                     self.BASE_URL,
                     json=payload,
@@ -131,7 +134,7 @@ class LangSearchClient:
             # Navigate the JSON structure: data -> webPages -> value
             results = data.get("data", {}).get("webPages", {}).get("value", [])
             
-            logger.info(f"LangSearch returned {len(results)} results")
+            logger.info("LangSearch returned %d results", len(results))
             
             for result in results[:max_results]:
                 # Map fields according to the documentation
@@ -174,17 +177,17 @@ class LangSearchClient:
                     })
             # --- FIX ENDS HERE ---
             
-            logger.info(f"Processed {len(texts)} search results for {token} ({timeframe})")
+            logger.info("Processed %d search results for %s (%s)", len(texts), token, timeframe)
             return texts, sources
             
         except httpx.HTTPStatusError as e:
-            logger.error(f"LangSearch API HTTP error: {e.response.status_code}")
+            logger.error("LangSearch API HTTP error: %s", e.response.status_code)
             if hasattr(e.response, 'text'):
-                logger.error(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             raise Exception(f"Failed to fetch search results: HTTP {e.response.status_code}")
         except httpx.RequestError as e:
-            logger.error(f"LangSearch API request error: {str(e)}")
+            logger.error("LangSearch API request error: %s", e)
             raise Exception(f"Failed to fetch search results: {str(e)}")
         except Exception as e:
-            logger.error(f"Unexpected error in LangSearch search: {str(e)}")
+            logger.error("Unexpected error in LangSearch search: %s", e)
             raise
\ No newline at end of file
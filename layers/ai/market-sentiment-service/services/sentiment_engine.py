@@ -32,7 +32,7 @@ class SentimentEngine:
         
         # Deduplicate texts
         unique_texts = list(set(texts))
-        logger.info(f"Analyzing {len(unique_texts)} unique texts")
+        logger.info("Analyzing %d unique texts", len(unique_texts))
         
         sentiment_scores = []
         sentiment_labels = []
@@ -97,7 +97,7 @@ class SentimentEngine:
             "avg_compound_score": round(avg_compound, 3)
         }
         
-        logger.info(f"Sentiment analysis: {result['sentiment_counts']}, confidence: {result['confidence']}")
+        logger.info("Sentiment analysis: %s, confidence: %s", result['sentiment_counts'], result['confidence'])
         return result
     
     @staticmethod
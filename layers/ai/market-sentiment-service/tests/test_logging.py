@@ -0,0 +1,66 @@
+import io
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.logging_setup import CappedFormatter, QueueWriterHandler, SamplingFilter, parse_sample_rates
+
+
+def make_logger(handler):
+    logger = logging.getLogger("test.logging_setup")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_records_written_by_background_thread():
+    stream = io.StringIO()
+    handler = QueueWriterHandler(stream)
+    handler.setFormatter(CappedFormatter("%(levelname)s %(message)s", max_chars=12))
+    logger = make_logger(handler)
+
+    logger.info("Fetched %d results for %s", 5, "BTC")
+    logger.warning("short")
+    handler.close()
+
+    assert stream.getvalue().splitlines() == ["INFO Fetched 5 re...[13 more chars]", "WARNING short"]
+
+
+def test_full_queue_drops_records():
+    handler = QueueWriterHandler(io.StringIO(), queue_size=0)
+    logger = make_logger(handler)
+
+    logger.info("dropped")
+    handler.close()
+
+    assert handler.dropped == 1
+
+
+def test_sampling_by_event_name_and_template():
+    stream = io.StringIO()
+    handler = QueueWriterHandler(stream)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.addFilter(SamplingFilter(parse_sample_rates("sentiment_cache_hit=0, Analyzing %d texts=0")))
+    logger = make_logger(handler)
+
+    logger.info("Sentiment cache hit for %s", "BTC", extra={"event": "sentiment_cache_hit"})
+    logger.info("Analyzing %d texts", 3)
+    logger.warning("Analyzing %d texts", 4)
+    logger.info("kept")
+    handler.close()
+
+    assert stream.getvalue().splitlines() == ["Analyzing 4 texts", "kept"]
+
+
+def test_vendored_copy_matches_user_insights():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sibling = os.path.join(os.path.dirname(here), "user-insights", "app", "logging_setup.py")
+    if not os.path.exists(sibling):
+        pytest.skip("user-insights is not checked out next to this service")
+    with open(os.path.join(here, "app", "logging_setup.py")) as ours, open(sibling) as theirs:
+        assert ours.read() == theirs.read()
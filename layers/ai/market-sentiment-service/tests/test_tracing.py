@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tracing import TracingMiddleware, TracingTransport, configure_tracing, shutdown_tracing, start_span
+
+
+async def sentiment(request):
+    with start_span("db.get_sentiment_cache"):
+        pass
+    return JSONResponse({"traceparent": request.headers.get("traceparent")})
+
+
+def read_spans(path):
+    with open(path) as f:
+        return {span["name"]: span for span in map(json.loads, f)}
+
+
+def test_trace_propagates_over_httpx(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    configure_tracing("market-sentiment-service", str(path))
+    app = TracingMiddleware(Starlette(routes=[Route("/api/v1/sentiment", sentiment, methods=["POST"])]))
+
+    async def call():
+        transport = TracingTransport(httpx.ASGITransport(app=app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://sentiment") as client:
+            with start_span("POST /api/v1/insights"):
+                return await client.post("/api/v1/sentiment", json={"token": "BTC"})
+
+    try:
+        response = asyncio.run(call())
+    finally:
+        shutdown_tracing()
+
+    spans = read_spans(path)
+    caller = spans["POST /api/v1/insights"]
+    client_span = spans["HTTP POST sentiment"]
+    server = spans["POST /api/v1/sentiment"]
+    db = spans["db.get_sentiment_cache"]
+    assert response.json()["traceparent"] == f"00-{caller['trace_id']}-{client_span['span_id']}-01"
+    assert {span["trace_id"] for span in spans.values()} == {caller["trace_id"]}
+    assert client_span["parent_span_id"] == caller["span_id"]
+    assert server["parent_span_id"] == client_span["span_id"]
+    assert db["parent_span_id"] == server["span_id"]
+    assert server["attributes"]["http.status_code"] == 200
+
+
+def test_tracing_disabled_sends_no_header():
+    app = Starlette(routes=[Route("/api/v1/sentiment", sentiment, methods=["POST"])])
+
+    async def call():
+        transport = TracingTransport(httpx.ASGITransport(app=app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://sentiment") as client:
+            return await client.post("/api/v1/sentiment", json={"token": "BTC"})
+
+    assert asyncio.run(call()).json() == {"traceparent": None}
+
+
+def test_vendored_copy_matches_user_insights():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sibling = os.path.join(os.path.dirname(here), "user-insights", "app", "tracing.py")
+    if not os.path.exists(sibling):
+        pytest.skip("user-insights is not checked out next to this service")
+    with open(os.path.join(here, "app", "tracing.py")) as ours, open(sibling) as theirs:
+        assert ours.read() == theirs.read()
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from .database import get_session
 from .schemas import InsightRequest, InsightResponse, UserInsightRecord
+from .responses import fast_json
 from .services import InsightGenerator, ComparisonService
 from .utils import get_timeframe_for_analysis, LLMScheduler
 
@@ -32,8 +33,8 @@ async def generate_insight(
         cached_insight = result.scalars().first()
         
         if cached_insight and not LLMScheduler.should_regenerate_insight(cached_insight.created_at):
-            logger.info(f"Returning cached insight for user {request.user_id}")
-            return InsightResponse(
+            logger.info("Returning cached insight for user %s", request.user_id, extra={"event": "insight_cache_hit"})
+            return fast_json(InsightResponse(
                 user_id=cached_insight.user_id,
                 tokens=request.tokens,
                 insight_type=cached_insight.insight_type,
@@ -41,7 +42,7 @@ async def generate_insight(
                 confidence=cached_insight.confidence / 100.0,
                 sources=cached_insight.insight_metadata.get("sources", []) if cached_insight.insight_metadata else [],
                 created_at=cached_insight.created_at
-            )
+            ))
         
         # Fetch sentiment data
         timeframe = get_timeframe_for_analysis()
@@ -78,7 +79,7 @@ async def generate_insight(
         session.add(record)
         await session.commit()
         
-        return InsightResponse(
+        return fast_json(InsightResponse(
             user_id=request.user_id,
             tokens=request.tokens,
             insight_type=request.insight_type,
@@ -86,10 +87,10 @@ async def generate_insight(
             confidence=confidence,
             sources=[sentiment_data],
             created_at=record.created_at
-        )
+        ))
         
     except Exception as e:
-        logger.error(f"Failed to generate insight: {e}")
+        logger.error("Failed to generate insight: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -121,5 +122,5 @@ async def get_user_insights(
         }
         
     except Exception as e:
-        logger.error(f"Failed to retrieve insights: {e}")
+        logger.error("Failed to retrieve insights: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
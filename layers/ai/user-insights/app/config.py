@@ -34,6 +34,21 @@ class Settings(BaseSettings):
     gemini_temperature: float = 0.7
     gemini_max_tokens: int = 2048
     
+    # Response settings
+    fast_json_enabled: bool = os.getenv("FAST_JSON_ENABLED", "True").lower() == "true"
+    
+    # Logging settings
+    log_async: bool = os.getenv("LOG_ASYNC", "True").lower() == "true"
+    log_queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    log_max_message_chars: int = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "2000"))
+    log_sample_rates: str = os.getenv("LOG_SAMPLE_RATES", "")
+    
+    # Tracing settings
+    tracing_enabled: bool = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+    tracing_service_name: str = os.getenv("TRACING_SERVICE_NAME", "user-insights-service")
+    tracing_export_path: str = os.getenv("TRACING_EXPORT_PATH", "traces/spans.jsonl")
+    tracing_sample_rate: float = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+    
     # Cache settings
     insight_cache_ttl_days: int = 7
     
@@ -8,6 +8,7 @@ import json
 import logging
 
 from sqlalchemy import (
+    event,
     create_engine,
     Column,
     Integer,
@@ -21,6 +22,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
 from .config import settings
+from .tracing import CLIENT, begin_span
 
 Base = declarative_base()
 
@@ -31,6 +33,33 @@ engine = None
 async_session_maker = None
 
 
+def trace_queries(engine) -> None:
+    """Record a client span per SQL statement executed on ``engine``."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        attributes = {
+            "db.system": "postgresql",
+            "db.operation": statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "",
+            "db.statement": statement[:500],
+        }
+        conn.info.setdefault("trace_spans", []).append(begin_span("db.query", CLIENT, attributes))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+
 class InsightModel(Base):
     __tablename__ = "insights"
 
@@ -47,6 +76,7 @@ Index("ix_insights_user_created", InsightModel.user_id, InsightModel.created_at)
 class InsightDatabase:
     def __init__(self, database_url: str, retention_days: int = 90):
         self.engine = create_engine(database_url, pool_pre_ping=True)
+        trace_queries(self.engine)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         self.retention_days = retention_days
         # create tables if not present
@@ -185,6 +215,8 @@ async def init_db():
             pool_pre_ping=True
         )
         
+        trace_queries(engine.sync_engine)
+        
         async_session_maker = async_sessionmaker(
             engine, 
             class_=AsyncSession, 
@@ -198,7 +230,7 @@ async def init_db():
         
         logger.info("Database initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
+        logger.error("Failed to initialize database: %s", e)
         raise
 
 
@@ -11,14 +11,20 @@ import logging
 
 from .config import settings
 from .schemas import UserInsight
+from .responses import fast_json
 from .services.insight_generator import InsightGenerator
 from .services.comparison_service import ComparisonService
 from .database import init_db, close_db
+from .logging_setup import parse_sample_rates, setup_logging
+from .tracing import TracingMiddleware, configure_tracing, shutdown_tracing
 
 # Configure logging
-logging.basicConfig(
+setup_logging(
     level=logging.INFO if not settings.debug else logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    use_queue=settings.log_async,
+    queue_size=settings.log_queue_size,
+    max_message_chars=settings.log_max_message_chars,
+    sample_rates=parse_sample_rates(settings.log_sample_rates)
 )
 logger = logging.getLogger(__name__)
 
@@ -27,10 +33,13 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Manage app lifecycle."""
     logger.info("Starting User Insights Service...")
+    if settings.tracing_enabled:
+        configure_tracing(settings.tracing_service_name, settings.tracing_export_path, settings.tracing_sample_rate)
     await init_db()
     yield
     logger.info("Shutting down User Insights Service...")
     await close_db()
+    shutdown_tracing()
 
 
 # Initialize FastAPI app
@@ -53,6 +62,9 @@ app.add_middleware(
     allow_headers=["Authorization", "Content-Type"],
 )
 
+# Server span per request, continuing the caller's trace
+app.add_middleware(TracingMiddleware)
+
 # Initialize services
 insight_generator = InsightGenerator()
 comparison_service = ComparisonService()
@@ -91,7 +103,7 @@ async def generate_user_insight(
             user_id=user_id,
             transactions_data=transactions_data
         )
-        return insight
+        return fast_json(insight)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating insights: {str(e)}")
 
@@ -109,7 +121,7 @@ async def get_user_insight(user_id: str) -> UserInsight:
         insight = await insight_generator.get_latest(user_id)
         if not insight:
             raise HTTPException(status_code=404, detail="No insight found for this user")
-        return insight
+        return fast_json(insight)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving insight: {str(e)}")
 
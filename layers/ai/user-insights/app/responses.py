@@ -0,0 +1,57 @@
+"""
+Fast JSON responses for routes returning already-validated models.
+"""
+
+import json
+from typing import Any
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response that skips ``jsonable_encoder``.
+
+    Pydantic models are serialized by pydantic-core in one pass, producing
+    the same document as FastAPI's response_model path; other content is
+    encoded with orjson when installed and compact ``json.dumps`` otherwise.
+    Returning this from a route bypasses the response model re-validation,
+    so only use it for validated content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+def fast_json(content: Any):
+    """
+    Return validated content as a FastJSONResponse when fast JSON is enabled.
+    
+    Args:
+        content: A validated model, or a trusted document already in the
+            response shape (e.g. a cached response)
+    
+    Returns:
+        FastJSONResponse, or the content itself for FastAPI's default
+        validation and encoding when fast JSON is disabled
+    """
+    if settings.fast_json_enabled:
+        return FastJSONResponse(content)
+    return content
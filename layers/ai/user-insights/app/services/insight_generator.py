@@ -13,6 +13,7 @@ from ..schemas import UserInsight, WeeklyComparison, MonthlyComparison
 from ..database import get_db
 from .comparison_service import ComparisonService
 from ..utils.llm_scheduler import LLMScheduler
+from ..tracing import CLIENT, TracingTransport, start_span
 
 logger = logging.getLogger(__name__)
 
@@ -159,13 +160,14 @@ class InsightGenerator:
             )
             
             # Call Gemini API
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=settings.gemini_temperature,
-                    max_output_tokens=settings.gemini_max_tokens,
+            with start_span("gemini.generate", CLIENT, {"gemini.model": settings.gemini_model}):
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=settings.gemini_temperature,
+                        max_output_tokens=settings.gemini_max_tokens,
+                    )
                 )
-            )
             
             # Parse response - try to extract JSON from text
             import json
@@ -181,7 +183,7 @@ class InsightGenerator:
             }
         
         except Exception as e:
-            logger.error(f"Error generating LLM insights: {str(e)}")
+            logger.error("Error generating LLM insights: %s", e)
             # Return default insights if LLM fails
             return {
                 "insights": ["Unable to generate insights at this time"],
@@ -225,7 +227,7 @@ Response must be valid JSON only.
         """Fetch sentiment data from market sentiment service."""
         sentiments = {}
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with httpx.AsyncClient(timeout=30.0, transport=TracingTransport()) as client:
             for token in tokens:
                 try:
                     response = await client.post(
@@ -235,7 +237,7 @@ Response must be valid JSON only.
                     response.raise_for_status()
                     sentiments[token.upper()] = response.json()
                 except Exception as e:
-                    logger.warning(f"Failed to fetch sentiment for {token}: {e}")
+                    logger.warning("Failed to fetch sentiment for %s: %s", token, e)
                     sentiments[token.upper()] = {
                         "sentiment": "neutral",
                         "confidence": 0.0,
@@ -262,13 +264,14 @@ Response must be valid JSON only.
             )
             
             model = genai.GenerativeModel(settings.gemini_model)
-            response = model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": settings.gemini_temperature,
-                    "max_output_tokens": settings.gemini_max_tokens
-                }
-            )
+            with start_span("gemini.generate", CLIENT, {"gemini.model": settings.gemini_model}):
+                response = model.generate_content(
+                    prompt,
+                    generation_config={
+                        "temperature": settings.gemini_temperature,
+                        "max_output_tokens": settings.gemini_max_tokens
+                    }
+                )
             
             insight_text = response.text.strip()
             confidence = self._estimate_confidence(sentiment_data)
@@ -276,7 +279,7 @@ Response must be valid JSON only.
             return insight_text, confidence
             
         except Exception as e:
-            logger.error(f"Failed to generate insight: {e}")
+            logger.error("Failed to generate insight: %s", e)
             return "Unable to generate insight at this time.", 0.0
     
     def _build_insight_prompt(
@@ -0,0 +1,486 @@
+"""
+Distributed tracing with W3C trace context and a local JSONL span exporter.
+
+Vendored: ``market-sentiment-service/app/tracing.py`` and
+``user-insights/app/tracing.py`` are identical copies. Each service is
+built and run from its own directory (Docker build context, ``start.sh``,
+and user-insights bind-mounts it over ``/app``), so a sibling package would
+not be in either image. Change both copies together; the market sentiment
+tests check that they match.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Iterator, List, MutableMapping, NamedTuple, Optional, Tuple
+
+import httpx
+
+SERVER = "server"
+CLIENT = "client"
+INTERNAL = "internal"
+
+TRACEPARENT_HEADER = "traceparent"
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+class SpanContext(NamedTuple):
+    """Identity of a span as propagated between services."""
+    
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """
+    Parse a W3C ``traceparent`` header.
+    
+    Args:
+        value: Header value, e.g. ``00-<trace id>-<parent id>-01``
+    
+    Returns:
+        Remote span context, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 0x01))
+
+
+def format_traceparent(context: SpanContext) -> str:
+    """Format a span context as a W3C ``traceparent`` header."""
+    return f"00-{context.trace_id}-{context.span_id}-{'01' if context.sampled else '00'}"
+
+
+class Span:
+    """A timed operation within a trace."""
+    
+    __slots__ = (
+        "tracer", "name", "kind", "context", "parent_id", "attributes",
+        "status", "start_time_ns", "_start", "end_time_ns",
+    )
+    
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        kind: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        attributes: Optional[Dict[str, Any]]
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.context = context
+        self.parent_id = parent_id
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = "ok"
+        self.start_time_ns = time.time_ns()
+        self._start = time.perf_counter_ns()
+        self.end_time_ns: Optional[int] = None
+    
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute on the span."""
+        self.attributes[key] = value
+    
+    def record_exception(self, error: BaseException) -> None:
+        """Mark the span as failed by ``error``."""
+        self.status = "error"
+        self.attributes["error.type"] = type(error).__name__
+        self.attributes["error.message"] = str(error)[:200]
+    
+    def end(self) -> None:
+        """End the span and export it if sampled. Later calls do nothing."""
+        if self.end_time_ns is not None:
+            return
+        self.end_time_ns = self.start_time_ns + (time.perf_counter_ns() - self._start)
+        if self.context.sampled:
+            self.tracer.exporter.export(self.to_dict())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Exported representation of the span."""
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_id,
+            "service": self.tracer.service_name,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_time_ns,
+            "end_time_unix_nano": self.end_time_ns,
+            "duration_ms": round((self.end_time_ns - self.start_time_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Span used while tracing is disabled."""
+    
+    context = None
+    
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+    
+    def record_exception(self, error: BaseException) -> None:
+        pass
+    
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSpanExporter:
+    """
+    Append finished spans to a local file, one JSON object per line.
+    
+    Spans are buffered and written with a single ``write`` per batch on a
+    file opened with ``O_APPEND``, so several workers can share one file
+    without interleaving lines. Analysis needs no collector: group lines by
+    ``trace_id`` and nest them by ``parent_span_id``.
+    """
+    
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 1.0):
+        """
+        Initialize exporter.
+        
+        Args:
+            path: JSONL file to append to; parent directories are created
+            batch_size: Spans buffered before a write
+            flush_interval: Seconds after which the next span forces a write
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._fd: Optional[int] = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._buffer: List[bytes] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+    
+    def export(self, span: Dict[str, Any]) -> None:
+        """Buffer a finished span, writing the batch when it is due."""
+        line = json.dumps(span, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+    
+    def flush(self) -> None:
+        """Write buffered spans."""
+        with self._lock:
+            self._flush_locked()
+    
+    def close(self) -> None:
+        """Flush and close the file."""
+        with self._lock:
+            self._flush_locked()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Exporter counters."""
+        return {"path": self.path, "exported": self.exported, "dropped": self.dropped}
+    
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        if self._fd is None:
+            self.dropped += len(batch)
+            return
+        data = b"".join(batch)
+        try:
+            while data:
+                written = os.write(self._fd, data)
+                data = data[written:]
+            self.exported += len(batch)
+        except OSError:
+            # Tracing must never fail a request
+            self.dropped += len(batch)
+
+
+class Tracer:
+    """Creates spans for one service."""
+    
+    def __init__(self, service_name: str, exporter: JsonlSpanExporter, sample_rate: float = 1.0):
+        """
+        Initialize tracer.
+        
+        Args:
+            service_name: Recorded on every span
+            exporter: Destination for sampled spans
+            sample_rate: Fraction of new traces that are recorded; traces
+                continued from another service follow the caller's decision
+        """
+        self.service_name = service_name
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+    
+    def start(
+        self,
+        name: str,
+        kind: str = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None
+    ) -> Span:
+        """
+        Start a span without making it current.
+        
+        Args:
+            name: Operation name
+            kind: ``server``, ``client`` or ``internal``
+            attributes: Initial attributes
+            parent: Parent context; defaults to the current span
+        """
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+        span_id = f"{random.getrandbits(64):016x}"
+        if parent is None:
+            context = SpanContext(f"{random.getrandbits(128):032x}", span_id, random.random() < self.sample_rate)
+            return Span(self, name, kind, context, None, attributes)
+        context = SpanContext(parent.trace_id, span_id, parent.sampled)
+        return Span(self, name, kind, context, parent.span_id, attributes)
+
+
+_tracer: Optional[Tracer] = None
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def configure_tracing(service_name: str, path: str, sample_rate: float = 1.0) -> Tracer:
+    """
+    Enable tracing for this process.
+    
+    Args:
+        service_name: Recorded on every span
+        path: JSONL file spans are appended to
+        sample_rate: Fraction of new traces that are recorded
+    
+    Returns:
+        The process tracer
+    """
+    global _tracer
+    shutdown_tracing()
+    _tracer = Tracer(service_name, JsonlSpanExporter(path), sample_rate)
+    return _tracer
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and disable tracing."""
+    global _tracer
+    if _tracer is not None:
+        _tracer.exporter.close()
+        _tracer = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    """The process tracer, or None while tracing is disabled."""
+    return _tracer
+
+
+def current_span() -> Optional[Span]:
+    """The active span in this context, if any."""
+    return _current_span.get()
+
+
+def begin_span(
+    name: str,
+    kind: str = INTERNAL,
+    attributes: Optional[Dict[str, Any]] = None,
+    parent: Optional[SpanContext] = None
+):
+    """
+    Start a span that is not made current; the caller must ``end()`` it.
+    
+    Use this for spans that outlive a single step of an async generator,
+    which may resume in a different context. Activate it around the steps
+    that should be its children with ``use_span``.
+    
+    Returns:
+        Started span, or a no-op span while tracing is disabled
+    """
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.start(name, kind, attributes, parent)
+
+
+@contextmanager
+def use_span(span) -> Iterator[Any]:
+    """Make ``span`` current for the block without ending it."""
+    if span is NOOP_SPAN:
+        yield span
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    kind: str = INTERNAL,
+    attributes: Optional[Dict[str, Any]] = None,
+    parent: Optional[SpanContext] = None
+) -> Iterator[Any]:
+    """
+    Run the block in a new current span, ended when the block exits.
+    
+    Exceptions leaving the block are recorded on the span and re-raised.
+    
+    Args:
+        name: Operation name
+        kind: ``server``, ``client`` or ``internal``
+        attributes: Initial attributes
+        parent: Parent context; defaults to the current span
+    """
+    tracer = _tracer
+    if tracer is None:
+        yield NOOP_SPAN
+        return
+    span = tracer.start(name, kind, attributes, parent)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def inject(headers: MutableMapping[str, str]) -> MutableMapping[str, str]:
+    """Add the current span's ``traceparent`` to outgoing ``headers``."""
+    span = _current_span.get()
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = format_traceparent(span.context)
+    return headers
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware recording a server span per HTTP request.
+    
+    Continues the caller's trace from its ``traceparent`` header, so spans
+    from every service handling one request share a trace id. The span
+    covers streamed bodies until the last chunk is sent.
+    """
+    
+    def __init__(self, app, exclude: Tuple[str, ...] = ("/", "/health")):
+        """
+        Initialize middleware.
+        
+        Args:
+            app: Wrapped ASGI application
+            exclude: Paths that are not traced
+        """
+        self.app = app
+        self.exclude = frozenset(exclude)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+        
+        method = scope["method"]
+        attributes = {"http.method": method, "http.target": scope["path"]}
+        with start_span(f"{method} {scope['path']}", SERVER, attributes, parent=parent) as span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "error"
+                await send(message)
+            
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # Name by route template once routing has matched
+                route = scope.get("route")
+                if getattr(route, "path", None):
+                    span.name = f"{method} {route.path}"
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport recording a client span per outbound request.
+    
+    Sends the span as the ``traceparent`` header, so the called service
+    continues the trace. Use it as ``httpx.AsyncClient(transport=TracingTransport())``.
+    """
+    
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize transport.
+        
+        Args:
+            transport: Transport that sends the requests; defaults to httpx's
+        """
+        self._transport = transport or httpx.AsyncHTTPTransport()
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attributes = {
+            "http.method": request.method,
+            "http.url": str(request.url.copy_with(query=None)),
+        }
+        with start_span(f"HTTP {request.method} {request.url.host}", CLIENT, attributes) as span:
+            inject(request.headers)
+            response = await self._transport.handle_async_request(request)
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.status = "error"
+            return response
+    
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def traced(name: str, kind: str = INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+    """
+    Decorator running an async function in a span.
+    
+    Args:
+        name: Operation name
+        kind: ``server``, ``client`` or ``internal``
+        attributes: Initial span attributes
+    """
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with start_span(name, kind, attributes):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
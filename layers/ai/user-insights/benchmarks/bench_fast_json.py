@@ -0,0 +1,95 @@
+"""
+Micro-benchmark: serialization cost of the UserInsight responses.
+
+Compares FastAPI's default path (response_model re-validation,
+``jsonable_encoder`` and ``JSONResponse``) with returning
+``FastJSONResponse`` directly, for insights with a growing number of
+category comparisons. Both paths include building the validated
+``UserInsight``, and both bodies are checked to decode to the same document.
+
+Usage (from the service root):
+    python -m benchmarks.bench_fast_json [--number N]
+"""
+import argparse
+import asyncio
+import copy
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.responses import FastJSONResponse
+from app.schemas import UserInsight
+
+
+def response_field():
+    """The response field FastAPI builds for ``response_model=UserInsight``."""
+    app = FastAPI()
+
+    @app.get("/insights/{user_id}", response_model=UserInsight)
+    async def insight(user_id: str):
+        pass
+
+    return app.router.routes[-1].response_field
+
+
+def make_insight(categories: int) -> dict:
+    """The schema example with ``categories`` category comparisons."""
+    data = copy.deepcopy(UserInsight.model_config["json_schema_extra"]["example"])
+    category = data["category_insights"][0]
+    data["category_insights"] = [dict(category, category_name=f"Category {i}") for i in range(categories)]
+    return data
+
+
+async def default_path(field, data) -> bytes:
+    content = await serialize_response(field=field, response_content=UserInsight(**data))
+    return JSONResponse(content).body
+
+
+async def fast_path(field, data) -> bytes:
+    return FastJSONResponse(UserInsight(**data)).body
+
+
+IMPLEMENTATIONS = {
+    "default": default_path,
+    "fast": fast_path,
+}
+
+
+async def measure(fn, args, number: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(number):
+            await fn(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+async def run(number: int) -> None:
+    field = response_field()
+    print(f"{'categories':>10} " + " ".join(f"{name:>12}" for name in IMPLEMENTATIONS) + f" {'speedup':>8}")
+    for categories in [1, 8, 24]:
+        args = (field, make_insight(categories))
+        bodies = [json.loads(await fn(*args)) for fn in IMPLEMENTATIONS.values()]
+        assert all(body == bodies[0] for body in bodies), "serialized bodies differ"
+
+        timings = [await measure(fn, args, number) for fn in IMPLEMENTATIONS.values()]
+        print(
+            f"{categories:>10} "
+            + " ".join(f"{seconds * 1e6:>9.1f} us" for seconds in timings)
+            + f" {timings[0] / timings[1]:>7.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=1000, help="Calls per timing sample")
+    args = parser.parse_args()
+    asyncio.run(run(args.number))
+
+
+if __name__ == "__main__":
+    main()